@@ -36,7 +36,8 @@ async function doHttpGet<T>(
 ): Promise<T[]> {
   const response = (await handleRequestWithErrorReporting(
     HTTP.get(`/dataset/${operation}`, {
-      params: params,
+      // the response is written while records are generated
+      params: { ...params, stream: true },
       paramsSerializer: {
         indexes: null
       }
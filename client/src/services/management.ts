@@ -12,6 +12,24 @@ interface DatasetPostRequest {
   title: string
 }
 
+interface DatasetPostResponse {
+  result: string
+  job_id: string
+}
+
+interface DatasetImportJob {
+  job_id: string
+  status: 'queued' | 'running' | 'done' | 'failed'
+  stage: 'validating' | 'inserting' | 'annotating' | null
+  rows_parsed: number
+  rows_inserted: number
+  eufid: string | null
+  message: string | null
+  error_summary: string | null
+}
+
+const IMPORT_JOB_POLL_INTERVAL_MS = 2000
+
 interface ProjectOrganism {
   taxa_id: number
   cto: string
@@ -50,14 +68,41 @@ interface ProjectPostRequest extends ProjectInfo {
 async function postDataset(
   request: DatasetPostRequest,
   dialogState: DialogStateStore
-): Promise<void> {
-  return await handleRequestWithErrorReporting<void>(
+): Promise<DatasetPostResponse> {
+  return await handleRequestWithErrorReporting<DatasetPostResponse>(
     HTTPSecure.post('/management/dataset', request),
     `Failed to post dataset`,
     dialogState
   )
 }
 
+async function getDatasetImportJob(
+  jobId: string,
+  dialogState: DialogStateStore
+): Promise<DatasetImportJob> {
+  return await handleRequestWithErrorReporting<DatasetImportJob>(
+    HTTPSecure.get(`/management/dataset/job/${jobId}`),
+    `Failed to get dataset import status`,
+    dialogState
+  )
+}
+
+async function waitForDatasetImportJob(
+  jobId: string,
+  dialogState: DialogStateStore,
+  onProgress: (job: DatasetImportJob) => void
+): Promise<DatasetImportJob> {
+  // poll until the job is done or failed
+  for (;;) {
+    const job = await getDatasetImportJob(jobId, dialogState)
+    onProgress(job)
+    if (job.status === 'done' || job.status === 'failed') {
+      return job
+    }
+    await new Promise((r) => setTimeout(r, IMPORT_JOB_POLL_INTERVAL_MS))
+  }
+}
+
 async function postProject(request: ProjectPostRequest, dialogState: DialogStateStore) {
   return await handleRequestWithErrorReporting<void>(
     HTTPSecure.post('/management/project', request),
@@ -68,11 +113,15 @@ async function postProject(request: ProjectPostRequest, dialogState: DialogState
 
 export {
   type DatasetPostRequest,
+  type DatasetPostResponse,
+  type DatasetImportJob,
   type ProjectPostRequest,
   type ProjectInfo,
   type ProjectOrganism,
   type ProjectMetaData,
   type ExternalSource,
   postDataset,
+  getDatasetImportJob,
+  waitForDatasetImportJob,
   postProject
 }
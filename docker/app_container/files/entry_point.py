@@ -48,6 +48,7 @@ system("find /uploads /import /data -exec chown app {} \\;")
 system("find /uploads /import /data -exec chgrp 0 {} \\;")
 system("find /uploads /import /data -exec chmod g+wr,o-rwx {} \\;")
 system("find /uploads /import /data -type d -exec chmod g+xs {} \\;")
+system("su - app /app/run_import_worker.sh &")
 system(
     f"exec su - app /app/run_flask.sh {environ.get('HTTP_WORKER_PROCESSES')} {environ.get('HTTP_WORKER_TIMEOUT', 30)}"
     f" {environ.get('HTTP_REVERSE_PROXY_IPS', '')}"
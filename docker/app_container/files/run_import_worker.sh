@@ -0,0 +1,7 @@
+#!/bin/sh
+
+echo '### Activating venv ###'
+. /app/venv/bin/activate
+cd /app
+echo '### Starting import worker ###'
+exec flask --app scimodom.app dataset worker
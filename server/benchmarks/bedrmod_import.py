@@ -0,0 +1,101 @@
+"""Compare parsing and validation of bedRMod records with
+EufImporter (record by record) and EufColumnarImporter (by chunks).
+
+Usage::
+
+    python benchmarks/bedrmod_import.py --records 1000000
+    python benchmarks/bedrmod_import.py --records 1000000 --crlf --invalid 0.001
+
+Records are random sites on 22 chromosomes, on both strands, with
+a few modification names. With --crlf, lines end with "\\r\\n". With
+--invalid, this fraction of records has an invalid strand, and is
+reported as error. Records are written to a temporary file, and
+times include reading, parsing, and validation, but not database work.
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from scimodom.utils.importer.bed_importer import EufImporter
+from scimodom.utils.importer.columnar_importer import EufColumnarImporter
+from scimodom.utils.importer.text_file_reader import open_text_file
+
+HEADER = """#fileformat=bedRModv1.8
+#organism=9606
+#modification_type=RNA
+#assembly=GRCh38
+#annotation_source=Annotation
+#annotation_version=Version
+#sequencing_platform=Sequencing platform
+#basecalling=
+#bioinformatics_workflow=Workflow
+#experiment=Description of experiment.
+#external_source=
+#chrom\tchromstart\tchromEnd\tname\tscore\tstrand\tthickstart\tthickEnd\titermRgb\tcoverage\tfrequency
+"""
+
+
+def get_text(records, crlf, invalid, seed):
+    rng = np.random.default_rng(seed)
+    chroms = rng.integers(1, 23, records).tolist()
+    starts = rng.integers(0, 250000000, records).tolist()
+    names = rng.choice(["m6A", "m5C", "Y", "Am"], records).tolist()
+    scores = rng.integers(0, 1001, records).tolist()
+    strands = rng.choice(["+", "-"], records)
+    strands[rng.random(records) < invalid] = "*"
+    coverages = rng.integers(0, 10000, records).tolist()
+    frequencies = rng.integers(1, 101, records).tolist()
+    end_of_line = "\r\n" if crlf else "\n"
+    lines = [
+        f"{chrom}\t{start}\t{start + 1}\t{name}\t{score}\t{strand}"
+        f"\t{start}\t{start + 1}\t0,0,0\t{coverage}\t{frequency}{end_of_line}"
+        for chrom, start, name, score, strand, coverage, frequency in zip(
+            chroms, starts, names, scores, strands.tolist(), coverages, frequencies
+        )
+    ]
+    return HEADER + "".join(lines)
+
+
+def time_record_parser(path):
+    with open_text_file(path) as fh:
+        importer = EufImporter(stream=fh, source="benchmark")
+        return sum(1 for _ in importer.parse())
+
+
+def time_chunk_parser(path):
+    with open_text_file(path) as fh:
+        importer = EufColumnarImporter(stream=fh, source="benchmark")
+        return sum(len(chunk) for chunk in importer.parse_chunks())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--records", type=int, default=1000000)
+    parser.add_argument("--crlf", action="store_true")
+    parser.add_argument("--invalid", type=float, default=0.0)
+    args = parser.parse_args()
+
+    with tempfile.NamedTemporaryFile("w", suffix=".bedrmod", newline="") as fh:
+        fh.write(get_text(args.records, args.crlf, args.invalid, 1))
+        fh.flush()
+        rates = {}
+        for name, function in [
+            ("records", time_record_parser),
+            ("chunks", time_chunk_parser),
+        ]:
+            start = time.perf_counter()
+            count = function(fh.name)
+            elapsed = time.perf_counter() - start
+            rates[name] = args.records / elapsed
+            print(
+                f"{name:<10} {elapsed:>8.2f} s {count:>12,} records"
+                f" {rates[name]:>12,.0f} rows/s"
+            )
+    print(f"speedup    {rates['chunks'] / rates['records']:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
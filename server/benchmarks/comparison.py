@@ -0,0 +1,79 @@
+"""Compare intersect, closest, and subtract of two datasets with
+ComparisonEngine.NUMPY (in process) and ComparisonEngine.BEDTOOLS.
+
+Usage::
+
+    python benchmarks/comparison.py --records 1000000
+    python benchmarks/comparison.py --records 1000000 --bedtools
+
+Datasets are random single-nucleotide sites on 22 chromosomes, on both
+strands. Times include the conversion of records to coordinate arrays,
+and the creation of all result records. With --bedtools, the same
+operations are timed with bedtools, if installed.
+"""
+
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from scimodom.services.bedtools import BedToolsService
+from scimodom.utils.dtos.bedtools import TrustedComparisonRecord
+from scimodom.utils.specs.enums import ComparisonEngine, Strand
+
+
+def get_records(records, eufid, seed):
+    rng = np.random.default_rng(seed)
+    chroms = rng.integers(1, 23, records).tolist()
+    starts = rng.integers(0, 50000000, records).tolist()
+    strands = rng.integers(0, 2, records).tolist()
+    return [
+        TrustedComparisonRecord(
+            str(chrom),
+            start,
+            start + 1,
+            "m6A",
+            1000,
+            Strand.FORWARD if strand else Strand.REVERSE,
+            eufid,
+            10,
+            50,
+        )
+        for chrom, start, strand in zip(chroms, starts, strands)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--records", type=int, default=1000000)
+    parser.add_argument("--bedtools", action="store_true")
+    args = parser.parse_args()
+
+    a_records = get_records(args.records, "BENCHMARK001", 1)
+    b_records = get_records(args.records, "BENCHMARK002", 2)
+    engines = [ComparisonEngine.NUMPY]
+    if args.bedtools:
+        engines.append(ComparisonEngine.BEDTOOLS)
+    for engine in engines:
+        service = BedToolsService(tmp_path=tempfile.mkdtemp(), comparison_engine=engine)
+        for operation in [
+            service.intersect_comparison_records,
+            service.closest_comparison_records,
+            service.subtract_comparison_records,
+        ]:
+            start = time.perf_counter()
+            try:
+                count = sum(1 for _ in operation(a_records, [b_records], True))
+            except NotImplementedError:
+                print("bedtools is not installed, skipping")
+                break
+            elapsed = time.perf_counter() - start
+            name = operation.__name__.split("_")[0]
+            print(
+                f"{engine.value:<10} {name:<10} {elapsed:>8.2f} s {count:>12,} records"
+            )
+
+
+if __name__ == "__main__":
+    main()
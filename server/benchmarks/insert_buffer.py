@@ -0,0 +1,90 @@
+"""Compare insert rates (rows/s) for Data records using
+InsertBuffer (ORM) and BulkInsertBuffer (ORM, CORE, LOAD_DATA).
+
+Usage::
+
+    python benchmarks/insert_buffer.py --rows 200000
+    python benchmarks/insert_buffer.py --database-uri mysql+mysqldb://... --rows 1000000
+
+Against an existing database, records are inserted into a savepoint,
+which is rolled back, i.e. the database is left unchanged. Note that
+the dataset and modification foreign keys must exist, see
+--dataset-id and --modification-id.
+"""
+
+import argparse
+import time
+
+from scimodom.database.buffer import BulkInsertBuffer, InsertBuffer
+from scimodom.database.database import Base, make_session
+from scimodom.database.models import Data
+from scimodom.services.dataset import DATA_COLUMNS
+from scimodom.utils.specs.enums import InsertMode, Strand
+
+
+def get_values(rows, dataset_id, modification_id):
+    for i in range(rows):
+        yield (
+            dataset_id,
+            modification_id,
+            "1",
+            i,
+            i + 1,
+            "m6A",
+            1000,
+            Strand.FORWARD,
+            i,
+            i + 1,
+            "0,0,0",
+            10,
+            50,
+        )
+
+
+def run_insert_buffer(session, rows, dataset_id, modification_id):
+    with InsertBuffer[Data](session) as buffer:
+        for values in get_values(rows, dataset_id, modification_id):
+            buffer.queue(Data(**dict(zip(DATA_COLUMNS, values))))
+
+
+def run_bulk_insert_buffer(mode):
+    def run(session, rows, dataset_id, modification_id):
+        with BulkInsertBuffer[Data](session, Data, DATA_COLUMNS, mode=mode) as buffer:
+            for values in get_values(rows, dataset_id, modification_id):
+                buffer.queue(values)
+
+    return run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--database-uri", default="sqlite:///:memory:")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--dataset-id", default="BENCHMARK001")
+    parser.add_argument("--modification-id", type=int, default=1)
+    args = parser.parse_args()
+
+    engine, Session = make_session(args.database_uri, local_infile=True)
+    if args.database_uri.startswith("sqlite"):
+        Base.metadata.create_all(engine)
+
+    runs = {
+        "InsertBuffer": run_insert_buffer,
+        **{
+            f"BulkInsertBuffer ({mode.value})": run_bulk_insert_buffer(mode)
+            for mode in InsertMode
+        },
+    }
+    for name, run in runs.items():
+        with Session() as session:
+            checkpoint = session.begin_nested()
+            start = time.perf_counter()
+            run(session, args.rows, args.dataset_id, args.modification_id)
+            elapsed = time.perf_counter() - start
+            checkpoint.rollback()
+            session.rollback()
+        print(f"{name:<32} {args.rows / elapsed:>12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
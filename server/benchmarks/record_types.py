@@ -0,0 +1,137 @@
+"""Compare pydantic records (IntersectRecord) and trusted records
+(TrustedIntersectRecord) on the intersect hot path: parsing bedtools
+output, and serializing an API response.
+
+Usage::
+
+    python benchmarks/record_types.py --records 1000000
+    python benchmarks/record_types.py --records 1000000 --bedtools
+
+Parsing runs on pre-split bedtools -wa -wb output lines (2 x 9 fields),
+i.e. without bedtools itself. With --bedtools, the complete
+BedToolsService.intersect_comparison_records is also timed, if
+bedtools is installed. Memory is the peak traced allocation per record,
+with all records held in a list, as for a response.
+"""
+
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+
+from scimodom.api.dataset import IntersectResponse
+from scimodom.services.bedtools import BedToolsService
+from scimodom.utils.dtos.bedtools import (
+    ComparisonRecord,
+    IntersectRecord,
+    TrustedComparisonRecord,
+    TrustedIntersectRecord,
+)
+from scimodom.utils.specs.enums import Strand
+
+
+def get_fields(records):
+    for i in range(records):
+        a = ["1", str(i), str(i + 1), "m6A", "1000", "+", "EUFID0000001", "10", "50"]
+        b = ["1", str(i), str(i + 1), "m6A", "900", "+", "EUFID0000002", "20", "40"]
+        yield a + b
+
+
+def get_pydantic_record(s):
+    return ComparisonRecord(
+        chrom=s[0],
+        start=s[1],
+        end=s[2],
+        name=s[3],
+        score=s[4],
+        strand=s[5],
+        eufid=s[6],
+        coverage=s[7],
+        frequency=s[8],
+    )
+
+
+def parse_pydantic(lines):
+    return [
+        IntersectRecord(a=get_pydantic_record(s[:9]), b=get_pydantic_record(s[9:]))
+        for s in lines
+    ]
+
+
+def parse_trusted(lines):
+    get_record = BedToolsService._get_comparison_record_from_bedtool
+    return [TrustedIntersectRecord(get_record(s[:9]), get_record(s[9:])) for s in lines]
+
+
+def serialize_pydantic(records):
+    return IntersectResponse(records=records).model_dump_json()
+
+
+def serialize_trusted(records):
+    return json.dumps(
+        {"records": [record.to_json_dict() for record in records]},
+        separators=(",", ":"),
+    )
+
+
+def run_bedtools(records):
+    service = BedToolsService(tmp_path=tempfile.mkdtemp())
+    a_records = [
+        TrustedComparisonRecord(
+            "1", i * 10, i * 10 + 1, "m6A", 1000, Strand.FORWARD, "EUFID01", 10, 50
+        )
+        for i in range(records)
+    ]
+    start = time.perf_counter()
+    count = sum(
+        1
+        for _ in service.intersect_comparison_records(
+            a_records, [a_records], is_strand=True
+        )
+    )
+    return count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--records", type=int, default=1000000)
+    parser.add_argument("--bedtools", action="store_true")
+    args = parser.parse_args()
+
+    lines = list(get_fields(args.records))
+    for name, parse, serialize in [
+        ("IntersectRecord", parse_pydantic, serialize_pydantic),
+        ("TrustedIntersectRecord", parse_trusted, serialize_trusted),
+    ]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        records = parse(lines)
+        parse_elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        start = time.perf_counter()
+        serialize(records)
+        serialize_elapsed = time.perf_counter() - start
+        print(
+            f"{name:<24}"
+            f" parse {parse_elapsed / args.records * 1e6:>6.2f} us/record"
+            f" {peak / args.records:>8,.0f} B/record"
+            f" serialize {serialize_elapsed / args.records * 1e6:>6.2f} us/record"
+        )
+        del records
+
+    if args.bedtools:
+        try:
+            count, elapsed = run_bedtools(args.records)
+        except NotImplementedError:
+            print("bedtools is not installed, skipping intersect")
+        else:
+            print(
+                f"{'intersect (bedtools)':<24}"
+                f" {elapsed / args.records * 1e6:>6.2f} us/record ({count:,} records)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
+from gzip import GzipFile
+from io import TextIOWrapper
+import json
 import logging
+import time
+from contextlib import ExitStack
 from dataclasses import dataclass
-from typing import Generator, Iterable, Sequence
+from typing import Callable, Generator, Iterable, Iterator, Sequence
 
 from flask import Blueprint
 from flask_cors import cross_origin
@@ -14,7 +19,13 @@ from scimodom.api.helpers import (
     get_valid_remote_file_name_from_request_parameter,
     get_valid_boolean_from_request_parameter,
     get_valid_taxa_id,
-    get_response_from_pydantic_object,
+    get_optional_non_negative_int,
+    get_optional_positive_int,
+    generate_json_records,
+    generate_json_page,
+    get_response_from_compressed_json,
+    get_response_from_json_chunks,
+    get_started,
 )
 from scimodom.services.assembly import LiftOverError
 from scimodom.services.bedtools import get_bedtools_service, BedToolsService
@@ -41,7 +52,10 @@ from scimodom.utils.dtos.bedtools import (
     ClosestRecord,
     SubtractRecord,
     ComparisonRecord,
+    TrustedComparisonRecord,
+    TrustedRecord,
 )
+from scimodom.utils.comparison_summary import ComparisonSummary
 from scimodom.utils.specs.enums import Identifiers
 
 logger = logging.getLogger(__name__)
@@ -49,16 +63,45 @@ logger = logging.getLogger(__name__)
 dataset_api = Blueprint("dataset_api", __name__)
 
 
+# Response schemas: trusted records are serialized in the same
+# format, but without validation, see generate_json_records;
+# totalRecords is only given for a page ('firstRecord', 'maxRecords'),
+# and 'summary=true' returns a ComparisonSummaryResponse instead
+
+
 class IntersectResponse(BaseModel):
     records: list[IntersectRecord]
+    totalRecords: int | None = None
 
 
 class ClosestResponse(BaseModel):
     records: list[ClosestRecord]
+    totalRecords: int | None = None
 
 
 class SubtractResponse(BaseModel):
     records: list[SubtractRecord]
+    totalRecords: int | None = None
+
+
+class ComparisonSummaryChrom(BaseModel):
+    chrom: str
+    records: int
+
+
+class ComparisonSummaryPair(BaseModel):
+    reference: str
+    comparison: str | None
+    records: int
+    referenceRecords: int | None
+    referenceTotal: int
+    fraction: float | None
+
+
+class ComparisonSummaryResponse(BaseModel):
+    totalRecords: int
+    chroms: list[ComparisonSummaryChrom]
+    pairs: list[ComparisonSummaryPair]
 
 
 @dataset_api.route("/list_all", methods=["GET"])
@@ -80,38 +123,78 @@ def list_mine():
 @dataset_api.route("/intersect", methods=["GET"])
 @cross_origin(supports_credentials=True)
 def intersect():
-    try:
-        with _CompareContext() as ctx:
-            records = ctx.bedtools_service.intersect_comparison_records(
-                ctx.a_records, ctx.b_records_list, is_strand=ctx.is_strand
-            )
-            return get_response_from_pydantic_object(IntersectResponse(records=records))
-    except ClientResponseException as e:
-        return e.response_tuple
+    return _get_comparison_response(
+        "intersect",
+        lambda ctx: ctx.bedtools_service.intersect_comparison_records(
+            ctx.a_records, ctx.b_records_list, is_strand=ctx.is_strand
+        ),
+    )
 
 
 @dataset_api.route("/closest", methods=["GET"])
 @cross_origin(supports_credentials=True)
 def closest():
-    try:
-        with _CompareContext() as ctx:
-            records = ctx.bedtools_service.closest_comparison_records(
-                ctx.a_records, ctx.b_records_list, is_strand=ctx.is_strand
-            )
-            return get_response_from_pydantic_object(ClosestResponse(records=records))
-    except ClientResponseException as e:
-        return e.response_tuple
+    return _get_comparison_response(
+        "closest",
+        lambda ctx: ctx.bedtools_service.closest_comparison_records(
+            ctx.a_records, ctx.b_records_list, is_strand=ctx.is_strand
+        ),
+    )
 
 
 @dataset_api.route("/subtract", methods=["GET"])
 @cross_origin(supports_credentials=True)
 def subtract():
+    return _get_comparison_response(
+        "subtract",
+        lambda ctx: ctx.bedtools_service.subtract_comparison_records(
+            ctx.a_records, ctx.b_records_list, is_strand=ctx.is_strand
+        ),
+    )
+
+
+def _get_comparison_response(
+    name: str, operation: Callable[["_CompareContext.Ctx"], Iterable[TrustedRecord]]
+):
+    # results are cached by FileService; with 'stream=true', the response is written
+    # while records are generated, and the context is closed once the response is closed;
+    # pages are read from the full result, and summaries are cached separately
     try:
-        with _CompareContext() as ctx:
-            records = ctx.bedtools_service.subtract_comparison_records(
-                ctx.a_records, ctx.b_records_list, is_strand=ctx.is_strand
-            )
-            return get_response_from_pydantic_object(SubtractResponse(records=records))
+        with ExitStack() as stack:
+            compare_context = _CompareContext()
+            file_service = get_file_service()
+            cache_name, eufids = compare_context.get_cache_name(name)
+            page = compare_context.page
+            cached = file_service.open_comparison_cache(cache_name)
+            if cached is not None:
+                if page is None:
+                    return get_response_from_compressed_json(cached)
+                stack.callback(cached.close)
+                lines = TextIOWrapper(GzipFile(fileobj=cached), encoding="utf-8")
+                chunks = generate_json_page(lines, *page)
+            else:
+                started = time.time()
+                ctx = stack.enter_context(compare_context)
+                if ctx.is_summary:
+                    summary = ComparisonSummary()
+                    ctx.a_records = summary.count_references(ctx.a_records)
+                    summary.add(operation(ctx))
+                    json_chunks: Iterator[str] = iter(
+                        [json.dumps(summary.to_json_dict(), separators=(",", ":"))]
+                    )
+                else:
+                    records = operation(ctx)
+                    if ctx.is_stream:
+                        records = get_started(records)
+                    json_chunks = generate_json_records(records)
+                chunks = file_service.write_comparison_cache(
+                    cache_name, eufids, started, json_chunks
+                )
+                if page is not None:
+                    chunks = generate_json_page(chunks, *page)
+            response = get_response_from_json_chunks(chunks, compare_context.is_stream)
+            response.call_on_close(stack.pop_all().close)
+            return response
     except ClientResponseException as e:
         return e.response_tuple
 
@@ -120,16 +203,20 @@ class _CompareContext:
     @dataclass
     class Ctx:
         bedtools_service: BedToolsService
-        a_records: Iterable[ComparisonRecord]
-        b_records_list: Sequence[Iterable[ComparisonRecord]]
+        a_records: Iterable[TrustedComparisonRecord]
+        b_records_list: Sequence[Iterable[ComparisonRecord | TrustedComparisonRecord]]
         is_strand: bool
+        is_stream: bool
+        is_summary: bool
 
     def __init__(self):
-        self._reference_ids = get_valid_dataset_id_list_from_request_parameter(
-            "reference"
+        # IDs are sorted, so that the result order does not depend on the
+        # request, see get_cache_name
+        self._reference_ids = sorted(
+            get_valid_dataset_id_list_from_request_parameter("reference")
         )
-        self._comparison_ids = get_valid_dataset_id_list_from_request_parameter(
-            "comparison"
+        self._comparison_ids = sorted(
+            get_valid_dataset_id_list_from_request_parameter("comparison")
         )
         self._upload_id = get_valid_tmp_file_id_from_request_parameter(
             "upload", is_optional=True
@@ -141,6 +228,14 @@ class _CompareContext:
             "strand", default=True
         )
         self._is_euf = get_valid_boolean_from_request_parameter("euf", default=False)
+        self._is_stream = get_valid_boolean_from_request_parameter(
+            "stream", default=False
+        )
+        self._is_summary = get_valid_boolean_from_request_parameter(
+            "summary", default=False
+        )
+        self._first_record = get_optional_non_negative_int("firstRecord")
+        self._max_records = get_optional_positive_int("maxRecords")
         try:
             self._taxa_id = get_valid_taxa_id(is_optional=not self._is_euf)
         except ClientResponseException as exc:
@@ -161,9 +256,62 @@ class _CompareContext:
             raise ClientResponseException(
                 400, "Request can only handle 'upload' or 'comparison', but not both"
             )
+        if self._is_summary and (
+            self._first_record is not None or self._max_records is not None
+        ):
+            raise ClientResponseException(
+                400,
+                "Request can only handle 'summary' or 'firstRecord' and "
+                "'maxRecords', but not both",
+            )
         self._data_service = get_data_service()
         self._validator_service = get_validator_service()
 
+    @property
+    def is_stream(self) -> bool:
+        return self._is_stream
+
+    @property
+    def page(self) -> tuple[int, int | None] | None:
+        """First record and maximum number of records
+        of the requested page, or None for all records."""
+        if self._first_record is None and self._max_records is None:
+            return None
+        return self._first_record or 0, self._max_records
+
+    def get_cache_name(self, operation: str) -> tuple[str, list[str]]:
+        """Return the name of the operation result in the cache,
+        see :meth:`FileService.get_comparison_cache_name`, and the
+        EUFIDs of the datasets it involves. Uploads are identified
+        by a digest of their content.
+
+        :param operation: Operation, e.g. intersect
+        :type operation: str
+        :returns: Name and EUFIDs
+        :rtype: tuple[str, list[str]]
+        """
+        upload_key = None
+        if self._upload_id is not None:
+            try:
+                digest = get_file_service().get_tmp_upload_file_digest(self._upload_id)
+            except FileNotFoundError:
+                raise ClientResponseException(
+                    404,
+                    "Upload file ID not found"
+                    "File not found - Select the file again and try to re-upload",
+                )
+            options = f"euf-{self._taxa_id}" if self._is_euf else "bed6"
+            upload_key = f"upload-{digest}-{options}"
+        name = get_file_service().get_comparison_cache_name(
+            operation,
+            self._reference_ids,
+            self._comparison_ids,
+            upload_key,
+            self._is_strand,
+            "summary" if self._is_summary else None,
+        )
+        return name, [*self._reference_ids, *self._comparison_ids]
+
     def __enter__(self) -> Ctx:
         if self._upload_id is None:
             # The MySQL driver does not allow to have multiple queries run at once;
@@ -192,24 +340,16 @@ class _CompareContext:
             a_records=a_records,
             b_records_list=b_records_list,
             is_strand=self._is_strand,
+            is_stream=self._is_stream,
+            is_summary=self._is_summary,
         )
 
     def _get_comparison_records_from_db(
         self, dataset_ids
-    ) -> Generator[ComparisonRecord, None, None]:
+    ) -> Generator[TrustedComparisonRecord, None, None]:
+        # records come from dataset snapshots or the database, and are not validated
         for dataset_id in dataset_ids:
-            for data in self._data_service.get_by_dataset(dataset_id):
-                yield ComparisonRecord(
-                    chrom=data.chrom,
-                    start=data.start,
-                    end=data.end,
-                    name=data.name,
-                    score=data.score,
-                    strand=data.strand,
-                    eufid=data.dataset_id,
-                    coverage=data.coverage,
-                    frequency=data.frequency,
-                )
+            yield from self._data_service.get_comparison_records(dataset_id)
 
     def _get_comparison_records_from_file(
         self,
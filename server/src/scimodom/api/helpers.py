@@ -1,11 +1,16 @@
+import gzip
+from itertools import chain, islice
+import json
+import logging
 from pathlib import Path
 import re
-from typing import Optional, Any
+from typing import BinaryIO, Iterable, Iterator, Optional, Any, TypeVar
 
 from flask import request, Response
 from flask_jwt_extended import get_jwt_identity
 from sqlalchemy.exc import NoResultFound
 from pydantic import BaseModel
+from werkzeug.wsgi import wrap_file
 
 from scimodom.database.models import Dataset, User, BamFile
 from scimodom.services.dataset import get_dataset_service
@@ -14,6 +19,7 @@ from scimodom.services.permission import get_permission_service
 from scimodom.services.user import get_user_service, NoSuchUser
 from scimodom.services.utilities import get_utilities_service
 from scimodom.services.assembly import get_assembly_service
+from scimodom.utils.dtos.bedtools import TrustedRecord
 from scimodom.utils.specs.enums import Strand, TargetsFileType, Identifiers
 
 """
@@ -79,6 +85,12 @@ VALID_DATASET_ID_REGEXP = re.compile(r"\A[a-zA-Z0-9]{1,256}\Z")
 VALID_FILENAME_REGEXP = re.compile(r"\A[a-zA-Z0-9.,_-]{1,256}\Z")
 INVALID_CHARS_REGEXP = re.compile(r"[^a-zA-Z0-9.,_-]")
 MAX_DATASET_IDS_IN_LIST = 3
+# Records serialized at once, see generate_json_records
+STREAM_BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
 
 
 class ClientResponseException(Exception):
@@ -490,6 +502,161 @@ def get_response_from_pydantic_object(obj: BaseModel):
     )
 
 
+def get_response_from_trusted_records(records: Iterable[TrustedRecord]):
+    """Serialize trusted records as {"records": [...]}, in the
+    same format as a pydantic response model with a list of
+    records, but without validation.
+
+    :param records: Records
+    :type records: Iterable[TrustedRecord]
+    :returns: Response
+    :rtype: Response
+    """
+    return Response(
+        response=json.dumps(
+            {"records": [record.to_json_dict() for record in records]},
+            separators=(",", ":"),
+        ),
+        status=200,
+        mimetype="application/json",
+    )
+
+
+def get_response_from_json_chunks(chunks: Iterable[str], is_stream: bool) -> Response:
+    """Return a JSON response from chunks of a JSON document,
+    see :func:`generate_json_records`.
+
+    If is_stream, once the response is started, its status
+    cannot change: use :func:`get_started` to report errors
+    raised before the first record with an error response.
+
+    :param chunks: JSON chunks
+    :type chunks: Iterable[str]
+    :param is_stream: Write chunks as they are generated,
+    else join them first.
+    :type is_stream: bool
+    :returns: Response
+    :rtype: Response
+    """
+    return Response(
+        response=chunks if is_stream else "".join(chunks),
+        status=200,
+        mimetype="application/json",
+    )
+
+
+def get_response_from_compressed_json(fh: BinaryIO) -> Response:
+    """Return a JSON response from a gzip compressed file.
+    The file is sent as is if the client accepts gzip, else
+    it is decompressed while the response is written. The
+    file is closed with the response.
+
+    :param fh: Opened file handle for reading
+    :type fh: BinaryIO
+    :returns: Response
+    :rtype: Response
+    """
+    if "gzip" in request.accept_encodings:
+        response = Response(
+            response=wrap_file(request.environ, fh),
+            status=200,
+            mimetype="application/json",
+            direct_passthrough=True,
+        )
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(
+            response=wrap_file(request.environ, gzip.GzipFile(fileobj=fh)),
+            status=200,
+            mimetype="application/json",
+        )
+        response.call_on_close(fh.close)
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def generate_json_records(records: Iterable[TrustedRecord]) -> Iterator[str]:
+    """Serialize trusted records as {"records": [...]}, in
+    chunks of STREAM_BATCH_SIZE records, so that memory is
+    bounded by a chunk, and not by all records.
+
+    Each record is written on its own line, so that a page
+    can be read from the document without parsing it, see
+    :func:`generate_json_page`.
+
+    :param records: Records
+    :type records: Iterable[TrustedRecord]
+    :returns: JSON chunks
+    :rtype: Iterator[str]
+    """
+    yield '{"records":['
+    iterator = iter(records)
+    separator = ""
+    try:
+        while batch := list(islice(iterator, STREAM_BATCH_SIZE)):
+            yield separator + ",".join(
+                "\n" + json.dumps(record.to_json_dict(), separators=(",", ":"))
+                for record in batch
+            )
+            separator = ","
+    except Exception as exc:
+        # a streamed response is truncated, and the client sees invalid JSON
+        logger.error(f"Failed to generate records: {exc}")
+        raise
+    yield "\n]}" if separator else "]}"
+
+
+def generate_json_page(
+    chunks: Iterable[str], first_record: int, max_records: int | None
+) -> Iterator[str]:
+    """Serialize a page of the records of a JSON document
+    written by :func:`generate_json_records`, as
+    {"records": [...], "totalRecords": N}. The document is
+    read line by line to the end, to count all records, but
+    only records of the page are kept.
+
+    :param chunks: JSON chunks, or lines, of the document
+    :type chunks: Iterable[str]
+    :param first_record: Index of the first record of the page
+    :type first_record: int
+    :param max_records: Maximum number of records of the page,
+    or None for all records from first_record.
+    :type max_records: int | None
+    :returns: JSON chunks
+    :rtype: Iterator[str]
+    """
+    stop = None if max_records is None else first_record + max_records
+    lines = _get_lines(chunks)
+    next(lines)  # {"records":[
+    total_records = 0
+    separator = ""
+    yield '{"records":['
+    for line in lines:
+        if not line or line.startswith("]"):
+            break
+        if total_records >= first_record and (stop is None or total_records < stop):
+            yield separator + "\n" + line.rstrip(",")
+            separator = ","
+        total_records += 1
+    yield ("\n]" if separator else "]") + f',"totalRecords":{total_records}}}'
+
+
+def get_started(items: Iterable[T]) -> Iterator[T]:
+    """Start a (lazy) iterable up to its first item, so that
+    errors raised until then are raised here, and not while
+    a streaming response is written.
+
+    :param items: Items
+    :type items: Iterable[T]
+    :returns: The same items
+    :rtype: Iterator[T]
+    """
+    iterator = iter(items)
+    for first in iterator:
+        return chain([first], iterator)
+    return iter(())
+
+
 # Private
 
 
@@ -497,6 +664,15 @@ def _get_file_too_large_message(max_size: int):
     return f"File too large (max. {max_size} bytes)"
 
 
+def _get_lines(chunks: Iterable[str]) -> Iterator[str]:
+    rest = ""
+    for chunk in chunks:
+        lines = (rest + chunk).split("\n")
+        rest = lines.pop()
+        yield from lines
+    yield rest
+
+
 def _is_valid_identifier(identifier, length):
     if not VALID_DATASET_ID_REGEXP.match(identifier):
         return False
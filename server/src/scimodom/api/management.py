@@ -4,13 +4,16 @@ from smtplib import SMTPException
 
 from flask import Blueprint, request
 from flask_cors import cross_origin
-from flask_jwt_extended import jwt_required
+from flask_jwt_extended import jwt_required, get_jwt_identity
 
 from scimodom.api.helpers import create_error_response
 from scimodom.config import get_config
-from scimodom.services.assembly import LiftOverError
 
 from scimodom.services.dataset import get_dataset_service
+from scimodom.services.import_job import (
+    ImportJobNotFoundError,
+    get_import_job_service,
+)
 from scimodom.services.validator import (
     SelectionNotFoundError,
     DatasetImportError,
@@ -22,12 +25,13 @@ from scimodom.services.annotation import RNA_TYPE_TO_ANNOTATION_SOURCE_MAP
 from scimodom.services.project import get_project_service
 from scimodom.services.mail import get_mail_service
 import scimodom.utils.utils as utils
-from scimodom.services.sunburst import get_sunburst_service
+from scimodom.utils.dtos.import_job import DatasetImportRequestDto
+from scimodom.utils.dtos.project import ProjectTemplate
 from scimodom.utils.importer.bed_importer import (
     BedImportTooManyErrors,
     BedImportEmptyFile,
 )
-from scimodom.utils.dtos.project import ProjectTemplate
+from scimodom.utils.importer.text_file_reader import open_text_file
 
 logger = logging.getLogger(__name__)
 
@@ -69,26 +73,40 @@ def create_project_request():
 @cross_origin(supports_credentials=True)
 @jwt_required()
 def add_dataset():
-    """Add a new dataset to a project and import data.
+    """Add a new dataset to a project and queue data import.
 
-    Parameter values are validated on import.
+    Parameter values, the file header, and the first
+    records are validated immediately. Records are imported asynchronously
+    by the import worker, see "flask dataset worker".
+    The progress can be followed using the returned job ID.
     """
     dataset_form = request.json
     annotation_source = RNA_TYPE_TO_ANNOTATION_SOURCE_MAP[dataset_form["rna_type"]]
     upload_path = Path(get_config().UPLOAD_PATH, dataset_form["file_id"])
+    import_request = DatasetImportRequestDto(
+        file_path=upload_path.as_posix(),
+        smid=dataset_form["smid"],
+        title=dataset_form["title"],
+        assembly_id=dataset_form["assembly_id"],
+        modification_ids=utils.to_list(dataset_form["modification_id"]),
+        organism_id=dataset_form["organism_id"],
+        technology_id=dataset_form["technology_id"],
+        annotation_source=annotation_source,
+        user_email=get_jwt_identity(),
+    )
     dataset_service = get_dataset_service()
     try:
-        with open(upload_path) as fp:
-            dataset_service.import_dataset(
+        with open_text_file(upload_path) as fp:
+            dataset_service.prepare_import(
                 fp,
-                source=upload_path.as_posix(),
-                smid=dataset_form["smid"],
-                title=dataset_form["title"],
-                assembly_id=dataset_form["assembly_id"],
-                modification_ids=utils.to_list(dataset_form["modification_id"]),
-                organism_id=dataset_form["organism_id"],
-                technology_id=dataset_form["technology_id"],
-                annotation_source=annotation_source,
+                source=import_request.file_path,
+                smid=import_request.smid,
+                title=import_request.title,
+                assembly_id=import_request.assembly_id,
+                modification_ids=import_request.modification_ids,
+                organism_id=import_request.organism_id,
+                technology_id=import_request.technology_id,
+                annotation_source=import_request.annotation_source,
             )
     except SelectionNotFoundError:
         return create_error_response(
@@ -135,15 +153,26 @@ def add_dataset():
             "Modify the file to conform to the latest bedRMod format specifications.\n"
             "Consult the documentation (Dataset upload errors) for more information.",
         )
-    except LiftOverError as exc:
-        return create_error_response(
-            500, str(exc), "Liftover failed. Contact the system administrator."
-        )
     except Exception as e:
         logger.error(
             f"Import failed in a unexpected way: {e}. The request was: {dataset_form}."
         )
         raise e
-    sunburst_service = get_sunburst_service()
-    sunburst_service.trigger_background_update()
-    return {"result": "Ok"}, 200
+    import_job_service = get_import_job_service()
+    job_id = import_job_service.submit_dataset_import(import_request)
+    return {"result": "Ok", "job_id": job_id}, 202
+
+
+@management_api.route("/dataset/job/<string:job_id>", methods=["GET"])
+@cross_origin(supports_credentials=True)
+@jwt_required()
+def get_dataset_import_job(job_id: str):
+    """Get status and progress of a dataset import job."""
+    import_job_service = get_import_job_service()
+    try:
+        job = import_job_service.get_job(job_id)
+    except ImportJobNotFoundError:
+        return create_error_response(404, "Not found", "No such import job.")
+    if job.request.user_email != get_jwt_identity():
+        return create_error_response(404, "Not found", "No such import job.")
+    return job.model_dump(mode="json", exclude={"request": {"file_path", "user_email"}})
@@ -17,7 +17,7 @@ from scimodom.api.helpers import (
     get_valid_coords,
     get_valid_targets_type,
     get_valid_taxa_id,
-    get_response_from_pydantic_object,
+    get_response_from_trusted_records,
     get_non_negative_int,
     get_optional_positive_int,
     get_optional_non_negative_int,
@@ -153,7 +153,7 @@ def get_modification_targets(target_type):
             records = ctx.bedtools_service.intersect_bed6_records(
                 ctx.records, ctx.stream, is_strand=ctx.is_strand
             )
-            return get_response_from_pydantic_object(IntersectResponse(records=records))
+            return get_response_from_trusted_records(records)
     except ClientResponseException as e:
         return e.response_tuple
 
@@ -30,6 +30,8 @@ def export_dataset(dataset_id: str):
 @transfer_api.route("/tmp_upload", methods=["POST"])
 @cross_origin(supports_credentials=True)
 def upload_tmp_file():
+    # Compressed files are accepted, and the limit applies to the
+    # decompressed size, but larger requests are rejected upfront.
     if (
         request.content_length is not None
         and request.content_length > MAX_TMP_FILE_SIZE
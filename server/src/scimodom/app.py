@@ -6,6 +6,7 @@ from sqlalchemy.orm import scoped_session
 
 from scimodom.app_singleton import create_app_singleton
 from scimodom.config import set_config_from_environment, get_config
+from scimodom.database.buffer import get_insert_modes
 from scimodom.database.database import make_session, init
 
 from scimodom.services.setup import get_setup_service
@@ -19,6 +20,7 @@ from scimodom.services.url import (
     TRANSFER_API_ROUTE,
     USER_API_ROUTE,
 )
+from scimodom.utils.specs.enums import InsertMode
 
 
 def create_app():
@@ -29,7 +31,11 @@ def create_app():
     app.config.from_object(get_config())
     dictConfig(app.config["LOGGING"])
 
-    engine, session = make_session(app.config["DATABASE_URI"])
+    insert_modes = get_insert_modes(app.config["INSERT_MODES"])
+    engine, session = make_session(
+        app.config["DATABASE_URI"],
+        local_infile=InsertMode.LOAD_DATA in insert_modes.values(),
+    )
     app.session = scoped_session(session)
     init(engine, lambda: app.session)
     setup_service = get_setup_service()
@@ -2,8 +2,11 @@ import click
 
 from flask import Blueprint
 
-from scimodom.services.annotation import get_annotation_service
-from scimodom.utils.specs.enums import AnnotationSource
+from scimodom.services.annotation import (
+    get_annotation_service,
+    get_reannotation_service,
+)
+from scimodom.utils.specs.enums import AnnotationSource, ReannotationStage
 
 
 annotation_cli = Blueprint("annotation", __name__)
@@ -19,6 +22,18 @@ annotation_cli = Blueprint("annotation", __name__)
     type=click.Choice(["ensembl", "gtrnadb"], case_sensitive=False),
     help="Annotation source.",
 )
+@click.option(
+    "--domain",
+    required=False,
+    type=click.STRING,
+    help="GtRNAdb taxonomic domain, e.g. eukaryota.",
+)
+@click.option(
+    "--name",
+    required=False,
+    type=click.STRING,
+    help="GtRNAdb species name, e.g. Hsapi38.",
+)
 def add_annotation(taxa_id: int, source: str, **kwargs) -> None:
     """Add annotations.
 
@@ -29,8 +44,8 @@ def add_annotation(taxa_id: int, source: str, **kwargs) -> None:
     """
     annotation_service = get_annotation_service()
 
-    if source == "gtrnadb":
-        click.secho("Not Implemented...", fg="red")
+    if source == "gtrnadb" and (kwargs["domain"] is None or kwargs["name"] is None):
+        click.secho("Options --domain and --name are required for gtrnadb.", fg="red")
         raise click.Abort()
 
     click.secho(f"Preparing {source} annotation for {taxa_id}...", fg="green")
@@ -42,7 +57,15 @@ def add_annotation(taxa_id: int, source: str, **kwargs) -> None:
 
     try:
         annotation_source = AnnotationSource(source)
-        annotation_service.create_annotation(annotation_source, taxa_id)
+        if annotation_source == AnnotationSource.GTRNADB:
+            annotation_service.create_annotation(
+                annotation_source,
+                taxa_id,
+                domain=kwargs["domain"],
+                name=kwargs["name"],
+            )
+        else:
+            annotation_service.create_annotation(annotation_source, taxa_id)
         click.secho("   ... done!", fg="green")
     except FileExistsError:
         click.secho(
@@ -53,3 +76,74 @@ def add_annotation(taxa_id: int, source: str, **kwargs) -> None:
     except Exception as exc:
         click.secho(f"Failed to prepare annotation: {exc}", fg="red")
         raise click.Abort()
+
+
+@annotation_cli.cli.command(
+    "reannotate",
+    epilog="Check docs at https://dieterich-lab.github.io/scimodom/flask.html.",
+)
+@click.argument("taxa_id", type=click.INT)
+@click.option(
+    "--release",
+    type=click.INT,
+    help="Ensembl release. Default is the current release.",
+)
+@click.option(
+    "--annotation-workers",
+    type=click.IntRange(min=1),
+    help="Number of worker processes used to annotate each dataset.",
+)
+@click.option(
+    "--restart",
+    is_flag=True,
+    show_default=True,
+    default=False,
+    help="Discard the state of an interrupted job.",
+)
+def reannotate(
+    taxa_id: int, release: int | None, annotation_workers: int | None, restart: bool
+) -> None:
+    """Re-annotate all datasets for a new Ensembl release.
+
+    Annotation files are created for the release, and all
+    datasets are annotated into a shadow table, before
+    annotations are swapped at once. An interrupted job
+    is resumed, unless --restart is given.
+
+    \b
+    TAXA_ID is the organism taxonomic ID.
+    """
+    reannotation_service = get_reannotation_service()
+
+    job = reannotation_service.get_job(taxa_id)
+    if job is not None and job.stage != ReannotationStage.DONE and not restart:
+        click.secho(
+            f"Resuming re-annotation for {taxa_id} to release {job.to_release} "
+            f"({len(job.done_eufids)}/{len(job.eufids)} datasets done)...",
+            fg="green",
+        )
+    else:
+        click.secho(f"Re-annotating datasets for {taxa_id}...", fg="green")
+    click.secho("Continue [y/n]?", fg="green")
+    c = click.getchar()
+    if c not in ["y", "Y"]:
+        click.secho("Aborted!", fg="yellow")
+        return
+
+    def progress(eufid: str, done_count: int, total_count: int) -> None:
+        click.secho(f"   ... {eufid} ({done_count}/{total_count})", fg="green")
+
+    try:
+        job = reannotation_service.reannotate(
+            taxa_id,
+            release=release,
+            workers=annotation_workers,
+            restart=restart,
+            progress=progress,
+        )
+        click.secho(
+            f"   ... done! Annotation is now at release {job.to_release}.", fg="green"
+        )
+    except Exception as exc:
+        click.secho(f"Failed to re-annotate datasets: {exc}", fg="red")
+        raise click.Abort()
@@ -1,6 +1,16 @@
 from collections import defaultdict
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+)
+import multiprocessing
 from pathlib import Path
 import re
+import time
+from typing import Callable
 
 import click
 from flask import Blueprint
@@ -8,6 +18,7 @@ from sqlalchemy import select
 
 from scimodom.database.database import get_session
 from scimodom.database.models import (
+    Dataset,
     DetectionTechnology,
     Organism,
     Modification,
@@ -18,15 +29,26 @@ from scimodom.cli.utilities import (
 )
 
 from scimodom.services.assembly import AssemblyNotFoundError, get_assembly_service
-from scimodom.services.dataset import get_dataset_service
+from scimodom.services.data import get_data_service
+from scimodom.services.dataset import (
+    DatasetImportTask,
+    DatasetService,
+    DatasetValidationTask,
+    PreparedDataset,
+    get_dataset_service,
+)
 from scimodom.services.file import get_file_service
+from scimodom.services.import_job import get_import_job_service
 from scimodom.services.project import get_project_service
 from scimodom.services.sunburst import get_sunburst_service
+from scimodom.utils.dtos.dataset_validation import DatasetValidationReportDto
 from scimodom.utils.dtos.project import (
     ProjectMetaDataDto,
     ProjectTemplate,
 )
-from scimodom.utils.specs.enums import AnnotationSource
+from scimodom.utils.import_metrics import ImportMetrics
+from scimodom.utils.importer.text_file_reader import open_text_file
+from scimodom.utils.specs.enums import AnnotationSource, ImportJobStatus
 
 
 dataset_cli = Blueprint("dataset", __name__)
@@ -87,7 +109,41 @@ dataset_cli = Blueprint("dataset", __name__)
     type=click.STRING,
     help=(
         "Update data and data annotation records for existing dataset "
-        "with the supplied EUFID instead of creating a new one."
+        "with the supplied EUFID instead of creating a new one. "
+        "Only records that changed are written."
+    ),
+)
+@click.option(
+    "--columnar",
+    is_flag=True,
+    show_default=True,
+    default=False,
+    help="Parse and validate records by chunks.",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    show_default=True,
+    default=False,
+    help="Show wall time, rows, and peak memory for each import stage.",
+)
+@click.option(
+    "--annotation-workers",
+    default=None,
+    type=click.IntRange(min=1),
+    help=(
+        "Number of worker processes used to annotate records, "
+        "sharded by chromosome and strand. Default is set by ANNOTATION_WORKERS."
+    ),
+)
+@click.option(
+    "--early-abort",
+    is_flag=True,
+    show_default=True,
+    default=False,
+    help=(
+        "Abort as soon as the error rate is exceeded with high confidence. "
+        "Assumes that errors are spread evenly in the file."
     ),
 )
 def add_dataset(
@@ -101,6 +157,10 @@ def add_dataset(
     technology_id: int,
     dry_run: bool,
     eufid: str | None,
+    columnar: bool,
+    profile: bool,
+    annotation_workers: int | None,
+    early_abort: bool,
 ) -> None:
     """Add a new dataset or update records for an existing dataset.
 
@@ -127,9 +187,10 @@ def add_dataset(
         click.secho("Aborted!", fg="yellow")
         return
 
+    metrics = ImportMetrics()
     try:
         annotation_source = AnnotationSource(annotation)
-        with open(filename) as fp:
+        with open_text_file(filename) as fp:
             eufid = dataset_service.import_dataset(
                 fp,
                 source=filename,
@@ -142,6 +203,10 @@ def add_dataset(
                 annotation_source=annotation_source,
                 dry_run_flag=dry_run,
                 eufid=eufid,
+                columnar_flag=columnar,
+                metrics=metrics,
+                annotation_workers=annotation_workers,
+                early_abort_flag=early_abort,
             )
         click.secho(
             f"   ... {succes_msg} dataset with EUFID: '{eufid}'.",
@@ -153,6 +218,9 @@ def add_dataset(
             fg="red",
         )
         raise click.Abort()
+    finally:
+        if profile:
+            click.echo(metrics.format_report())
 
     if not dry_run:
         try:
@@ -178,7 +246,53 @@ def add_dataset(
     type=click.Choice(["ensembl", "gtrnadb"], case_sensitive=False),
     help="Annotation source.",
 )
-def add_dataset_in_batch(input_directory: str, request_uuid: str, annotation: str):
+@click.option(
+    "--columnar",
+    is_flag=True,
+    show_default=True,
+    default=False,
+    help="Parse and validate records by chunks.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help=(
+        "Number of worker processes used to parse, validate, "
+        "and lift over files. Records are written to the database "
+        "by the main process."
+    ),
+)
+@click.option(
+    "--annotation-workers",
+    default=None,
+    type=click.IntRange(min=1),
+    help=(
+        "Number of worker processes used to annotate records, "
+        "sharded by chromosome and strand. Default is set by ANNOTATION_WORKERS."
+    ),
+)
+@click.option(
+    "--early-abort",
+    is_flag=True,
+    show_default=True,
+    default=False,
+    help=(
+        "Abort as soon as the error rate is exceeded with high confidence. "
+        "Assumes that errors are spread evenly in the file."
+    ),
+)
+def add_dataset_in_batch(
+    input_directory: str,
+    request_uuid: str,
+    annotation: str,
+    columnar: bool,
+    jobs: int,
+    annotation_workers: int | None,
+    early_abort: bool,
+):
     """Add one project and all its datasets in batch w/o confirmation.
 
     All dataset files must be under INPUT_DIRECTORY, and
@@ -193,6 +307,9 @@ def add_dataset_in_batch(input_directory: str, request_uuid: str, annotation: st
     There is no [--dry-run] option.
     This method cannot be used to update records for existing datasets.
 
+    With [--jobs] > 1, files are prepared in parallel, and datasets
+    are created in the order in which files are ready.
+
     \b
     INPUT_DIRECTORY is the path to bedRMod (EU-formatted) files.
     REQUEST_UUID is the name (w/o extension) of a project
@@ -243,6 +360,7 @@ def add_dataset_in_batch(input_directory: str, request_uuid: str, annotation: st
         )
         raise click.Abort()
 
+    import_arguments = []
     visited = set()
     for metadata in project_template.metadata:
         filename, title = _get_filename_and_title(metadata)
@@ -255,10 +373,10 @@ def add_dataset_in_batch(input_directory: str, request_uuid: str, annotation: st
         )
         organism_id = _get_organism_id(metadata.organism)
         technology_id = _get_technology_id(metadata)
-        try:
-            with open(file_path) as fp:
-                eufid = dataset_service.import_dataset(
-                    fp,
+        import_arguments.append(
+            (
+                file_path,
+                dict(
                     source=file_path.as_posix(),
                     smid=smid,
                     title=title,
@@ -267,18 +385,21 @@ def add_dataset_in_batch(input_directory: str, request_uuid: str, annotation: st
                     organism_id=organism_id,
                     technology_id=technology_id,
                     annotation_source=annotation_source,
-                )
-            click.secho(
-                f"   ... created dataset with EUFID: '{eufid}'...",
-                fg="green",
-            )
-        except Exception as exc:
-            click.secho(
-                f"Failed to create dataset. {exc}... Skipping!",
-                fg="red",
+                    columnar_flag=columnar,
+                    early_abort_flag=early_abort,
+                ),
             )
-            continue
+        )
+    metrics = ImportMetrics()
+    if jobs == 1:
+        _import_datasets(dataset_service, import_arguments, metrics, annotation_workers)
+    else:
+        _import_datasets_in_parallel(
+            dataset_service, import_arguments, jobs, metrics, annotation_workers
+        )
     click.secho("   ... done.", fg="green")
+    click.secho(f"Import metrics for {len(import_arguments)} file(s):", fg="green")
+    click.echo(metrics.format_report())
 
     try:
         click.secho("Triggering charts update in the background ...", fg="green")
@@ -292,6 +413,310 @@ def add_dataset_in_batch(input_directory: str, request_uuid: str, annotation: st
         raise click.Abort()
 
 
+@dataset_cli.cli.command(
+    "validate",
+    epilog="Check docs at https://dieterich-lab.github.io/scimodom/flask.html.",
+)
+@click.argument("paths", nargs=-1, required=True, type=click.Path(exists=True))
+@click.option(
+    "-j",
+    "--jobs",
+    default=1,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Number of worker processes used to validate files.",
+)
+@click.option(
+    "--json",
+    "as_json",
+    is_flag=True,
+    show_default=True,
+    default=False,
+    help="Print one JSON report per line.",
+)
+def validate_datasets(paths: tuple[str], jobs: int, as_json: bool) -> None:
+    """Validate bedRMod files w/o importing them.
+
+    Records are checked against the assembly and the
+    organism given in the file header, and against all known
+    modifications. Errors do not stop validation: a report
+    is printed for each file with the number of errors by
+    class, unknown chroms and modification names, sort order
+    and duplicate sites. Exit with status 1 if any file is invalid.
+
+    \b
+    PATHS are bedRMod (EU-formatted) files, or directories.
+    All files directly under a directory are validated.
+    """
+    dataset_service = get_dataset_service()
+    file_paths = _get_file_paths(paths)
+    reports = []
+
+    def report(validation_report):
+        reports.append(validation_report)
+        _report_validation(validation_report, as_json)
+
+    if jobs == 1:
+        for file_path in file_paths:
+            try:
+                with open_text_file(file_path) as fp:
+                    report(dataset_service.validate_dataset(fp, file_path.as_posix()))
+            except Exception as exc:
+                report(_get_failed_validation_report(file_path, exc))
+    else:
+        _validate_datasets_in_parallel(dataset_service, file_paths, jobs, report)
+    if not all(r.is_valid for r in reports):
+        raise click.exceptions.Exit(1)
+
+
+@dataset_cli.cli.command(
+    "worker",
+    epilog="Check docs at https://dieterich-lab.github.io/scimodom/flask.html.",
+)
+@click.option(
+    "--poll-interval",
+    default=5.0,
+    show_default=True,
+    type=click.FloatRange(min=0, min_open=True),
+    help="Seconds to wait before looking for new jobs.",
+)
+@click.option(
+    "--once",
+    is_flag=True,
+    show_default=True,
+    default=False,
+    help="Exit when there are no more queued jobs.",
+)
+def run_import_worker(poll_interval: float, once: bool) -> None:
+    """Run queued dataset imports one at a time.
+
+    Dataset imports are queued by the management API.
+    Charts are updated after each successful import.
+    """
+    import_job_service = get_import_job_service()
+    click.secho("Waiting for import jobs ...", fg="green")
+    while True:
+        job = import_job_service.run_next_job()
+        if job is None:
+            if once:
+                break
+            time.sleep(poll_interval)
+            continue
+        if job.status != ImportJobStatus.DONE:
+            click.secho(f"Import job {job.job_id} failed. {job.message}.", fg="red")
+            continue
+        click.secho(
+            f"   ... import job {job.job_id} created dataset with EUFID: '{job.eufid}'.",
+            fg="green",
+        )
+        try:
+            _so_sunburst_update()
+        except Exception as exc:
+            click.secho(f"Failed to update charts. {exc}.", fg="red")
+    click.secho("   ... done.", fg="green")
+
+
+@dataset_cli.cli.command(
+    "snapshot",
+    epilog="Check docs at https://dieterich-lab.github.io/scimodom/flask.html.",
+)
+@click.argument("eufids", nargs=-1)
+def write_snapshots(eufids: tuple[str]) -> None:
+    """Write the snapshot of datasets.
+
+    Snapshots are columnar copies of dataset records, read
+    instead of the database to compare and export datasets.
+    They are written on import, use this command for datasets
+    imported before, or to rewrite snapshots.
+
+    \b
+    EUFIDS are dataset IDs. Default is all datasets.
+    """
+    session = get_session()
+    data_service = get_data_service()
+    if not eufids:
+        eufids = tuple(session.scalars(select(Dataset.id)).all())
+    for eufid in eufids:
+        data_service.write_snapshot(eufid)
+        if data_service.get_snapshot(eufid) is None:
+            click.secho(f"No snapshot written for dataset {eufid}.", fg="yellow")
+    click.secho(f"   ... done ({len(eufids)} datasets).", fg="green")
+
+
+def _import_datasets(
+    dataset_service: DatasetService,
+    import_arguments: list[tuple[Path, dict]],
+    metrics: ImportMetrics,
+    annotation_workers: int | None = None,
+) -> None:
+    for file_path, kwargs in import_arguments:
+        try:
+            with open_text_file(file_path) as fp:
+                eufid = dataset_service.import_dataset(
+                    fp,
+                    metrics=metrics,
+                    annotation_workers=annotation_workers,
+                    **kwargs,
+                )
+            _report_dataset_created(eufid)
+        except Exception as exc:
+            _report_dataset_failed(exc)
+            continue
+
+
+def _import_datasets_in_parallel(
+    dataset_service: DatasetService,
+    import_arguments: list[tuple[Path, dict]],
+    jobs: int,
+    metrics: ImportMetrics,
+    annotation_workers: int | None = None,
+) -> None:
+    # Workers inherit services by forking, but they do not access the
+    # database: import contexts are created, and prepared records
+    # are written, by the main process. At most 2 * jobs prepared
+    # files are waiting to be written at any time.
+    max_pending = 2 * jobs
+    pending: set[Future] = set()
+
+    def write_prepared(futures):
+        for future in futures:
+            try:
+                eufid = dataset_service.import_prepared_dataset(
+                    future.result(),
+                    metrics=metrics,
+                    annotation_workers=annotation_workers,
+                )
+                _report_dataset_created(eufid)
+            except Exception as exc:
+                _report_dataset_failed(exc)
+
+    with ProcessPoolExecutor(
+        max_workers=jobs, mp_context=multiprocessing.get_context("fork")
+    ) as executor:
+        for file_path, kwargs in import_arguments:
+            try:
+                with open_text_file(file_path) as fp:
+                    task = dataset_service.prepare_import(fp, **kwargs)
+            except Exception as exc:
+                _report_dataset_failed(exc)
+                continue
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                write_prepared(done)
+            pending.add(executor.submit(_prepare_records, task))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            write_prepared(done)
+
+
+def _prepare_records(task: DatasetImportTask) -> PreparedDataset:
+    with open_text_file(task.source) as fp:
+        return get_dataset_service().prepare_records(task, fp)
+
+
+def _get_file_paths(paths: tuple[str]) -> list[Path]:
+    file_paths = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            file_paths.extend(
+                sorted(
+                    p
+                    for p in path.iterdir()
+                    if p.is_file() and not p.name.startswith(".")
+                )
+            )
+        else:
+            file_paths.append(path)
+    return file_paths
+
+
+def _validate_datasets_in_parallel(
+    dataset_service: DatasetService,
+    file_paths: list[Path],
+    jobs: int,
+    report: Callable[[DatasetValidationReportDto], None],
+) -> None:
+    # Headers are validated by the main process, which accesses
+    # the database. Workers only parse and validate records.
+    futures: dict[Future, Path] = {}
+    with ProcessPoolExecutor(
+        max_workers=jobs, mp_context=multiprocessing.get_context("fork")
+    ) as executor:
+        for file_path in file_paths:
+            try:
+                with open_text_file(file_path) as fp:
+                    task = dataset_service.prepare_validation(fp, file_path.as_posix())
+            except Exception as exc:
+                report(_get_failed_validation_report(file_path, exc))
+                continue
+            futures[executor.submit(_validate_records, task)] = file_path
+        for future in as_completed(futures):
+            try:
+                report(future.result())
+            except Exception as exc:
+                report(_get_failed_validation_report(futures[future], exc))
+
+
+def _validate_records(task: DatasetValidationTask) -> DatasetValidationReportDto:
+    with open_text_file(task.source) as fp:
+        return get_dataset_service().validate_records(task, fp)
+
+
+def _get_failed_validation_report(
+    file_path: Path, exc: Exception
+) -> DatasetValidationReportDto:
+    return DatasetValidationReportDto(source=file_path.as_posix(), message=str(exc))
+
+
+def _report_validation(report: DatasetValidationReportDto, as_json: bool) -> None:
+    if as_json:
+        click.echo(report.model_dump_json())
+        return
+    if report.is_valid:
+        click.secho(
+            f"{report.source}: valid ({report.record_count} records)", fg="green"
+        )
+    else:
+        click.secho(
+            f"{report.source}: invalid ({report.record_count} records, "
+            f"{report.error_count} errors)",
+            fg="red",
+        )
+    if report.message is not None:
+        click.echo(f"   {report.message}")
+    if report.error_counts:
+        errors = ", ".join(f"{c.value}: {n}" for c, n in report.error_counts.items())
+        click.echo(f"   errors by class: {errors}")
+    for label, counts in [
+        ("unknown chroms", report.unknown_chroms),
+        ("unknown modification names", report.unknown_modification_names),
+    ]:
+        if counts:
+            values = ", ".join(f"{v} ({n})" for v, n in counts.items())
+            click.echo(f"   {label}: {values}")
+    if not report.is_sorted:
+        click.secho(
+            f"   records are not sorted (line {report.first_unsorted_line})",
+            fg="yellow",
+        )
+    elif report.duplicate_site_count:
+        click.secho(f"   duplicate sites: {report.duplicate_site_count}", fg="yellow")
+
+
+def _report_dataset_created(eufid: str) -> None:
+    click.secho(
+        f"   ... created dataset with EUFID: '{eufid}'...",
+        fg="green",
+    )
+
+
+def _report_dataset_failed(exc: Exception) -> None:
+    click.secho(
+        f"Failed to create dataset. {exc}... Skipping!",
+        fg="red",
+    )
+
+
 def _get_filename_and_title(metadata: ProjectMetaDataDto) -> tuple[str, str]:
     regexp = re.compile(r"(?:file=)(?P<file>.*),\s*(?:title=)(?P<title>.*)")
     if metadata.note is None:
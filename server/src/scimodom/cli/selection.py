@@ -97,3 +97,46 @@ def add_selection(
             fg="red",
         )
         raise click.Abort()
+
+
+@selection_cli.cli.command(
+    "rebuild-gene-cache",
+    epilog="Check docs at https://dieterich-lab.github.io/scimodom/flask.html.",
+)
+@click.argument("selection_ids", type=click.INT, nargs=-1)
+@click.option(
+    "--check",
+    is_flag=True,
+    show_default=True,
+    default=False,
+    help="Only report gene caches that are missing or out of date.",
+)
+def rebuild_gene_cache(selection_ids: tuple[int, ...], check: bool) -> None:
+    """Rebuild gene caches from the database.
+
+    Gene caches are merged when datasets are added, and
+    rebuilt when datasets are updated. Use this command
+    to check caches, and to rebuild those that are missing
+    or out of date.
+
+    \b
+    SELECTION_IDS are selection IDs. Default is all selections.
+    """
+    selection_service = get_selection_service()
+
+    try:
+        stale_selection_ids = selection_service.rebuild_gene_caches(
+            list(selection_ids) if selection_ids else None, is_check_only=check
+        )
+    except Exception as exc:
+        click.secho(f"Failed to rebuild gene caches. {exc}.", fg="red")
+        raise click.Abort()
+
+    if not stale_selection_ids:
+        click.secho("All gene caches are up to date.", fg="green")
+    elif check:
+        click.secho(
+            f"Gene caches missing or out of date: {stale_selection_ids}.", fg="yellow"
+        )
+    else:
+        click.secho(f"   ... rebuilt gene caches: {stale_selection_ids}.", fg="green")
@@ -37,6 +37,11 @@ class Config:
     UPLOAD_PATH: ClassVar[str | Path] = "uploads"
     FRONTEND_PATH: ClassVar[Path] = Path(DEFAULT_FRONTEND_PATH)
     BEDTOOLS_TMP_PATH: ClassVar[str | Path] = "/tmp/bedtools"
+    INSERT_MODES: ClassVar[str] = ""
+    ANNOTATION_ENGINE: ClassVar[str] = "numpy"
+    ANNOTATION_WORKERS: ClassVar[int] = 1
+    COMPARISON_ENGINE: ClassVar[str] = "numpy"
+    COMPARISON_CACHE_SIZE: ClassVar[int] = 1024 * 1024 * 1024
     LOGGING = dict(
         version=1,
         disable_existing_loggers=False,
@@ -126,6 +131,15 @@ def set_config_from_environment():
         UPLOAD_PATH = os.getenv("UPLOAD_PATH", "uploads")
         FRONTEND_PATH = Path(os.getenv("FRONTEND_PATH", Config.FRONTEND_PATH))
         BEDTOOLS_TMP_PATH = os.getenv("BEDTOOLS_TMP_PATH", Config.BEDTOOLS_TMP_PATH)
+        INSERT_MODES = os.getenv("INSERT_MODES", Config.INSERT_MODES)
+        ANNOTATION_ENGINE = os.getenv("ANNOTATION_ENGINE", Config.ANNOTATION_ENGINE)
+        ANNOTATION_WORKERS = int(
+            os.getenv("ANNOTATION_WORKERS", Config.ANNOTATION_WORKERS)
+        )
+        COMPARISON_ENGINE = os.getenv("COMPARISON_ENGINE", Config.COMPARISON_ENGINE)
+        COMPARISON_CACHE_SIZE = int(
+            os.getenv("COMPARISON_CACHE_SIZE", Config.COMPARISON_CACHE_SIZE)
+        )
 
         LOGGING = get_logging(FLASK_DEBUG)
 
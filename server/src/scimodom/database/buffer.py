@@ -1,7 +1,14 @@
-from typing import Generic, TypeVar, List
+import logging
+from tempfile import NamedTemporaryFile
+from typing import Any, Generic, TypeVar, List, Sequence
 
+from sqlalchemy import insert, text
 from sqlalchemy.orm import Session
 
+from scimodom.utils.specs.enums import InsertMode
+
+logger = logging.getLogger(__name__)
+
 T = TypeVar("T")  # Should be SqlAlchemy model class
 
 
@@ -51,3 +58,162 @@ class InsertBuffer(Generic[T]):
         self._session.add_all(self.buffer)
         self._session.flush()
         self.buffer = []
+
+
+class BulkInsertBuffer(Generic[T]):
+    """Utility class to insert plain tuples into a model table. Unlike
+    :class:`InsertBuffer`, records are not tracked by the session (except
+    for :attr:`InsertMode.ORM`), and are written with a single
+    executemany (:attr:`InsertMode.CORE`), or a LOAD DATA LOCAL INFILE
+    statement from a spooled TSV file (:attr:`InsertMode.LOAD_DATA`,
+    MySQL only, otherwise falls back to executemany). In all cases,
+    statements are executed on the session connection, i.e. within the
+    current transaction (or savepoint). Note that with LOAD DATA LOCAL,
+    MySQL reports data conversion errors as warnings, records must
+    therefore be validated beforehand.
+
+    :param session: SQLAlchemy ORM session
+    :type session: Session
+    :param model: SQLAlchemy model class
+    :type model: type[T]
+    :param columns: Column names, in the order of the queued values
+    :type columns: Sequence[str]
+    :param mode: Insert mode
+    :type mode: InsertMode
+    :param auto_flush: Imported data is flushed by default.
+    If set to false, data is only inserted on explicit flush.
+    :type auto_flush: bool
+    :param buffer_size: Maximal number of record before flushing.
+    :type buffer_size: int
+    :param tmp_path: Directory for spooled TSV files. If None,
+    the default temporary directory is used.
+    :type tmp_path: str | None
+
+    The number of records written so far is available as
+    :attr:`row_count`.
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        model: type[T],
+        columns: Sequence[str],
+        mode: InsertMode = InsertMode.CORE,
+        auto_flush: bool = True,
+        buffer_size: int = 10000,
+        tmp_path: str | None = None,
+    ) -> None:
+        """Initializer method."""
+        self._session = session
+        self._model = model
+        self._table = model.__table__  # type: ignore[attr-defined]
+        self._columns = list(columns)
+        self._mode = mode
+        self._auto_flush = auto_flush
+        self._buffer_size = buffer_size
+        self._tmp_path = tmp_path
+
+        self.buffer: List[tuple[Any, ...]] = []
+        self.row_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.flush()
+
+    def queue(self, values: tuple[Any, ...]) -> None:
+        """Buffers data and flush if required."""
+        self.buffer.append(values)
+        if self._auto_flush and len(self.buffer) >= self._buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Insert and reset buffer."""
+        if len(self.buffer) == 0:
+            return
+        if self._mode == InsertMode.ORM:
+            self._session.add_all(
+                [self._model(**dict(zip(self._columns, v))) for v in self.buffer]
+            )
+            self._session.flush()
+        elif self._mode == InsertMode.LOAD_DATA and self._is_mysql():
+            self._load_data()
+        else:
+            self._session.execute(
+                insert(self._table),
+                [dict(zip(self._columns, v)) for v in self.buffer],
+            )
+        self.row_count += len(self.buffer)
+        self.buffer = []
+
+    def _is_mysql(self) -> bool:
+        return self._session.get_bind().dialect.name in ["mysql", "mariadb"]
+
+    def _load_data(self) -> None:
+        dialect = self._session.get_bind().dialect
+        processors = []
+        for name in self._columns:
+            column_type = self._table.c[name].type
+            processors.append(column_type.dialect_impl(dialect).bind_processor(dialect))
+        with NamedTemporaryFile(
+            mode="w", suffix=".tsv", dir=self._tmp_path, encoding="utf-8"
+        ) as fh:
+            for values in self.buffer:
+                fh.write(
+                    "\t".join(
+                        _to_tsv_field(v if p is None else p(v))
+                        for v, p in zip(values, processors)
+                    )
+                )
+                fh.write("\n")
+            fh.flush()
+            columns = ", ".join(f"`{name}`" for name in self._columns)
+            self._session.execute(
+                text(
+                    f"LOAD DATA LOCAL INFILE :path INTO TABLE `{self._table.name}` "
+                    f"CHARACTER SET utf8mb4 ({columns})"
+                ),
+                {"path": fh.name},
+            )
+
+
+def _to_tsv_field(value: Any) -> str:
+    if value is None:
+        return "\\N"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+
+
+def get_insert_mode(
+    insert_modes: dict[str, InsertMode], model: type[Any]
+) -> InsertMode:
+    """Return insert mode for a model, or
+    :attr:`InsertMode.CORE` if none is set.
+
+    :param insert_modes: Insert modes by table name
+    :type insert_modes: dict[str, InsertMode]
+    :param model: SQLAlchemy model class
+    :type model: type
+    :returns: Insert mode
+    :rtype: InsertMode
+    """
+    return insert_modes.get(model.__tablename__, InsertMode.CORE)
+
+
+def get_insert_modes(value: str) -> dict[str, InsertMode]:
+    """Parse insert modes by table name, e.g.
+    "data=load_data,data_annotation=core".
+
+    :param value: Comma-separated list of table=mode
+    :type value: str
+    :returns: Insert modes by table name
+    :rtype: dict[str, InsertMode]
+    """
+    insert_modes = {}
+    for item in value.split(","):
+        if item.strip() == "":
+            continue
+        table, _, mode = item.partition("=")
+        insert_modes[table.strip()] = InsertMode(mode.strip())
+    return insert_modes
@@ -21,17 +21,29 @@ class Base(DeclarativeBase):
     )
 
 
-def make_session(database_uri: str) -> tuple[Engine, sessionmaker[Session]]:
+def make_session(
+    database_uri: str, local_infile: bool = False
+) -> tuple[Engine, sessionmaker[Session]]:
     """Wrapper for engine creation and configurable Session factory.
 
     :param database_uri: Database URI
     :type database_uri: str
+    :param local_infile: Allow LOAD DATA LOCAL INFILE (MySQL only)
+    :type local_infile: bool
     :returns: engine and session
     :rtype: tuple(Engine, Session)
     """
     # https://docs.sqlalchemy.org/en/20/core/pooling.html#pool-disconnects
     # connect_args={"check_same_thread": False}
-    engine = create_engine(database_uri, pool_pre_ping=True, pool_recycle=3600)
+    connect_args = {}
+    if local_infile and database_uri.startswith("mysql"):
+        connect_args["local_infile"] = 1
+    engine = create_engine(
+        database_uri,
+        pool_pre_ping=True,
+        pool_recycle=3600,
+        connect_args=connect_args,
+    )
     session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     return engine, session
 
@@ -274,6 +274,37 @@ class GenomicAnnotation(Base):
     )
 
 
+class GenomicFeature(Base):
+    """Genomic feature intervals by gene and annotation release,
+    with UCSC-style bins (only used with the SQL annotation engine).
+    Intergenic intervals are unstranded."""
+
+    __tablename__ = "genomic_feature"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    annotation_id: Mapped[int] = mapped_column(ForeignKey("annotation.id"))
+    release: Mapped[int] = mapped_column(nullable=False)
+    chrom: Mapped[str] = mapped_column(String(128), nullable=False)
+    start: Mapped[int] = mapped_column(nullable=False)
+    end: Mapped[int] = mapped_column(nullable=False)
+    strand: Mapped[Strand] = mapped_column(Enum(Strand), nullable=False)
+    bin: Mapped[int] = mapped_column(nullable=False)
+    gene_id: Mapped[str] = mapped_column(String(128), nullable=False)
+    feature: Mapped[str] = mapped_column(String(32), nullable=False)
+
+    __table_args__ = (
+        Index(
+            "idx_feature_bin",
+            "annotation_id",
+            "release",
+            "chrom",
+            "strand",
+            "bin",
+            "start",
+        ),
+    )
+
+
 # for Project and Dataset, allow Optional (None in Python), but nullable=False (NOT NULL)
 # to instantiate class, assign later?
 class Project(Base):
@@ -454,6 +485,22 @@ class DataAnnotation(Base):
     inst_data: Mapped["Data"] = relationship(back_populates="annotations")
 
 
+class DataAnnotationShadow(Base):
+    """Staging table for DataAnnotation, used when re-annotating
+    data records for a new annotation release. Rows are moved to
+    DataAnnotation at once, and there are no foreign keys, as
+    records may be deleted while re-annotating."""
+
+    __tablename__ = "data_annotation_shadow"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    data_id: Mapped[int] = mapped_column(nullable=False, index=True)
+    gene_id: Mapped[str] = mapped_column(String(128), nullable=False)
+    feature: Mapped[str] = mapped_column(String(32), nullable=False)
+
+    __table_args__ = (UniqueConstraint(data_id, gene_id, feature),)
+
+
 class Sprinzl(Base):
     """Sprinzl tRNA position numbering"""
 
@@ -1,9 +1,12 @@
 import logging
 from functools import cache
+from typing import Any
 
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from scimodom.config import get_config
+from scimodom.database.buffer import get_insert_modes
 from scimodom.database.database import get_session
 from scimodom.database.models import (
     Annotation,
@@ -19,13 +22,17 @@ from scimodom.services.annotation.generic import (
     AnnotationNotFoundError,
 )
 from scimodom.services.annotation.gtrnadb import GtRNAdbAnnotationService
+from scimodom.services.annotation.reannotation import (
+    ReannotationError,
+    ReannotationService,
+)
 from scimodom.services.bedtools import get_bedtools_service
 from scimodom.services.data import get_data_service
 from scimodom.services.external import get_external_service
 from scimodom.services.file import get_file_service
 from scimodom.services.gene import get_gene_service
 from scimodom.services.web import get_web_service
-from scimodom.utils.specs.enums import AnnotationSource
+from scimodom.utils.specs.enums import AnnotationEngine, AnnotationSource
 
 logger = logging.getLogger(__name__)
 
@@ -220,9 +227,11 @@ class AnnotationService:
         annotation_source: AnnotationSource,
         eufid: str,
         selection_ids: list[int],
+        min_data_id: int | None = None,
+        workers: int | None = None,
     ):
         self._services_by_annotation_source[annotation_source].annotate_data(
-            taxa_id, eufid, selection_ids
+            taxa_id, eufid, selection_ids, min_data_id, workers
         )
 
     def get_features_by_rna_type(self, rna_type: str) -> list[str]:
@@ -241,32 +250,43 @@ class AnnotationService:
 def get_annotation_service() -> AnnotationService:
     """Helper function to set up an AnnotationService object by injecting its dependencies."""
     session = get_session()
-    data_service = get_data_service()
-    bedtools_service = get_bedtools_service()
-    external_service = get_external_service()
-    web_service = get_web_service()
-    gene_service = get_gene_service()
-    file_service = get_file_service()
+    dependencies = _get_annotation_service_dependencies()
     return AnnotationService(
         session=session,
         services_by_annotation_source={
             AnnotationSource.ENSEMBL: EnsemblAnnotationService(
-                session=session,
-                data_service=data_service,
-                bedtools_service=bedtools_service,
-                external_service=external_service,
-                web_service=web_service,
-                gene_service=gene_service,
-                file_service=file_service,
+                session=session, **dependencies
             ),
             AnnotationSource.GTRNADB: GtRNAdbAnnotationService(
-                session=session,
-                data_service=data_service,
-                bedtools_service=bedtools_service,
-                external_service=external_service,
-                web_service=web_service,
-                gene_service=gene_service,
-                file_service=file_service,
+                session=session, **dependencies
             ),
         },
     )
+
+
+@cache
+def get_reannotation_service() -> ReannotationService:
+    """Helper function to set up a ReannotationService object by injecting its dependencies."""
+    session = get_session()
+    return ReannotationService(
+        session=session,
+        ensembl_service=EnsemblAnnotationService(
+            session=session, **_get_annotation_service_dependencies()
+        ),
+        file_service=get_file_service(),
+        gene_service=get_gene_service(),
+    )
+
+
+def _get_annotation_service_dependencies() -> dict[str, Any]:
+    return {
+        "data_service": get_data_service(),
+        "bedtools_service": get_bedtools_service(),
+        "external_service": get_external_service(),
+        "web_service": get_web_service(),
+        "gene_service": get_gene_service(),
+        "file_service": get_file_service(),
+        "insert_modes": get_insert_modes(get_config().INSERT_MODES),
+        "annotation_workers": get_config().ANNOTATION_WORKERS,
+        "annotation_engine": AnnotationEngine(get_config().ANNOTATION_ENGINE),
+    }
@@ -1,13 +1,50 @@
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+import itertools
 import logging
+import multiprocessing
 import shutil
 from pathlib import Path
-from typing import ClassVar, Callable
+from typing import ClassVar, Callable, Iterable, Iterator, NamedTuple, Sequence
 from posixpath import join as urljoin
 
-from scimodom.database.buffer import InsertBuffer
-from scimodom.database.models import Annotation, DataAnnotation, GenomicAnnotation
-from scimodom.services.annotation.generic import GenericAnnotationService
-from scimodom.utils.specs.enums import AssemblyFileType, Ensembl
+from sqlalchemy import (
+    Row,
+    and_,
+    delete,
+    exists,
+    func,
+    insert,
+    or_,
+    select,
+    union,
+    update,
+)
+
+from scimodom.database.buffer import BulkInsertBuffer, get_insert_mode
+from scimodom.database.models import (
+    Annotation,
+    Data,
+    DataAnnotation,
+    DataAnnotationShadow,
+    GenomicAnnotation,
+    GenomicFeature,
+)
+from scimodom.services.bedtools import BedToolsService, ENSEMBL_FEATURE_INDEX
+from scimodom.services.annotation.generic import (
+    GENOMIC_ANNOTATION_COLUMNS,
+    GenericAnnotationService,
+)
+from scimodom.services.data import NoDataRecords
+from scimodom.utils.genomic_bin import BIN_LEVELS, get_bin
+from scimodom.utils.import_metrics import StageMetrics, get_import_metrics
+from scimodom.utils.specs.enums import (
+    AnnotationEngine,
+    AssemblyFileType,
+    Ensembl,
+    ImportMetricsStage,
+    Strand,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -25,6 +62,9 @@ class EnsemblAnnotationService(GenericAnnotationService):
     :type FMT: str
     :param ANNOTATION_FILE: Annotation file name
     :type ANNOTATION_FILE: Callable
+    :param ANNOTATION_SHARD_SIZE: Maximum number of records per chunk,
+    and thus per shard
+    :type ANNOTATION_SHARD_SIZE: int
     :param FEATURES: Genomic features
     :type FEATURES: dict of {str: dict of {str: str}}
     """
@@ -33,6 +73,7 @@ class EnsemblAnnotationService(GenericAnnotationService):
     ANNOTATION_FILE: ClassVar[
         Callable
     ] = "{organism}.{assembly}.{release}.chr.{fmt}.gz".format
+    ANNOTATION_SHARD_SIZE: ClassVar[int] = 500000
     FEATURES: ClassVar[dict[str, dict[str, str]]] = {
         "conventional": {
             "exon": "Exonic",
@@ -65,20 +106,29 @@ class EnsemblAnnotationService(GenericAnnotationService):
         """This method automates the creation of Ensembl
         annotations for a given organism for the current
         release. The annotation must exist in the database.
+        If the release already exists, but has no feature
+        index, only the index is created. With AnnotationEngine.SQL,
+        features are also loaded into GenomicFeature, if not yet done.
 
         :param taxa_id: Taxonomy ID
         :type taxa_id: int
         """
         annotation = self.get_annotation(taxa_id)
+        release_path = self.get_release_path(annotation)
         if self._release_exists(annotation.id):
+            if not Path(release_path, ENSEMBL_FEATURE_INDEX).is_dir():
+                self._create_feature_index(release_path)
+            if self._annotation_engine == AnnotationEngine.SQL and not (
+                self._genomic_features_exist(annotation.id, annotation.release)
+            ):
+                try:
+                    self._load_genomic_features(annotation.id, release_path)
+                    self._session.commit()
+                except Exception:
+                    self._session.rollback()
+                    raise
             return
 
-        release_path = self.get_release_path(annotation)
-        annotation_file, url = self._get_annotation_paths(annotation, release_path)
-        chrom_file = self._file_service.get_assembly_file_path(
-            annotation.taxa_id, AssemblyFileType.CHROM
-        )
-
         logger.info(
             f"Setting up Ensembl {annotation.release} for {annotation.taxa_id}..."
         )
@@ -90,43 +140,439 @@ class EnsemblAnnotationService(GenericAnnotationService):
             raise
 
         try:
-            with open(annotation_file, "wb") as fh:
-                self._web_service.stream_request_to_file(url, fh)
-            self._bedtools_service.ensembl_to_bed_features(
-                annotation_file,
-                chrom_file,
-                {k: list(v.keys()) for k, v in self.FEATURES.items()},
-            )
+            annotation_file = self._create_release_files(annotation, release_path)
             self._update_database(annotation.id, annotation_file)
+            if self._annotation_engine == AnnotationEngine.SQL:
+                self._load_genomic_features(annotation.id, release_path)
             self._session.commit()
         except Exception:
             self._session.rollback()
             shutil.rmtree(release_path)
             raise
 
-    def _annotate_data_in_database(self, taxa_id: int, eufid: str) -> None:
+    def create_release(self, annotation: Annotation, release: int) -> Path:
+        """Create annotation files for a given release, e.g.
+        a new Ensembl release, without changing the database,
+        see :meth:`update_genomic_annotation`. Files are kept
+        if they are complete, i.e. if they have a feature index,
+        else they are created again.
+
+        :param annotation: Annotation instance
+        :type annotation: Annotation
+        :param release: Ensembl release
+        :type release: int
+        :returns: Release path
+        :rtype: Path
+        """
+        release_path = self.get_release_path(annotation, release)
+        if Path(release_path, ENSEMBL_FEATURE_INDEX).is_dir():
+            return release_path
+
+        logger.info(f"Setting up Ensembl {release} for {annotation.taxa_id}...")
+
+        shutil.rmtree(release_path, ignore_errors=True)
+        release_path.mkdir(parents=True)
+        try:
+            self._create_release_files(annotation, release_path)
+        except Exception:
+            shutil.rmtree(release_path)
+            raise
+        return release_path
+
+    def update_genomic_annotation(
+        self, annotation: Annotation, release_path: Path
+    ) -> list[str]:
+        """Update GenomicAnnotation with the genes of a release
+        created with :meth:`create_release`. New genes are added,
+        and existing genes are updated. Genes that are not part
+        of the release are kept, as data records may still be
+        annotated with them. With AnnotationEngine.SQL, features
+        of the release are loaded into GenomicFeature. The caller
+        must commit.
+
+        :param annotation: Annotation instance
+        :type annotation: Annotation
+        :param release_path: Release path
+        :type release_path: Path
+        :returns: IDs of genes that are not part of the release
+        :rtype: list[str]
+        """
+        annotation_file, _ = self._get_annotation_paths(annotation, release_path)
+        gene_ids = set(
+            self._session.scalars(
+                select(GenomicAnnotation.id).filter_by(annotation_id=annotation.id)
+            )
+        )
+        records = self._bedtools_service.get_ensembl_annotation_records(
+            annotation_file,
+            annotation.id,
+            self.FEATURES["extended"]["intergenic"],
+        )
+        updated_records = []
+        with BulkInsertBuffer[GenomicAnnotation](
+            self._session,
+            GenomicAnnotation,
+            GENOMIC_ANNOTATION_COLUMNS,
+            mode=get_insert_mode(self._insert_modes, GenomicAnnotation),
+        ) as buffer:
+            for record in records:
+                values = (record.id, record.annotation_id, record.name, record.biotype)
+                if record.id in gene_ids:
+                    gene_ids.remove(record.id)
+                    updated_records.append(
+                        dict(zip(GENOMIC_ANNOTATION_COLUMNS, values))
+                    )
+                else:
+                    buffer.queue(values)
+        if updated_records:
+            self._session.execute(update(GenomicAnnotation), updated_records)
+        if self._annotation_engine == AnnotationEngine.SQL:
+            self._load_genomic_features(annotation.id, release_path)
+        return sorted(gene_ids)
+
+    def delete_genomic_features(self, annotation: Annotation, release: int) -> None:
+        """Delete GenomicFeature records of a release, e.g. of
+        the previous release after re-annotation. The caller
+        must commit.
+
+        :param annotation: Annotation instance
+        :type annotation: Annotation
+        :param release: Ensembl release
+        :type release: int
+        """
+        self._session.execute(
+            delete(GenomicFeature).where(
+                GenomicFeature.annotation_id == annotation.id,
+                GenomicFeature.release == release,
+            )
+        )
+
+    def annotate_data_for_release(
+        self,
+        annotation: Annotation,
+        release: int,
+        eufid: str,
+        model: type[DataAnnotation] | type[DataAnnotationShadow],
+        workers: int | None = None,
+    ) -> None:
+        """Annotate all records of a dataset with a release
+        created with :meth:`create_release`, and add entries
+        to DataAnnotation, or to its shadow table, see
+        :meth:`_annotate_data_in_database`.
+
+        :param annotation: Annotation instance
+        :type annotation: Annotation
+        :param release: Ensembl release
+        :type release: int
+        :param eufid: EUF ID
+        :type eufid: str
+        :param model: Model table to which entries are added
+        :type model: type[DataAnnotation] | type[DataAnnotationShadow]
+        :param workers: Number of worker processes. Default is the
+        number of annotation workers of this service.
+        :type workers: int | None
+        """
+        self._annotate_dataset(annotation, release, eufid, model, None, workers)
+
+    def _annotate_data_in_database(
+        self,
+        taxa_id: int,
+        eufid: str,
+        min_data_id: int | None = None,
+        workers: int | None = None,
+    ) -> None:
         """Annotate Data: add entries to DataAnnotation
         for a given dataset.
 
+        Records are read and annotated by chunks of at most
+        ANNOTATION_SHARD_SIZE records. With more than one worker,
+        chunks are partitioned into shards by chrom and strand.
+        Shards with more than 1/workers of the chunk records are
+        split, so that a chunk with a single chrom and strand is
+        still shared by all workers. Shards are annotated in
+        parallel worker processes, and annotated records are
+        written by the main process.
+
+        With AnnotationEngine.SQL, records are instead annotated
+        in the database with a single INSERT ... SELECT, joining
+        Data and GenomicFeature on chrom, strand, and bins, and
+        workers are not used.
+
         :param taxa_id: Taxonomy ID
         :type taxa_id: int
         :param eufid: EUF ID
         :type eufid: str
+        :param min_data_id: If given, only annotate records with a larger ID,
+        e.g. records added when updating a dataset.
+        :type min_data_id: int | None
+        :param workers: Number of worker processes. Default is the
+        number of annotation workers of this service.
+        :type workers: int | None
         """
         annotation = self.get_annotation(taxa_id)
-        release_path = self.get_release_path(annotation)
+        self._annotate_dataset(
+            annotation,
+            annotation.release,
+            eufid,
+            DataAnnotation,
+            min_data_id,
+            workers,
+        )
+
+    def _annotate_dataset(
+        self,
+        annotation: Annotation,
+        release: int,
+        eufid: str,
+        model: type[DataAnnotation] | type[DataAnnotationShadow],
+        min_data_id: int | None,
+        workers: int | None,
+    ) -> None:
+        if workers is None:
+            workers = self._annotation_workers
+        release_path = self.get_release_path(annotation, release)
 
         logger.debug(f"Annotating records for EUFID {eufid}...")
 
-        records = list(self._data_service.get_by_dataset(eufid))
+        with get_import_metrics().stage(ImportMetricsStage.ANNOTATION) as stage_metrics:
+            if self._annotation_engine == AnnotationEngine.SQL:
+                self._annotate_dataset_in_database(
+                    annotation.id, release, eufid, model, min_data_id, stage_metrics
+                )
+                return
+            chunks = self._data_service.get_chunks_by_dataset(
+                eufid,
+                min_data_id=min_data_id,
+                chunk_size=self.ANNOTATION_SHARD_SIZE,
+            )
+            try:
+                first_chunk = next(chunks)
+            except NoDataRecords:
+                if min_data_id is None:
+                    raise
+                return
+
+            def counted(chunks: Iterable[Sequence[Row]]) -> Iterator[Sequence[Row]]:
+                for chunk in chunks:
+                    stage_metrics.rows_in += len(chunk)
+                    yield chunk
+
+            features = {
+                **self.FEATURES["conventional"],
+                **self.FEATURES["extended"],
+            }
+            all_chunks = counted(itertools.chain([first_chunk], chunks))
+            if workers > 1:
+                annotated_records = self._annotate_shards(
+                    release_path, features, all_chunks, workers
+                )
+            else:
+                annotated_records = (
+                    (record.gene_id, record.data_id, record.feature)
+                    for chunk in all_chunks
+                    for record in self._bedtools_service.annotate_data_using_ensembl(
+                        release_path, dict(features), chunk  # type: ignore
+                    )
+                )
+            with BulkInsertBuffer[DataAnnotation | DataAnnotationShadow](
+                self._session,
+                model,
+                ["gene_id", "data_id", "feature"],
+                mode=get_insert_mode(self._insert_modes, model),
+            ) as buffer:
+                for values in annotated_records:
+                    buffer.queue(values)
+            stage_metrics.rows_out += buffer.row_count
 
-        features = {**self.FEATURES["conventional"], **self.FEATURES["extended"]}
-        annotated_records = self._bedtools_service.annotate_data_using_ensembl(
-            release_path, features, records
+    def _annotate_dataset_in_database(
+        self,
+        annotation_id: int,
+        release: int,
+        eufid: str,
+        model: type[DataAnnotation] | type[DataAnnotationShadow],
+        min_data_id: int | None,
+        stage_metrics: StageMetrics,
+    ) -> None:
+        data_filter = [Data.dataset_id == eufid]
+        if min_data_id is not None:
+            data_filter.append(Data.id > min_data_id)
+        count = self._session.scalar(
+            select(func.count()).select_from(Data).where(*data_filter)
+        )
+        if count == 0:
+            if min_data_id is None:
+                raise NoDataRecords(f"No records found for dataset id(s) {eufid}!")
+            return
+        stage_metrics.rows_in += count
+
+        # candidate features are in the bins overlapping
+        # each record, at each level, see genomic_bin
+        bin_overlap = or_(
+            *(
+                GenomicFeature.bin.between(
+                    offset + Data.start.op(">>")(shift),
+                    offset + (Data.end - 1).op(">>")(shift),
+                )
+                for offset, shift in BIN_LEVELS
+            )
+        )
+
+        def get_query(*strand_conditions):
+            return (
+                select(GenomicFeature.gene_id, Data.id, GenomicFeature.feature)
+                .join(
+                    GenomicFeature,
+                    and_(
+                        GenomicFeature.annotation_id == annotation_id,
+                        GenomicFeature.release == release,
+                        GenomicFeature.chrom == Data.chrom,
+                        *strand_conditions,
+                        bin_overlap,
+                        GenomicFeature.start < Data.end,
+                        GenomicFeature.end > Data.start,
+                    ),
+                )
+                .where(*data_filter)
+            )
+
+        # records overlapping several intervals of a gene are annotated once
+        query = union(
+            get_query(
+                GenomicFeature.strand == Data.strand,
+                GenomicFeature.strand != Strand.UNDEFINED,
+            ),
+            # intergenic
+            get_query(GenomicFeature.strand == Strand.UNDEFINED),
+        )
+        result = self._session.execute(
+            insert(model).from_select(["gene_id", "data_id", "feature"], query)
+        )
+        stage_metrics.rows_out += result.rowcount
+
+    def _genomic_features_exist(self, annotation_id: int, release: int) -> bool:
+        return self._session.scalar(
+            select(
+                exists().where(
+                    GenomicFeature.annotation_id == annotation_id,
+                    GenomicFeature.release == release,
+                )
+            )
+        )
+
+    def _load_genomic_features(self, annotation_id: int, release_path: Path) -> None:
+        release = int(release_path.name)
+        self._session.execute(
+            delete(GenomicFeature).where(
+                GenomicFeature.annotation_id == annotation_id,
+                GenomicFeature.release == release,
+            )
+        )
+        records = self._bedtools_service.get_ensembl_feature_records(
+            release_path,
+            {**self.FEATURES["conventional"], **self.FEATURES["extended"]},
+        )
+        with BulkInsertBuffer[GenomicFeature](
+            self._session,
+            GenomicFeature,
+            [
+                "annotation_id",
+                "release",
+                "chrom",
+                "start",
+                "end",
+                "strand",
+                "bin",
+                "gene_id",
+                "feature",
+            ],
+            mode=get_insert_mode(self._insert_modes, GenomicFeature),
+        ) as buffer:
+            for chrom, start, end, strand, gene_id, feature in records:
+                buffer.queue(
+                    (
+                        annotation_id,
+                        release,
+                        chrom,
+                        start,
+                        end,
+                        Strand(strand),
+                        get_bin(start, end),
+                        gene_id,
+                        feature,
+                    )
+                )
+        logger.info(
+            f"Loaded {buffer.row_count} genomic features for release {release}."
+        )
+
+    def _annotate_shards(
+        self,
+        release_path: Path,
+        features: dict[str, str],
+        chunks: Iterable[Sequence[Row]],
+        workers: int,
+    ) -> Iterator[tuple[str, int, str]]:
+        # Workers do not access the database, annotated records
+        # are merged by the main process as shards are done. At
+        # most 2 * workers shards are pending at any time.
+        max_pending = 2 * workers
+        pending: set[Future] = set()
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("fork")
+        ) as executor:
+            for chunk in chunks:
+                max_shard_size = -(-len(chunk) // workers)
+                for shard in self._get_shards(chunk, max_shard_size):
+                    if len(pending) >= max_pending:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            yield from future.result()
+                    pending.add(
+                        executor.submit(
+                            _annotate_shard,
+                            self._bedtools_service,
+                            release_path,
+                            dict(features),
+                            shard,
+                        )
+                    )
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+
+    @staticmethod
+    def _get_shards(chunk: Sequence[Row], max_size: int) -> list[list["_ShardRecord"]]:
+        # records by chrom and strand, split into at most max_size records
+        partitions: dict[tuple[str, Strand], list[_ShardRecord]] = defaultdict(list)
+        for row in chunk:
+            record = _ShardRecord._make(row)
+            partitions[(record.chrom, record.strand)].append(record)
+        return [
+            partition[idx : idx + max_size]
+            for partition in partitions.values()
+            for idx in range(0, len(partition), max_size)
+        ]
+
+    def _create_release_files(self, annotation: Annotation, release_path: Path) -> Path:
+        annotation_file, url = self._get_annotation_paths(annotation, release_path)
+        chrom_file = self._file_service.get_assembly_file_path(
+            annotation.taxa_id, AssemblyFileType.CHROM
+        )
+        with open(annotation_file, "wb") as fh:
+            self._web_service.stream_request_to_file(url, fh)
+        self._bedtools_service.ensembl_to_bed_features(
+            annotation_file,
+            chrom_file,
+            {k: list(v.keys()) for k, v in self.FEATURES.items()},
+        )
+        self._create_feature_index(release_path)
+        return annotation_file
+
+    def _create_feature_index(self, release_path: Path) -> None:
+        self._bedtools_service.ensembl_to_feature_index(
+            release_path, {k: list(v.keys()) for k, v in self.FEATURES.items()}
         )
-        with InsertBuffer[DataAnnotation](self._session) as buffer:
-            for record in annotated_records:
-                buffer.queue(DataAnnotation(**record.model_dump()))
 
     def _update_database(self, annotation_id: int, annotation_file: Path) -> None:
         records = self._bedtools_service.get_ensembl_annotation_records(
@@ -134,17 +580,26 @@ class EnsemblAnnotationService(GenericAnnotationService):
             annotation_id,
             self.FEATURES["extended"]["intergenic"],
         )
-        with InsertBuffer[GenomicAnnotation](self._session) as buffer:
+        with BulkInsertBuffer[GenomicAnnotation](
+            self._session,
+            GenomicAnnotation,
+            GENOMIC_ANNOTATION_COLUMNS,
+            mode=get_insert_mode(self._insert_modes, GenomicAnnotation),
+        ) as buffer:
             for record in records:
-                buffer.queue(GenomicAnnotation(**record.model_dump()))
+                buffer.queue(
+                    (record.id, record.annotation_id, record.name, record.biotype)
+                )
 
     def _get_annotation_paths(
         self, annotation: Annotation, release_path: Path
     ) -> tuple[Path, str]:
+        # the release is that of the path, see create_release
+        release = release_path.name
         filen = self.ANNOTATION_FILE(
             organism=release_path.parent.parent.name,
             assembly=release_path.parent.name,
-            release=annotation.release,
+            release=release,
             fmt=self.FMT,
         )
         # TODO: AD HOC
@@ -152,9 +607,36 @@ class EnsemblAnnotationService(GenericAnnotationService):
             filen = filen.replace(".chr", "")
         url = urljoin(
             Ensembl.FTP.value,
-            f"release-{annotation.release}",
+            f"release-{release}",
             self.FMT,
             release_path.parent.parent.name.lower(),
             filen,
         )
         return Path(release_path, filen), url
+
+
+class _ShardRecord(NamedTuple):
+    """Data record fields required for annotation, see
+    DATA_RECORD_COLUMNS and :meth:`BedToolsService.annotate_data_using_ensembl`."""
+
+    id: int
+    chrom: str
+    start: int
+    end: int
+    name: str
+    score: int
+    strand: Strand
+
+
+def _annotate_shard(
+    bedtools_service: BedToolsService,
+    release_path: Path,
+    features: dict[str, str],
+    shard: list[_ShardRecord],
+) -> list[tuple[str, int, str]]:
+    return [
+        (record.gene_id, record.data_id, record.feature)
+        for record in bedtools_service.annotate_data_using_ensembl(
+            release_path, features, shard  # type: ignore
+        )
+    ]
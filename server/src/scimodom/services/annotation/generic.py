@@ -17,9 +17,17 @@ from scimodom.services.external import ExternalService
 from scimodom.services.file import FileService
 from scimodom.services.gene import GeneService
 from scimodom.services.web import WebService
+from scimodom.utils.import_metrics import get_import_metrics
+from scimodom.utils.specs.enums import (
+    AnnotationEngine,
+    ImportMetricsStage,
+    InsertMode,
+)
 
 logger = logging.getLogger(__name__)
 
+GENOMIC_ANNOTATION_COLUMNS = ["id", "annotation_id", "name", "biotype"]
+
 
 class AnnotationNotFoundError(Exception):
     """Exception handling for a non-existing Annotation
@@ -38,6 +46,9 @@ class GenericAnnotationService(ABC):
         web_service: WebService,
         gene_service: GeneService,
         file_service: FileService,
+        insert_modes: dict[str, InsertMode] | None = None,
+        annotation_workers: int = 1,
+        annotation_engine: AnnotationEngine = AnnotationEngine.NUMPY,
     ) -> None:
         """Utility class to handle annotations.
 
@@ -53,6 +64,13 @@ class GenericAnnotationService(ABC):
         :type web_service: WebService
         :param file_service: FileService
         :type file_service: FileService
+        :param insert_modes: Insert modes by table name, see :class:`BulkInsertBuffer`
+        :type insert_modes: dict[str, InsertMode] | None
+        :param annotation_workers: Default number of worker processes
+        used to annotate data records, see :meth:`annotate_data`
+        :type annotation_workers: int
+        :param annotation_engine: Engine used to annotate data records
+        :type annotation_engine: AnnotationEngine
         """
 
         self._session = session
@@ -62,6 +80,9 @@ class GenericAnnotationService(ABC):
         self._web_service = web_service
         self._gene_service = gene_service
         self._file_service = file_service
+        self._insert_modes = {} if insert_modes is None else insert_modes
+        self._annotation_workers = annotation_workers
+        self._annotation_engine = annotation_engine
 
         self._version = self._session.execute(
             select(AnnotationVersion.version_num)
@@ -93,16 +114,22 @@ class GenericAnnotationService(ABC):
                 f"No such {source} annotation for taxonomy ID: {taxa_id}."
             )
 
-    def get_release_path(self, annotation: Annotation) -> Path:
+    def get_release_path(
+        self, annotation: Annotation, release: int | None = None
+    ) -> Path:
         """Construct annotation release path.
 
         :param annotation: Annotation instance
         :type annotation: Annotation
+        :param release: Release, default is the annotation release
+        :type release: int | None
         :returns: Annotation release path
         :rtype: Path
         """
         path = self._file_service.get_annotation_dir(annotation.taxa_id)
-        return Path(path, str(annotation.release))
+        if release is None:
+            release = annotation.release
+        return Path(path, str(release))
 
     def _release_exists(self, annotation_id) -> bool:
         """Check if release exists by checking if the database
@@ -117,11 +144,31 @@ class GenericAnnotationService(ABC):
             return True
         return False
 
-    def annotate_data(self, taxa_id: int, eufid: str, selection_ids: list[int]):
-        self._annotate_data_in_database(taxa_id, eufid)
-        for selection_id in selection_ids:
-            self._gene_service.update_gene_cache(selection_id)
+    def annotate_data(
+        self,
+        taxa_id: int,
+        eufid: str,
+        selection_ids: list[int],
+        min_data_id: int | None = None,
+        workers: int | None = None,
+    ):
+        self._annotate_data_in_database(taxa_id, eufid, min_data_id, workers)
+        with get_import_metrics().stage(ImportMetricsStage.GENE_CACHE) as stage_metrics:
+            for selection_id in selection_ids:
+                # records of an updated dataset may have been removed
+                if min_data_id is None:
+                    count = self._gene_service.merge_gene_cache(selection_id, eufid)
+                else:
+                    count = self._gene_service.update_gene_cache(selection_id)
+                stage_metrics.rows_out += count
+            stage_metrics.rows_in += len(selection_ids)
 
     @abstractmethod
-    def _annotate_data_in_database(self, taxa_id: int, eufid: str):
+    def _annotate_data_in_database(
+        self,
+        taxa_id: int,
+        eufid: str,
+        min_data_id: int | None = None,
+        workers: int | None = None,
+    ):
         pass
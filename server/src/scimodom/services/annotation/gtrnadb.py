@@ -2,19 +2,33 @@ import logging
 import re
 import shutil
 from pathlib import Path
-from typing import ClassVar, Callable, NamedTuple
+from typing import ClassVar, Callable, NamedTuple, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import Row, select
 
-from scimodom.database.buffer import InsertBuffer
-from scimodom.database.models import Annotation, Assembly, GenomicAnnotation
-from scimodom.services.annotation.generic import GenericAnnotationService
+from scimodom.database.buffer import BulkInsertBuffer, get_insert_mode
+from scimodom.database.models import (
+    Annotation,
+    Assembly,
+    DataAnnotation,
+    GenomicAnnotation,
+    Sprinzl,
+)
+from scimodom.services.annotation.generic import (
+    GENOMIC_ANNOTATION_COLUMNS,
+    GenericAnnotationService,
+)
+from scimodom.services.data import NoDataRecords
+from scimodom.utils.import_metrics import get_import_metrics
+from scimodom.utils.specs.enums import AssemblyFileType, ImportMetricsStage
+from scimodom.utils.sprinzl_index import SprinzlIndex
 from posixpath import join as urljoin
 
 logger = logging.getLogger(__name__)
 
 # GtRNAdb annotation
 GTRNADB_URL = "http://gtrnadb.ucsc.edu/genomes/"
+SPRINZL_INDEX = "sprinzl_index"
 
 
 class GtRNAdbAnnotationService(GenericAnnotationService):
@@ -26,12 +40,15 @@ class GtRNAdbAnnotationService(GenericAnnotationService):
     :type FMT: list of str
     :param ANNOTATION_FILE: Annotation file pattern
     :type ANNOTATION_FILE: Callable
+    :param ANNOTATION_CHUNK_SIZE: Maximum number of records per chunk
+    :type ANNOTATION_CHUNK_SIZE: int
     :param FEATURES: Genomic features
     :type FEATURES: dict of {str: str}
     """
 
     FMT: ClassVar[list[str]] = ["bed", "fa"]
-    ANNOTATION_FILE: ClassVar[Callable] = "{species}-tRNAs.{fmt}".format
+    ANNOTATION_FILE: ClassVar[Callable] = "{assembly}-tRNAs.{fmt}".format
+    ANNOTATION_CHUNK_SIZE: ClassVar[int] = 500000
     FEATURES: ClassVar[dict[str, dict[str, str]]] = {
         "conventional": {"exon": "Exonic"},
         "extended": {"intron": "Intronic"},
@@ -71,19 +88,18 @@ class GtRNAdbAnnotationService(GenericAnnotationService):
         :type name: str
         """
         annotation = self.get_annotation(taxa_id)
-        if self._release_exists(annotation.id):
-            return
-
         domain = kwargs["domain"]
         name = kwargs["name"]
         release_path = self.get_release_path(annotation)
         annotation_paths = self._get_annotation_paths(release_path, domain, name)
         annotation_file = annotation_paths["bed"].annotation_file
         fasta_file = annotation_paths["fa"].annotation_file
-        # TODO
-        # seqids = self._assembly_service.get_seqids(annotation.taxa_id)
-        # ?
-        # seqids = []
+        if self._release_exists(annotation.id):
+            if not Path(release_path, SPRINZL_INDEX).is_dir():
+                self._create_sprinzl_index(
+                    release_path, domain, annotation_file, fasta_file
+                )
+            return
 
         logger.info(
             f"Setting up GtRNAdb {annotation.release} for {annotation.taxa_id}..."
@@ -99,11 +115,13 @@ class GtRNAdbAnnotationService(GenericAnnotationService):
             for paths in annotation_paths.values():
                 with open(paths.annotation_file, "wb") as fh:
                     self._web_service.stream_request_to_file(paths.url, fh)
+            self._patch_annotation(annotation_file, self._get_seqids(taxa_id))
             self._bedtools_service.gtrnadb_to_bed_features(
                 annotation_file, [list(d.keys())[0] for d in self.FEATURES.values()]
             )
-            # TODO
-            # self._update_annotation()
+            self._create_sprinzl_index(
+                release_path, domain, annotation_file, fasta_file
+            )
             self._update_database(
                 annotation_file, annotation.id, release_path.parent.parent.name
             )
@@ -154,19 +172,28 @@ class GtRNAdbAnnotationService(GenericAnnotationService):
                     continue
                 fd.write(f"{line}\n")
 
-    # TODO
-    def _update_annotation(self, domain, fasta_file):
+    def _get_seqids(self, taxa_id: int) -> list[str]:
+        with self._file_service.open_assembly_file(
+            taxa_id, AssemblyFileType.CHROM
+        ) as fh:
+            return [line.split("\t")[0] for line in fh if line.strip()]
+
+    def _create_sprinzl_index(
+        self, release_path: Path, domain: str, annotation_file: Path, fasta_file: Path
+    ) -> None:
+        # covariance model and Sprinzl coordinates by domain
+        # are expected in the annotation directory
         annotation_path = self._file_service.get_annotation_parent_dir()
         model_file = Path(annotation_path, domain).with_suffix(".cm").as_posix()
         sprinzl_file = Path(annotation_path, domain).with_suffix(".txt").as_posix()
-        self._external_service.get_sprinzl_mapping(model_file, fasta_file, sprinzl_file)
-
-        # self._patch_annotation(annotation_file, seqids)
-
-        # maybe we need to patch the annotation here
-        # restrict to highly confident set
-        # patch
-        # and at the same time update mapping file with chrom start
+        mapping_file = self._external_service.get_sprinzl_mapping(
+            model_file, fasta_file.as_posix(), sprinzl_file
+        )
+        # GtRNAdb sequence IDs are "{organism}_{name}", as gene IDs
+        index = SprinzlIndex.from_files(
+            annotation_file, Path(mapping_file), release_path.parent.parent.name
+        )
+        index.save(Path(release_path, SPRINZL_INDEX))
 
     def _update_database(
         self, annotation_file: Path, annotation_id: int, organism: str
@@ -176,9 +203,103 @@ class GtRNAdbAnnotationService(GenericAnnotationService):
             annotation_id,
             organism,
         )
-        with InsertBuffer[GenomicAnnotation](self._session) as buffer:
+        with BulkInsertBuffer[GenomicAnnotation](
+            self._session,
+            GenomicAnnotation,
+            GENOMIC_ANNOTATION_COLUMNS,
+            mode=get_insert_mode(self._insert_modes, GenomicAnnotation),
+        ) as buffer:
             for record in records:
-                buffer.queue(GenomicAnnotation(**record.model_dump()))
+                buffer.queue(
+                    (record.id, record.annotation_id, record.name, record.biotype)
+                )
+
+    def _annotate_data_in_database(
+        self,
+        taxa_id: int,
+        eufid: str,
+        min_data_id: int | None = None,
+        workers: int | None = None,
+    ):
+        """Annotate Data: add entries to DataAnnotation
+        and Sprinzl for a given dataset.
+
+        Sites are looked up by their start position in the
+        Sprinzl index of the release, by chunks of at most
+        ANNOTATION_CHUNK_SIZE records. The lookup is vectorized,
+        and workers are not used.
 
-    def _annotate_data_in_database(self, taxa_id: int, eufid: str):
-        pass
+        :param taxa_id: Taxonomy ID
+        :type taxa_id: int
+        :param eufid: EUF ID
+        :type eufid: str
+        :param min_data_id: If given, only annotate records with a larger ID,
+        e.g. records added when updating a dataset.
+        :type min_data_id: int | None
+        :param workers: Number of worker processes (unused)
+        :type workers: int | None
+        """
+        annotation = self.get_annotation(taxa_id)
+        index = SprinzlIndex.load(
+            Path(self.get_release_path(annotation), SPRINZL_INDEX)
+        )
+        features = {
+            **self.FEATURES["conventional"],
+            **self.FEATURES["extended"],
+        }
+
+        logger.debug(f"Annotating records for EUFID {eufid}...")
+
+        with get_import_metrics().stage(ImportMetricsStage.ANNOTATION) as stage_metrics:
+            chunks = self._data_service.get_chunks_by_dataset(
+                eufid,
+                min_data_id=min_data_id,
+                chunk_size=self.ANNOTATION_CHUNK_SIZE,
+            )
+            annotation_buffer = BulkInsertBuffer[DataAnnotation](
+                self._session,
+                DataAnnotation,
+                ["gene_id", "data_id", "feature"],
+                mode=get_insert_mode(self._insert_modes, DataAnnotation),
+            )
+            sprinzl_buffer = BulkInsertBuffer[Sprinzl](
+                self._session,
+                Sprinzl,
+                ["data_id", "position"],
+                mode=get_insert_mode(self._insert_modes, Sprinzl),
+            )
+            with annotation_buffer, sprinzl_buffer:
+                try:
+                    for chunk in chunks:
+                        stage_metrics.rows_in += len(chunk)
+                        self._annotate_chunk(
+                            index, features, chunk, annotation_buffer, sprinzl_buffer
+                        )
+                except NoDataRecords:
+                    if min_data_id is None:
+                        raise
+            stage_metrics.rows_out += annotation_buffer.row_count
+
+    @staticmethod
+    def _annotate_chunk(
+        index: SprinzlIndex,
+        features: dict[str, str],
+        chunk: Sequence[Row],
+        annotation_buffer: BulkInsertBuffer[DataAnnotation],
+        sprinzl_buffer: BulkInsertBuffer[Sprinzl],
+    ) -> None:
+        sites, gene_ids, site_features, labels = index.lookup(
+            [row.chrom for row in chunk],
+            [row.start for row in chunk],
+            [row.strand.value for row in chunk],
+        )
+        sprinzl_values = set()
+        for site, gene_id, feature, label in zip(
+            sites.tolist(), gene_ids, site_features, labels
+        ):
+            data_id = chunk[site].id
+            annotation_buffer.queue((gene_id, data_id, features[feature]))
+            if label is not None:
+                sprinzl_values.add((data_id, label))
+        for values in sorted(sprinzl_values):
+            sprinzl_buffer.queue(values)
@@ -0,0 +1,318 @@
+import logging
+from datetime import datetime, timezone
+from typing import Callable
+
+from sqlalchemy import delete, exists, insert, select
+from sqlalchemy.orm import Session
+
+from scimodom.database.models import (
+    Annotation,
+    Data,
+    DataAnnotation,
+    DataAnnotationShadow,
+    GenomicAnnotation,
+    Organism,
+    Selection,
+)
+from scimodom.services.annotation.ensembl import EnsemblAnnotationService
+from scimodom.services.data import NoDataRecords
+from scimodom.services.file import FileService
+from scimodom.services.gene import GeneService
+from scimodom.utils.dtos.reannotation import ReannotationJobDto
+from scimodom.utils.specs.enums import (
+    AnnotationSource,
+    Ensembl,
+    ReannotationStage,
+)
+
+logger = logging.getLogger(__name__)
+
+# Called with the EUF ID of the dataset just re-annotated, the
+# number of datasets done so far, and the total number of datasets.
+ReannotationProgressCallback = Callable[[str, int, int], None]
+
+
+class ReannotationError(Exception):
+    """Exception handling for a re-annotation job that
+    cannot run, e.g. if it is already running."""
+
+    pass
+
+
+class ReannotationService:
+    """Re-annotate all datasets of an organism for a new
+    Ensembl release, e.g. after a release bump.
+
+    A job runs in stages, see :class:`ReannotationStage`.
+    First, annotation files are created for the new release,
+    and genes are added or updated. Then, each dataset is
+    annotated into the shadow table DataAnnotationShadow, while
+    DataAnnotation is left untouched. Finally, annotations are
+    swapped in a single transaction, which also updates the
+    annotation release, and removes obsolete genes.
+
+    The job state is written to a file after each stage and
+    each dataset, and an interrupted job is resumed where it
+    stopped.
+
+    :param session: SQLAlchemy ORM session
+    :type session: Session
+    :param ensembl_service: Ensembl annotation service instance
+    :type ensembl_service: EnsemblAnnotationService
+    :param file_service: File service instance
+    :type file_service: FileService
+    :param gene_service: Gene service instance
+    :type gene_service: GeneService
+    :param DELETE_CHUNK_SIZE: Maximum number of obsolete genes per statement
+    :type DELETE_CHUNK_SIZE: int
+    """
+
+    DELETE_CHUNK_SIZE = 1000
+
+    def __init__(
+        self,
+        session: Session,
+        ensembl_service: EnsemblAnnotationService,
+        file_service: FileService,
+        gene_service: GeneService,
+    ) -> None:
+        self._session = session
+        self._ensembl_service = ensembl_service
+        self._file_service = file_service
+        self._gene_service = gene_service
+
+    def reannotate(
+        self,
+        taxa_id: int,
+        release: int | None = None,
+        workers: int | None = None,
+        restart: bool = False,
+        progress: ReannotationProgressCallback | None = None,
+    ) -> ReannotationJobDto:
+        """Run, or resume, the re-annotation job of an organism.
+
+        :param taxa_id: Taxonomy ID
+        :type taxa_id: int
+        :param release: Ensembl release, default is the current release
+        :type release: int | None
+        :param workers: Number of worker processes used to annotate
+        each dataset, see :meth:`EnsemblAnnotationService.annotate_data_for_release`.
+        :type workers: int | None
+        :param restart: Discard the state of an interrupted job
+        :type restart: bool
+        :param progress: Called after each dataset
+        :type progress: ReannotationProgressCallback | None
+        :returns: Job
+        :rtype: ReannotationJobDto
+
+        :raises: ReannotationError
+        """
+        if release is None:
+            release = Ensembl.RELEASE.value
+        if progress is None:
+            progress = _ignore_progress
+        with self._file_service.lock_reannotation_job(taxa_id) as is_locked:
+            if not is_locked:
+                raise ReannotationError(
+                    f"Re-annotation for taxonomy ID {taxa_id} is already running."
+                )
+            job = self._get_job(taxa_id, release, restart)
+            if job.stage == ReannotationStage.RELEASE:
+                self._create_release(job)
+            if job.stage == ReannotationStage.ANNOTATION:
+                self._annotate_datasets(job, workers, progress)
+            if job.stage == ReannotationStage.SWAP:
+                self._swap_annotations(job)
+            return job
+
+    def get_job(self, taxa_id: int) -> ReannotationJobDto | None:
+        """Return the last re-annotation job of an organism, if any.
+
+        :param taxa_id: Taxonomy ID
+        :type taxa_id: int
+        :returns: Job
+        :rtype: ReannotationJobDto | None
+        """
+        try:
+            return ReannotationJobDto.model_validate_json(
+                self._file_service.read_reannotation_job(taxa_id)
+            )
+        except FileNotFoundError:
+            return None
+
+    def _get_job(self, taxa_id: int, release: int, restart: bool) -> ReannotationJobDto:
+        annotation = self._ensembl_service.get_annotation_from_taxid_and_source(
+            taxa_id, AnnotationSource.ENSEMBL.value
+        )
+        job = self.get_job(taxa_id)
+        if (
+            job is not None
+            and not restart
+            and job.annotation_id == annotation.id
+            and job.to_release == release
+            and job.stage != ReannotationStage.DONE
+        ):
+            logger.info(
+                f"Resuming re-annotation for {taxa_id} at stage '{job.stage.value}', "
+                f"{len(job.done_eufids)}/{len(job.eufids)} datasets done."
+            )
+            return job
+        if annotation.release == release:
+            raise ReannotationError(
+                f"Annotation for taxonomy ID {taxa_id} is already at release {release}."
+            )
+        now = datetime.now(timezone.utc)
+        job = ReannotationJobDto(
+            taxa_id=taxa_id,
+            annotation_id=annotation.id,
+            from_release=annotation.release,
+            to_release=release,
+            stage=ReannotationStage.RELEASE,
+            eufids=self._get_annotated_datasets(annotation.id),
+            created=now,
+            updated=now,
+        )
+        self._write_job(job)
+        return job
+
+    def _get_annotated_datasets(self, annotation_id: int) -> list[str]:
+        query = (
+            select(Data.dataset_id)
+            .distinct()
+            .join(DataAnnotation, DataAnnotation.data_id == Data.id)
+            .join(GenomicAnnotation, GenomicAnnotation.id == DataAnnotation.gene_id)
+            .where(GenomicAnnotation.annotation_id == annotation_id)
+            .order_by(Data.dataset_id)
+        )
+        return list(self._session.scalars(query))
+
+    def _create_release(self, job: ReannotationJobDto) -> None:
+        annotation = self._get_annotation(job)
+        release_path = self._ensembl_service.create_release(annotation, job.to_release)
+        try:
+            job.obsolete_gene_ids = self._ensembl_service.update_genomic_annotation(
+                annotation, release_path
+            )
+            self._session.commit()
+        except Exception:
+            self._session.rollback()
+            raise
+        self._set_stage(job, ReannotationStage.ANNOTATION)
+
+    def _annotate_datasets(
+        self,
+        job: ReannotationJobDto,
+        workers: int | None,
+        progress: ReannotationProgressCallback,
+    ) -> None:
+        annotation = self._get_annotation(job)
+        for eufid in job.eufids:
+            if eufid in job.done_eufids:
+                continue
+            try:
+                # remove records of an interrupted run
+                self._session.execute(
+                    delete(DataAnnotationShadow).where(
+                        DataAnnotationShadow.data_id.in_(self._get_data_ids([eufid]))
+                    )
+                )
+                self._ensembl_service.annotate_data_for_release(
+                    annotation, job.to_release, eufid, DataAnnotationShadow, workers
+                )
+                self._session.commit()
+            except NoDataRecords:
+                # dataset deleted in the meantime
+                self._session.rollback()
+            except Exception:
+                self._session.rollback()
+                raise
+            job.done_eufids.append(eufid)
+            self._write_job(job)
+            logger.info(
+                f"Re-annotated {eufid} ({len(job.done_eufids)}/{len(job.eufids)})."
+            )
+            progress(eufid, len(job.done_eufids), len(job.eufids))
+        self._set_stage(job, ReannotationStage.SWAP)
+
+    def _swap_annotations(self, job: ReannotationJobDto) -> None:
+        annotation = self._get_annotation(job)
+        # the release is updated with the swap, which may thus
+        # have been committed before the job was interrupted
+        if annotation.release != job.to_release:
+            data_ids = self._get_data_ids(job.eufids)
+            try:
+                self._session.execute(
+                    delete(DataAnnotation).where(DataAnnotation.data_id.in_(data_ids))
+                )
+                self._session.execute(
+                    insert(DataAnnotation).from_select(
+                        ["data_id", "gene_id", "feature"],
+                        select(
+                            DataAnnotationShadow.data_id,
+                            DataAnnotationShadow.gene_id,
+                            DataAnnotationShadow.feature,
+                        ).where(DataAnnotationShadow.data_id.in_(data_ids)),
+                    )
+                )
+                self._session.execute(
+                    delete(DataAnnotationShadow).where(
+                        DataAnnotationShadow.data_id.in_(data_ids)
+                    )
+                )
+                self._delete_obsolete_genes(job.obsolete_gene_ids)
+                self._ensembl_service.delete_genomic_features(
+                    annotation, job.from_release
+                )
+                annotation.release = job.to_release
+                self._session.commit()
+            except Exception:
+                self._session.rollback()
+                raise
+            logger.info(
+                f"Swapped annotations for {job.taxa_id} to release {job.to_release}."
+            )
+        for selection_id in self._get_selection_ids(job.taxa_id):
+            self._gene_service.update_gene_cache(selection_id)
+        self._set_stage(job, ReannotationStage.DONE)
+
+    def _delete_obsolete_genes(self, gene_ids: list[str]) -> None:
+        # genes may still be used by datasets added while re-annotating
+        for idx in range(0, len(gene_ids), self.DELETE_CHUNK_SIZE):
+            self._session.execute(
+                delete(GenomicAnnotation).where(
+                    GenomicAnnotation.id.in_(
+                        gene_ids[idx : idx + self.DELETE_CHUNK_SIZE]
+                    ),
+                    ~exists().where(DataAnnotation.gene_id == GenomicAnnotation.id),
+                )
+            )
+
+    def _get_selection_ids(self, taxa_id: int) -> list[int]:
+        return list(
+            self._session.scalars(
+                select(Selection.id)
+                .join(Organism, Organism.id == Selection.organism_id)
+                .where(Organism.taxa_id == taxa_id)
+            )
+        )
+
+    @staticmethod
+    def _get_data_ids(eufids: list[str]):
+        return select(Data.id).where(Data.dataset_id.in_(eufids))
+
+    def _get_annotation(self, job: ReannotationJobDto) -> Annotation:
+        return self._session.get_one(Annotation, job.annotation_id)
+
+    def _set_stage(self, job: ReannotationJobDto, stage: ReannotationStage) -> None:
+        job.stage = stage
+        self._write_job(job)
+
+    def _write_job(self, job: ReannotationJobDto) -> None:
+        job.updated = datetime.now(timezone.utc)
+        self._file_service.write_reannotation_job(
+            job.taxa_id, job.model_dump_json(indent=4)
+        )
+
+
+def _ignore_progress(eufid: str, done_count: int, total_count: int) -> None:
+    pass
@@ -1,9 +1,13 @@
 import json
 import logging
-from functools import cache
+from functools import cache, lru_cache
+import os
+from pathlib import Path
 from posixpath import join as urljoin
-from typing import Any, Sequence, TextIO
+from typing import Any, Generator, Iterable, Sequence, TextIO
 
+from cmmodule.utils import map_coordinates, read_chain_file  # type: ignore # import-untyped
+import pandas as pd  # type: ignore # import-untyped
 from requests.exceptions import HTTPError
 from sqlalchemy import select, func
 from sqlalchemy.exc import NoResultFound
@@ -14,12 +18,14 @@ from scimodom.database.models import Assembly, AssemblyVersion, Taxa
 from scimodom.services.external import get_external_service, ExternalService
 from scimodom.services.file import FileService, get_file_service
 from scimodom.services.web import WebService, get_web_service
+from scimodom.utils.dtos.bedtools import EufRecord
 from scimodom.utils.utils import gen_short_uuid
 from scimodom.utils.specs.enums import (
     AssemblyFileType,
     Identifiers,
     Ensembl,
     ImportLimits,
+    Strand,
 )
 
 logger = logging.getLogger(__name__)
@@ -53,6 +59,81 @@ class LiftOverError(Exception):
     pass
 
 
+class ChainIndex:
+    """In-memory interval index of a chain file, used to
+    lift over records w/o calling CrossMap.
+
+    The chain file is parsed, and intervals are mapped
+    using the CrossMap library, i.e. results are the same
+    as with "CrossMap bed --chromid s".
+
+    :param chain_file: Chain file
+    :type chain_file: str
+    """
+
+    def __init__(self, chain_file: str) -> None:
+        self._mapping, _, _ = read_chain_file(chain_file)
+
+    def map_interval(
+        self, chrom: str, start: int, end: int, strand: Strand
+    ) -> list[tuple[str, int, int, Strand]]:
+        """Map an interval to the target assembly.
+
+        As with CrossMap, intervals spanning several
+        chain blocks are split, and the result is
+        empty if the interval cannot be fully mapped.
+
+        :param chrom: Chromosome
+        :type chrom: str
+        :param start: Start
+        :type start: int
+        :param end: End
+        :type end: int
+        :param strand: Strand
+        :type strand: Strand
+        :returns: Mapped intervals as (chrom, start, end, strand)
+        :rtype: list[tuple[str, int, int, Strand]]
+        """
+        query_strand = "-" if strand == Strand.REVERSE else "+"
+        matches = map_coordinates(
+            self._mapping, chrom, start, end, query_strand, chrom_style="s"
+        )
+        if matches is None or len(matches) % 2 != 0:
+            return []
+        return [
+            (
+                target_chrom,
+                target_start,
+                target_end,
+                (
+                    Strand(target_strand)
+                    if strand != Strand.UNDEFINED
+                    else Strand.UNDEFINED
+                ),
+            )
+            for target_chrom, target_start, target_end, target_strand in matches[1::2]
+        ]
+
+
+def get_chain_index(chain_file: str) -> ChainIndex:
+    """Return the index of a chain file. Indexes are
+    cached, i.e. each chain file is read only once per
+    process, unless it was modified.
+
+    :param chain_file: Chain file
+    :type chain_file: str
+    :returns: Chain index
+    :rtype: ChainIndex
+    """
+    return _get_cached_chain_index(chain_file, os.stat(chain_file).st_mtime_ns)
+
+
+@lru_cache(maxsize=8)
+def _get_cached_chain_index(chain_file: str, mtime_ns: int) -> ChainIndex:
+    logger.info(f"Reading chain file {chain_file}...")
+    return ChainIndex(chain_file)
+
+
 class AssemblyService:
     """Utility class to manage assemblies.
 
@@ -199,28 +280,173 @@ class AssemblyService:
         if self.is_latest_assembly(assembly):
             raise AssemblyVersionError("Cannot liftover for latest assembly.")
 
-        chain_file = self._file_service.get_assembly_file_path(
+        chain_file = self.get_chain_file_path(assembly)
+        return self.lift_over_file(
+            chain_file.as_posix(), raw_file, unmapped_file, threshold
+        )
+
+    def get_chain_file_path(self, assembly: Assembly) -> Path:
+        """Return the chain file path to lift over
+        records from assembly to the current assembly.
+
+        :param assembly: Assembly instance
+        :type assembly: Assembly
+        :returns: Path to chain file
+        :rtype: Path
+        """
+        return self._file_service.get_assembly_file_path(
             assembly.taxa_id,
             file_type=AssemblyFileType.CHAIN,
             assembly_name=assembly.name,
         )
 
+    def lift_over_file(
+        self,
+        chain_file: str,
+        raw_file: str,
+        unmapped_file: str | None = None,
+        threshold: float = ImportLimits.LIFTOVER.max,
+    ) -> TextIO:
+        """Liftover records using a chain file. Unlike
+        :meth:`create_lifted_file`, this does not access
+        the database.
+
+        :param chain_file: Chain file
+        :type chain_file: str
+        :param raw_file: BED file to be lifted over
+        :type raw_file: str
+        :param unmapped_file: Unmapped features
+        :type unmapped_file: str | None
+        :param threshold: Threshold for raising LiftOverError
+        :type threshold: float
+        :returns: File handle pointing to the liftedOver features
+        :rtype: TextIO
+        """
         raw_lines = self._file_service.count_lines(raw_file)
         lifted_file, unmapped_file = self._external_service.get_crossmap_output(
-            raw_file, chain_file.as_posix(), unmapped_file
+            raw_file, chain_file, unmapped_file
         )
 
         unmapped_lines = self._file_service.count_lines(unmapped_file)
-        if unmapped_lines / raw_lines > threshold:
+        self._check_unmapped_count(unmapped_lines, raw_lines, threshold)
+        return self._file_service.open_file_for_reading(lifted_file)
+
+    def lift_over_records(
+        self,
+        chain_file: str,
+        records: Iterable[EufRecord],
+        threshold: float = ImportLimits.LIFTOVER.max,
+    ) -> Generator[EufRecord, None, None]:
+        """Liftover records in memory, see :class:`ChainIndex`.
+        Records are lifted over as they are read, the number of
+        unmapped records is checked once all records are read.
+        This does not access the database.
+
+        :param chain_file: Chain file
+        :type chain_file: str
+        :param records: Records to be lifted over
+        :type records: Iterable[EufRecord]
+        :param threshold: Threshold for raising LiftOverError
+        :type threshold: float
+        :returns: Lifted records
+        :rtype: Generator[EufRecord, None, None]
+        """
+        chain_index = get_chain_index(chain_file)
+        raw_count = 0
+        unmapped_count = 0
+        for record in records:
+            raw_count += 1
+            intervals = chain_index.map_interval(
+                record.chrom, record.start, record.end, record.strand
+            )
+            if not intervals:
+                unmapped_count += 1
+            for chrom, start, end, strand in intervals:
+                yield record.model_copy(
+                    update={
+                        "chrom": chrom,
+                        "start": start,
+                        "end": end,
+                        "strand": strand,
+                    }
+                )
+        self._check_unmapped_count(unmapped_count, raw_count, threshold)
+
+    def lift_over_chunks(
+        self,
+        chain_file: str,
+        chunks: Iterable[pd.DataFrame],
+        threshold: float = ImportLimits.LIFTOVER.max,
+    ) -> Generator[pd.DataFrame, None, None]:
+        """Liftover records by chunks, see :meth:`lift_over_records`,
+        and :meth:`EufColumnarImporter.parse_chunks` for the format
+        of chunks.
+
+        :param chain_file: Chain file
+        :type chain_file: str
+        :param chunks: Chunks to be lifted over
+        :type chunks: Iterable[pd.DataFrame]
+        :param threshold: Threshold for raising LiftOverError
+        :type threshold: float
+        :returns: Lifted chunks
+        :rtype: Generator[pd.DataFrame, None, None]
+        """
+        chain_index = get_chain_index(chain_file)
+        raw_count = 0
+        unmapped_count = 0
+        for chunk in chunks:
+            raw_count += len(chunk)
+            rows = []
+            lifted: dict[str, list[Any]] = {
+                "chrom": [],
+                "start": [],
+                "end": [],
+                "strand": [],
+            }
+            for row, (chrom, start, end, strand) in enumerate(
+                zip(
+                    chunk["chrom"].tolist(),
+                    chunk["start"].tolist(),
+                    chunk["end"].tolist(),
+                    chunk["strand"].tolist(),
+                )
+            ):
+                intervals = chain_index.map_interval(chrom, start, end, Strand(strand))
+                if not intervals:
+                    unmapped_count += 1
+                for interval in intervals:
+                    rows.append(row)
+                    for column, value in zip(lifted.keys(), interval):
+                        lifted[column].append(value)
+            lifted["strand"] = [strand.value for strand in lifted["strand"]]
+            if not rows:
+                continue
+            chunk = chunk.take(rows).reset_index(drop=True)
+            for column, values in lifted.items():
+                chunk[column] = values
+            yield chunk.astype(
+                {
+                    "chrom": "category",
+                    "start": "int64",
+                    "end": "int64",
+                    "strand": "category",
+                }
+            )
+        self._check_unmapped_count(unmapped_count, raw_count, threshold)
+
+    @staticmethod
+    def _check_unmapped_count(
+        unmapped_count: int, raw_count: int, threshold: float
+    ) -> None:
+        if raw_count > 0 and unmapped_count / raw_count > threshold:
             raise LiftOverError(
-                f"Liftover failed: {unmapped_lines} records out of {raw_lines} could not be mapped."
+                f"Liftover failed: {unmapped_count} records out of {raw_count} could not be mapped."
             )
-        if unmapped_lines > 0:
+        if unmapped_count > 0:
             logger.warning(
-                f"{unmapped_lines} records could not be mapped... "
+                f"{unmapped_count} records could not be mapped... "
                 "Contact the system administrator if you have questions."
             )
-        return self._file_service.open_file_for_reading(lifted_file)
 
     def add_assembly(self, taxa_id: int, assembly_name: str) -> None:
         """Add an assembly to the database if it does not exist.
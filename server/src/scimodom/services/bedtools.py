@@ -1,9 +1,17 @@
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from contextlib import contextmanager
 from functools import cache
 import logging
-from os import makedirs
+import multiprocessing
+from operator import attrgetter
+import os
+from os import cpu_count, makedirs
 from pathlib import Path
-from typing import Iterable, Sequence, Any, TextIO
+import shutil
+from tempfile import TemporaryDirectory
+from typing import Generator, Iterable, Sequence, Any, TextIO
 
+import numpy as np
 import pybedtools  # type: ignore
 from pybedtools import BedTool, create_interval_from_list
 
@@ -13,17 +21,24 @@ from scimodom.database.models import Data
 from scimodom.utils.dtos.bedtools import (
     Bed6Record,
     EufRecord,
-    DataAnnotationRecord,
     GenomicAnnotationRecord,
-    IntersectRecord,
-    ClosestRecord,
-    SubtractRecord,
     ComparisonRecord,
+    TrustedBed6Record,
+    TrustedClosestRecord,
+    TrustedComparisonRecord,
+    TrustedDataAnnotationRecord,
+    TrustedIntersectRecord,
 )
-from scimodom.utils.specs.enums import Strand
+import scimodom.utils.interval_comparison as interval_comparison
+from scimodom.utils.interval_index import INDEX_METADATA_FILE, IntervalIndex
+from scimodom.utils.specs.enums import AnnotationEngine, ComparisonEngine, Strand
 
 logger = logging.getLogger(__name__)
 
+ENSEMBL_FEATURE_INDEX = "feature_index"
+STRANDS = {strand.value: strand for strand in Strand}
+GENES_PARTITION = "genes"
+
 
 class AnnotationFormatError(Exception):
     """Exception handling for change in specifications
@@ -34,9 +49,40 @@ class AnnotationFormatError(Exception):
 
 
 class BedToolsService:
-    def __init__(self, tmp_path):
+    """Provides genomic interval operations, mostly
+    using pybedtools.
+
+    :param tmp_path: Directory for temporary files
+    :type tmp_path: str | Path
+    :param annotation_engine: Engine used to annotate data
+    records, see :meth:`annotate_data_using_ensembl`.
+    Default is AnnotationEngine.NUMPY.
+    :type annotation_engine: AnnotationEngine
+    :param comparison_engine: Engine used to compare
+    records, see :meth:`intersect_comparison_records`.
+    Default is ComparisonEngine.NUMPY.
+    :type comparison_engine: ComparisonEngine
+    """
+
+    def __init__(
+        self,
+        tmp_path,
+        annotation_engine: AnnotationEngine = AnnotationEngine.NUMPY,
+        comparison_engine: ComparisonEngine = ComparisonEngine.NUMPY,
+    ):
         makedirs(tmp_path, exist_ok=True)
         pybedtools.helpers.set_tempdir(tmp_path)
+        self._annotation_engine = annotation_engine
+        self._comparison_engine = comparison_engine
+        self._feature_indexes: dict[
+            Path, tuple[float, IntervalIndex, IntervalIndex]
+        ] = {}
+
+    def __getstate__(self) -> dict[str, Any]:
+        # memory-mapped indexes are not sent to worker processes
+        state = self.__dict__.copy()
+        state["_feature_indexes"] = {}
+        return state
 
     @staticmethod
     def create_temp_file_from_records(
@@ -93,6 +139,60 @@ class BedToolsService:
             id=f"{prefix}{intergenic_feature}", annotation_id=annotation_id
         )
 
+    @staticmethod
+    def get_ensembl_feature_records(
+        annotation_path: Path, features: dict[str, str]
+    ) -> Iterable[tuple[str, int, int, str, str, str]]:
+        """Create records for GenomicFeature from the BED
+        files written by :meth:`ensembl_to_bed_features`, with
+        one record per interval and gene. Columns order is
+        (chrom, start, end, strand, gene_id, feature).
+        Intergenic records are unstranded, and use the same
+        gene ID as :meth:`annotate_data_using_ensembl`.
+
+        :param annotation_path: Path to annotation
+        :type annotation_path: Path
+        :param features: Genomic features, incl. intergenic
+        :type features: dict of {str: str}
+        :returns: Feature records as tuple of columns
+        :rtype: Iterable[tuple[str, int, int, str, str, str]]
+        """
+        features = dict(features)
+        if "intergenic" not in features:
+            raise AnnotationFormatError(
+                "Missing feature intergenic from specs. This is due to a change "
+                "in definition. Aborting transaction!"
+            )
+        intergenic_feature = features.pop("intergenic")
+        prefix = None
+        for feature, pretty_feature in features.items():
+            with open(Path(annotation_path, f"{feature}.bed"), "r") as fh:
+                for line in fh:
+                    fields = line.rstrip("\n").split("\t")
+                    for gene_id in fields[6].split(","):
+                        if prefix is None:
+                            prefix = utils.get_ensembl_prefix(gene_id)
+                        yield (
+                            fields[0],
+                            int(fields[1]),
+                            int(fields[2]),
+                            fields[5],
+                            gene_id,
+                            pretty_feature,
+                        )
+        gene_id = f"{prefix}{intergenic_feature}"
+        with open(Path(annotation_path, "intergenic.bed"), "r") as fh:
+            for line in fh:
+                fields = line.rstrip("\n").split("\t")
+                yield (
+                    fields[0],
+                    int(fields[1]),
+                    int(fields[2]),
+                    Strand.UNDEFINED.value,
+                    gene_id,
+                    intergenic_feature,
+                )
+
     @staticmethod
     def get_gtrnadb_annotation_records(
         annotation_file: Path,
@@ -217,12 +317,19 @@ class BedToolsService:
         annotation_path: Path,
         features: dict[str, str],
         records: Iterable[Data],
-    ) -> Iterable[DataAnnotationRecord]:
+    ) -> Iterable[TrustedDataAnnotationRecord]:
         """Annotate data records, i.e. create
         records for DataAnnotation. Columns
         order is (gene_id, data_id, feature).
         There is no type coercion.
 
+        With AnnotationEngine.BEDTOOLS, overlaps are found
+        with "bedtools intersect", else in process with
+        :class:`IntervalIndex`. Both yield the same records,
+        in the same order. The index written by
+        :meth:`ensembl_to_feature_index` is memory-mapped,
+        if it exists, else BED files are read.
+
         :param annotation_path: Path to annotation
         :type annotation_path: Path
         :param records: Data records as BED6+1-like,
@@ -232,15 +339,29 @@ class BedToolsService:
         annotation must be created.
         :type features: dict of {str: str}
         :returns: Records for DataAnnotation
-        :rtype: Iterable[ModificationRecord]
+        :rtype: Iterable[TrustedDataAnnotationRecord]
         """
 
-        bedtool_records = self._get_data_to_bedtool_for_annotation(records)
         if "intergenic" not in features:
             raise AnnotationFormatError(
                 "Missing feature intergenic from specs. This is due to a change "
                 "in definition. Aborting transaction!"
             )
+        if self._annotation_engine == AnnotationEngine.BEDTOOLS:
+            return self._annotate_data_using_bedtools(
+                annotation_path, features, records
+            )
+        return self._annotate_data_using_interval_index(
+            annotation_path, features, records
+        )
+
+    def _annotate_data_using_bedtools(
+        self,
+        annotation_path: Path,
+        features: dict[str, str],
+        records: Iterable[Data],
+    ) -> Iterable[TrustedDataAnnotationRecord]:
+        bedtool_records = self._get_data_to_bedtool_for_annotation(records)
         intergenic_feature = features.pop("intergenic")
         prefix = None
         for feature, pretty_feature in features.items():
@@ -263,12 +384,145 @@ class BedToolsService:
             b=feature_bedtool, wa=True, wb=True, s=False, sorted=True
         )
         for s in stream:
-            yield DataAnnotationRecord(
-                gene_id=gene_id, data_id=s[6], feature=intergenic_feature
+            yield TrustedDataAnnotationRecord(gene_id, int(s[6]), intergenic_feature)
+
+    def _annotate_data_using_interval_index(
+        self,
+        annotation_path: Path,
+        features: dict[str, str],
+        records: Iterable[Data],
+    ) -> Iterable[TrustedDataAnnotationRecord]:
+        # same records, in the same order as with bedtools:
+        # by feature, then by sorted record, then by feature interval
+        sorted_records = sorted(records, key=lambda r: (r.chrom, r.start))
+        chroms = [record.chrom for record in sorted_records]
+        starts = [record.start for record in sorted_records]
+        ends = [record.end for record in sorted_records]
+        strands = [record.strand.value for record in sorted_records]
+        data_ids = [record.id for record in sorted_records]
+
+        intergenic_feature = features.pop("intergenic")
+        feature_index, intergenic_index = self._get_ensembl_feature_index(
+            annotation_path, list(features.keys())
+        )
+        try:
+            feature_order = np.full(len(feature_index.features), -1, dtype=np.int64)
+            for order, feature in enumerate(features.keys()):
+                feature_order[feature_index.features.index(feature)] = order
+        except ValueError as exc:
+            raise AnnotationFormatError(
+                f"Missing feature from index in {annotation_path}: {exc}."
+            ) from exc
+        pretty_features = list(features.values())
+
+        record_hits, index_hits = feature_index.overlap(chroms, starts, ends, strands)
+        hit_features = feature_order[feature_index.get_feature_codes(index_hits)]
+        is_requested = hit_features >= 0
+        record_hits = record_hits[is_requested]
+        index_hits = index_hits[is_requested]
+        hit_features = hit_features[is_requested]
+        order = np.lexsort((index_hits, record_hits, hit_features))
+        for record_hit, index_hit, hit_feature in zip(
+            record_hits[order].tolist(),
+            index_hits[order].tolist(),
+            hit_features[order].tolist(),
+        ):
+            for gene_id in feature_index.get_name(index_hit).split(","):
+                yield TrustedDataAnnotationRecord(
+                    gene_id, data_ids[record_hit], pretty_features[hit_feature]
+                )
+
+        # any feature, exc. intergenic has a gene_id, use the first one
+        codes = feature_index.get_feature_codes(np.arange(len(feature_index)))
+        first_feature = np.flatnonzero(feature_order[codes] == 0)
+        prefix = (
+            utils.get_ensembl_prefix(
+                feature_index.get_name(int(first_feature[0])).split(",")[0]
             )
+            if len(first_feature) > 0
+            else None
+        )
+        gene_id = f"{prefix}{intergenic_feature}"
+        record_hits, _ = intergenic_index.overlap(chroms, starts, ends)
+        for record_hit in record_hits.tolist():
+            yield TrustedDataAnnotationRecord(
+                gene_id, data_ids[record_hit], intergenic_feature
+            )
+
+    def _get_ensembl_feature_index(
+        self, annotation_path: Path, features: list[str]
+    ) -> tuple[IntervalIndex, IntervalIndex]:
+        index_path = Path(annotation_path, ENSEMBL_FEATURE_INDEX)
+        try:
+            modified = Path(index_path, "features", INDEX_METADATA_FILE).stat().st_mtime
+        except FileNotFoundError:
+            logger.info(
+                f"No feature index found in {annotation_path}, reading BED files..."
+            )
+            return self._get_ensembl_feature_index_from_bed(annotation_path, features)
+        cached = self._feature_indexes.get(index_path)
+        if cached is None or cached[0] != modified:
+            cached = (
+                modified,
+                IntervalIndex.load(Path(index_path, "features")),
+                IntervalIndex.load(Path(index_path, "intergenic")),
+            )
+            self._feature_indexes[index_path] = cached
+        return cached[1], cached[2]
+
+    @staticmethod
+    def _get_ensembl_feature_index_from_bed(
+        annotation_path: Path, features: list[str]
+    ) -> tuple[IntervalIndex, IntervalIndex]:
+        feature_index = IntervalIndex.from_beds(
+            [Path(annotation_path, f"{feature}.bed") for feature in features],
+            features=features,
+        )
+        intergenic_index = IntervalIndex.from_bed(
+            Path(annotation_path, "intergenic.bed"), stranded=False
+        )
+        return feature_index, intergenic_index
+
+    def ensembl_to_feature_index(
+        self, annotation_path: Path, features: dict[str, list[str]]
+    ) -> None:
+        """Build a binary index of genomic features from
+        BED files written by :meth:`ensembl_to_bed_features`,
+        to annotate data records without parsing BED files,
+        see :meth:`annotate_data_using_ensembl`. The index is
+        written to "annotation_path", and replaces any existing
+        index.
+
+        :param annotation_path: Path to annotation
+        :type annotation_path: Path
+        :param features: Genomic features for which
+        annotation must be created.
+        :type features: dict of {str: list of str}
+        """
+        index_path = Path(annotation_path, ENSEMBL_FEATURE_INDEX)
+        tmp_path = Path(annotation_path, f"{ENSEMBL_FEATURE_INDEX}.tmp")
+        logger.info(f"Writing feature index to {index_path}...")
+
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        feature_index, intergenic_index = self._get_ensembl_feature_index_from_bed(
+            annotation_path,
+            [
+                feature
+                for feature in [*features["conventional"], *features["extended"]]
+                if feature != "intergenic"
+            ],
+        )
+        feature_index.save(Path(tmp_path, "features"))
+        intergenic_index.save(Path(tmp_path, "intergenic"))
+        shutil.rmtree(index_path, ignore_errors=True)
+        tmp_path.rename(index_path)
 
     def ensembl_to_bed_features(
-        self, annotation_file: Path, chrom_file: Path, features: dict[str, list[str]]
+        self,
+        annotation_file: Path,
+        chrom_file: Path,
+        features: dict[str, list[str]],
+        processes: int | None = None,
     ) -> None:
         """Wrangle Ensembl (GTF) annotation to BED format for
         each genomic features in "features". The files are
@@ -284,6 +538,10 @@ class BedToolsService:
         awk 'OFS="\t" {print $4, $2, $3, $1, $5, $6, $7, $8}' |
         sort -k1,1 -k2,2n > exon.bed.
 
+        The sorted GTF is read once, and records are partitioned
+        by feature type. Features are then derived in parallel,
+        except introns, which require exons.
+
         :param annotation_file: Path to annotation file.
         The format is implicitely assumed to be GTF.
         :type annotation_file: Path
@@ -292,106 +550,224 @@ class BedToolsService:
         :param features: Genomic features for which
         annotation must be created.
         :type features: dict of {str: list of str}
+        :param processes: Number of worker processes. Default is one
+        per feature, up to the number of CPUs. If 1, features are
+        derived in process.
+        :type processes: int | None
         """
         parent = annotation_file.parent
-        annotation_bedtool = pybedtools.BedTool(annotation_file.as_posix()).sort()
+        intron_file = self._check_feature("intron", features, parent)
+        intergenic_file = self._check_feature("intergenic", features, parent)
+        if processes is None:
+            processes = min(len(features["conventional"]) + 1, cpu_count() or 1)
 
-        def _get_gtf_attrs_by_name(feature):
-            line = [
-                (
-                    feature.attrs["gene_name"]
-                    if "gene_name" in feature.attrs
-                    else feature.attrs["gene_id"]
-                ),
-                feature.start,
-                feature.end,
-                feature.chrom,
-                feature.score,
-                feature.strand,
-                feature.attrs["gene_id"],
-                feature.attrs["gene_biotype"],
-            ]
-            return pybedtools.cbedtools.create_interval_from_list(line)
-
-        def _get_fields_by_name(feature):
-            line = [
-                feature.name,
-                feature.start,
-                feature.end,
-                feature.chrom,
-                feature.score,
-                feature.strand,
-                feature.fields[6],
-                feature.fields[7],
-            ]
-            return pybedtools.cbedtools.create_interval_from_list(line)
+        logger.info(f"Preparing annotation and writing to {parent}...")
 
-        def _annotation_to_stream(feature, function=_get_gtf_attrs_by_name):
-            return annotation_bedtool.filter(lambda a: a.fields[2] == feature).each(
-                function
+        with TemporaryDirectory(dir=pybedtools.get_tempdir()) as tmp_path:
+            partitions = self._partition_ensembl_annotation(
+                annotation_file, features["conventional"], Path(tmp_path)
             )
+            with _get_executor(processes) as executor:
+                futures = {
+                    feature: executor.submit(
+                        _merge_feature,
+                        partitions[feature],
+                        Path(parent, f"{feature}.bed").as_posix(),
+                    )
+                    for feature in features["conventional"]
+                }
+                futures["intergenic"] = executor.submit(
+                    _complement_genes,
+                    partitions[GENES_PARTITION],
+                    chrom_file.as_posix(),
+                    intergenic_file,
+                )
+                futures["exon"].result()
+                futures["intron"] = executor.submit(
+                    _subtract_exons,
+                    partitions["gene"],
+                    Path(parent, "exon.bed").as_posix(),
+                    intron_file,
+                )
+                for future in futures.values():
+                    future.result()
 
-        logger.info(f"Preparing annotation and writing to {parent}...")
+    @staticmethod
+    def _partition_ensembl_annotation(
+        annotation_file: Path, features: list[str], tmp_path: Path
+    ) -> dict[str, str]:
+        # the GTF is sorted once, and each partition keeps that order
+        partitions = {
+            feature: Path(tmp_path, f"{feature}.tmp").as_posix()
+            for feature in {*features, "gene", GENES_PARTITION}
+        }
+        handles = {
+            feature: open(file_name, "w") for feature, file_name in partitions.items()
+        }
+        try:
+            for feature in pybedtools.BedTool(annotation_file.as_posix()).sort():
+                feature_type = feature.fields[2]
+                if feature_type in features:
+                    handles[feature_type].write(str(_get_gtf_attrs_by_name(feature)))
+                if feature_type == "gene":
+                    handles["gene"].write(str(_get_gtf_attrs_by_name(feature)))
+                    handles[GENES_PARTITION].write(str(_get_gtf_attrs(feature)))
+        finally:
+            for handle in handles.values():
+                handle.close()
+        logger.debug(f"Partitioned {annotation_file} by feature type.")
+        return partitions
 
-        for feature in features["conventional"]:
-            logger.debug(f"Writing {feature}...")
+    def intersect_comparison_records(
+        self,
+        a_records: Iterable[ComparisonRecord | TrustedComparisonRecord],
+        b_records_list: list[Iterable[ComparisonRecord | TrustedComparisonRecord]],
+        is_strand: bool,
+        is_sorted: bool = True,
+    ) -> Iterable[TrustedIntersectRecord]:
+        """Intersect records, i.e. report each record in A
+        with each overlapping record in B, as for
+        "bedtools intersect -wa -wb".
 
-            file_name = Path(parent, f"{feature}.bed").as_posix()
-            _ = (
-                _annotation_to_stream(feature)
-                .sort()
-                .merge(s=True, c=[4, 5, 6, 7, 8], o="distinct")
-                .each(_get_fields_by_name)
-                .sort()
-                .moveto(file_name)
-            )
+        With ComparisonEngine.BEDTOOLS, this is a wrapper for
+        pybedtools.bedtool.BedTool.intersect, else overlaps are
+        found in process, see :func:`interval_comparison.intersect`.
+        Both yield the same records, in the same order.
 
-        file_name = Path(parent, "exon.bed").as_posix()
-        exons = pybedtools.BedTool(file_name).each(_get_fields_by_name).sort()
-        file_name = self._check_feature("intron", features, parent)
-        _ = (
-            _annotation_to_stream("gene")
-            .sort()
-            .subtract(exons, s=True, sorted=True)
-            .sort()
-            .merge(s=True, c=[4, 5, 6, 7, 8], o="distinct")
-            .each(_get_fields_by_name)
-            .sort()
-            .moveto(file_name)
+        :param a_records: Left operand of operation
+        :type a_records: Iterable[ComparisonRecord | TrustedComparisonRecord]
+        :param b_records_list: Right operand of operation
+        :type b_records_list: list[Iterable[ComparisonRecord | TrustedComparisonRecord]]
+        :parm is_strand: Perform strand-aware query
+        :type is_strand: bool
+        :param is_sorted: Invoked sweeping algorithm (bedtools only)
+        :type is_sorted: bool
+        :returns: records
+        :rtype: Iterable of TrustedIntersectRecord
+        """
+        if self._comparison_engine == ComparisonEngine.BEDTOOLS:
+            return self._intersect_comparison_records_using_bedtools(
+                a_records, b_records_list, is_strand, is_sorted
+            )
+        records_list, intervals_list = self._get_comparison_intervals(
+            a_records, b_records_list
+        )
+        a_hits, b_files, b_hits = interval_comparison.intersect(
+            intervals_list[0], intervals_list[1:], is_strand
+        )
+        a, b_list = records_list[0], records_list[1:]
+        return (
+            TrustedIntersectRecord(a[a_hit], b_list[b_file][b_hit])
+            for a_hit, b_file, b_hit in zip(
+                a_hits.tolist(), b_files.tolist(), b_hits.tolist()
+            )
         )
 
-        file_name = self._check_feature("intergenic", features, parent)
-        _ = (
-            _annotation_to_stream("gene", function=_get_gtf_attrs)
-            .complement(g=chrom_file.as_posix())
-            .moveto(file_name)
+    def closest_comparison_records(
+        self,
+        a_records: Iterable[ComparisonRecord | TrustedComparisonRecord],
+        b_records_list: list[Iterable[ComparisonRecord | TrustedComparisonRecord]],
+        is_strand: bool,
+        is_sorted: bool = True,
+    ) -> Iterable[TrustedClosestRecord]:
+        """Report the closest non-overlapping records in B
+        for each record in A, with all ties, among all B,
+        and with the distance with respect to A, as for
+        "bedtools closest -io -t all -mdb all -D a".
+
+        With ComparisonEngine.BEDTOOLS, this is a wrapper for
+        pybedtools.bedtool.BedTool.closest, else closest records
+        are found in process, see :func:`interval_comparison.closest`.
+        Both yield the same records, in the same order.
+
+        :param a_records: Left operand of operation
+        :type a_records: Iterable[ComparisonRecord | TrustedComparisonRecord]
+        :param b_records_list: Right operand of operation
+        :type b_records_list: list[Iterable[ComparisonRecord | TrustedComparisonRecord]]
+        :parm is_strand: Perform strand-aware query
+        :type is_strand: bool
+        :param is_sorted: Invoked sweeping algorithm (bedtools only)
+        :type is_sorted: bool
+        :returns: records
+        :rtype: Iterable of TrustedClosestRecord
+        """
+        if self._comparison_engine == ComparisonEngine.BEDTOOLS:
+            return self._closest_comparison_records_using_bedtools(
+                a_records, b_records_list, is_strand, is_sorted
+            )
+        records_list, intervals_list = self._get_comparison_intervals(
+            a_records, b_records_list
+        )
+        a_hits, b_files, b_hits, distances = interval_comparison.closest(
+            intervals_list[0], intervals_list[1:], is_strand
+        )
+        a, b_list = records_list[0], records_list[1:]
+        return (
+            TrustedClosestRecord(a[a_hit], b_list[b_file][b_hit], distance)
+            for a_hit, b_file, b_hit, distance in zip(
+                a_hits.tolist(), b_files.tolist(), b_hits.tolist(), distances.tolist()
+            )
         )
 
-    def intersect_comparison_records(
+    def subtract_comparison_records(
         self,
-        a_records: Iterable[ComparisonRecord],
-        b_records_list: list[Iterable[ComparisonRecord]],
+        a_records: Iterable[ComparisonRecord | TrustedComparisonRecord],
+        b_records_list: list[Iterable[ComparisonRecord | TrustedComparisonRecord]],
         is_strand: bool,
         is_sorted: bool = True,
-    ) -> Iterable[IntersectRecord]:
-        """Wrapper for pybedtools.bedtool.BedTool.intersect
+    ) -> Iterable[TrustedComparisonRecord]:
+        """Subtract records, i.e. report the parts of records
+        in A that do not overlap any record in B, as for
+        "bedtools subtract".
 
-        Relies on the behaviour of bedtools -wa -wb option: the first
-        column after the complete -a record lists the file number
-        from which the overlap came.
+        With ComparisonEngine.BEDTOOLS, this is a wrapper for
+        pybedtools.bedtool.BedTool.subtract, else records are
+        subtracted in process, see :func:`interval_comparison.subtract`.
+        Both yield the same records, in the same order.
 
         :param a_records: Left operand of operation
-        :type a_records: Iterable[ComparisonRecord]
+        :type a_records: Iterable[ComparisonRecord | TrustedComparisonRecord]
         :param b_records_list: Right operand of operation
-        :type b_records_list: list[Iterable[ComparisonRecord]]
+        :type b_records_list: list[Iterable[ComparisonRecord | TrustedComparisonRecord]]
         :parm is_strand: Perform strand-aware query
         :type is_strand: bool
-        :param is_sorted: Invoked sweeping algorithm
+        :param is_sorted: Invoked sweeping algorithm (bedtools only)
         :type is_sorted: bool
         :returns: records
-        :rtype: Iterable of IntersectRecord
+        :rtype: Iterable of TrustedComparisonRecord
         """
+        if self._comparison_engine == ComparisonEngine.BEDTOOLS:
+            return self._subtract_comparison_records_using_bedtools(
+                a_records, b_records_list, is_strand, is_sorted
+            )
+        records_list, intervals_list = self._get_comparison_intervals(
+            a_records, b_records_list
+        )
+        a_hits, starts, ends = interval_comparison.subtract(
+            intervals_list[0], intervals_list[1:], is_strand
+        )
+        a = records_list[0]
+        # records that are not split are reported as is
+        is_split = (starts != intervals_list[0].starts[a_hits]) | (
+            ends != intervals_list[0].ends[a_hits]
+        )
+        return (
+            a[a_hit]._replace(start=start, end=end) if split else a[a_hit]
+            for a_hit, start, end, split in zip(
+                a_hits.tolist(), starts.tolist(), ends.tolist(), is_split.tolist()
+            )
+        )
 
+    def _intersect_comparison_records_using_bedtools(
+        self,
+        a_records: Iterable[ComparisonRecord | TrustedComparisonRecord],
+        b_records_list: list[Iterable[ComparisonRecord | TrustedComparisonRecord]],
+        is_strand: bool,
+        is_sorted: bool = True,
+    ) -> Iterable[TrustedIntersectRecord]:
+        # relies on the behaviour of bedtools -wa -wb option: the first
+        # column after the complete -a record lists the file number
+        # from which the overlap came
         a_bedtool = self._get_comparison_record_to_bedtool(a_records)
         b_bedtools = [self._get_comparison_record_to_bedtool(x) for x in b_records_list]
         bedtool = a_bedtool.intersect(
@@ -405,34 +781,18 @@ class BedToolsService:
         for s in stream:
             a = self._get_comparison_record_from_bedtool(s[:9])
             b = self._get_comparison_record_from_bedtool(s[9:])
-            r = IntersectRecord(a=a, b=b)
-            yield r
+            yield TrustedIntersectRecord(a, b)
 
-    def closest_comparison_records(
+    def _closest_comparison_records_using_bedtools(
         self,
-        a_records: Iterable[ComparisonRecord],
-        b_records_list: list[Iterable[ComparisonRecord]],
+        a_records: Iterable[ComparisonRecord | TrustedComparisonRecord],
+        b_records_list: list[Iterable[ComparisonRecord | TrustedComparisonRecord]],
         is_strand: bool,
         is_sorted: bool = True,
-    ) -> Iterable[ClosestRecord]:
-        """Wrapper for pybedtools.bedtool.BedTool.closest
-
-        Relies on the behaviour of bedtools -io -t -mdb -D options: the first
-        column after the complete -a record lists the file number
-        from which the closest interval came.
-
-        :param a_records: Left operand of operation
-        :type a_records: Iterable[ComparisonRecord]
-        :param b_records_list: Right operand of operation
-        :type b_records_list: list[Iterable[ComparisonRecord]]
-        :parm is_strand: Perform strand-aware query
-        :type is_strand: bool
-        :param is_sorted: Invoked sweeping algorithm
-        :type is_sorted: bool
-        :returns: records
-        :rtype: Iterable of ClosestRecord
-        """
-
+    ) -> Iterable[TrustedClosestRecord]:
+        # relies on the behaviour of bedtools -io -t -mdb -D options: the first
+        # column after the complete -a record lists the file number
+        # from which the closest interval came
         # BED6+3
         n_fields = 9
 
@@ -453,33 +813,19 @@ class BedToolsService:
             lambda c: c.fields[n_fields + 1] != "-1"
         )
         for s in stream:
-            yield ClosestRecord(
-                a=self._get_comparison_record_from_bedtool(s[:9]),
-                b=self._get_comparison_record_from_bedtool(s[9:18]),
-                distance=s[18],
+            yield TrustedClosestRecord(
+                self._get_comparison_record_from_bedtool(s[:9]),
+                self._get_comparison_record_from_bedtool(s[9:18]),
+                int(s[18]),
             )
 
-    def subtract_comparison_records(
+    def _subtract_comparison_records_using_bedtools(
         self,
-        a_records: Iterable[ComparisonRecord],
-        b_records_list: list[Iterable[ComparisonRecord]],
+        a_records: Iterable[ComparisonRecord | TrustedComparisonRecord],
+        b_records_list: list[Iterable[ComparisonRecord | TrustedComparisonRecord]],
         is_strand: bool,
         is_sorted: bool = True,
-    ) -> Iterable[SubtractRecord]:
-        """Wrapper for pybedtools.bedtool.BedTool.subtract
-
-        :param a_records: Left operand of operation
-        :type a_records: Iterable[ComparisonRecord]
-        :param b_records_list: Right operand of operation
-        :type b_records_list: Iterable[ComparisonRecord]
-        :parm is_strand: Perform strand-aware query
-        :type is_strand: bool
-        :param is_sorted: Invoked sweeping algorithm
-        :type is_sorted: bool
-        :returns: records
-        :rtype: Iterable of SubtractRecord
-        """
-
+    ) -> Iterable[TrustedComparisonRecord]:
         def b_generator():
             for records in b_records_list:
                 for r in records:
@@ -489,24 +835,22 @@ class BedToolsService:
         b_bedtool = self._get_comparison_record_to_bedtool(b_generator())
         bedtool = a_bedtool.subtract(b_bedtool, s=is_strand, sorted=is_sorted)
         for s in bedtool:
-            yield SubtractRecord(
-                **self._get_comparison_record_from_bedtool(s).model_dump()
-            )
+            yield self._get_comparison_record_from_bedtool(s)
 
     def intersect_bed6_records(
         self,
-        a_records: Iterable[Bed6Record],
+        a_records: Iterable[Bed6Record | TrustedBed6Record],
         stream: TextIO,
         is_strand: bool,
         is_sorted: bool = True,
-    ) -> Iterable[Bed6Record]:
+    ) -> Iterable[TrustedBed6Record]:
         """Wrapper for pybedtools.bedtool.BedTool.intersect
 
         This method only returns the original B feature when
         an overlap is found with A!
 
         :param a_records: Left operand of operation
-        :type a_records: Iterable[Bed6Record]
+        :type a_records: Iterable[Bed6Record | TrustedBed6Record]
         :param stream: Right operand of operation.
         The file is truncated to BED6.
         :type stream: TextIO
@@ -515,7 +859,7 @@ class BedToolsService:
         :param is_sorted: Invoked sweeping algorithm
         :type is_sorted: bool
         :returns: records
-        :rtype: Iterable of Bed6Record
+        :rtype: Iterable of TrustedBed6Record
         """
         a_bedtool = self._get_bed6_record_to_bedtool(a_records)
         b_bedtool = BedTool(stream)
@@ -586,13 +930,11 @@ class BedToolsService:
         )
         for s in stream:
             for gene_id in s[13].split(","):
-                yield DataAnnotationRecord(
-                    gene_id=gene_id, data_id=s[6], feature=feature
-                )
+                yield TrustedDataAnnotationRecord(gene_id, int(s[6]), feature)
 
     @staticmethod
     def _get_bed6_record_to_bedtool(
-        records: Iterable[Bed6Record],
+        records: Iterable[Bed6Record | TrustedBed6Record],
     ) -> BedTool:
         def generator():
             for record in records:
@@ -611,7 +953,7 @@ class BedToolsService:
 
     @staticmethod
     def _get_comparison_record_to_bedtool(
-        records: Iterable[ComparisonRecord],
+        records: Iterable[ComparisonRecord | TrustedComparisonRecord],
     ) -> BedTool:
         def generator():
             for record in records:
@@ -632,31 +974,188 @@ class BedToolsService:
         return BedTool(generator()).sort()
 
     @staticmethod
-    def _get_bed6_record_from_bedtool(s: Sequence[str]) -> Bed6Record:
-        return Bed6Record(
-            chrom=s[0],
-            start=s[1],
-            end=s[2],
-            name=s[3],
-            score=s[4],
-            strand=Strand(s[5]),
+    def _get_comparison_intervals(
+        a_records: Iterable[ComparisonRecord | TrustedComparisonRecord],
+        b_records_list: list[Iterable[ComparisonRecord | TrustedComparisonRecord]],
+    ) -> tuple[
+        list[list[TrustedComparisonRecord]], list[interval_comparison.Intervals]
+    ]:
+        # records of A, then of each B, with shared chrom codes
+        records_list = [
+            [
+                (
+                    record
+                    if isinstance(record, TrustedComparisonRecord)
+                    else TrustedComparisonRecord(
+                        record.chrom,
+                        record.start,
+                        record.end,
+                        record.name,
+                        record.score,
+                        record.strand,
+                        record.eufid,
+                        record.coverage,
+                        record.frequency,
+                    )
+                )
+                for record in records
+            ]
+            for records in [a_records, *b_records_list]
+        ]
+        chrom_codes = interval_comparison.get_chrom_codes(
+            record.chrom for records in records_list for record in records
+        )
+        strand_codes = interval_comparison.STRAND_CODES
+        intervals_list = [
+            interval_comparison.Intervals(
+                chroms=_get_array(
+                    map(chrom_codes.__getitem__, map(attrgetter("chrom"), records)),
+                    len(records),
+                ),
+                starts=_get_array(map(attrgetter("start"), records), len(records)),
+                ends=_get_array(map(attrgetter("end"), records), len(records)),
+                strands=_get_array(
+                    map(strand_codes.__getitem__, map(attrgetter("strand"), records)),
+                    len(records),
+                ),
+            )
+            for records in records_list
+        ]
+        return records_list, intervals_list
+
+    @staticmethod
+    def _get_bed6_record_from_bedtool(s: Sequence[str]) -> TrustedBed6Record:
+        # bedtools output of our own records, not validated
+        return TrustedBed6Record(
+            s[0],
+            int(s[1]),
+            int(s[2]),
+            s[3],
+            int(s[4]),
+            STRANDS.get(s[5]) or Strand(s[5]),
         )
 
     @staticmethod
-    def _get_comparison_record_from_bedtool(s: Sequence[str]) -> ComparisonRecord:
-        return ComparisonRecord(
-            chrom=s[0],
-            start=s[1],
-            end=s[2],
-            name=s[3],
-            score=s[4],
-            strand=Strand(s[5]),
-            eufid=s[6],
-            coverage=s[7],
-            frequency=s[8],
+    def _get_comparison_record_from_bedtool(
+        s: Sequence[str],
+    ) -> TrustedComparisonRecord:
+        # bedtools output of our own records, not validated
+        return TrustedComparisonRecord(
+            s[0],
+            int(s[1]),
+            int(s[2]),
+            s[3],
+            int(s[4]),
+            STRANDS.get(s[5]) or Strand(s[5]),
+            s[6],
+            int(s[7]),
+            int(s[8]),
         )
 
 
+def _get_array(values: Iterable[int], count: int) -> np.ndarray:
+    return np.fromiter(values, dtype=np.int64, count=count)
+
+
+def _get_executor(processes: int) -> Executor:
+    if processes == 1:
+        return _InProcessExecutor()
+    # workers inherit the pybedtools temporary directory by forking
+    return ProcessPoolExecutor(
+        max_workers=processes, mp_context=multiprocessing.get_context("fork")
+    )
+
+
+class _InProcessExecutor(Executor):
+    def submit(self, fn, /, *args, **kwargs) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            future.set_exception(exc)
+        return future
+
+
+@contextmanager
+def _removing_temp_files() -> Generator[None, None, None]:
+    # worker processes exit w/o running the pybedtools cleanup
+    count = len(BedTool.TEMPFILES)
+    try:
+        yield
+    finally:
+        for file_name in BedTool.TEMPFILES[count:]:
+            if os.path.exists(file_name):
+                os.unlink(file_name)
+        del BedTool.TEMPFILES[count:]
+
+
+def _merge_feature(partition_file: str, file_name: str) -> None:
+    logger.debug(f"Writing {file_name}...")
+    with _removing_temp_files():
+        _ = (
+            pybedtools.BedTool(partition_file)
+            .sort()
+            .merge(s=True, c=[4, 5, 6, 7, 8], o="distinct")
+            .each(_get_fields_by_name)
+            .sort()
+            .moveto(file_name)
+        )
+
+
+def _subtract_exons(genes_file: str, exon_file: str, file_name: str) -> None:
+    logger.debug(f"Writing {file_name}...")
+    with _removing_temp_files():
+        exons = pybedtools.BedTool(exon_file).each(_get_fields_by_name).sort()
+        _ = (
+            pybedtools.BedTool(genes_file)
+            .sort()
+            .subtract(exons, s=True, sorted=True)
+            .sort()
+            .merge(s=True, c=[4, 5, 6, 7, 8], o="distinct")
+            .each(_get_fields_by_name)
+            .sort()
+            .moveto(file_name)
+        )
+
+
+def _complement_genes(genes_file: str, chrom_file: str, file_name: str) -> None:
+    logger.debug(f"Writing {file_name}...")
+    with _removing_temp_files():
+        _ = pybedtools.BedTool(genes_file).complement(g=chrom_file).moveto(file_name)
+
+
+def _get_gtf_attrs_by_name(feature):
+    line = [
+        (
+            feature.attrs["gene_name"]
+            if "gene_name" in feature.attrs
+            else feature.attrs["gene_id"]
+        ),
+        feature.start,
+        feature.end,
+        feature.chrom,
+        feature.score,
+        feature.strand,
+        feature.attrs["gene_id"],
+        feature.attrs["gene_biotype"],
+    ]
+    return pybedtools.cbedtools.create_interval_from_list(line)
+
+
+def _get_fields_by_name(feature):
+    line = [
+        feature.name,
+        feature.start,
+        feature.end,
+        feature.chrom,
+        feature.score,
+        feature.strand,
+        feature.fields[6],
+        feature.fields[7],
+    ]
+    return pybedtools.cbedtools.create_interval_from_list(line)
+
+
 def _get_gtf_attrs(feature):
     """This function is to be passed
     as argument to BedTool.each(), to
@@ -717,4 +1216,8 @@ def _remove_filno(feature, n_fields: int = 9, is_closest: bool = False):
 
 @cache
 def get_bedtools_service():
-    return BedToolsService(tmp_path=get_config().BEDTOOLS_TMP_PATH)
+    return BedToolsService(
+        tmp_path=get_config().BEDTOOLS_TMP_PATH,
+        annotation_engine=AnnotationEngine(get_config().ANNOTATION_ENGINE),
+        comparison_engine=ComparisonEngine(get_config().COMPARISON_ENGINE),
+    )
@@ -1,26 +1,68 @@
 import logging
 from functools import cache
-from typing import Union, List, Iterable
+from typing import Any, ClassVar, Union, List, Iterable, Iterator, Optional, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import Row, select
 from sqlalchemy.orm import Session
 
 from scimodom.database.database import get_session
 from scimodom.database.models import Data, Dataset
+from scimodom.services.file import FileService, get_file_service
+from scimodom.utils.data_snapshot import (
+    SNAPSHOT_COLUMNS,
+    DataSnapshot,
+    DataSnapshotBuilder,
+)
+from scimodom.utils.dtos.bedtools import TrustedComparisonRecord
 
 logger = logging.getLogger(__name__)
 
+# Data columns required to annotate or compare records
+DATA_RECORD_COLUMNS = ("id", "chrom", "start", "end", "name", "score", "strand")
+DATA_COMPARISON_COLUMNS = (*DATA_RECORD_COLUMNS, "dataset_id", "coverage", "frequency")
+# Snapshot columns required to compare records, the EUFID is that of the snapshot
+SNAPSHOT_COMPARISON_COLUMNS = (
+    *DATA_RECORD_COLUMNS[1:],
+    "coverage",
+    "frequency",
+)
+
 
 class NoDataRecords(Exception):
     pass
 
 
 class DataService:
-    def __init__(self, session: Session):
+    """Provides methods to read Data records.
+
+    Read-heavy paths (comparison, export) read the records
+    of a dataset from a columnar snapshot, if there is one,
+    see :class:`DataSnapshot`. Snapshots are written after
+    a dataset is imported or updated, see :meth:`write_snapshot`,
+    and removed before its records are changed or deleted,
+    see :meth:`delete_snapshot`. Without snapshot, records
+    are read from the database.
+
+    :param session: SQLAlchemy ORM session
+    :type session: Session
+    :param file_service: File service instance used to store
+    snapshots. If None, snapshots are not used.
+    :type file_service: FileService | None
+    :param CHUNK_SIZE: Default number of records per chunk,
+    see :meth:`get_chunks_by_dataset`
+    :type CHUNK_SIZE: int
+    """
+
+    CHUNK_SIZE: ClassVar[int] = 100000
+
+    def __init__(self, session: Session, file_service: FileService | None = None):
         self._session = session
+        self._file_service = file_service
 
     def get_by_dataset(
-        self, datasets: Union[str, Dataset, List[Union[str, Dataset]]]
+        self,
+        datasets: Union[str, Dataset, List[Union[str, Dataset]]],
+        min_data_id: Optional[int] = None,
     ) -> Iterable[Data]:
         dataset_ids = self._get_datasets_as_id_list(datasets)
 
@@ -29,15 +71,204 @@ class DataService:
             .execution_options(yield_per=1000)
             .where(Data.dataset_id.in_(dataset_ids))
         )
+        if min_data_id is not None:
+            query = query.where(Data.id > min_data_id)
         count = 0
-        for record in self._session.execute(query).all():
+        for record in self._session.scalars(query):
             count += 1
-            yield record[0]
+            yield record
         if count == 0:
             raise NoDataRecords(
                 f"No records found for dataset id(s) {', '.join(dataset_ids)}!"
             )
 
+    def get_chunks_by_dataset(
+        self,
+        datasets: Union[str, Dataset, List[Union[str, Dataset]]],
+        columns: Sequence[str] = DATA_RECORD_COLUMNS,
+        min_data_id: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[Sequence[Row]]:
+        """Read Data records as lightweight rows (named tuples),
+        chunk by chunk, ordered by ID.
+
+        Each chunk is read with its own query (keyset pagination
+        on the ID), so that no more than one chunk is held in
+        memory, and that the session can be used to write records
+        between chunks, as no result set is left open.
+
+        :param datasets: Dataset(s) or EUFID(s)
+        :type datasets: str | Dataset | list of str | Dataset
+        :param columns: Data columns, "id" is always read first.
+        Default is DATA_RECORD_COLUMNS.
+        :type columns: Sequence[str]
+        :param min_data_id: If given, only read records with a larger ID
+        :type min_data_id: int | None
+        :param chunk_size: Number of records per chunk. Default is CHUNK_SIZE.
+        :type chunk_size: int | None
+        :returns: Chunks of rows
+        :rtype: Iterator[Sequence[Row]]
+
+        :raises: NoDataRecords
+        """
+        dataset_ids = self._get_datasets_as_id_list(datasets)
+        if chunk_size is None:
+            chunk_size = self.CHUNK_SIZE
+        query = (
+            select(Data.id, *[getattr(Data, c) for c in columns if c != "id"])
+            .where(Data.dataset_id.in_(dataset_ids))
+            .order_by(Data.id)
+            .limit(chunk_size)
+        )
+        last_id = min_data_id
+        count = 0
+        while True:
+            chunk_query = query if last_id is None else query.where(Data.id > last_id)
+            chunk = self._session.execute(chunk_query).all()
+            if len(chunk) == 0:
+                break
+            count += len(chunk)
+            last_id = chunk[-1].id
+            yield chunk
+            if len(chunk) < chunk_size:
+                break
+        if count == 0:
+            raise NoDataRecords(
+                f"No records found for dataset id(s) {', '.join(dataset_ids)}!"
+            )
+
+    def get_comparison_records(
+        self, dataset_id: str
+    ) -> Iterator[TrustedComparisonRecord]:
+        """Read the records of a dataset for comparison, from its
+        snapshot, sorted by chrom and start, or from the database,
+        ordered by ID. Records come from the database, and are
+        not validated.
+
+        :param dataset_id: EUFID
+        :type dataset_id: str
+        :returns: Records
+        :rtype: Iterator[TrustedComparisonRecord]
+
+        :raises: NoDataRecords
+        """
+        snapshot = self.get_snapshot(dataset_id)
+        if snapshot is not None:
+            for (
+                chrom,
+                start,
+                end,
+                name,
+                score,
+                strand,
+                coverage,
+                frequency,
+            ) in snapshot.get_rows(SNAPSHOT_COMPARISON_COLUMNS):
+                yield TrustedComparisonRecord(
+                    chrom,
+                    start,
+                    end,
+                    name,
+                    score,
+                    strand,
+                    dataset_id,
+                    coverage,
+                    frequency,
+                )
+            return
+        for chunk in self.get_chunks_by_dataset(
+            dataset_id, columns=DATA_COMPARISON_COLUMNS
+        ):
+            for data in chunk:
+                yield TrustedComparisonRecord(
+                    data.chrom,
+                    data.start,
+                    data.end,
+                    data.name,
+                    data.score,
+                    data.strand,
+                    data.dataset_id,
+                    data.coverage,
+                    data.frequency,
+                )
+
+    def get_bedrmod_rows(self, dataset_id: str) -> Iterator[tuple[Any, ...]]:
+        """Read the records of a dataset with all bedRMod columns,
+        in file order (SNAPSHOT_COLUMNS), from its snapshot, sorted
+        by chrom and start, or from the database, ordered by ID.
+        A dataset without records yields no rows.
+
+        :param dataset_id: EUFID
+        :type dataset_id: str
+        :returns: Rows
+        :rtype: Iterator[tuple[Any, ...]]
+        """
+        snapshot = self.get_snapshot(dataset_id)
+        if snapshot is not None:
+            yield from snapshot.get_rows()
+            return
+        try:
+            for chunk in self.get_chunks_by_dataset(
+                dataset_id, columns=SNAPSHOT_COLUMNS
+            ):
+                for data in chunk:
+                    yield tuple(data[1:])
+        except NoDataRecords:
+            return
+
+    def get_snapshot(self, dataset_id: str) -> DataSnapshot | None:
+        """Load the snapshot of a dataset, memory-mapped.
+
+        :param dataset_id: EUFID
+        :type dataset_id: str
+        :returns: Snapshot, or None if snapshots are not used,
+        or if there is no valid snapshot
+        :rtype: DataSnapshot | None
+        """
+        if self._file_service is None:
+            return None
+        return self._file_service.get_data_snapshot(dataset_id)
+
+    def write_snapshot(self, dataset_id: str) -> None:
+        """Write the snapshot of a dataset from its records
+        in the database, replacing any previous snapshot. A dataset
+        without records has no snapshot. Records are read chunk by
+        chunk, and each chunk is converted to arrays, see
+        :class:`DataSnapshotBuilder`. Errors writing the snapshot
+        are only logged, as the database remains the reference.
+
+        :param dataset_id: EUFID
+        :type dataset_id: str
+        """
+        if self._file_service is None:
+            return
+        builder = DataSnapshotBuilder()
+        max_data_id = 0
+        try:
+            for chunk in self.get_chunks_by_dataset(
+                dataset_id, columns=SNAPSHOT_COLUMNS
+            ):
+                builder.add(dict(zip(SNAPSHOT_COLUMNS, list(zip(*chunk))[1:])))
+                max_data_id = chunk[-1].id
+        except NoDataRecords:
+            self.delete_snapshot(dataset_id)
+            return
+        snapshot = builder.build(dataset_id, max_data_id)
+        try:
+            self._file_service.update_data_snapshot(dataset_id, snapshot)
+        except OSError as exc:
+            logger.warning(f"Failed to write snapshot for dataset {dataset_id}: {exc}")
+
+    def delete_snapshot(self, dataset_id: str) -> None:
+        """Remove the snapshot of a dataset, if any.
+
+        :param dataset_id: EUFID
+        :type dataset_id: str
+        """
+        if self._file_service is None:
+            return
+        self._file_service.delete_data_snapshot(dataset_id)
+
     @staticmethod
     def _get_datasets_as_id_list(datasets):
         if type(datasets) is str or isinstance(datasets, Dataset):
@@ -47,4 +278,4 @@ class DataService:
 
 @cache
 def get_data_service():
-    return DataService(session=get_session())
+    return DataService(session=get_session(), file_service=get_file_service())
@@ -1,13 +1,24 @@
+import csv
+from collections import defaultdict, deque
+from dataclasses import dataclass, replace
 from datetime import datetime, timezone
 from functools import cache
+from itertools import repeat
 import logging
-from typing import List, Dict, Optional, TextIO
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, TextIO
 
-from sqlalchemy import select, func, delete
+import pandas as pd  # type: ignore # import-untyped
+from sqlalchemy import select, func, delete, update
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import Session
 
-from scimodom.database.buffer import InsertBuffer
+from scimodom.config import get_config
+from scimodom.database.buffer import (
+    BulkInsertBuffer,
+    get_insert_mode,
+    get_insert_modes,
+)
 from scimodom.database.database import get_session
 from scimodom.database.models import (
     Dataset,
@@ -23,22 +34,111 @@ from scimodom.database.models import (
     UserProjectAssociation,
     Data,
     DataAnnotation,
+    Sprinzl,
 )
 from scimodom.services.annotation import get_annotation_service, AnnotationService
+from scimodom.services.data import DataService, get_data_service
 from scimodom.services.file import FileService, get_file_service
 from scimodom.services.validator import (
     _DatasetImportContext,
+    _ReadOnlyImportContext,
+    DatasetImportError,
     DatasetUpdateError,
+    SpecsError,
     ValidatorService,
     get_validator_service,
 )
+from scimodom.utils.import_metrics import ImportMetrics, get_import_metrics
 from scimodom.utils.importer.bed_importer import EufImporter
+from scimodom.utils.importer.columnar_importer import (
+    EUF_COLUMNS,
+    STR_COLUMNS,
+    STRANDS,
+    EufColumnarImporter,
+)
 from scimodom.utils.dtos.bedtools import EufRecord
-from scimodom.utils.specs.enums import AnnotationSource, Identifiers
+from scimodom.utils.dtos.dataset_validation import DatasetValidationReportDto
+from scimodom.utils.specs.enums import (
+    AnnotationSource,
+    Identifiers,
+    ImportMetricsStage,
+    ImportStage,
+    InsertMode,
+)
 from scimodom.utils.utils import gen_short_uuid
 
 logger = logging.getLogger(__name__)
 
+DATA_COLUMNS = [
+    "dataset_id",
+    "modification_id",
+    "chrom",
+    "start",
+    "end",
+    "name",
+    "score",
+    "strand",
+    "thick_start",
+    "thick_end",
+    "item_rgb",
+    "coverage",
+    "frequency",
+]
+
+# Records are matched on these columns when updating a dataset...
+DATA_KEY_COLUMNS = ["chrom", "start", "end", "strand", "name"]
+# ...and these are updated in place
+DATA_UPDATE_COLUMNS = [
+    "score",
+    "thick_start",
+    "thick_end",
+    "item_rgb",
+    "coverage",
+    "frequency",
+]
+
+# Called with the current stage, the number of records
+# parsed, and the number of records inserted so far.
+ImportProgressCallback = Callable[[ImportStage, int, int], None]
+
+
+@dataclass
+class DatasetImportTask:
+    """Validated import context for a bedRMod file,
+    see :meth:`DatasetService.prepare_import`.
+
+    The EUFID is only assigned when the dataset is
+    written into the database.
+    """
+
+    source: str
+    header: dict[str, str]
+    context: _DatasetImportContext
+    early_abort_flag: bool = False
+
+
+@dataclass
+class PreparedDataset:
+    """Validated, and eventually lifted over, records
+    ready to be written into the database,
+    see :meth:`DatasetService.prepare_records`.
+    """
+
+    task: DatasetImportTask
+    records_file: str
+    record_count: int
+    metrics: ImportMetrics | None = None
+
+
+@dataclass
+class DatasetValidationTask:
+    """Validated read-only context for a bedRMod file,
+    see :meth:`DatasetService.prepare_validation`.
+    """
+
+    source: str
+    context: _ReadOnlyImportContext
+
 
 class DatasetService:
     """Provides methods to retrieve and manage
@@ -50,21 +150,36 @@ class DatasetService:
     :type annotation_service: AnnotationService
     :param file_service: File service instance
     :type file_service: FileService
+    :param data_service: Data service instance, used to maintain
+    the snapshot of each dataset, see :class:`DataService`
+    :type data_service: DataService
     :param validator_service: Validator service instance
     :type validator_service: ValidatorService
+    :param insert_modes: Insert modes by table name, see :class:`BulkInsertBuffer`
+    :type insert_modes: dict[str, InsertMode] | None
     """
 
+    PREPARED_CHUNK_SIZE = 100000
+    PROGRESS_INTERVAL = 100000
+    PRESCAN_RECORD_COUNT = 10000
+    UPDATE_BATCH_SIZE = 1000
+    EARLY_ABORT_MIN_RECORDS = 1000
+
     def __init__(
         self,
         session: Session,
         annotation_service: AnnotationService,
         file_service: FileService,
+        data_service: DataService,
         validator_service: ValidatorService,
+        insert_modes: dict[str, InsertMode] | None = None,
     ):
         self._session = session
         self._annotation_service = annotation_service
         self._file_service = file_service
+        self._data_service = data_service
         self._validator_service = validator_service
+        self._insert_modes = {} if insert_modes is None else insert_modes
 
     def get_by_id(self, eufid: str) -> Dataset:
         """Retrieve dataset by EUFID.
@@ -150,10 +265,18 @@ class DatasetService:
         annotation_source: AnnotationSource,
         dry_run_flag: bool = False,
         eufid: str | None = None,
+        columnar_flag: bool = False,
+        progress: ImportProgressCallback | None = None,
+        metrics: ImportMetrics | None = None,
+        annotation_workers: int | None = None,
+        early_abort_flag: bool = False,
     ) -> str:
         """Import dataset and records from bedRMod formatted file
         and write into the database.
 
+        Wall time, rows in and out, and peak RSS are recorded
+        for each stage of the import, and logged at the end.
+
         :param stream: Input stream
         :type stream: TextIO
         :param source: Import file name
@@ -174,12 +297,74 @@ class DatasetService:
         :type annotation_source: AnnotationSource
         :param dry_run_flag: If true, validate data w/o writing into the database. Default is False.
         :type dry_run_flag: bool
-        :param eufid: Update data and data annotation records for this EUFID (dataset). This is silently
-        ignored if 'dry_run_flag' is set. Default is None.
+        :param eufid: Update data and data annotation records for this EUFID (dataset). Only records
+        that changed are written, and only new records are annotated. Records are matched by chrom, start,
+        end, strand, and name. This is silently ignored if 'dry_run_flag' is set. Default is None.
         :type eufid: str | None
+        :param columnar_flag: If true, parse and validate records by chunks
+        using :class:`EufColumnarImporter`. Default is False.
+        :type columnar_flag: bool
+        :param progress: Called with the current stage, and the number
+        of records parsed and inserted, at most every PROGRESS_INTERVAL records.
+        :type progress: ImportProgressCallback | None
+        :param metrics: If given, stage metrics are added to this instance.
+        :type metrics: ImportMetrics | None
+        :param annotation_workers: Number of worker processes used to annotate
+        records. Default is set by the annotation service.
+        :type annotation_workers: int | None
+        :param early_abort_flag: If true, abort as soon as the error rate
+        is exceeded with high confidence, see :meth:`AbstractBedImporter._check_early_abort`.
+        This assumes that errors are spread evenly, and files with many errors
+        among the first records may be rejected, although they would pass a full
+        parse. Default is False.
+        :type early_abort_flag: bool
         :returns: EUFID - in case of a dry run the value 'DRYRUNDRYRUN' is returned.
         :rtype: str
         """
+        dataset_metrics = ImportMetrics()
+        try:
+            with dataset_metrics.activate():
+                return self._import_dataset(
+                    stream,
+                    source=source,
+                    smid=smid,
+                    title=title,
+                    assembly_id=assembly_id,
+                    modification_ids=modification_ids,
+                    organism_id=organism_id,
+                    technology_id=technology_id,
+                    annotation_source=annotation_source,
+                    dry_run_flag=dry_run_flag,
+                    eufid=eufid,
+                    columnar_flag=columnar_flag,
+                    progress=progress,
+                    annotation_workers=annotation_workers,
+                    early_abort_flag=early_abort_flag,
+                )
+        finally:
+            _log_metrics(source, dataset_metrics)
+            if metrics is not None:
+                metrics.merge(dataset_metrics)
+
+    def _import_dataset(
+        self,
+        stream: TextIO,
+        source: str,
+        smid: str,
+        title: str,
+        assembly_id: int,
+        modification_ids: list[int],
+        organism_id: int,
+        technology_id: int,
+        annotation_source: AnnotationSource,
+        dry_run_flag: bool,
+        eufid: str | None,
+        columnar_flag: bool,
+        progress: ImportProgressCallback | None,
+        annotation_workers: int | None,
+        early_abort_flag: bool,
+    ) -> str:
+        self._prescan(stream, source, early_abort_flag)
         update_flag = False
         if dry_run_flag:
             eufid = "DRYRUNDRYRUN"
@@ -192,11 +377,21 @@ class DatasetService:
         else:
             eufid = self._generate_eufid()
 
+        if progress is None:
+            progress = _ignore_progress
+        progress(ImportStage.VALIDATING, 0, 0)
         checkpoint = None
         if not dry_run_flag:
             checkpoint = self._session.begin_nested()
         try:
-            importer = EufImporter(stream=stream, source=source)
+            importer_class = EufColumnarImporter if columnar_flag else EufImporter
+            importer = importer_class(
+                stream=stream,
+                source=source,
+                early_abort_min_records=self._get_early_abort_min_records(
+                    early_abort_flag
+                ),
+            )
             self._validator_service.create_import_context(
                 importer=importer,
                 smid=smid,
@@ -209,8 +404,9 @@ class DatasetService:
                 annotation_source=annotation_source,
                 dry_run_flag=dry_run_flag,
                 update_flag=update_flag,
+                columnar_flag=columnar_flag,
             )
-            self._import_dataset_with_context(importer)
+            self._import_dataset_with_context(importer, progress, annotation_workers)
         except Exception:
             if checkpoint is not None:
                 checkpoint.rollback()
@@ -218,6 +414,252 @@ class DatasetService:
 
         return eufid
 
+    def prepare_import(
+        self,
+        stream: TextIO,
+        source: str,
+        smid: str,
+        title: str,
+        assembly_id: int,
+        modification_ids: list[int],
+        organism_id: int,
+        technology_id: int,
+        annotation_source: AnnotationSource,
+        columnar_flag: bool = False,
+        early_abort_flag: bool = False,
+    ) -> DatasetImportTask:
+        """Validate header and import context for a new dataset,
+        w/o reading records.
+
+        This is the first stage of a staged import: records
+        are then validated with :meth:`prepare_records`, which
+        does not access the database, and can thus run in a
+        worker process. Prepared records are finally written
+        into the database with :meth:`import_prepared_dataset`.
+
+        :param stream: Input stream
+        :type stream: TextIO
+        :param source: Import file name
+        :type source: str
+        :param smid: Project SMID
+        :type smid: str
+        :param title: Datatset title
+        :type title: str
+        :param assembly_id: Assembly ID
+        :type assembly_id: int
+        :param modification_ids: Modification ID(s)
+        :type modification_ids: list[int]
+        :param organism_id: Organism ID
+        :type organism_id: int
+        :param technology_id: Technology ID
+        :type technology_id: int
+        :param annotation_source: Source of annotation
+        :type annotation_source: AnnotationSource
+        :param columnar_flag: If true, parse and validate records by chunks
+        using :class:`EufColumnarImporter`. Default is False.
+        :type columnar_flag: bool
+        :param early_abort_flag: If true, abort as soon as the error rate
+        is exceeded with high confidence, see :meth:`import_dataset`.
+        Default is False.
+        :type early_abort_flag: bool
+        :returns: Import task
+        :rtype: DatasetImportTask
+        """
+        self._prescan(stream, source, early_abort_flag)
+        importer = EufImporter(stream=stream, source=source)
+        self._validator_service.create_import_context(
+            importer=importer,
+            smid=smid,
+            eufid="",
+            title=title,
+            modification_ids=modification_ids,
+            organism_id=organism_id,
+            technology_id=technology_id,
+            assembly_id=assembly_id,
+            annotation_source=annotation_source,
+            dry_run_flag=False,
+            update_flag=False,
+            columnar_flag=columnar_flag,
+        )
+        context = self._validator_service.get_import_context()
+        header = self._validator_service.get_validated_header()
+        if context is None or header is None:
+            raise DatasetImportError(f"Failed to create import context for {source}.")
+        if context.is_liftover:
+            context.chain_file = self._validator_service.get_chain_file(context)
+        return DatasetImportTask(
+            source=source,
+            header=header,
+            context=context,
+            early_abort_flag=early_abort_flag,
+        )
+
+    def prepare_records(
+        self, task: DatasetImportTask, stream: TextIO
+    ) -> PreparedDataset:
+        """Parse, validate, and eventually lift over records,
+        and write them to a temporary file.
+
+        This method does not access the database.
+
+        :param task: Import task
+        :type task: DatasetImportTask
+        :param stream: Input stream
+        :type stream: TextIO
+        :returns: Prepared dataset
+        :rtype: PreparedDataset
+        """
+        context = task.context
+        importer_class = EufColumnarImporter if context.columnar_flag else EufImporter
+        importer = importer_class(
+            stream=stream,
+            source=task.source,
+            early_abort_min_records=self._get_early_abort_min_records(
+                task.early_abort_flag
+            ),
+        )
+        records_file = self._file_service.create_temp_file(suffix=".tsv")
+        metrics = ImportMetrics()
+        try:
+            with metrics.activate(), open(records_file, "w") as fh:
+                record_count = self._write_validated_records(context, importer, fh)
+        except Exception:
+            Path(records_file).unlink(missing_ok=True)
+            raise
+        return PreparedDataset(
+            task=task,
+            records_file=records_file,
+            record_count=record_count,
+            metrics=metrics,
+        )
+
+    def import_prepared_dataset(
+        self,
+        prepared: PreparedDataset,
+        metrics: ImportMetrics | None = None,
+        annotation_workers: int | None = None,
+    ) -> str:
+        """Write a prepared dataset into the database,
+        see :meth:`prepare_import`. The temporary file
+        holding the records is removed.
+
+        Stage metrics recorded when preparing records
+        are logged together with those recorded here.
+
+        :param prepared: Prepared dataset
+        :type prepared: PreparedDataset
+        :param metrics: If given, stage metrics are added to this instance.
+        :type metrics: ImportMetrics | None
+        :param annotation_workers: Number of worker processes used to annotate
+        records. Default is set by the annotation service.
+        :type annotation_workers: int | None
+        :returns: EUFID
+        :rtype: str
+        """
+        dataset_metrics = ImportMetrics()
+        if prepared.metrics is not None:
+            dataset_metrics.merge(prepared.metrics)
+        try:
+            with dataset_metrics.activate():
+                return self._import_prepared_dataset(prepared, annotation_workers)
+        finally:
+            _log_metrics(prepared.task.source, dataset_metrics)
+            if metrics is not None:
+                metrics.merge(dataset_metrics)
+
+    def _import_prepared_dataset(
+        self, prepared: PreparedDataset, annotation_workers: int | None
+    ) -> str:
+        try:
+            context = replace(prepared.task.context, eufid=self._generate_eufid())
+            checkpoint = self._session.begin_nested()
+            try:
+                # datasets written in the meantime are not covered by prepare_import
+                self._validator_service.check_for_duplicate_dataset(context)
+                self._create_dataset(context, prepared.task.header)
+                with get_import_metrics().stage(
+                    ImportMetricsStage.INSERTION
+                ) as stage_metrics, BulkInsertBuffer[Data](
+                    self._session,
+                    Data,
+                    DATA_COLUMNS,
+                    mode=get_insert_mode(self._insert_modes, Data),
+                ) as buffer:
+                    for chunk in self._read_prepared_records(prepared):
+                        for values in self._get_data_values_from_chunk(chunk, context):
+                            buffer.queue(values)
+                stage_metrics.rows_in += prepared.record_count
+                stage_metrics.rows_out += buffer.row_count
+                self._add_association(context)
+                self._annotate_and_commit(
+                    context, annotation_workers=annotation_workers
+                )
+            except Exception:
+                checkpoint.rollback()
+                raise
+        finally:
+            Path(prepared.records_file).unlink(missing_ok=True)
+        return context.eufid
+
+    def validate_dataset(
+        self, stream: TextIO, source: str
+    ) -> DatasetValidationReportDto:
+        """Validate a bedRMod file w/o importing it,
+        see :meth:`prepare_validation` and :meth:`validate_records`.
+
+        :param stream: Input stream
+        :type stream: TextIO
+        :param source: Import file name
+        :type source: str
+        :returns: Validation report
+        :rtype: DatasetValidationReportDto
+        """
+        importer = self._get_validation_importer(stream, source)
+        task = self._create_validation_task(importer, source)
+        return self._validator_service.get_validation_report(
+            importer, task.context, source
+        )
+
+    def prepare_validation(self, stream: TextIO, source: str) -> DatasetValidationTask:
+        """Validate header, and create a read-only import
+        context for the organism and assembly given in the header.
+
+        Records are then validated with :meth:`validate_records`,
+        which does not access the database, and can thus run in
+        a worker process.
+
+        :param stream: Input stream
+        :type stream: TextIO
+        :param source: Import file name
+        :type source: str
+        :returns: Validation task
+        :rtype: DatasetValidationTask
+        """
+        importer = EufImporter(stream=stream, source=source)
+        return self._create_validation_task(importer, source)
+
+    def validate_records(
+        self, task: DatasetValidationTask, stream: TextIO
+    ) -> DatasetValidationReportDto:
+        """Parse and validate all records, w/o creating
+        database records, see :meth:`ValidatorService.get_validation_report`.
+
+        Records are parsed by chunks, and memory use does not
+        depend on the size of the input. Errors do not abort
+        validation. This method does not access the database.
+
+        :param task: Validation task
+        :type task: DatasetValidationTask
+        :param stream: Input stream
+        :type stream: TextIO
+        :returns: Validation report
+        :rtype: DatasetValidationReportDto
+        """
+        importer = self._get_validation_importer(stream, task.source)
+        return self._validator_service.get_validation_report(
+            importer, task.context, task.source
+        )
+
     def delete_dataset(self, dataset: Dataset) -> None:
         """Delete a dataset and all associated data.
 
@@ -228,13 +670,15 @@ class DatasetService:
         - bam_file
         - dataset
 
-        Associated BAM files are deleted from
-        the file system.
+        Associated BAM files, the snapshot of the dataset,
+        and cached comparison results that involve the
+        dataset are deleted from the file system.
 
         :param dataset: Dataset instance to delete
         :type dataset: Dataset
         """
         try:
+            self._data_service.delete_snapshot(dataset.id)
             self._delete_data_records(dataset.id)
             self._session.execute(
                 delete(DatasetModificationAssociation).filter_by(dataset_id=dataset.id)
@@ -247,56 +691,123 @@ class DatasetService:
                 self._file_service.remove_bam_file(bam_file)
             self._session.delete(dataset)
             self._session.commit()
+            self._file_service.delete_comparison_cache(dataset.id)
         except Exception:
             self._session.rollback()
             raise
 
     @staticmethod
-    def _get_data_record(record: EufRecord, context: _DatasetImportContext):
-        return Data(
-            dataset_id=context.eufid,
-            modification_id=context.modification_names.get(record.name),
-            chrom=record.chrom,
-            start=record.start,
-            end=record.end,
-            name=record.name,
-            score=record.score,
-            strand=record.strand,
-            thick_start=record.thick_start,
-            thick_end=record.thick_end,
-            item_rgb=record.item_rgb,
-            coverage=record.coverage,
-            frequency=record.frequency,
+    def _get_data_values(record: EufRecord, context: _DatasetImportContext):
+        return (
+            context.eufid,
+            context.modification_names.get(record.name),
+            record.chrom,
+            record.start,
+            record.end,
+            record.name,
+            record.score,
+            record.strand,
+            record.thick_start,
+            record.thick_end,
+            record.item_rgb,
+            record.coverage,
+            record.frequency,
         )
 
+    def _create_validation_task(
+        self, importer: EufImporter, source: str
+    ) -> DatasetValidationTask:
+        organism = importer.get_header("organism")
+        try:
+            taxa_id = int(organism)  # type: ignore[arg-type]
+        except (TypeError, ValueError):
+            raise SpecsError(f"Failed to parse organism from header: {organism}.")
+        self._validator_service.create_read_only_import_context(importer, taxa_id)
+        context = self._validator_service.get_read_only_context()
+        if context is None:
+            raise DatasetImportError(f"Failed to create import context for {source}.")
+        return DatasetValidationTask(source=source, context=context)
+
+    @staticmethod
+    def _get_validation_importer(stream: TextIO, source: str) -> EufColumnarImporter:
+        # all errors are reported
+        return EufColumnarImporter(stream=stream, source=source, max_error_rate=None)
+
+    def _prescan(self, stream: TextIO, source: str, early_abort_flag: bool) -> None:
+        # Reject files with too many format errors before any database
+        # work is done. Records are parsed again later, so we only
+        # look at the first records, and rewind the stream. Unless
+        # early abort is requested, only files that are read entirely
+        # are rejected.
+        if not stream.seekable():
+            return
+        position = stream.tell()
+        importer = EufImporter(stream=stream, source=source)
+        importer.prescan(self.PRESCAN_RECORD_COUNT, early_abort_flag)
+        stream.seek(position)
+
+    def _get_early_abort_min_records(self, early_abort_flag: bool) -> int | None:
+        return self.EARLY_ABORT_MIN_RECORDS if early_abort_flag else None
+
     def _generate_eufid(self) -> str:
         eufids = self._session.execute(select(Dataset.id)).scalars().all()
         return gen_short_uuid(Identifiers.EUFID.length, eufids)
 
-    def _import_dataset_with_context(self, importer: EufImporter) -> None:
+    def _import_dataset_with_context(
+        self,
+        importer: EufImporter,
+        progress: ImportProgressCallback,
+        annotation_workers: int | None = None,
+    ) -> None:
         context = self._validator_service.get_import_context()
         if context is not None:
-            self._create_dataset(context)
-            self._import_data_records(context, importer)
+            self._create_dataset(
+                context, self._validator_service.get_validated_header()
+            )
+            # records inserted by an update have larger IDs
+            min_data_id = None
+            if context.update_flag and not context.dry_run_flag:
+                min_data_id = self._get_max_data_id(context.eufid)
+                self._data_service.delete_snapshot(context.eufid)
+                self._file_service.delete_comparison_cache(context.eufid)
+            inserted_count = self._import_data_records(context, importer, progress)
             self._add_association(context)
             if not context.dry_run_flag:
-                self._annotation_service.annotate_data(
-                    taxa_id=context.taxa_id,
-                    annotation_source=context.annotation_source,
-                    eufid=context.eufid,
-                    selection_ids=context.selection_ids,
+                progress(
+                    ImportStage.ANNOTATING, importer.get_parsed_count(), inserted_count
                 )
-                self._session.commit()
+                self._annotate_and_commit(context, min_data_id, annotation_workers)
 
-                logger.info(
-                    f"Added dataset {context.eufid} to project {context.smid} with title = {context.title}, "
-                    f"and the following selections: {context.selection_ids}. "
-                )
+    def _annotate_and_commit(
+        self,
+        context: _DatasetImportContext,
+        min_data_id: int | None = None,
+        annotation_workers: int | None = None,
+    ) -> None:
+        self._annotation_service.annotate_data(
+            taxa_id=context.taxa_id,
+            annotation_source=context.annotation_source,
+            eufid=context.eufid,
+            selection_ids=context.selection_ids,
+            min_data_id=min_data_id,
+            workers=annotation_workers,
+        )
+        self._session.commit()
+        self._data_service.write_snapshot(context.eufid)
+        if context.update_flag:
+            # results may have been cached while the dataset was updated
+            self._file_service.delete_comparison_cache(context.eufid)
+
+        logger.info(
+            f"Added dataset {context.eufid} to project {context.smid} with title = {context.title}, "
+            f"and the following selections: {context.selection_ids}. "
+        )
 
-    def _create_dataset(self, context: _DatasetImportContext):
+    def _create_dataset(
+        self, context: _DatasetImportContext, header: dict[str, str] | None
+    ):
         if context.update_flag or context.dry_run_flag:
             return
-        header = self._validator_service.get_validated_header()
         if header is not None:
             dataset = Dataset(
                 id=context.eufid,
@@ -318,22 +829,215 @@ class DatasetService:
             self._session.flush()
 
     def _import_data_records(
-        self, context: _DatasetImportContext, importer: EufImporter
-    ):
+        self,
+        context: _DatasetImportContext,
+        importer: EufImporter,
+        progress: ImportProgressCallback,
+    ) -> int:
         if context.dry_run_flag:
+            # validated records are discarded
+            for _ in self._get_validated_records_or_chunks(context, importer):
+                pass
+            return 0
+        if context.update_flag:
+            return self._update_data_records(context, importer, progress)
+        count = 0
+        with get_import_metrics().stage(
+            ImportMetricsStage.INSERTION
+        ) as stage_metrics, BulkInsertBuffer[Data](
+            self._session,
+            Data,
+            DATA_COLUMNS,
+            mode=get_insert_mode(self._insert_modes, Data),
+        ) as buffer:
+            progress(ImportStage.INSERTING, importer.get_parsed_count(), 0)
+            for count, values in enumerate(
+                self._get_validated_data_values(context, importer), start=1
+            ):
+                buffer.queue(values)
+                if count % self.PROGRESS_INTERVAL == 0:
+                    progress(
+                        ImportStage.INSERTING,
+                        importer.get_parsed_count(),
+                        buffer.row_count,
+                    )
+        stage_metrics.rows_in += count
+        stage_metrics.rows_out += buffer.row_count
+        return buffer.row_count
+
+    def _get_validated_records_or_chunks(
+        self, context: _DatasetImportContext, importer: EufImporter
+    ) -> Iterator[EufRecord | pd.DataFrame]:
+        if context.columnar_flag and isinstance(importer, EufColumnarImporter):
+            return self._validator_service.get_validated_chunks(importer, context)
+        return self._validator_service.get_validated_records(importer, context)
+
+    def _get_validated_data_values(
+        self, context: _DatasetImportContext, importer: EufImporter
+    ) -> Iterator[tuple[Any, ...]]:
+        if context.columnar_flag and isinstance(importer, EufColumnarImporter):
+            for chunk in self._validator_service.get_validated_chunks(
+                importer, context
+            ):
+                yield from self._get_data_values_from_chunk(chunk, context)
+        else:
             for record in self._validator_service.get_validated_records(
                 importer, context
             ):
-                self._get_data_record(record, context)
+                yield self._get_data_values(record, context)
+
+    @staticmethod
+    def _get_data_values_from_chunk(
+        chunk: pd.DataFrame, context: _DatasetImportContext
+    ) -> Iterator[tuple[Any, ...]]:
+        size = len(chunk)
+        return zip(
+            repeat(context.eufid, size),
+            chunk["name"].map(context.modification_names).tolist(),
+            chunk["chrom"].tolist(),
+            chunk["start"].tolist(),
+            chunk["end"].tolist(),
+            chunk["name"].tolist(),
+            chunk["score"].tolist(),
+            chunk["strand"].map(STRANDS).tolist(),
+            chunk["thick_start"].tolist(),
+            chunk["thick_end"].tolist(),
+            chunk["item_rgb"].tolist(),
+            chunk["coverage"].tolist(),
+            chunk["frequency"].tolist(),
+        )
+
+    def _write_validated_records(
+        self, context: _DatasetImportContext, importer: EufImporter, fh: TextIO
+    ) -> int:
+        record_count = 0
+        if context.columnar_flag and isinstance(importer, EufColumnarImporter):
+            for chunk in self._validator_service.get_validated_chunks(
+                importer, context
+            ):
+                chunk[EUF_COLUMNS].to_csv(
+                    fh, sep="\t", header=False, index=False, quoting=csv.QUOTE_NONE
+                )
+                record_count += len(chunk)
         else:
-            if context.update_flag:
-                self._delete_data_records(context.eufid)
-            with InsertBuffer[Data](self._session) as buffer:
-                for record in self._validator_service.get_validated_records(
-                    importer, context
-                ):
-                    data = self._get_data_record(record, context)
-                    buffer.queue(data)
+            for record in self._validator_service.get_validated_records(
+                importer, context
+            ):
+                values = record.model_dump()
+                values["strand"] = record.strand.value
+                fh.write("\t".join(str(values[c]) for c in EUF_COLUMNS) + "\n")
+                record_count += 1
+        return record_count
+
+    def _read_prepared_records(
+        self, prepared: PreparedDataset
+    ) -> Iterator[pd.DataFrame]:
+        if prepared.record_count == 0:
+            return iter([])
+        return pd.read_csv(
+            prepared.records_file,
+            sep="\t",
+            header=None,
+            names=EUF_COLUMNS,
+            dtype={c: str for c in STR_COLUMNS},
+            quoting=csv.QUOTE_NONE,
+            na_filter=False,
+            chunksize=self.PREPARED_CHUNK_SIZE,
+        )
+
+    def _update_data_records(
+        self,
+        context: _DatasetImportContext,
+        importer: EufImporter,
+        progress: ImportProgressCallback,
+    ) -> int:
+        stored_values = self._get_stored_data_values(context.eufid)
+        count = 0
+        updated_count = 0
+        unchanged_count = 0
+        updates: list[dict[str, Any]] = []
+        metrics = get_import_metrics()
+        with metrics.stage(ImportMetricsStage.INSERTION), BulkInsertBuffer[Data](
+            self._session,
+            Data,
+            DATA_COLUMNS,
+            mode=get_insert_mode(self._insert_modes, Data),
+        ) as buffer:
+            progress(ImportStage.INSERTING, importer.get_parsed_count(), 0)
+            for count, values in enumerate(
+                self._get_validated_data_values(context, importer), start=1
+            ):
+                row = dict(zip(DATA_COLUMNS, values))
+                key = tuple(row[c] for c in DATA_KEY_COLUMNS)
+                stored = None
+                stored_duplicates = stored_values.get(key)
+                if stored_duplicates:
+                    # duplicate sites are matched one to one, in ID order
+                    stored = stored_duplicates.popleft()
+                if stored is None:
+                    buffer.queue(values)
+                elif stored[1:] != tuple(row[c] for c in DATA_UPDATE_COLUMNS):
+                    updates.append(
+                        {"id": stored[0], **{c: row[c] for c in DATA_UPDATE_COLUMNS}}
+                    )
+                    if len(updates) >= self.UPDATE_BATCH_SIZE:
+                        self._session.execute(update(Data), updates)
+                        updated_count += len(updates)
+                        updates = []
+                else:
+                    unchanged_count += 1
+                if count % self.PROGRESS_INTERVAL == 0:
+                    progress(
+                        ImportStage.INSERTING,
+                        importer.get_parsed_count(),
+                        buffer.row_count,
+                    )
+        with metrics.stage(ImportMetricsStage.INSERTION) as stage_metrics:
+            if updates:
+                self._session.execute(update(Data), updates)
+                updated_count += len(updates)
+            data_ids_to_delete = [
+                stored[0]
+                for stored_duplicates in stored_values.values()
+                for stored in stored_duplicates
+            ]
+            self._delete_data_records_by_id(data_ids_to_delete)
+        stage_metrics.rows_in += count
+        stage_metrics.rows_out += buffer.row_count + updated_count
+        logger.info(
+            f"Updated dataset {context.eufid}: {buffer.row_count} records inserted, "
+            f"{updated_count} updated, {len(data_ids_to_delete)} deleted, "
+            f"and {unchanged_count} unchanged."
+        )
+        return buffer.row_count
+
+    def _get_stored_data_values(
+        self, eufid: str
+    ) -> dict[tuple[Any, ...], deque[tuple[Any, ...]]]:
+        # key columns -> [(ID, update columns), ...], a dataset may
+        # contain the same site more than once
+        query = (
+            select(
+                *[getattr(Data, c) for c in DATA_KEY_COLUMNS],
+                Data.id,
+                *[getattr(Data, c) for c in DATA_UPDATE_COLUMNS],
+            )
+            .where(Data.dataset_id == eufid)
+            .order_by(Data.id)
+        )
+        key_size = len(DATA_KEY_COLUMNS)
+        stored_values: dict[tuple[Any, ...], deque[tuple[Any, ...]]] = defaultdict(
+            deque
+        )
+        for row in self._session.execute(query):
+            stored_values[tuple(row[:key_size])].append(tuple(row[key_size:]))
+        return stored_values
+
+    def _get_max_data_id(self, eufid: str) -> int:
+        max_data_id = self._session.execute(
+            select(func.max(Data.id)).where(Data.dataset_id == eufid)
+        ).scalar_one()
+        return 0 if max_data_id is None else max_data_id
 
     def _delete_data_records(self, eufid: str):
         data_ids_to_delete = (
@@ -344,8 +1048,20 @@ class DatasetService:
         self._session.execute(
             delete(DataAnnotation).where(DataAnnotation.data_id.in_(data_ids_to_delete))
         )
+        self._session.execute(
+            delete(Sprinzl).where(Sprinzl.data_id.in_(data_ids_to_delete))
+        )
         self._session.execute(delete(Data).filter_by(dataset_id=eufid))
 
+    def _delete_data_records_by_id(self, data_ids: list[int]) -> None:
+        for idx in range(0, len(data_ids), self.UPDATE_BATCH_SIZE):
+            batch = data_ids[idx : idx + self.UPDATE_BATCH_SIZE]
+            self._session.execute(
+                delete(DataAnnotation).where(DataAnnotation.data_id.in_(batch))
+            )
+            self._session.execute(delete(Sprinzl).where(Sprinzl.data_id.in_(batch)))
+            self._session.execute(delete(Data).where(Data.id.in_(batch)))
+
     def _add_association(self, context: _DatasetImportContext) -> None:
         if context.update_flag or context.dry_run_flag:
             return
@@ -357,6 +1073,14 @@ class DatasetService:
         self._session.flush()
 
 
+def _ignore_progress(stage: ImportStage, parsed_count: int, inserted_count: int):
+    pass
+
+
+def _log_metrics(source: str, metrics: ImportMetrics) -> None:
+    logger.info(f"Import metrics for {source}:\n{metrics.format_report()}")
+
+
 def _none_if_empty(x):
     if x == "":
         return None
@@ -376,5 +1100,7 @@ def get_dataset_service() -> DatasetService:
         session=get_session(),
         annotation_service=get_annotation_service(),
         file_service=get_file_service(),
+        data_service=get_data_service(),
         validator_service=get_validator_service(),
+        insert_modes=get_insert_modes(get_config().INSERT_MODES),
     )
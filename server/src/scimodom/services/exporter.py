@@ -13,12 +13,12 @@ from sqlalchemy.orm import Session
 from scimodom.database.database import get_session
 from scimodom.database.models import (
     Dataset,
-    Data,
     Assembly,
     AssemblyVersion,
     Annotation,
     AnnotationVersion,
 )
+from scimodom.services.data import DataService, get_data_service
 from scimodom.utils.specs.euf import EUF_VERSION
 
 logger = logging.getLogger(__name__)
@@ -36,8 +36,9 @@ class Exporter:
     BAD_FILE_NAME_CHARACTERS_REGEXP = re.compile(r"[^a-zA-Z0-9(),._-]")
     VERSION = EUF_VERSION
 
-    def __init__(self, session: Session):
+    def __init__(self, session: Session, data_service: DataService):
         self._session = session
+        self._data_service = data_service
 
     def get_dataset_file_name(self, dataset_id: str) -> str:
         try:
@@ -112,30 +113,41 @@ class Exporter:
         yield "#chrom\tchromStart\tchromEnd\tname\tscore\tstrand\tthickStart\tthickEnd\titemRgb\tcoverage\tfrequency\n"
 
     def _generate_records(self, dataset: Dataset):
-        """Generate data records.
+        """Generate data records, from the dataset
+        snapshot if there is one, see :meth:`DataService.get_bedrmod_rows`.
 
         :param dataset: Dataset
         :type dataset: Dataset
         """
-        for data in self._session.scalars(
-            select(Data).where(Data.dataset_id == dataset.id)
-        ):
+        for (
+            chrom,
+            start,
+            end,
+            name,
+            score,
+            strand,
+            thick_start,
+            thick_end,
+            item_rgb,
+            coverage,
+            frequency,
+        ) in self._data_service.get_bedrmod_rows(dataset.id):
             parts = [
-                data.chrom,
-                str(data.start),
-                str(data.end),
-                data.name,
-                str(data.score),
-                data.strand.value,
-                str(data.thick_start),
-                str(data.thick_end),
-                data.item_rgb,
-                str(data.coverage),
-                str(data.frequency),
+                chrom,
+                str(start),
+                str(end),
+                name,
+                str(score),
+                strand.value,
+                str(thick_start),
+                str(thick_end),
+                item_rgb,
+                str(coverage),
+                str(frequency),
             ]
             yield "\t".join(parts) + "\n"
 
 
 @cache
 def get_exporter() -> Exporter:
-    return Exporter(session=get_session())
+    return Exporter(session=get_session(), data_service=get_data_service())
@@ -1,15 +1,17 @@
 import logging
 import gzip
+import hashlib
 import os
 import re
+import time
 from contextlib import contextmanager
 from fcntl import flock, LOCK_SH, LOCK_EX, LOCK_UN, LOCK_NB, lockf
 from functools import cache
-from os import unlink, rename, makedirs, stat, close, umask, replace
+from os import unlink, rename, makedirs, stat, close, umask, replace, utime
 from os.path import join, exists, dirname, basename, isfile
 from pathlib import Path
-from shutil import copyfileobj, rmtree
-from tempfile import mkstemp, NamedTemporaryFile
+from shutil import copyfileobj, move, rmtree
+from tempfile import mkdtemp, mkstemp, NamedTemporaryFile
 from typing import (
     Optional,
     IO,
@@ -22,8 +24,11 @@ from typing import (
     ClassVar,
     Generator,
     Callable,
+    Iterator,
+    Sequence,
 )
 from uuid import uuid4
+import zlib
 
 import pysam
 import pysam.samtools
@@ -35,6 +40,8 @@ from sqlalchemy.sql.operators import and_
 from scimodom.config import get_config
 from scimodom.database.database import get_session
 from scimodom.database.models import Dataset, BamFile, Taxa, Assembly, AssemblyVersion
+from scimodom.utils.data_snapshot import DataSnapshot
+from scimodom.utils.importer.text_file_reader import GZIP_MAGIC_BYTES, open_text_file
 from scimodom.utils.specs.enums import AssemblyFileType, TargetsFileType
 
 logger = logging.getLogger(__name__)
@@ -64,6 +71,55 @@ class FileTooLarge(Exception):
     pass
 
 
+class _DecompressedSizeCounter:
+    """Count the size of a data stream after decompression,
+    if the stream is gzip (or bgzip) compressed.
+
+    :param max_size: Maximum decompressed size, or None
+    :type max_size: int | None
+    """
+
+    def __init__(self, max_size: Optional[int], buffer_size: int):
+        self.size = 0
+        self._max_size = max_size
+        self._buffer_size = buffer_size
+        self._head = b""
+        self._decompressor: Any = None
+        self._is_compressed: Optional[bool] = None
+
+    def update(self, data: bytes) -> None:
+        """Count the next chunk of data.
+
+        :param data: Raw data
+        :type data: bytes
+        :raises FileTooLarge: If the maximum size is exceeded.
+        """
+        if self._is_compressed is None:
+            self._head += data
+            if len(self._head) < len(GZIP_MAGIC_BYTES):
+                return
+            self._is_compressed = self._head.startswith(GZIP_MAGIC_BYTES)
+            data, self._head = self._head, b""
+        if not self._is_compressed:
+            self._add(len(data))
+            return
+        while data:
+            if self._decompressor is None:
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            self._add(len(self._decompressor.decompress(data, self._buffer_size)))
+            if self._decompressor.eof:
+                # bgzip files consist of several gzip members
+                data = self._decompressor.unused_data
+                self._decompressor = None
+            else:
+                data = self._decompressor.unconsumed_tail
+
+    def _add(self, size: int) -> None:
+        self.size += size
+        if self._max_size is not None and self.size > self._max_size:
+            raise FileTooLarge(f"The file is too large (max {self._max_size} bytes)")
+
+
 class FileService:
     """Provide a service to interact with the file system.
 
@@ -77,6 +133,9 @@ class FileService:
     :param upload_path: str | Path
     :param import_path: Path to IMPORT directory
     :param import_path: str | Path
+    :param comparison_cache_size: Maximum size of the comparison
+    result cache (compressed, in bytes), 0 to disable the cache
+    :type comparison_cache_size: int
     """
 
     BUFFER_SIZE = 1024 * 1024
@@ -86,10 +145,17 @@ class FileService:
     GENE_CACHE_DEST: ClassVar[Path] = Path("cache", "gene", "selection")
     MOTIF_CACHE_DEST: ClassVar[Path] = Path("cache", "motifs", "PWMs_logo")
     SUNBURST_CACHE_DEST: ClassVar[Path] = Path("cache", "sunburst")
+    DATA_SNAPSHOT_DEST: ClassVar[Path] = Path("cache", "data")
+    COMPARISON_CACHE_DEST: ClassVar[Path] = Path("cache", "comparison")
+    COMPARISON_CACHE_INVALIDATED_DEST: ClassVar[str] = "invalidated"
+    COMPARISON_CACHE_SUFFIX: ClassVar[str] = ".json.gz"
+    COMPARISON_CACHE_NAME_SEPARATORS: ClassVar[re.Pattern] = re.compile(r"[_-]")
     ASSEMBLY_DEST: ClassVar[str] = "assembly"
     METADATA_DEST: ClassVar[str] = "metadata"
     REQUEST_DEST: ClassVar[str] = "project_requests"
     BAM_DEST: ClassVar[str] = "bam_files"
+    IMPORT_JOB_DEST: ClassVar[Path] = Path("jobs", "import")
+    REANNOTATION_JOB_DEST: ClassVar[Path] = Path("jobs", "reannotation")
 
     def __init__(
         self,
@@ -98,12 +164,14 @@ class FileService:
         temp_path: str | Path,
         upload_path: str | Path,
         import_path: str | Path,
+        comparison_cache_size: int = 0,
     ):
         self._session = session
         self._data_path = data_path
         self._temp_path = temp_path
         self._upload_path = upload_path
         self._import_path = import_path
+        self._comparison_cache_size = comparison_cache_size
 
         for path in [
             data_path,
@@ -117,7 +185,11 @@ class FileService:
             self._get_gene_cache_dir(),
             self._get_motif_cache_dir(),
             self._get_sunburst_cache_dir(),
+            self._get_data_snapshot_dir(),
+            self._get_comparison_cache_invalidated_dir(),
             self._get_bam_files_parent_dir(),
+            self._get_import_job_dir(),
+            self._get_reannotation_job_dir(),
         ]:
             self._create_folder(path)
 
@@ -189,14 +261,15 @@ class FileService:
         return Path(self._import_path, name).is_file()
 
     def open_import_file(self, name: str) -> TextIO:
-        """Import file for reading.
+        """Import file for reading. The file may be
+        gzip (or bgzip) compressed.
 
         :param name: File name
         :type name: str
         :return: Opened file handle for reading
         :rtype: TextIO
         """
-        return open(Path(self._import_path, name))
+        return open_text_file(Path(self._import_path, name))
 
     # Annotation incl. extended annotations (miRNA targets, RBP binding sites, etc.)
 
@@ -233,6 +306,15 @@ class FileService:
         path = Path(self.get_annotation_dir(taxa_id), target_type.value(chrom=chrom))
         return open(path, "r")
 
+    def get_annotation_parent_dir(self) -> Path:
+        """Return the parent directory of all annotations,
+        e.g. for files shared by organisms.
+
+        :returns: Path to annotation parent directory
+        :rtype: Path
+        """
+        return self._get_annotation_parent_dir()
+
     def _get_annotation_parent_dir(self) -> Path:
         return Path(self._data_path, self.ANNOTATION_DEST)
 
@@ -272,6 +354,32 @@ class FileService:
                 print(g, file=fh)
             flock(fh.fileno(), LOCK_UN)
 
+    def merge_gene_cache(self, selection_id: int, genes: Iterable[str]) -> int:
+        """Add genes to the gene cache of a selection ID. The
+        cache is locked while it is read and written, so that
+        concurrent merges do not lose genes.
+
+        :param selection_id: The selection_id in question.
+        :type selection_id: int
+        :param genes: The gene names
+        :type genes: Iterable[str]
+        :returns: Number of genes in the cache
+        :rtype: int
+        :raises FileNotFoundError: If there is no cache
+        """
+        path = Path(self._get_gene_cache_dir(), str(selection_id))
+        with open(path, "r+") as fh:
+            flock(fh.fileno(), LOCK_EX)
+            cached_genes = set(fh.read().split())
+            merged_genes = cached_genes | set(genes)
+            if merged_genes != cached_genes:
+                fh.seek(0)
+                fh.truncate()
+                for g in sorted(merged_genes):
+                    print(g, file=fh)
+            flock(fh.fileno(), LOCK_UN)
+            return len(merged_genes)
+
     def delete_gene_cache(self, selection_id: int) -> None:
         """Remove a gene cache file for a given selection.
 
@@ -355,6 +463,237 @@ class FileService:
                 do_it()
             lockf(fh, LOCK_UN)
 
+    def get_data_snapshot(self, eufid: str) -> DataSnapshot | None:
+        """Load the snapshot of a dataset, memory-mapped,
+        see :class:`DataSnapshot`.
+
+        :param eufid: EUFID
+        :type eufid: str
+        :returns: Snapshot, or None if there is no snapshot,
+        or if it was written with another format version
+        :rtype: DataSnapshot | None
+        """
+        path = Path(self._get_data_snapshot_dir(), eufid)
+        try:
+            return DataSnapshot.load(path)
+        except FileNotFoundError:
+            return None
+
+    def update_data_snapshot(self, eufid: str, snapshot: DataSnapshot) -> None:
+        """Write the snapshot of a dataset. The snapshot is
+        written to a temporary directory, which then replaces
+        the current snapshot, if any, so that readers never see
+        a partial snapshot. Arrays of a replaced snapshot remain
+        valid for readers that have them memory-mapped.
+
+        :param eufid: EUFID
+        :type eufid: str
+        :param snapshot: Snapshot
+        :type snapshot: DataSnapshot
+        """
+        parent_dir = self._get_data_snapshot_dir()
+        temporary_dir = mkdtemp(dir=parent_dir, prefix=".tmp_")
+        try:
+            snapshot.save(Path(temporary_dir))
+            self.delete_data_snapshot(eufid)
+            rename(temporary_dir, Path(parent_dir, eufid))
+        except Exception:
+            rmtree(temporary_dir, ignore_errors=True)
+            raise
+
+    def delete_data_snapshot(self, eufid: str) -> None:
+        """Remove the snapshot of a dataset, if any.
+
+        :param eufid: EUFID
+        :type eufid: str
+        """
+        path = Path(self._get_data_snapshot_dir(), eufid)
+        if not exists(path):
+            return
+        # move out of the way first, readers fall back to the database
+        obsolete_dir = mkdtemp(dir=self._get_data_snapshot_dir(), prefix=".old_")
+        try:
+            rename(path, Path(obsolete_dir, eufid))
+        except FileNotFoundError:
+            pass
+        rmtree(obsolete_dir, ignore_errors=True)
+
+    @staticmethod
+    def get_comparison_cache_name(
+        operation: str,
+        reference_ids: Iterable[str],
+        comparison_ids: Iterable[str],
+        upload_key: str | None,
+        is_strand: bool,
+        view: str | None = None,
+    ) -> str:
+        """Return the name of a comparison result in the cache.
+        Names are formed from the operation, the sorted reference
+        EUFIDs, the sorted comparison EUFIDs, or a key for the
+        upload, the strand flag, and the view, if any, separated
+        by "_" and "-".
+
+        :param operation: Operation, e.g. intersect
+        :type operation: str
+        :param reference_ids: Reference EUFIDs
+        :type reference_ids: Iterable[str]
+        :param comparison_ids: Comparison EUFIDs
+        :type comparison_ids: Iterable[str]
+        :param upload_key: If given, key for the uploaded file
+        and its options, used instead of comparison EUFIDs. Must
+        not contain EUFIDs, see :meth:`get_tmp_upload_file_digest`.
+        :type upload_key: str | None
+        :param is_strand: Strand-aware operation
+        :type is_strand: bool
+        :param view: If given, key for a part or a summary of the
+        result, e.g. a page. Must not contain EUFIDs.
+        :type view: str | None
+        :returns: Name
+        :rtype: str
+        """
+        comparison = (
+            "-".join(sorted(comparison_ids)) if upload_key is None else upload_key
+        )
+        strand = "strand" if is_strand else "nostrand"
+        parts = [operation, "-".join(sorted(reference_ids)), comparison, strand]
+        if view is not None:
+            parts.append(view)
+        return "_".join(parts)
+
+    def open_comparison_cache(self, name: str) -> BinaryIO | None:
+        """Open a cached comparison result (gzip compressed JSON)
+        for reading, and mark it as recently used.
+
+        :param name: Name, see :meth:`get_comparison_cache_name`
+        :type name: str
+        :returns: Opened file handle for reading, or None
+        if the result is not in the cache
+        :rtype: BinaryIO | None
+        """
+        if self._comparison_cache_size <= 0:
+            return None
+        path = self._get_comparison_cache_path(name)
+        try:
+            fh = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            utime(path)
+        except FileNotFoundError:
+            # evicted in the meantime, the handle remains valid
+            pass
+        return fh
+
+    def write_comparison_cache(
+        self,
+        name: str,
+        eufids: Sequence[str],
+        started: float,
+        chunks: Iterable[str],
+    ) -> Iterator[str]:
+        """Write a comparison result to the cache while it
+        is generated. Chunks are passed through, and written
+        gzip compressed to a temporary file. Once all chunks
+        are generated, the file is added to the cache, and least
+        recently used results are evicted, so that the cache
+        does not exceed its size. The result is discarded if it is
+        incomplete, if it is larger than the cache, or if any
+        of the datasets was invalidated since it was started,
+        see :meth:`delete_comparison_cache`.
+
+        :param name: Name, see :meth:`get_comparison_cache_name`
+        :type name: str
+        :param eufids: EUFIDs of the datasets used for the result
+        :type eufids: Sequence[str]
+        :param started: Time (seconds since the epoch) at which
+        the datasets were read
+        :type started: float
+        :param chunks: JSON chunks
+        :type chunks: Iterable[str]
+        :returns: The same chunks
+        :rtype: Iterator[str]
+        """
+        if self._comparison_cache_size <= 0:
+            yield from chunks
+            return
+        is_complete = False
+        with NamedTemporaryFile(
+            dir=self._get_comparison_cache_dir(), prefix=".tmp_", delete=False
+        ) as fp:
+            try:
+                with gzip.GzipFile(filename="", fileobj=fp, mode="wb") as gz:
+                    for chunk in chunks:
+                        gz.write(chunk.encode("utf-8"))
+                        yield chunk
+                is_complete = True
+            finally:
+                fp.close()
+                if (
+                    is_complete
+                    and stat(fp.name).st_size <= self._comparison_cache_size
+                    and not self._is_comparison_cache_invalidated(eufids, started)
+                ):
+                    replace(fp.name, self._get_comparison_cache_path(name))
+                    self._evict_comparison_cache()
+                else:
+                    unlink(fp.name)
+
+    def delete_comparison_cache(self, eufid: str) -> None:
+        """Remove all cached comparison results that involve
+        a dataset, and mark the dataset as invalidated, so that
+        results being written are discarded.
+
+        :param eufid: EUFID
+        :type eufid: str
+        """
+        marker = Path(self._get_comparison_cache_invalidated_dir(), eufid)
+        marker.touch()
+        # file times may be coarser than the clock, see _is_comparison_cache_invalidated
+        now = time.time()
+        utime(marker, (now, now))
+        for path in Path(self._get_comparison_cache_dir()).glob(
+            f"*{self.COMPARISON_CACHE_SUFFIX}"
+        ):
+            name = path.name.removesuffix(self.COMPARISON_CACHE_SUFFIX)
+            if eufid in self.COMPARISON_CACHE_NAME_SEPARATORS.split(name):
+                path.unlink(missing_ok=True)
+
+    def _is_comparison_cache_invalidated(
+        self, eufids: Sequence[str], started: float
+    ) -> bool:
+        for eufid in eufids:
+            try:
+                invalidated = stat(
+                    Path(self._get_comparison_cache_invalidated_dir(), eufid)
+                ).st_mtime
+            except FileNotFoundError:
+                continue
+            if invalidated >= started:
+                return True
+        return False
+
+    def _evict_comparison_cache(self) -> None:
+        entries = []
+        for path in Path(self._get_comparison_cache_dir()).glob(
+            f"*{self.COMPARISON_CACHE_SUFFIX}"
+        ):
+            try:
+                stat_info = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat_info.st_mtime, stat_info.st_size, path))
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_size <= self._comparison_cache_size:
+                break
+            path.unlink(missing_ok=True)
+            total_size -= size
+
+    def _get_comparison_cache_path(self, name: str) -> Path:
+        return Path(
+            self._get_comparison_cache_dir(), f"{name}{self.COMPARISON_CACHE_SUFFIX}"
+        )
+
     def _get_gene_cache_dir(self) -> Path:
         return Path(self._data_path, self.GENE_CACHE_DEST)
 
@@ -364,6 +703,17 @@ class FileService:
     def _get_sunburst_cache_dir(self) -> Path:
         return Path(self._data_path, self.SUNBURST_CACHE_DEST)
 
+    def _get_data_snapshot_dir(self) -> Path:
+        return Path(self._data_path, self.DATA_SNAPSHOT_DEST)
+
+    def _get_comparison_cache_dir(self) -> Path:
+        return Path(self._data_path, self.COMPARISON_CACHE_DEST)
+
+    def _get_comparison_cache_invalidated_dir(self) -> Path:
+        return Path(
+            self._get_comparison_cache_dir(), self.COMPARISON_CACHE_INVALIDATED_DEST
+        )
+
     # Project related
 
     def create_project_metadata_file(self, smid: str) -> TextIO:
@@ -427,6 +777,176 @@ class FileService:
     def _get_project_request_dir(self) -> Path:
         return Path(self._get_project_metadata_dir(), self.REQUEST_DEST)
 
+    # Import jobs
+
+    def write_import_job(self, job_id: str, content: str) -> None:
+        """Create or replace an import job file. The file
+        is replaced atomically, i.e. readers see either the
+        old or the new content.
+
+        :param job_id: Job ID
+        :type job_id: str
+        :param content: File content
+        :type content: str
+        """
+        self._check_import_job_id(job_id)
+        path = self._get_import_job_file_path(job_id)
+        with NamedTemporaryFile(
+            mode="w", dir=self._get_import_job_dir(), delete=False
+        ) as fp:
+            fp.write(content)
+        replace(fp.name, path)
+
+    def read_import_job(self, job_id: str) -> str:
+        """Read an import job file.
+
+        :param job_id: Job ID
+        :type job_id: str
+        :returns: File content
+        :rtype: str
+        :raises FileNotFoundError: If there is no such job
+        """
+        self._check_import_job_id(job_id)
+        with open(self._get_import_job_file_path(job_id)) as fh:
+            return fh.read()
+
+    def get_import_job_ids(self) -> list[str]:
+        """Return the IDs of all import jobs.
+
+        :returns: Job IDs
+        :rtype: list[str]
+        """
+        return sorted(
+            path.stem for path in Path(self._get_import_job_dir()).glob("*.json")
+        )
+
+    def add_import_job_input(self, job_id: str, path: str | Path) -> str:
+        """Move an input file to the import job directory, where
+        it is kept until it is deleted with the job input.
+
+        :param job_id: Job ID
+        :type job_id: str
+        :param path: Input file, e.g. an uploaded file
+        :type path: str | Path
+        :returns: New path of the input file
+        :rtype: str
+        """
+        self._check_import_job_id(job_id)
+        target = Path(self._get_import_job_dir(), f"{job_id}.input")
+        move(path, target)
+        return target.as_posix()
+
+    def delete_import_job_input(self, job_id: str) -> None:
+        """Remove the input file of an import job, if any.
+
+        :param job_id: Job ID
+        :type job_id: str
+        """
+        self._check_import_job_id(job_id)
+        Path(self._get_import_job_dir(), f"{job_id}.input").unlink(missing_ok=True)
+
+    @contextmanager
+    def lock_import_job(self, job_id: str) -> Generator[bool, None, None]:
+        """Try to acquire an exclusive lock for an import job.
+        The lock is released on exit, or when the process
+        holding it terminates.
+
+        :param job_id: Job ID
+        :type job_id: str
+        :returns: True if the lock was acquired, else False
+        :rtype: Generator[bool, None, None]
+        """
+        self._check_import_job_id(job_id)
+        with self._lock_file(
+            Path(self._get_import_job_dir(), f"{job_id}.lock")
+        ) as is_locked:
+            yield is_locked
+
+    def delete_import_job_lock(self, job_id: str) -> None:
+        """Remove the lock file of an import job, if any. Call
+        only while holding the lock, once the job is done or
+        failed, see :meth:`lock_import_job`.
+
+        :param job_id: Job ID
+        :type job_id: str
+        """
+        self._check_import_job_id(job_id)
+        Path(self._get_import_job_dir(), f"{job_id}.lock").unlink(missing_ok=True)
+
+    def _check_import_job_id(self, job_id: str) -> None:
+        if not self.VALID_FILE_ID_REGEXP.match(job_id):
+            raise ValueError(f"Invalid import job ID: '{job_id}'")
+
+    def _get_import_job_file_path(self, job_id: str) -> Path:
+        return Path(self._get_import_job_dir(), f"{job_id}.json")
+
+    def _get_import_job_dir(self) -> Path:
+        return Path(self._data_path, self.IMPORT_JOB_DEST)
+
+    # Re-annotation jobs
+
+    def write_reannotation_job(self, taxa_id: int, content: str) -> None:
+        """Create or replace the re-annotation job file
+        of an organism. The file is replaced atomically.
+
+        :param taxa_id: Taxa ID
+        :type taxa_id: int
+        :param content: File content
+        :type content: str
+        """
+        with NamedTemporaryFile(
+            mode="w", dir=self._get_reannotation_job_dir(), delete=False
+        ) as fp:
+            fp.write(content)
+        replace(fp.name, self._get_reannotation_job_file_path(taxa_id))
+
+    def read_reannotation_job(self, taxa_id: int) -> str:
+        """Read the re-annotation job file of an organism.
+
+        :param taxa_id: Taxa ID
+        :type taxa_id: int
+        :returns: File content
+        :rtype: str
+        :raises FileNotFoundError: If there is no such job
+        """
+        with open(self._get_reannotation_job_file_path(taxa_id)) as fh:
+            return fh.read()
+
+    @contextmanager
+    def lock_reannotation_job(self, taxa_id: int) -> Generator[bool, None, None]:
+        """Try to acquire an exclusive lock for the re-annotation
+        job of an organism, see :meth:`lock_import_job`.
+
+        :param taxa_id: Taxa ID
+        :type taxa_id: int
+        :returns: True if the lock was acquired, else False
+        :rtype: Generator[bool, None, None]
+        """
+        with self._lock_file(
+            Path(self._get_reannotation_job_dir(), f"{taxa_id}.lock")
+        ) as is_locked:
+            yield is_locked
+
+    def _get_reannotation_job_file_path(self, taxa_id: int) -> Path:
+        return Path(self._get_reannotation_job_dir(), f"{taxa_id}.json")
+
+    def _get_reannotation_job_dir(self) -> Path:
+        return Path(self._data_path, self.REANNOTATION_JOB_DEST)
+
+    @staticmethod
+    @contextmanager
+    def _lock_file(lock_file: Path) -> Generator[bool, None, None]:
+        with open(lock_file, "w") as fh:
+            try:
+                lockf(fh, LOCK_EX | LOCK_NB)
+            except OSError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                lockf(fh, LOCK_UN)
+
     # Assembly
 
     def get_assembly_file_path(
@@ -686,6 +1206,17 @@ class FileService:
     # uploaded files
 
     def upload_tmp_file(self, stream, max_file_size) -> str:
+        """Write an uploaded text file, which may be gzip
+        (or bgzip) compressed. Compressed files are kept as is,
+        but the size limit applies to the decompressed data.
+
+        :param stream: Data stream
+        :type stream: IO[bytes]
+        :param max_file_size: Maximum (decompressed) file size, or None
+        :type max_file_size: int | None
+        :returns: File ID
+        :rtype: str
+        """
         fp, path = mkstemp(dir=self._upload_path)
         close(fp)
         file_id = basename(path)
@@ -693,21 +1224,50 @@ class FileService:
             raise Exception(
                 f"Internal Error: Tmp file basename ({file_id}) is not valid!"
             )
-        self._stream_to_file(stream, path, max_file_size, overwrite_is_ok=True)
+        self._stream_to_file(
+            stream,
+            path,
+            max_file_size,
+            overwrite_is_ok=True,
+            max_size_is_decompressed=True,
+        )
         return file_id
 
     def open_tmp_upload_file_by_id(self, file_id: str) -> TextIO:
         if not self.VALID_FILE_ID_REGEXP.match(file_id):
             raise ValueError("open_tmp_file_by_id called with bad file_id")
         path = join(self._upload_path, file_id)
-        return open(path)
+        return open_text_file(path)
+
+    def get_tmp_upload_file_digest(self, file_id: str) -> str:
+        """Return the SHA-256 digest of the (raw) content of
+        an uploaded file.
+
+        :param file_id: File ID
+        :type file_id: str
+        :returns: Hex digest
+        :rtype: str
+        :raises FileNotFoundError: If there is no such file
+        """
+        if not self.VALID_FILE_ID_REGEXP.match(file_id):
+            raise ValueError("get_tmp_upload_file_digest called with bad file_id")
+        digest = hashlib.sha256()
+        with open(join(self._upload_path, file_id), "rb") as fh:
+            while data := fh.read(self.BUFFER_SIZE):
+                digest.update(data)
+        return digest.hexdigest()
 
     def check_tmp_upload_file_id(self, file_id: str) -> bool:
         path = join(self._upload_path, file_id)
         return isfile(path)
 
     def _stream_to_file(
-        self, data_stream, path, max_size, overwrite_is_ok=False
+        self,
+        data_stream,
+        path,
+        max_size,
+        overwrite_is_ok=False,
+        max_size_is_decompressed=False,
     ) -> None:
         if exists(path) and not overwrite_is_ok:
             raise Exception(
@@ -716,12 +1276,20 @@ class FileService:
         self._create_folder(dirname(path))
         try:
             bytes_written = 0
+            size_counter = (
+                _DecompressedSizeCounter(max_size, self.BUFFER_SIZE)
+                if max_size_is_decompressed
+                else None
+            )
             with open(path, "wb", opener=write_opener) as fp:
                 while True:
                     buffer = data_stream.read(self.BUFFER_SIZE)
                     if len(buffer) == 0:
                         break
                     fp.write(buffer)
+                    if size_counter is not None:
+                        size_counter.update(buffer)
+                        continue
                     bytes_written += len(buffer)
                     if max_size is not None and bytes_written > max_size:
                         raise FileTooLarge(
@@ -866,4 +1434,5 @@ def get_file_service() -> FileService:
         temp_path=config.BEDTOOLS_TMP_PATH,
         upload_path=config.UPLOAD_PATH,
         import_path=config.IMPORT_PATH,
+        comparison_cache_size=config.COMPARISON_CACHE_SIZE,
     )
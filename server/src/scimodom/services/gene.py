@@ -28,36 +28,56 @@ class GeneService:
         self._session = session
         self._file_service = file_service
 
-    def update_gene_cache(self, selection_id: int) -> None:
-        """Update gene cache for one selection ID.
+    def update_gene_cache(self, selection_id: int) -> int:
+        """Update gene cache for one selection ID,
+        i.e. rebuild it from all datasets of the selection.
 
         :param selection_id: Selection ID
         :type selection_id: int
+        :returns: Number of genes
+        :rtype: int
         """
-        query = (
-            select(GenomicAnnotation.name)
-            .filter(Selection.id == selection_id)
-            .filter(
-                DatasetModificationAssociation.modification_id
-                == Selection.modification_id
-            )
-            .filter(
-                Dataset.id == DatasetModificationAssociation.dataset_id,
-                Dataset.organism_id == Selection.organism_id,
-                Dataset.technology_id == Selection.technology_id,
-            )
-            .filter(Data.dataset_id == Dataset.id)
-            .filter(Data.modification_id == Selection.modification_id)
-            .filter(DataAnnotation.data_id == Data.id)
-            .filter(GenomicAnnotation.id == DataAnnotation.gene_id)
-        ).distinct()
-        genes = list(
-            filter(
-                lambda g: g is not None,
-                set(self._session.execute(query).scalars().all()),
-            )
-        )
+        genes = self._get_genes_from_database(selection_id)
         self._file_service.update_gene_cache(selection_id, genes)
+        return len(genes)
+
+    def merge_gene_cache(self, selection_id: int, eufid: str) -> int:
+        """Add the genes of a new dataset to the gene cache
+        for one selection ID. Unlike :meth:`update_gene_cache`,
+        only the records of this dataset are queried. The cache
+        is rebuilt if it does not exist.
+
+        Genes are only ever added, records that are removed,
+        e.g. when a dataset is updated or deleted, require
+        a rebuild.
+
+        :param selection_id: Selection ID
+        :type selection_id: int
+        :param eufid: EUF ID of the new dataset
+        :type eufid: str
+        :returns: Number of genes
+        :rtype: int
+        """
+        genes = self._get_genes_from_database(selection_id, eufid)
+        try:
+            return self._file_service.merge_gene_cache(selection_id, genes)
+        except FileNotFoundError:
+            return self.update_gene_cache(selection_id)
+
+    def check_gene_cache(self, selection_id: int) -> bool:
+        """Check if the gene cache for one selection ID
+        matches the database.
+
+        :param selection_id: Selection ID
+        :type selection_id: int
+        :returns: True if the cache exists and is up to date
+        :rtype: bool
+        """
+        try:
+            cached_genes = set(self._file_service.get_gene_cache(selection_id))
+        except FileNotFoundError:
+            return False
+        return cached_genes == set(self._get_genes_from_database(selection_id))
 
     def get_genes(self, selection_ids: Iterable[int]) -> Iterable[str]:
         """Retrieve genes for multiple selection ID(s).
@@ -85,6 +105,35 @@ class GeneService:
         """
         self._file_service.delete_gene_cache(selection_id)
 
+    def _get_genes_from_database(
+        self, selection_id: int, eufid: str | None = None
+    ) -> list[str]:
+        query = (
+            select(GenomicAnnotation.name)
+            .filter(Selection.id == selection_id)
+            .filter(
+                DatasetModificationAssociation.modification_id
+                == Selection.modification_id
+            )
+            .filter(
+                Dataset.id == DatasetModificationAssociation.dataset_id,
+                Dataset.organism_id == Selection.organism_id,
+                Dataset.technology_id == Selection.technology_id,
+            )
+            .filter(Data.dataset_id == Dataset.id)
+            .filter(Data.modification_id == Selection.modification_id)
+            .filter(DataAnnotation.data_id == Data.id)
+            .filter(GenomicAnnotation.id == DataAnnotation.gene_id)
+        ).distinct()
+        if eufid is not None:
+            query = query.filter(Dataset.id == eufid)
+        return list(
+            filter(
+                lambda g: g is not None,
+                set(self._session.execute(query).scalars().all()),
+            )
+        )
+
 
 def get_gene_service() -> GeneService:
     """
@@ -0,0 +1,213 @@
+from datetime import datetime, timezone
+from functools import cache
+import logging
+from uuid import uuid4
+
+from sqlalchemy.orm import Session
+
+from scimodom.database.database import get_session
+from scimodom.services.dataset import DatasetService, get_dataset_service
+from scimodom.services.file import FileService, get_file_service
+from scimodom.utils.dtos.import_job import (
+    DatasetImportJobDto,
+    DatasetImportRequestDto,
+)
+from scimodom.utils.importer.bed_importer import BedImportTooManyErrors
+from scimodom.utils.importer.text_file_reader import open_text_file
+from scimodom.utils.specs.enums import ImportJobStatus, ImportStage
+
+logger = logging.getLogger(__name__)
+
+
+class ImportJobNotFoundError(Exception):
+    """Exception for handling unknown import jobs."""
+
+    pass
+
+
+class ImportJobService:
+    """Provide a service to run dataset imports
+    asynchronously.
+
+    Jobs are queued as JSON files under the data path,
+    see :meth:`FileService.write_import_job`, and run
+    one at a time by a worker process, see
+    "flask dataset worker". While a job is running,
+    its file holds the current stage and the number of
+    records parsed and inserted so far.
+
+    :param session: SQLAlchemy ORM session
+    :type session: Session
+    :param file_service: File service instance
+    :type file_service: FileService
+    :param dataset_service: Dataset service instance
+    :type dataset_service: DatasetService
+    """
+
+    def __init__(
+        self,
+        session: Session,
+        file_service: FileService,
+        dataset_service: DatasetService,
+    ):
+        self._session = session
+        self._file_service = file_service
+        self._dataset_service = dataset_service
+
+    def submit_dataset_import(self, request: DatasetImportRequestDto) -> str:
+        """Queue a dataset import.
+
+        The input file is moved to the job directory, as
+        uploaded files are not kept until the job is run.
+
+        :param request: Import parameters
+        :type request: DatasetImportRequestDto
+        :returns: Job ID
+        :rtype: str
+        """
+        job_id = str(uuid4())
+        file_path = self._file_service.add_import_job_input(job_id, request.file_path)
+        now = datetime.now(timezone.utc)
+        job = DatasetImportJobDto(
+            job_id=job_id,
+            status=ImportJobStatus.QUEUED,
+            created=now,
+            updated=now,
+            request=request.model_copy(update={"file_path": file_path}),
+        )
+        self._write_job(job)
+        logger.info(f"Queued import job {job.job_id} for {request.file_path}.")
+        return job.job_id
+
+    def get_job(self, job_id: str) -> DatasetImportJobDto:
+        """Retrieve an import job.
+
+        :param job_id: Job ID
+        :type job_id: str
+        :returns: Import job
+        :rtype: DatasetImportJobDto
+        :raises ImportJobNotFoundError: If there is no such job
+        """
+        try:
+            return DatasetImportJobDto.model_validate_json(
+                self._file_service.read_import_job(job_id)
+            )
+        except (FileNotFoundError, ValueError):
+            raise ImportJobNotFoundError(f"No such import job: '{job_id}'.")
+
+    def get_jobs(self) -> list[DatasetImportJobDto]:
+        """Retrieve all import jobs, oldest first.
+
+        :returns: Import jobs
+        :rtype: list[DatasetImportJobDto]
+        """
+        jobs = []
+        for job_id in self._file_service.get_import_job_ids():
+            try:
+                jobs.append(self.get_job(job_id))
+            except ImportJobNotFoundError:
+                continue
+        return sorted(jobs, key=lambda job: job.created)
+
+    def run_next_job(self) -> DatasetImportJobDto | None:
+        """Run the oldest queued job, if any.
+
+        Jobs that are marked as running, but are not
+        locked by any process, e.g. because the worker
+        was killed, are marked as failed.
+
+        :returns: The job that was run, or None
+        :rtype: DatasetImportJobDto | None
+        """
+        for job in self.get_jobs():
+            if job.status not in [ImportJobStatus.QUEUED, ImportJobStatus.RUNNING]:
+                continue
+            with self._file_service.lock_import_job(job.job_id) as is_locked:
+                if not is_locked:
+                    continue
+                # the job may have been run in the meantime
+                job = self.get_job(job.job_id)
+                is_run = False
+                if job.status == ImportJobStatus.RUNNING:
+                    self._file_service.delete_import_job_input(job.job_id)
+                    self._update_job(
+                        job,
+                        status=ImportJobStatus.FAILED,
+                        message="The import was interrupted.",
+                    )
+                elif job.status == ImportJobStatus.QUEUED:
+                    self._run_job(job)
+                    is_run = True
+                # the job is done or failed, and is not locked again
+                self._file_service.delete_import_job_lock(job.job_id)
+                if is_run:
+                    return job
+        return None
+
+    def _run_job(self, job: DatasetImportJobDto) -> None:
+        request = job.request
+        self._update_job(job, status=ImportJobStatus.RUNNING)
+
+        def progress(stage: ImportStage, parsed_count: int, inserted_count: int):
+            self._update_job(
+                job,
+                stage=stage,
+                rows_parsed=parsed_count,
+                rows_inserted=inserted_count,
+            )
+
+        try:
+            with open_text_file(request.file_path) as fp:
+                eufid = self._dataset_service.import_dataset(
+                    fp,
+                    source=request.file_path,
+                    smid=request.smid,
+                    title=request.title,
+                    assembly_id=request.assembly_id,
+                    modification_ids=request.modification_ids,
+                    organism_id=request.organism_id,
+                    technology_id=request.technology_id,
+                    annotation_source=request.annotation_source,
+                    progress=progress,
+                )
+        except Exception as exc:
+            self._session.rollback()
+            logger.error(f"Import job {job.job_id} failed: {exc}")
+            self._update_job(
+                job,
+                status=ImportJobStatus.FAILED,
+                message=str(exc),
+                error_summary=(
+                    exc.error_summary
+                    if isinstance(exc, BedImportTooManyErrors)
+                    else None
+                ),
+            )
+            return
+        finally:
+            self._file_service.delete_import_job_input(job.job_id)
+        self._update_job(job, status=ImportJobStatus.DONE, eufid=eufid)
+        logger.info(f"Import job {job.job_id} created dataset {eufid}.")
+
+    def _update_job(self, job: DatasetImportJobDto, **kwargs) -> None:
+        for key, value in kwargs.items():
+            setattr(job, key, value)
+        job.updated = datetime.now(timezone.utc)
+        self._write_job(job)
+
+    def _write_job(self, job: DatasetImportJobDto) -> None:
+        self._file_service.write_import_job(job.job_id, job.model_dump_json())
+
+
+@cache
+def get_import_job_service() -> ImportJobService:
+    """Instantiate an ImportJobService object by injecting its dependencies.
+
+    :returns: Import job service instance
+    :rtype: ImportJobService
+    """
+    return ImportJobService(
+        session=get_session(),
+        file_service=get_file_service(),
+        dataset_service=get_dataset_service(),
+    )
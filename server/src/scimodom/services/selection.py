@@ -57,6 +57,36 @@ class SelectionService:
             self._session.rollback()
             raise
 
+    def rebuild_gene_caches(
+        self, selection_ids: list[int] | None = None, is_check_only: bool = False
+    ) -> list[int]:
+        """Check gene caches against the database, and rebuild
+        caches that are missing or out of date. Gene caches
+        are otherwise only merged when datasets are added.
+
+        :param selection_ids: Selection IDs. Default is all selections.
+        :type selection_ids: list[int] | None
+        :param is_check_only: If True, do not rebuild caches.
+        :type is_check_only: bool
+        :returns: Selection IDs of caches that are missing or out of date
+        :rtype: list[int]
+        """
+        if selection_ids is None:
+            selection_ids = list(
+                self._session.scalars(select(Selection.id).order_by(Selection.id))
+            )
+        stale_selection_ids = []
+        for selection_id in selection_ids:
+            if self._gene_service.check_gene_cache(selection_id):
+                continue
+            stale_selection_ids.append(selection_id)
+            if not is_check_only:
+                count = self._gene_service.update_gene_cache(selection_id)
+                logger.info(
+                    f"Rebuilt gene cache for selection '{selection_id}' ({count} genes)."
+                )
+        return stale_selection_ids
+
     def delete_selections_by_dataset(self, dataset: Dataset) -> None:
         """Delete selection(s) associated with a Dataset and clear gene cache.
 
@@ -4,6 +4,8 @@ import logging
 import re
 from typing import Generator
 
+import numpy as np
+import pandas as pd  # type: ignore # import-untyped
 from sqlalchemy import select, func, exists
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import Session
@@ -25,15 +27,21 @@ from scimodom.services.assembly import (
     get_assembly_service,
     AssemblyService,
 )
-from scimodom.services.bedtools import get_bedtools_service, BedToolsService
-from scimodom.utils.importer.bed_importer import EufImporter
+from scimodom.utils.dtos.dataset_validation import DatasetValidationReportDto
+from scimodom.utils.import_metrics import get_import_metrics
+from scimodom.utils.importer.bed_importer import BedImportEmptyFile, EufImporter
+from scimodom.utils.importer.columnar_importer import EufColumnarImporter
 from scimodom.utils.dtos.bedtools import EufRecord
 from scimodom.utils.specs.euf import (
     EUF_COMPATIBLE_VERSIONS,
     EUF_HEADERS,
     EUF_REQUIRED_HEADERS,
 )
-from scimodom.utils.specs.enums import AnnotationSource
+from scimodom.utils.specs.enums import (
+    AnnotationSource,
+    ImportErrorClass,
+    ImportMetricsStage,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -44,6 +52,8 @@ class _ReadOnlyImportContext:
     assembly_id: int
 
     is_liftover: bool = False
+    columnar_flag: bool = False
+    chain_file: str | None = None
     seqids: list[str] = field(default_factory=list)
     modification_names: dict[str, int] = field(default_factory=dict)
 
@@ -118,8 +128,6 @@ class ValidatorService:
     :type annotation_service: AnnotationService
     :param assembly_service: Assembly service instance
     :type assembly_service: AssemblyService
-    :param bedtools_service: BedTools service instance
-    :type bedtools_service: BedToolsService
     :param data_service: Data service instance
     :type data service: DataService
     """
@@ -131,12 +139,10 @@ class ValidatorService:
         session: Session,
         annotation_service: AnnotationService,
         assembly_service: AssemblyService,
-        bedtools_service: BedToolsService,
     ):
         self._session = session
         self._annotation_service = annotation_service
         self._assembly_service = assembly_service
-        self._bedtools_service = bedtools_service
 
         self._ro_context: _ReadOnlyImportContext
         self._context: _DatasetImportContext
@@ -251,16 +257,125 @@ class ValidatorService:
             for record in self._do_direct_import(importer, context):
                 yield record
 
+    def get_validated_chunks(
+        self,
+        importer: EufColumnarImporter,
+        context: _ReadOnlyImportContext | _DatasetImportContext,
+    ) -> Generator[pd.DataFrame, None, None]:
+        """Parse, eventually lift over, and return records
+        by chunks, see :meth:`EufColumnarImporter.parse_chunks`.
+
+        This method provides the same validation as
+        :meth:`get_validated_records`, but checks are done
+        for all records of a chunk at once.
+
+        :param importer: Columnar BED importer
+        :type importer: EufColumnarImporter
+        :param context: Import context
+        :type context: _ReadOnlyImportContext | _DatasetImportContext
+        """
+        if context.is_liftover:
+            for chunk in self._do_lift_over_by_chunks(importer, context):
+                yield chunk
+        else:
+            for chunk in self._do_direct_import_by_chunks(importer, context):
+                yield chunk
+
+    def get_validation_report(
+        self,
+        importer: EufColumnarImporter,
+        context: _ReadOnlyImportContext | _DatasetImportContext,
+        source: str,
+    ) -> DatasetValidationReportDto:
+        """Parse and validate all records w/o importing them.
+
+        Records are checked as done by :meth:`get_validated_chunks`,
+        but they are not lifted over. The input is read by chunks,
+        and memory use does not depend on its size. To report all
+        errors, the importer should not have a maximum error rate.
+
+        Valid records are also checked for sort order, i.e. records
+        for a chrom must be contiguous, and sorted by start. Duplicate
+        sites (same chrom, start, end, strand, and name) are only
+        counted for sorted input.
+
+        :param importer: Columnar BED importer
+        :type importer: EufColumnarImporter
+        :param context: Import context
+        :type context: _ReadOnlyImportContext | _DatasetImportContext
+        :param source: Import file name
+        :type source: str
+        :returns: Validation report
+        :rtype: DatasetValidationReportDto
+        """
+        record_count = 0
+        unknown_chroms: dict[str, int] = {}
+        unknown_names: dict[str, int] = {}
+        site_checker = _SiteOrderChecker()
+        message = None
+        try:
+            for chunk in importer.parse_chunks():
+                is_chrom = chunk["chrom"].isin(context.seqids).to_numpy()
+                _add_value_counts(unknown_chroms, chunk["chrom"][~is_chrom])
+                is_name = chunk["name"].isin(context.modification_names).to_numpy()
+                _add_value_counts(unknown_names, chunk["name"][is_chrom & ~is_name])
+                chunk = self._check_euf_chunk(chunk, importer, context)
+                site_checker.update(chunk)
+                record_count += len(chunk)
+        except BedImportEmptyFile as exc:
+            message = str(exc)
+        is_sorted = site_checker.first_unsorted_line is None
+        return DatasetValidationReportDto(
+            source=source,
+            record_count=record_count,
+            error_count=sum(importer.get_error_counts().values()),
+            error_counts=importer.get_error_counts(),
+            unknown_chroms=unknown_chroms,
+            unknown_modification_names=unknown_names,
+            is_sorted=is_sorted,
+            first_unsorted_line=site_checker.first_unsorted_line,
+            duplicate_site_count=site_checker.duplicate_count if is_sorted else None,
+            message=message,
+        )
+
+    @staticmethod
+    def _check_euf_chunk(chunk, importer, context) -> pd.DataFrame:
+        is_chrom = chunk["chrom"].isin(context.seqids).to_numpy()
+        is_name = chunk["name"].isin(context.modification_names).to_numpy()
+        is_valid = is_chrom & is_name
+        if is_valid.all():
+            return chunk
+        invalid = chunk.loc[~is_valid, ["line", "chrom", "name"]]
+        for line_number, chrom, name in invalid.itertuples(index=False):
+            if chrom not in context.seqids:
+                importer.report_error(
+                    f"Unrecognized chrom: {chrom}. Ignore this warning "
+                    "for scaffolds and contigs, otherwise this could be due to misformatting!",
+                    line_number,
+                    ImportErrorClass.UNKNOWN_CHROM,
+                )
+            else:
+                importer.report_error(
+                    f"Unrecognized name: {name}.",
+                    line_number,
+                    ImportErrorClass.UNKNOWN_NAME,
+                )
+        return chunk[is_valid].reset_index(drop=True)
+
     @staticmethod
     def _check_euf_record(record, importer, context) -> bool:
         if record.chrom not in context.seqids:
             importer.report_error(
                 f"Unrecognized chrom: {record.chrom}. Ignore this warning "
-                "for scaffolds and contigs, otherwise this could be due to misformatting!"
+                "for scaffolds and contigs, otherwise this could be due to misformatting!",
+                error_class=ImportErrorClass.UNKNOWN_CHROM,
             )
             return False
         if record.name not in context.modification_names:
-            importer.report_error(f"Unrecognized name: {record.name}.")
+            importer.report_error(
+                f"Unrecognized name: {record.name}.",
+                error_class=ImportErrorClass.UNKNOWN_NAME,
+            )
             return False
         return True
 
@@ -339,7 +454,7 @@ class ValidatorService:
                 f"No such technology ID: {self._context.technology_id}."
             )
         self._sanitize_selection_ids()
-        self._check_for_duplicate_dataset()
+        self.check_for_duplicate_dataset(self._context)
 
     def _sanitize_modification_ids(self) -> None:
         if len(set(self._context.modification_ids)) != len(
@@ -381,33 +496,61 @@ class ValidatorService:
                     f"{organism.cto} ({organism.taxa_id})."
                 )
 
-    def _check_for_duplicate_dataset(self) -> None:
+    def check_for_duplicate_dataset(self, context: _DatasetImportContext) -> None:
+        """Check that a dataset can be created (or updated)
+        for this import context.
+
+        :param context: Dataset import context
+        :type context: _DatasetImportContext
+        :raises DatasetUpdateError: If the dataset to update
+        does not match the context
+        :raises DatasetExistsError: If a suspected duplicate
+        dataset exists
+        """
         eufid = self._session.execute(
             select(func.distinct(Dataset.id))
             .join(DatasetModificationAssociation, Dataset.associations, isouter=True)
             .where(
-                Dataset.project_id == self._context.smid,
-                Dataset.title == self._context.title,
+                Dataset.project_id == context.smid,
+                Dataset.title == context.title,
                 DatasetModificationAssociation.modification_id.in_(
-                    self._context.modification_ids
+                    context.modification_ids
                 ),
-                Dataset.organism_id == self._context.organism_id,
-                Dataset.technology_id == self._context.technology_id,
+                Dataset.organism_id == context.organism_id,
+                Dataset.technology_id == context.technology_id,
             )
         ).scalar_one_or_none()
-        if self._context.update_flag:
-            if eufid != self._context.eufid:
+        if context.update_flag:
+            if eufid != context.eufid:
                 raise DatasetUpdateError(
-                    f"Provided dataset '{self._context.eufid}', but found '{eufid}' with "
-                    f"title '{self._context.title}' (SMID '{self._context.smid}')."
+                    f"Provided dataset '{context.eufid}', but found '{eufid}' with "
+                    f"title '{context.title}' (SMID '{context.smid}')."
                 )
         else:
             if eufid:
                 raise DatasetExistsError(
-                    f"Suspected duplicate dataset '{eufid}' (SMID '{self._context.smid}'), "
-                    f"and title '{self._context.title}'."
+                    f"Suspected duplicate dataset '{eufid}' (SMID '{context.smid}'), "
+                    f"and title '{context.title}'."
                 )
 
+    def get_chain_file(
+        self, context: _ReadOnlyImportContext | _DatasetImportContext
+    ) -> str:
+        """Return the chain file used to lift over records
+        for this import context.
+
+        Setting 'chain_file' on the context allows to
+        lift over records w/o accessing the database,
+        e.g. in worker processes.
+
+        :param context: Import context
+        :type context: _ReadOnlyImportContext | _DatasetImportContext
+        :returns: Path to chain file
+        :rtype: str
+        """
+        assembly = self._assembly_service.get_by_id(context.assembly_id)
+        return self._assembly_service.get_chain_file_path(assembly).as_posix()
+
     def _modification_id_to_name(self, idx: int) -> str:
         return self._session.execute(
             select(Modomics.short_name)
@@ -443,20 +586,83 @@ class ValidatorService:
         importer: EufImporter,
         context: _ReadOnlyImportContext | _DatasetImportContext,
     ) -> Generator[EufRecord, None, None]:
-        for record in importer.parse():
-            if self._check_euf_record(record, importer, context):
-                yield record
+        metrics = get_import_metrics()
+        records = (
+            record
+            for record in metrics.timed(ImportMetricsStage.PARSING, importer.parse())
+            if self._check_euf_record(record, importer, context)
+        )
+        yield from metrics.timed(
+            ImportMetricsStage.VALIDATION,
+            records,
+            upstream=ImportMetricsStage.PARSING,
+        )
+
+    def _do_direct_import_by_chunks(
+        self,
+        importer: EufColumnarImporter,
+        context: _ReadOnlyImportContext | _DatasetImportContext,
+    ) -> Generator[pd.DataFrame, None, None]:
+        metrics = get_import_metrics()
+        chunks = (
+            self._check_euf_chunk(chunk, importer, context)
+            for chunk in metrics.timed(
+                ImportMetricsStage.PARSING, importer.parse_chunks(), size=len
+            )
+        )
+        yield from metrics.timed(
+            ImportMetricsStage.VALIDATION,
+            chunks,
+            upstream=ImportMetricsStage.PARSING,
+            size=len,
+        )
 
     def _do_lift_over(
         self,
         importer: EufImporter,
         context: _ReadOnlyImportContext | _DatasetImportContext,
     ) -> Generator[EufRecord, None, None]:
-        def generator():
-            for record in importer.parse():
-                if self._check_euf_record(record, importer, context):
-                    yield record
+        chain_file = self._get_lift_over_chain_file(context)
+        records = self._do_direct_import(importer, context)
+        lifted_records = (
+            lifted_record
+            for lifted_record in self._assembly_service.lift_over_records(
+                chain_file, records
+            )
+            if self._check_euf_record(lifted_record, importer, context)
+        )
+        yield from get_import_metrics().timed(
+            ImportMetricsStage.LIFTOVER,
+            lifted_records,
+            upstream=ImportMetricsStage.VALIDATION,
+        )
+
+    def _do_lift_over_by_chunks(
+        self,
+        importer: EufColumnarImporter,
+        context: _ReadOnlyImportContext | _DatasetImportContext,
+    ) -> Generator[pd.DataFrame, None, None]:
+        chain_file = self._get_lift_over_chain_file(context)
+        chunks = self._do_direct_import_by_chunks(importer, context)
+        lifted_chunks = (
+            self._check_euf_chunk(lifted_chunk, importer, context)
+            for lifted_chunk in self._assembly_service.lift_over_chunks(
+                chain_file, chunks
+            )
+        )
+        yield from get_import_metrics().timed(
+            ImportMetricsStage.LIFTOVER,
+            lifted_chunks,
+            upstream=ImportMetricsStage.VALIDATION,
+            size=len,
+        )
 
+    def _get_lift_over_chain_file(
+        self, context: _ReadOnlyImportContext | _DatasetImportContext
+    ) -> str:
+        if context.chain_file is not None:
+            logger.info(f"Lifting over dataset using {context.chain_file}...")
+            return context.chain_file
         assembly = self._assembly_service.get_by_id(context.assembly_id)
         current_assembly_name = self._assembly_service.get_name_for_version(
             assembly.taxa_id
@@ -464,11 +670,60 @@ class ValidatorService:
         logger.info(
             f"Lifting over dataset from {assembly.name} to {current_assembly_name}..."
         )
-        raw_file = self._bedtools_service.create_temp_euf_file(generator())
-        with self._assembly_service.create_lifted_file(assembly, raw_file) as fp:
-            lifted_importer = EufImporter(stream=fp, source=fp.name)
-            for lifted_record in self._do_direct_import(lifted_importer, context):
-                yield lifted_record
+        return self._assembly_service.get_chain_file_path(assembly).as_posix()
+
+
+class _SiteOrderChecker:
+    """Check sort order, and count duplicate sites,
+    one chunk of valid records at a time."""
+
+    SITE_COLUMNS = ["chrom", "start", "end", "strand", "name"]
+
+    def __init__(self):
+        self.first_unsorted_line: int | None = None
+        self.duplicate_count = 0
+        self._seen_chroms: set[str] = set()
+        self._last_chrom: str | None = None
+        self._last_start = -1
+        # sites at the last position of the previous chunk
+        self._last_sites = pd.DataFrame(columns=self.SITE_COLUMNS, dtype=object)
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        if len(chunk) == 0 or self.first_unsorted_line is not None:
+            return
+        chrom = chunk["chrom"].to_numpy(dtype=object)
+        start = chunk["start"].to_numpy()
+        previous_chrom = np.concatenate([[self._last_chrom], chrom[:-1]])
+        previous_start = np.concatenate([[self._last_start], start[:-1]])
+        is_new_chrom = chrom != previous_chrom
+        is_unsorted = ~is_new_chrom & (start < previous_start)
+        for idx in np.flatnonzero(is_new_chrom):
+            if chrom[idx] in self._seen_chroms:
+                is_unsorted[idx] = True
+            self._seen_chroms.add(chrom[idx])
+        if is_unsorted.any():
+            self.first_unsorted_line = int(
+                chunk["line"].to_numpy()[np.argmax(is_unsorted)]
+            )
+            return
+        self._last_chrom, self._last_start = chrom[-1], start[-1]
+
+        sites = pd.concat(
+            [self._last_sites, chunk[self.SITE_COLUMNS].astype(object)],
+            ignore_index=True,
+        )
+        is_duplicate = sites.duplicated().to_numpy()[len(self._last_sites) :]
+        self.duplicate_count += int(is_duplicate.sum())
+        is_last_position = (sites["chrom"] == self._last_chrom).to_numpy() & (
+            sites["start"] == self._last_start
+        ).to_numpy()
+        self._last_sites = sites[is_last_position].drop_duplicates()
+
+
+def _add_value_counts(counts: dict[str, int], values: pd.Series) -> None:
+    for value, count in values.value_counts().items():
+        if count > 0:
+            counts[value] = counts.get(value, 0) + int(count)
 
 
 @cache
@@ -482,5 +737,4 @@ def get_validator_service() -> ValidatorService:
         session=get_session(),
         annotation_service=get_annotation_service(),
         assembly_service=get_assembly_service(),
-        bedtools_service=get_bedtools_service(),
     )
@@ -0,0 +1,102 @@
+from collections import Counter
+from typing import Any, Iterable, Iterator
+
+from scimodom.utils.dtos.bedtools import TrustedComparisonRecord, TrustedRecord
+
+
+class ComparisonSummary:
+    """Counts of comparison results (intersect, closest, or
+    subtract), without the records.
+
+    Reference (A) records are counted by dataset while they
+    are passed to the operation, see :meth:`count_references`,
+    and results are counted by chrom, and by pair of datasets
+    (A, B), see :meth:`add`. The fraction of a pair is the
+    number of distinct A records found in the results, over all
+    A records of this dataset. For subtract, results are pieces
+    of A records, B is None, and there is no fraction.
+
+    Results must be ordered by A records, as returned by
+    BedToolsService, so that distinct A records are counted
+    without keeping them in memory.
+    """
+
+    def __init__(self):
+        self._total_records = 0
+        self._reference_records: Counter[str] = Counter()
+        self._chrom_records: Counter[str] = Counter()
+        self._pair_records: Counter[tuple[str, str | None]] = Counter()
+        self._pair_references: Counter[tuple[str, str | None]] = Counter()
+        self._last_reference: dict[tuple[str, str | None], TrustedComparisonRecord] = {}
+
+    def count_references(
+        self, records: Iterable[TrustedComparisonRecord]
+    ) -> Iterator[TrustedComparisonRecord]:
+        """Count reference records by dataset, while
+        they are generated.
+
+        :param records: Reference records
+        :type records: Iterable[TrustedComparisonRecord]
+        :returns: The same records
+        :rtype: Iterator[TrustedComparisonRecord]
+        """
+        for record in records:
+            self._reference_records[record.eufid] += 1
+            yield record
+
+    def add(self, records: Iterable[TrustedRecord]) -> None:
+        """Count results.
+
+        :param records: Results, ordered by A records
+        :type records: Iterable[TrustedRecord]
+        """
+        for record in records:
+            if isinstance(record, TrustedComparisonRecord):
+                pair = (record.eufid, None)
+                self._add(record, pair)
+                continue
+            pair = (record.a.eufid, record.b.eufid)
+            self._add(record.a, pair)
+            if self._last_reference.get(pair) != record.a:
+                self._pair_references[pair] += 1
+                self._last_reference[pair] = record.a
+
+    def to_json_dict(self) -> dict[str, Any]:
+        """Return counts as JSON compatible dict, chroms
+        and pairs in order of first result.
+
+        :returns: Counts
+        :rtype: dict[str, Any]
+        """
+        pairs = []
+        for (a_eufid, b_eufid), records in self._pair_records.items():
+            reference_total = self._reference_records[a_eufid]
+            reference_records, fraction = None, None
+            if b_eufid is not None:
+                reference_records = self._pair_references[(a_eufid, b_eufid)]
+                fraction = reference_records / reference_total
+            pairs.append(
+                {
+                    "reference": a_eufid,
+                    "comparison": b_eufid,
+                    "records": records,
+                    "referenceRecords": reference_records,
+                    "referenceTotal": reference_total,
+                    "fraction": fraction,
+                }
+            )
+        return {
+            "totalRecords": self._total_records,
+            "chroms": [
+                {"chrom": chrom, "records": records}
+                for chrom, records in self._chrom_records.items()
+            ],
+            "pairs": pairs,
+        }
+
+    def _add(
+        self, record: TrustedComparisonRecord, pair: tuple[str, str | None]
+    ) -> None:
+        self._total_records += 1
+        self._chrom_records[record.chrom] += 1
+        self._pair_records[pair] += 1
@@ -0,0 +1,255 @@
+import json
+from pathlib import Path
+from typing import Any, Iterator, Sequence
+
+import numpy as np
+
+from scimodom.utils.specs.enums import Strand
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_METADATA_FILE = "snapshot.json"
+# bedRMod columns, in file order
+SNAPSHOT_COLUMNS = (
+    "chrom",
+    "start",
+    "end",
+    "name",
+    "score",
+    "strand",
+    "thick_start",
+    "thick_end",
+    "item_rgb",
+    "coverage",
+    "frequency",
+)
+SNAPSHOT_ENCODED_COLUMNS = ("chrom", "name", "strand", "item_rgb")
+SNAPSHOT_CHUNK_SIZE = 100000
+
+
+class DataSnapshot:
+    """Columnar copy of the Data records of one dataset.
+
+    Records are sorted by chrom, then by start, as for
+    "bedtools sort" (see :func:`get_sort_order`), and stored
+    column by column. Integer columns are int64 arrays, and
+    string columns (chrom, name, strand, item_rgb) are stored
+    as int32 codes into sorted dictionaries. A snapshot can be
+    saved as .npy arrays, and loaded memory-mapped, see
+    :meth:`save` and :meth:`load`.
+
+    The metadata carry a version stamp: the format version
+    (SNAPSHOT_VERSION), and the largest Data ID covered by
+    the snapshot. Snapshots written with another format version
+    are not loaded.
+
+    :param dataset_id: EUFID
+    :type dataset_id: str
+    :param max_data_id: Largest Data ID of the records
+    :type max_data_id: int
+    :param columns: Values by column, for all SNAPSHOT_COLUMNS,
+    in the same record order. Strands are given as Strand.
+    :type columns: dict[str, Sequence[Any]]
+    """
+
+    def __init__(
+        self, dataset_id: str, max_data_id: int, columns: dict[str, Sequence[Any]]
+    ):
+        builder = DataSnapshotBuilder()
+        builder.add(columns)
+        self._set_arrays(*builder.get_metadata_and_arrays(dataset_id, max_data_id))
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> "DataSnapshot | None":
+        """Load a snapshot saved with :meth:`save`,
+        see :meth:`IntervalIndex.load`.
+
+        :param path: Snapshot directory
+        :type path: Path
+        :param mmap: Memory-map arrays
+        :type mmap: bool
+        :returns: Snapshot, or None if it was written
+        with another format version
+        :rtype: DataSnapshot | None
+        """
+        with open(Path(path, SNAPSHOT_METADATA_FILE), "r") as fh:
+            metadata = json.load(fh)
+        if metadata.get("version") != SNAPSHOT_VERSION:
+            return None
+        arrays = {
+            name: np.load(Path(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+            for name in SNAPSHOT_COLUMNS
+        }
+        snapshot = cls.__new__(cls)
+        snapshot._set_arrays(metadata, arrays)
+        return snapshot
+
+    def save(self, path: Path) -> None:
+        """Save snapshot as .npy arrays, and a JSON file
+        for the version stamp and dictionaries. The metadata
+        are written last.
+
+        :param path: Snapshot directory, created if it does not exist
+        :type path: Path
+        """
+        Path(path).mkdir(parents=True, exist_ok=True)
+        for name in SNAPSHOT_COLUMNS:
+            np.save(Path(path, f"{name}.npy"), self._arrays[name])
+        with open(Path(path, SNAPSHOT_METADATA_FILE), "w") as fh:
+            json.dump(self._metadata, fh)
+
+    @property
+    def dataset_id(self) -> str:
+        return self._metadata["dataset_id"]
+
+    @property
+    def max_data_id(self) -> int:
+        return self._metadata["max_data_id"]
+
+    def __len__(self) -> int:
+        return len(self._arrays["start"])
+
+    def get_array(self, name: str) -> np.ndarray:
+        """Return the array of a column. String
+        columns are returned as codes, see :meth:`get_dictionary`.
+
+        :param name: Column name
+        :type name: str
+        :returns: Column array
+        :rtype: np.ndarray
+        """
+        return self._arrays[name]
+
+    def get_dictionary(self, name: str) -> list[str]:
+        """Return the dictionary of a string column.
+
+        :param name: Column name
+        :type name: str
+        :returns: Values by code
+        :rtype: list[str]
+        """
+        return self._metadata[name]
+
+    def get_rows(
+        self, columns: Sequence[str] = SNAPSHOT_COLUMNS
+    ) -> Iterator[tuple[Any, ...]]:
+        """Read records as tuples, in snapshot order.
+        Columns are decoded chunk by chunk, and strands
+        are returned as Strand.
+
+        :param columns: Columns, default is SNAPSHOT_COLUMNS
+        :type columns: Sequence[str]
+        :returns: Records
+        :rtype: Iterator[tuple[Any, ...]]
+        """
+        for idx in range(0, len(self), SNAPSHOT_CHUNK_SIZE):
+            chunk = slice(idx, idx + SNAPSHOT_CHUNK_SIZE)
+            yield from zip(
+                *[self._decode(name, self._arrays[name][chunk]) for name in columns]
+            )
+
+    def _decode(self, name: str, values: np.ndarray) -> list[Any]:
+        if name not in SNAPSHOT_ENCODED_COLUMNS:
+            return values.tolist()
+        dictionary = self._metadata[name]
+        if name == "strand":
+            dictionary = [Strand(value) for value in dictionary]
+        return [dictionary[code] for code in values.tolist()]
+
+    def _set_arrays(
+        self, metadata: dict[str, Any], arrays: dict[str, np.ndarray]
+    ) -> None:
+        self._metadata = metadata
+        self._arrays = arrays
+
+
+class DataSnapshotBuilder:
+    """Collect the columns of a snapshot chunk by chunk,
+    see :meth:`DataService.write_snapshot`.
+
+    Each chunk is converted to typed arrays when it is added,
+    so that only arrays are kept, and not the values of all
+    records. String columns are encoded in order of first
+    occurrence, and codes are mapped to sorted dictionaries
+    at the end.
+    """
+
+    def __init__(self):
+        self._chunks: dict[str, list[np.ndarray]] = {
+            name: [] for name in SNAPSHOT_COLUMNS
+        }
+        self._codes: dict[str, dict[Any, int]] = {
+            name: {} for name in SNAPSHOT_ENCODED_COLUMNS
+        }
+
+    def add(self, columns: dict[str, Sequence[Any]]) -> None:
+        """Add records.
+
+        :param columns: Values by column, for all SNAPSHOT_COLUMNS,
+        in the same record order. Strands are given as Strand.
+        :type columns: dict[str, Sequence[Any]]
+        """
+        for name in SNAPSHOT_COLUMNS:
+            values = columns[name]
+            if name == "strand":
+                values = [strand.value for strand in values]
+            if name in SNAPSHOT_ENCODED_COLUMNS:
+                codes = self._codes[name]
+                array = np.fromiter(
+                    (codes.setdefault(value, len(codes)) for value in values),
+                    dtype=np.int32,
+                    count=len(values),
+                )
+            else:
+                array = np.asarray(values, dtype=np.int64)
+            self._chunks[name].append(array)
+
+    def build(self, dataset_id: str, max_data_id: int) -> DataSnapshot:
+        """Return the snapshot of all records added so far.
+
+        :param dataset_id: EUFID
+        :type dataset_id: str
+        :param max_data_id: Largest Data ID of the records
+        :type max_data_id: int
+        :returns: Snapshot
+        :rtype: DataSnapshot
+        """
+        snapshot = DataSnapshot.__new__(DataSnapshot)
+        snapshot._set_arrays(*self.get_metadata_and_arrays(dataset_id, max_data_id))
+        return snapshot
+
+    def get_metadata_and_arrays(
+        self, dataset_id: str, max_data_id: int
+    ) -> tuple[dict[str, Any], dict[str, np.ndarray]]:
+        """Return snapshot metadata, including dictionaries,
+        and arrays sorted in snapshot order. Chunks added
+        so far are released.
+
+        :param dataset_id: EUFID
+        :type dataset_id: str
+        :param max_data_id: Largest Data ID of the records
+        :type max_data_id: int
+        :returns: Metadata, and arrays by column name
+        :rtype: tuple[dict[str, Any], dict[str, np.ndarray]]
+        """
+        metadata: dict[str, Any] = {
+            "version": SNAPSHOT_VERSION,
+            "dataset_id": dataset_id,
+            "max_data_id": max_data_id,
+        }
+        arrays: dict[str, np.ndarray] = {}
+        for name in SNAPSHOT_COLUMNS:
+            dtype = np.int32 if name in SNAPSHOT_ENCODED_COLUMNS else np.int64
+            array = np.concatenate([np.empty(0, dtype=dtype), *self._chunks[name]])
+            self._chunks[name] = []
+            if name in SNAPSHOT_ENCODED_COLUMNS:
+                codes = self._codes[name]
+                dictionary = sorted(codes)
+                ranks = np.empty(len(dictionary), dtype=np.int32)
+                ranks[[codes[value] for value in dictionary]] = np.arange(
+                    len(dictionary), dtype=np.int32
+                )
+                metadata[name] = dictionary
+                array = ranks[array]
+            arrays[name] = array
+        order = np.lexsort((arrays["start"], arrays["chrom"]))
+        return metadata, {name: arrays[name][order] for name in arrays}
@@ -1,4 +1,4 @@
-from typing import Annotated, Optional, Self
+from typing import Annotated, Any, NamedTuple, Optional, Self
 
 from pydantic import BaseModel, Field, model_validator
 
@@ -75,3 +75,119 @@ class DataAnnotationRecord(BaseModel):
     gene_id: Annotated[str, Field(min_length=1, max_length=128)]
     data_id: NonNegativInt
     feature: Annotated[str, Field(min_length=1, max_length=32)]
+
+
+# Trusted records are used on hot paths for records that come from the
+# database, or from bedtools output of such records. They are not
+# validated, and only carry the same fields as their pydantic
+# counterpart. Validate at system boundaries, e.g. uploads, instead.
+
+
+class TrustedBed6Record(NamedTuple):
+    """Bed6Record without validation."""
+
+    chrom: str
+    start: int
+    end: int
+    name: str
+    score: int
+    strand: Strand
+
+    def to_json_dict(self) -> dict[str, Any]:
+        """Return fields as for Bed6Record.model_dump(mode="json").
+
+        :returns: Fields
+        :rtype: dict[str, Any]
+        """
+        return {
+            "chrom": self.chrom,
+            "start": self.start,
+            "end": self.end,
+            "name": self.name,
+            "score": self.score,
+            "strand": self.strand.value,
+        }
+
+
+class TrustedComparisonRecord(NamedTuple):
+    """ComparisonRecord without validation. Fields are
+    in the order of the BED6+3 columns used by bedtools."""
+
+    chrom: str
+    start: int
+    end: int
+    name: str
+    score: int
+    strand: Strand
+    eufid: str
+    coverage: int
+    frequency: int
+
+    def to_json_dict(self) -> dict[str, Any]:
+        """Return fields as for ComparisonRecord.model_dump(mode="json").
+
+        :returns: Fields
+        :rtype: dict[str, Any]
+        """
+        return {
+            "chrom": self.chrom,
+            "start": self.start,
+            "end": self.end,
+            "name": self.name,
+            "score": self.score,
+            "strand": self.strand.value,
+            "coverage": self.coverage,
+            "frequency": self.frequency,
+            "eufid": self.eufid,
+        }
+
+
+class TrustedIntersectRecord(NamedTuple):
+    """IntersectRecord without validation."""
+
+    a: TrustedComparisonRecord
+    b: TrustedComparisonRecord
+
+    def to_json_dict(self) -> dict[str, Any]:
+        """Return fields as for IntersectRecord.model_dump(mode="json").
+
+        :returns: Fields
+        :rtype: dict[str, Any]
+        """
+        return {"a": self.a.to_json_dict(), "b": self.b.to_json_dict()}
+
+
+class TrustedClosestRecord(NamedTuple):
+    """ClosestRecord without validation."""
+
+    a: TrustedComparisonRecord
+    b: TrustedComparisonRecord
+    distance: int
+
+    def to_json_dict(self) -> dict[str, Any]:
+        """Return fields as for ClosestRecord.model_dump(mode="json").
+
+        :returns: Fields
+        :rtype: dict[str, Any]
+        """
+        return {
+            "a": self.a.to_json_dict(),
+            "b": self.b.to_json_dict(),
+            "distance": self.distance,
+        }
+
+
+class TrustedDataAnnotationRecord(NamedTuple):
+    """DataAnnotationRecord without validation."""
+
+    gene_id: str
+    data_id: int
+    feature: str
+
+
+TrustedRecord = (
+    TrustedBed6Record
+    | TrustedComparisonRecord
+    | TrustedIntersectRecord
+    | TrustedClosestRecord
+)
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+
+from scimodom.utils.specs.enums import ImportErrorClass
+
+
+class DatasetValidationReportDto(BaseModel):
+    source: str
+    record_count: int = 0
+    error_count: int = 0
+    error_counts: dict[ImportErrorClass, int] = {}
+    unknown_chroms: dict[str, int] = {}
+    unknown_modification_names: dict[str, int] = {}
+    is_sorted: bool = True
+    first_unsorted_line: int | None = None
+    duplicate_site_count: int | None = 0
+    message: str | None = None
+
+    @property
+    def is_valid(self) -> bool:
+        return self.message is None and self.error_count == 0
@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+from scimodom.utils.specs.enums import AnnotationSource, ImportJobStatus, ImportStage
+
+
+class DatasetImportRequestDto(BaseModel):
+    file_path: str
+    smid: str
+    title: str
+    assembly_id: int
+    modification_ids: list[int]
+    organism_id: int
+    technology_id: int
+    annotation_source: AnnotationSource
+    user_email: str | None = None
+
+
+class DatasetImportJobDto(BaseModel):
+    job_id: str
+    status: ImportJobStatus
+    stage: ImportStage | None = None
+    rows_parsed: int = 0
+    rows_inserted: int = 0
+    eufid: str | None = None
+    message: str | None = None
+    error_summary: str | None = None
+    created: datetime
+    updated: datetime
+    request: DatasetImportRequestDto
@@ -0,0 +1,18 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+from scimodom.utils.specs.enums import ReannotationStage
+
+
+class ReannotationJobDto(BaseModel):
+    taxa_id: int
+    annotation_id: int
+    from_release: int
+    to_release: int
+    stage: ReannotationStage
+    eufids: list[str] = []
+    done_eufids: list[str] = []
+    obsolete_gene_ids: list[str] = []
+    created: datetime
+    updated: datetime
@@ -0,0 +1,55 @@
+# UCSC-style binning scheme, see e.g. Kent et al. (2002) Genome Res. 12(6):996-1006.
+# Bins are numbered from the largest (512 Mb, level 0) to the smallest
+# (128 kb) level, and each level is given as (offset, shift), from the
+# smallest to the largest bins. Only the standard scheme is supported.
+BIN_LEVELS: list[tuple[int, int]] = [
+    (512 + 64 + 8 + 1, 17),
+    (64 + 8 + 1, 20),
+    (8 + 1, 23),
+    (1, 26),
+    (0, 29),
+]
+BIN_MAX_END = 1 << 29
+
+
+def get_bin(start: int, end: int) -> int:
+    """Return the smallest bin that fully contains an
+    interval. Intervals are half-open, as in BED.
+
+    :param start: Start position
+    :type start: int
+    :param end: End position
+    :type end: int
+    :returns: Bin
+    :rtype: int
+    :raises ValueError: If the interval is beyond the
+    range of the standard binning scheme.
+    """
+    if end > BIN_MAX_END:
+        raise ValueError(
+            f"Interval {start}-{end} is out of range for binning (max. {BIN_MAX_END})."
+        )
+    end = max(end - 1, start)
+    for offset, shift in BIN_LEVELS:
+        if start >> shift == end >> shift:
+            return offset + (start >> shift)
+    raise ValueError(f"Invalid interval {start}-{end} for binning.")
+
+
+def get_bin_ranges(start: int, end: int) -> list[tuple[int, int]]:
+    """Return, for each level, the range of bins that may
+    contain intervals overlapping a given interval, see
+    :func:`get_bin`.
+
+    :param start: Start position
+    :type start: int
+    :param end: End position
+    :type end: int
+    :returns: First and last bin (inclusive) by level
+    :rtype: list[tuple[int, int]]
+    """
+    end = max(end - 1, start)
+    return [
+        (offset + (start >> shift), offset + (end >> shift))
+        for offset, shift in BIN_LEVELS
+    ]
@@ -0,0 +1,288 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+import itertools
+import resource
+import sys
+import time
+from typing import Any, Callable, Generator, Iterable, Iterator, Optional
+
+from scimodom.utils.specs.enums import ImportMetricsStage
+
+RSS_SAMPLE_INTERVAL = 10000
+PROC_STATUS_FILE = "/proc/self/status"
+
+
+@dataclass
+class StageMetrics:
+    """Metrics for one stage of a dataset import.
+
+    Wall time is exclusive, i.e. it does not include time spent
+    in other stages, e.g. the time spent parsing records is not
+    included in the validation time. The peak RSS is the largest
+    current resident set size of the process sampled while the
+    stage was running, i.e. when it is entered and left, and
+    every RSS_SAMPLE_INTERVAL items. As stages are interleaved
+    (records are streamed), memory held by other stages is
+    included, and short peaks between samples may be missed.
+
+    :param stage: Import stage
+    :type stage: ImportMetricsStage
+    :param wall_time: Wall time in seconds
+    :type wall_time: float
+    :param rows_in: Number of rows (records) processed
+    :type rows_in: int
+    :param rows_out: Number of rows (records) produced
+    :type rows_out: int
+    :param peak_rss: Peak sampled resident set size in bytes
+    :type peak_rss: int
+    """
+
+    stage: ImportMetricsStage
+    wall_time: float = 0.0
+    rows_in: int = 0
+    rows_out: int = 0
+    peak_rss: int = 0
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.wall_time <= 0:
+            return 0.0
+        return self.rows_in / self.wall_time
+
+    def sample_rss(self) -> None:
+        self.peak_rss = max(self.peak_rss, get_current_rss())
+
+
+class ImportMetrics:
+    """Record wall time, rows in and out, and peak RSS
+    for each stage of a dataset import.
+
+    Metrics are recorded by services for the metrics
+    instance that is currently active, see :meth:`activate`
+    and :func:`get_import_metrics`, so that they do not
+    need to be passed around.
+
+    :param enabled: If false, nothing is recorded. Default is True.
+    :type enabled: bool
+    """
+
+    def __init__(self, enabled: bool = True):
+        self._enabled = enabled
+        self._stages: dict[ImportMetricsStage, StageMetrics] = {}
+        self._active: list[ImportMetricsStage] = []
+        self._mark = 0.0
+        self.wall_time = 0.0
+
+    @contextmanager
+    def activate(self) -> Generator["ImportMetrics", None, None]:
+        """Make this instance the active one, and record
+        the total wall time of one import.
+
+        :returns: This instance
+        :rtype: ImportMetrics
+        """
+        token = _active_metrics.set(self)
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.wall_time += time.perf_counter() - start
+            _active_metrics.reset(token)
+
+    @contextmanager
+    def stage(self, stage: ImportMetricsStage) -> Generator[StageMetrics, None, None]:
+        """Time a block of code. Rows in and out must be added
+        to the returned metrics by the caller.
+
+        :param stage: Import stage
+        :type stage: ImportMetricsStage
+        :returns: Stage metrics
+        :rtype: StageMetrics
+        """
+        if not self._enabled:
+            yield StageMetrics(stage=stage)
+            return
+        metrics = self._get_stage(stage)
+        metrics.sample_rss()
+        self._enter(stage)
+        try:
+            yield metrics
+        finally:
+            self._exit()
+            metrics.sample_rss()
+
+    def timed(
+        self,
+        stage: ImportMetricsStage,
+        iterable: Iterable[Any],
+        upstream: Optional[ImportMetricsStage] = None,
+        size: Optional[Callable[[Any], int]] = None,
+    ) -> Iterator[Any]:
+        """Time the production of items by an iterable.
+
+        Items yielded are counted as rows out. Rows in are the
+        rows produced meanwhile by the upstream stage, if any,
+        or else the rows out.
+
+        :param stage: Import stage
+        :type stage: ImportMetricsStage
+        :param iterable: Items
+        :type iterable: Iterable[Any]
+        :param upstream: Stage feeding the iterable
+        :type upstream: ImportMetricsStage | None
+        :param size: Number of rows per item, e.g. for chunks. Default is 1.
+        :type size: Callable[[Any], int] | None
+        :returns: Items
+        :rtype: Iterator[Any]
+        """
+        if not self._enabled:
+            return iter(iterable)
+        return self._timed(stage, iter(iterable), upstream, size)
+
+    def get_stages(self) -> list[StageMetrics]:
+        """Return metrics for all stages that were run,
+        in pipeline order.
+
+        :returns: Stage metrics
+        :rtype: list[StageMetrics]
+        """
+        return [self._stages[s] for s in ImportMetricsStage if s in self._stages]
+
+    def merge(self, other: "ImportMetrics") -> None:
+        """Add metrics of another import, e.g. to summarize
+        a batch import.
+
+        :param other: Metrics to add
+        :type other: ImportMetrics
+        """
+        for metrics in other.get_stages():
+            merged = self._get_stage(metrics.stage)
+            merged.wall_time += metrics.wall_time
+            merged.rows_in += metrics.rows_in
+            merged.rows_out += metrics.rows_out
+            merged.peak_rss = max(merged.peak_rss, metrics.peak_rss)
+        self.wall_time += other.wall_time
+
+    def format_report(self) -> str:
+        """Format metrics as a table.
+
+        Time not spent in any stage, e.g. reading
+        headers or creating the dataset, is reported
+        as "other".
+
+        :returns: Table
+        :rtype: str
+        """
+        lines = [
+            f"{'stage':<12}{'time (s)':>10}{'rows in':>12}{'rows out':>12}"
+            f"{'rows/s':>12}{'peak RSS (MiB)':>16}"
+        ]
+        for metrics in self.get_stages():
+            lines.append(
+                f"{metrics.stage.value:<12}{metrics.wall_time:>10.3f}"
+                f"{metrics.rows_in:>12}{metrics.rows_out:>12}"
+                f"{metrics.rows_per_second:>12.0f}"
+                f"{metrics.peak_rss / 2**20:>16.1f}"
+            )
+        stage_time = sum(m.wall_time for m in self._stages.values())
+        lines.append(f"{'other':<12}{max(self.wall_time - stage_time, 0):>10.3f}")
+        lines.append(f"{'total':<12}{self.wall_time:>10.3f}")
+        return "\n".join(lines)
+
+    def _timed(
+        self,
+        stage: ImportMetricsStage,
+        iterator: Iterator[Any],
+        upstream: Optional[ImportMetricsStage],
+        size: Optional[Callable[[Any], int]],
+    ) -> Generator[Any, None, None]:
+        metrics = self._get_stage(stage)
+        upstream_metrics = None if upstream is None else self._get_stage(upstream)
+        upstream_rows = 0 if upstream_metrics is None else upstream_metrics.rows_out
+        rows_out = 0
+        metrics.sample_rss()
+        try:
+            for count in itertools.count(1):
+                self._enter(stage)
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    self._exit()
+                rows_out += 1 if size is None else size(item)
+                if count % RSS_SAMPLE_INTERVAL == 0:
+                    metrics.sample_rss()
+                yield item
+        finally:
+            metrics.rows_out += rows_out
+            if upstream_metrics is None:
+                metrics.rows_in += rows_out
+            else:
+                metrics.rows_in += upstream_metrics.rows_out - upstream_rows
+            metrics.sample_rss()
+
+    def _get_stage(self, stage: ImportMetricsStage) -> StageMetrics:
+        try:
+            return self._stages[stage]
+        except KeyError:
+            metrics = StageMetrics(stage=stage)
+            self._stages[stage] = metrics
+            return metrics
+
+    def _enter(self, stage: ImportMetricsStage) -> None:
+        # time is attributed to the innermost active stage
+        now = time.perf_counter()
+        if self._active:
+            self._stages[self._active[-1]].wall_time += now - self._mark
+        self._active.append(stage)
+        self._mark = now
+
+    def _exit(self) -> None:
+        now = time.perf_counter()
+        stage = self._active.pop()
+        self._stages[stage].wall_time += now - self._mark
+        self._mark = now
+
+
+_active_metrics: ContextVar[Optional[ImportMetrics]] = ContextVar(
+    "import_metrics", default=None
+)
+_disabled_metrics = ImportMetrics(enabled=False)
+
+
+def get_import_metrics() -> ImportMetrics:
+    """Return the active import metrics, see
+    :meth:`ImportMetrics.activate`. If none is active,
+    a disabled instance is returned.
+
+    :returns: Import metrics
+    :rtype: ImportMetrics
+    """
+    metrics = _active_metrics.get()
+    return _disabled_metrics if metrics is None else metrics
+
+
+def get_current_rss() -> int:
+    """Return the current resident set size of the
+    current process, read from /proc/self/status.
+
+    Where /proc is not available (e.g. macOS), the
+    peak resident set size of the process is returned
+    instead, i.e. the high-water mark since it started.
+
+    :returns: RSS in bytes
+    :rtype: int
+    """
+    try:
+        with open(PROC_STATUS_FILE, "r") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    # e.g. "VmRSS:     12345 kB"
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
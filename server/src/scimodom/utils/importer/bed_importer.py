@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
+from collections import Counter
 import logging
+import math
 import re
 from typing import TextIO, Optional, Generator, Generic, TypeVar
 
@@ -10,7 +12,7 @@ from scimodom.utils.dtos.bedtools import (
     EufRecord,
     Bed6Record,
 )
-from scimodom.utils.specs.enums import Strand, ImportLimits
+from scimodom.utils.specs.enums import ImportErrorClass, ImportLimits, Strand
 
 logger = logging.getLogger(__name__)
 
@@ -28,25 +30,38 @@ class BedImportTooManyErrors(Exception):
         self.error_summary = error_summary
 
 
+class BedImportFieldCountError(ValueError):
+    """Exception for handling lines with too few fields."""
+
+    pass
+
+
 class AbstractBedImporter(Generic[RECORD_TYPE], ABC):
     """Abstract base class to read BED-formatted files."""
 
     BED_HEADER_REGEXP = re.compile(r"\A#\s*([a-zA-Z_]+)\s*=\s*(.*?)\s*\Z")
     MAX_ERRORS_TO_REPORT = 5
+    # One-sided z-score used for early abort, i.e. a file that is
+    # below the error rate limit is rejected with a probability
+    # of about 3e-5, assuming errors are spread evenly.
+    EARLY_ABORT_Z_SCORE = 4.0
 
     def __init__(
         self,
         stream: TextIO,
         source: str = "input stream",
         max_error_rate: Optional[float] = ImportLimits.BED.max,
+        early_abort_min_records: Optional[int] = None,
     ):
         self._headers: dict[str, str] = {}
         self._error_count = 0
         self._record_count = 0
         self._error_text = ""
+        self._error_counts: Counter[ImportErrorClass] = Counter()
 
         self._source = source
         self._max_error_rate = max_error_rate
+        self._early_abort_min_records = early_abort_min_records
 
         self._reader = TextFileReader(stream=stream, source=source)
         self._line_iterator = self._reader.read_lines()
@@ -69,21 +84,50 @@ class AbstractBedImporter(Generic[RECORD_TYPE], ABC):
         while record is not None:
             yield record
             record = self._get_next_record()
+        self._check_error_rate()
 
-        if (
-            self._max_error_rate is not None
-            and self._error_count > self._record_count * self._max_error_rate
-        ):
-            msg = (
-                f"Found too many errors in {self._source} "
-                f"(valid: {self._record_count}, errors: {self._error_count})"
-            )
-            logger.error(msg)
-            raise BedImportTooManyErrors(msg, self.get_error_summary())
-        if self._record_count == 0:
-            msg = f"Did not find any records in '{self._source}'"
-            logger.error(msg)
-            raise BedImportEmptyFile(msg)
+    def get_parsed_count(self) -> int:
+        """Return the number of records parsed so far,
+        including invalid records.
+
+        :returns: Number of records
+        :rtype: int
+        """
+        return self._record_count + self._error_count
+
+    def prescan(self, max_records: int, early_abort_flag: bool = False) -> None:
+        """Parse up to max_records records and check the error rate.
+
+        If the input is exhausted, the error rate is checked as
+        by :meth:`parse`. Otherwise, the file is only rejected if
+        early_abort_flag is set, and the records seen so far fail
+        the check in :meth:`_check_early_abort`. This check assumes
+        that errors are spread evenly: a file with errors clustered
+        at the beginning may be rejected, although it would pass a
+        full parse. The stream is not rewound.
+
+        :param max_records: Maximum number of records to parse
+        :type max_records: int
+        :param early_abort_flag: If true, check the records seen
+        so far as a sample. Default is False.
+        :type early_abort_flag: bool
+        :raises BedImportTooManyErrors: If the error rate is exceeded
+        :raises BedImportEmptyFile: If the input has no records
+        """
+        for record_count, _ in enumerate(self.parse(), start=1):
+            if record_count >= max_records:
+                if early_abort_flag:
+                    self._check_early_abort(min_records=0)
+                return
+
+    def get_error_counts(self) -> dict[ImportErrorClass, int]:
+        """Return the number of errors found so far
+        for each class of errors.
+
+        :returns: Number of errors by class
+        :rtype: dict[ImportErrorClass, int]
+        """
+        return dict(self._error_counts)
 
     def get_error_summary(self) -> str:
         if self._error_count == 0:
@@ -96,15 +140,68 @@ class AbstractBedImporter(Generic[RECORD_TYPE], ABC):
             ({self._error_count} errors in total)
             """
 
-    def report_error(self, message: str):
+    def report_error(
+        self,
+        message: str,
+        line_number: Optional[int] = None,
+        error_class: ImportErrorClass = ImportErrorClass.OTHER,
+    ):
         try:
-            self._reader.report_error(message)
+            self._reader.report_error(message, line_number)
         except TextFileReaderError as err:
-            self._error_count += 1
             self._record_count -= 1
-            if self._error_count <= self.MAX_ERRORS_TO_REPORT:
-                self._error_text += str(err).strip() + "\n"
-            logger.warning(str(err))
+            self._register_error(err, error_class)
+
+    def _check_error_rate(self):
+        if (
+            self._max_error_rate is not None
+            and self._error_count > self._record_count * self._max_error_rate
+        ):
+            self._raise_too_many_errors()
+        if self._record_count == 0:
+            msg = f"Did not find any records in '{self._source}'"
+            logger.error(msg)
+            raise BedImportEmptyFile(msg)
+
+    def _check_early_abort(self, min_records: Optional[int] = None):
+        """Raise if the error rate is exceeded with high confidence.
+
+        The final check in :meth:`_check_error_rate` fails if the
+        fraction of errors among all parsed lines is larger than
+        r / (1 + r), where r is the maximum error rate. Once at
+        least min_records lines are parsed, we abort if the lower
+        bound of the Wilson score interval for this fraction is
+        above the limit.
+
+        The Wilson score interval assumes that lines are a random
+        sample of the file, i.e. that errors are spread evenly. If
+        errors are clustered, e.g. at the beginning of the file,
+        a file that passes the final check may be rejected. Early
+        abort is thus only done if early_abort_min_records is given.
+        """
+        if self._max_error_rate is None:
+            return
+        if min_records is None:
+            min_records = self._early_abort_min_records
+        total_count = self._record_count + self._error_count
+        if min_records is None or total_count < min_records or total_count == 0:
+            return
+        limit = self._max_error_rate / (1 + self._max_error_rate)
+        if (
+            get_wilson_lower_bound(
+                self._error_count, total_count, self.EARLY_ABORT_Z_SCORE
+            )
+            > limit
+        ):
+            self._raise_too_many_errors(f", aborted after {total_count} records")
+
+    def _raise_too_many_errors(self, detail: str = ""):
+        msg = (
+            f"Found too many errors in {self._source} "
+            f"(valid: {self._record_count}, errors: {self._error_count}{detail})"
+        )
+        logger.error(msg)
+        raise BedImportTooManyErrors(msg, self.get_error_summary())
 
     def _get_next_record(self):
         try:
@@ -130,28 +227,65 @@ class AbstractBedImporter(Generic[RECORD_TYPE], ABC):
                 if key not in self._headers:
                     self._headers[key] = match.group(2)
 
-    def _get_record_from_line(self, line):
+    def _get_record_from_line(self, line, line_number=None):
         try:
             try:
                 fields = [x.strip() for x in line.split("\t")]
                 record = self.get_record_from_fields(fields)
                 return record
             except ValidationError as err:
-                self._reader.report_error_pydantic_error(err)
+                error_class = ImportErrorClass.INVALID_VALUE
+                self._reader.report_error_pydantic_error(err, line_number)
+            except BedImportFieldCountError as err:
+                error_class = ImportErrorClass.FIELD_COUNT
+                self._reader.report_error(str(err), line_number)
             except ValueError as err:
-                self._reader.report_error(str(err))
+                error_class = ImportErrorClass.INVALID_VALUE
+                self._reader.report_error(str(err), line_number)
         except TextFileReaderError as err:
-            self._error_count += 1
-            if self._error_count <= self.MAX_ERRORS_TO_REPORT:
-                self._error_text += str(err).strip() + "\n"
-            logger.warning(str(err))
+            self._register_error(err, error_class)
         return None
 
+    def _register_error(
+        self,
+        err: TextFileReaderError,
+        error_class: ImportErrorClass = ImportErrorClass.OTHER,
+    ) -> None:
+        self._error_count += 1
+        self._error_counts[error_class] += 1
+        if self._error_count <= self.MAX_ERRORS_TO_REPORT:
+            self._error_text += str(err).strip() + "\n"
+        logger.warning(str(err))
+        if self._early_abort_min_records is not None:
+            self._check_early_abort()
+
+
+def get_wilson_lower_bound(successes: int, trials: int, z_score: float) -> float:
+    """Return the lower bound of the Wilson score interval
+    for a binomial proportion.
+
+    :param successes: Number of successes
+    :type successes: int
+    :param trials: Number of trials
+    :type trials: int
+    :param z_score: Z-score of the confidence level
+    :type z_score: float
+    :returns: Lower bound
+    :rtype: float
+    """
+    if trials == 0:
+        return 0.0
+    p = successes / trials
+    z2 = z_score * z_score
+    centre = p + z2 / (2 * trials)
+    margin = z_score * math.sqrt(p * (1 - p) / trials + z2 / (4 * trials * trials))
+    return (centre - margin) / (1 + z2 / trials)
+
 
 class Bed6Importer(AbstractBedImporter[Bed6Record]):
     def get_record_from_fields(self, fields):
         if len(fields) < 6:
-            self._reader.report_error(f"Expected 6 fields, but got {len(fields)}")
+            raise BedImportFieldCountError(f"Expected 6 fields, but got {len(fields)}")
         return Bed6Record(
             chrom=fields[0],
             start=fields[1],
@@ -165,7 +299,7 @@ class Bed6Importer(AbstractBedImporter[Bed6Record]):
 class EufImporter(AbstractBedImporter[EufRecord]):
     def get_record_from_fields(self, fields):
         if len(fields) < 11:
-            self._reader.report_error(f"Expected 11 fields, but got {len(fields)}")
+            raise BedImportFieldCountError(f"Expected 11 fields, but got {len(fields)}")
         return EufRecord(
             chrom=fields[0],
             start=fields[1],
@@ -0,0 +1,512 @@
+from typing import Callable, Generator, Optional, TextIO
+
+import numpy as np
+import pandas as pd  # type: ignore # import-untyped
+
+from scimodom.utils.dtos.bedtools import EufRecord
+from scimodom.utils.importer.bed_importer import EufImporter
+from scimodom.utils.importer.text_file_reader import TextFileReaderError
+from scimodom.utils.specs.enums import ImportErrorClass, ImportLimits, Strand
+
+EUF_COLUMNS = [
+    "chrom",
+    "start",
+    "end",
+    "name",
+    "score",
+    "strand",
+    "thick_start",
+    "thick_end",
+    "item_rgb",
+    "coverage",
+    "frequency",
+]
+INT_COLUMNS = [
+    "start",
+    "end",
+    "score",
+    "thick_start",
+    "thick_end",
+    "coverage",
+    "frequency",
+]
+STR_COLUMNS = ["chrom", "name", "strand", "item_rgb"]
+STRANDS = {strand.value: strand for strand in Strand}
+INT64_MAX = np.iinfo(np.int64).max
+
+# Blocks are parsed as bytes, see _BlockFields. Fields are read
+# WORD_SIZE bytes at a time, as little-endian unsigned integers.
+WORD_SIZE = 8
+MAX_INT_DIGITS = 18
+# blocks are padded with "0" in front, so that integer fields can be
+# read right-aligned, and with null bytes at the end
+BLOCK_PADDING = b"0" * 24
+WORD_PADDING = b"\0" * WORD_SIZE
+TAB, NEWLINE, CARRIAGE_RETURN, HASH = (ord(c) for c in "\t\n\r#")
+# masks keeping the lowest (first), or highest (last) n bytes of a word
+LOW_BYTE_MASKS = np.array(
+    [(1 << (8 * n)) - 1 for n in range(WORD_SIZE + 1)], dtype=np.uint64
+)
+HIGH_BYTE_MASKS = ~LOW_BYTE_MASKS[::-1]
+ZERO_DIGITS = np.uint64(int.from_bytes(b"0" * WORD_SIZE, "little"))
+# separators of simple lines, w/o and with carriage return
+SIMPLE_LINE_SEPARATORS = [
+    np.array([TAB] * (len(EUF_COLUMNS) - 1) + line_end, dtype=np.uint8)
+    for line_end in ([NEWLINE], [CARRIAGE_RETURN, NEWLINE])
+]
+STRAND_CATEGORIES = list(STRANDS)
+STRAND_BYTE_CODES = np.full(256, -1, dtype=np.int8)
+STRAND_BYTE_CODES[[ord(strand) for strand in STRAND_CATEGORIES]] = np.arange(
+    len(STRAND_CATEGORIES)
+)
+
+
+class EufColumnarImporter(EufImporter):
+    """Read bedRMod files in chunks, and validate
+    records column-wise.
+
+    Records are read in blocks of lines, which are
+    parsed into data frames with vectorized operations
+    on the bytes of each block, see :class:`_BlockFields`.
+    Valid records are then identified using vectorized
+    checks that mirror the constraints of :class:`EufRecord`.
+    Lines that do not pass these checks, or that cannot be
+    parsed this way, e.g. with spaces around fields, are
+    parsed one at a time as done by :class:`EufImporter`,
+    i.e. errors are reported with the same messages, and
+    error rate limits apply in the same way.
+
+    Data frames have one column per :class:`EufRecord`
+    field, where strand values are kept as strings, and a
+    "line" column holding the line number of each record.
+
+    :param stream: Input stream
+    :type stream: TextIO
+    :param source: Source name used for reporting
+    :type source: str
+    :param max_error_rate: Maximum error rate, or None
+    :type max_error_rate: float | None
+    :param early_abort_min_records: Minimum number of records parsed
+    before aborting early, or None to parse the whole input
+    :type early_abort_min_records: int | None
+    :param chunk_size: Approximate number of characters read at once
+    :type chunk_size: int
+    """
+
+    DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+    def __init__(
+        self,
+        stream: TextIO,
+        source: str = "input stream",
+        max_error_rate: Optional[float] = ImportLimits.BED.max,
+        early_abort_min_records: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self._chunk_size = chunk_size
+        self._record_line_number: Optional[int] = None
+        super().__init__(
+            stream,
+            source=source,
+            max_error_rate=max_error_rate,
+            early_abort_min_records=early_abort_min_records,
+        )
+
+    def parse(self) -> Generator[EufRecord, None, None]:
+        for chunk in self.parse_chunks():
+            for line_number, *values in zip(
+                *(chunk[c].tolist() for c in ["line", *EUF_COLUMNS])
+            ):
+                self._record_line_number = line_number
+                record = dict(zip(EUF_COLUMNS, values))
+                record["strand"] = STRANDS[record["strand"]]
+                yield EufRecord(**record)
+        self._record_line_number = None
+
+    def parse_chunks(self) -> Generator[pd.DataFrame, None, None]:
+        """Parse records by chunks.
+
+        :returns: Data frames of valid records
+        :rtype: Generator[pd.DataFrame, None, None]
+        """
+        if self._next_record is not None:
+            yield self._get_frame_from_records(
+                [self._next_record], [self._reader.line_number]
+            )
+            for first_line_number, block in self._reader.read_blocks(self._chunk_size):
+                chunk = self._get_frame_from_block(first_line_number, block)
+                if len(chunk) > 0:
+                    yield chunk
+        self._check_error_rate()
+
+    def report_error(
+        self,
+        message: str,
+        line_number: Optional[int] = None,
+        error_class: ImportErrorClass = ImportErrorClass.OTHER,
+    ):
+        if line_number is None:
+            line_number = self._record_line_number
+        super().report_error(message, line_number, error_class)
+
+    def _get_frame_from_block(self, first_line_number: int, block: str):
+        block_fields = _BlockFields(block)
+        frame, is_parsed = block_fields.get_frame(first_line_number)
+        is_valid = is_parsed & self._get_valid_mask(frame)
+        # lines are in order, errors are reported in line order
+        lines_to_check = [
+            (first_line_number + idx, line)
+            for idx, line in block_fields.get_lines_to_check(is_valid)
+        ]
+        if is_valid.all() and not lines_to_check:
+            self._record_count += len(frame)
+            return frame
+        frame = frame[is_valid]
+        self._record_count += len(frame)
+        records, line_numbers = self._get_checked_records(lines_to_check)
+        if not records:
+            return frame.reset_index(drop=True)
+        checked_frame = self._get_frame_from_records(records, line_numbers)
+        frame = pd.concat([frame, checked_frame], ignore_index=True)
+        frame = frame.astype({c: "category" for c in STR_COLUMNS})
+        return frame.sort_values("line", kind="stable", ignore_index=True)
+
+    def _get_checked_records(
+        self, lines: list[tuple[int, str]]
+    ) -> tuple[list[EufRecord], list[int]]:
+        # errors are reported in line order
+        records = []
+        line_numbers = []
+        for line_number, line in lines:
+            record = self._get_record_from_line(line, line_number)
+            if record is None:
+                continue
+            if any(getattr(record, c) > INT64_MAX for c in INT_COLUMNS):
+                try:
+                    self._reader.report_error("Value out of range", line_number)
+                except TextFileReaderError as err:
+                    self._register_error(err, ImportErrorClass.OUT_OF_RANGE)
+                continue
+            self._record_count += 1
+            records.append(record)
+            line_numbers.append(line_number)
+        return records, line_numbers
+
+    @staticmethod
+    def _get_valid_mask(frame: pd.DataFrame) -> np.ndarray:
+        start = frame["start"].to_numpy()
+        end = frame["end"].to_numpy()
+        thick_start = frame["thick_start"].to_numpy()
+        thick_end = frame["thick_end"].to_numpy()
+        score = frame["score"].to_numpy()
+        frequency = frame["frequency"].to_numpy()
+        return (
+            _get_category_mask(frame["chrom"], _has_valid_length)
+            & _get_category_mask(frame["name"], _has_valid_length)
+            & _get_category_mask(frame["strand"], lambda c: c in STRANDS)
+            & (start >= 0)
+            & (end > start)
+            & (thick_start >= 0)
+            & (thick_end > thick_start)
+            & (score >= 0)
+            & (score <= 1000)
+            & (frame["coverage"].to_numpy() >= 0)
+            & (frequency > 0)
+            & (frequency <= 100)
+        )
+
+    @staticmethod
+    def _get_frame_from_records(
+        records: list[EufRecord], line_numbers: list[int]
+    ) -> pd.DataFrame:
+        frame = pd.DataFrame(
+            {
+                "line": np.array(line_numbers, dtype=np.int64),
+                **{
+                    c: np.array(
+                        [getattr(record, c) for record in records], dtype=np.int64
+                    )
+                    for c in INT_COLUMNS
+                },
+                **{
+                    c: np.array(
+                        [getattr(record, c) for record in records], dtype=object
+                    )
+                    for c in STR_COLUMNS
+                    if c != "strand"
+                },
+                "strand": np.array(
+                    [record.strand.value for record in records], dtype=object
+                ),
+            }
+        )
+        return frame[["line", *EUF_COLUMNS]].astype(
+            {c: "category" for c in STR_COLUMNS}
+        )
+
+
+def _get_category_mask(
+    values: pd.Series, is_valid: Callable[[str], bool]
+) -> np.ndarray:
+    # values are checked once per category
+    mask = np.array([is_valid(c) for c in values.cat.categories], dtype=bool)
+    return mask[values.cat.codes.to_numpy()]
+
+
+def _has_valid_length(value: str) -> bool:
+    return 1 <= len(value) <= 128
+
+
+class _BlockFields:
+    """Locate and parse the fields of a block of lines.
+
+    Lines are simple if they have exactly 11 tab-separated fields,
+    only printable ASCII characters, and no spaces, except for a
+    carriage return before the newline, and if they do not start
+    with "#". Fields of simple lines are parsed from the UTF-8
+    encoded block with vectorized operations: integers are read
+    as words of WORD_SIZE bytes, and converted 8 digits at a time,
+    and strings are encoded word by word. Other lines must be
+    parsed one at a time, see :meth:`get_lines_to_check`.
+
+    :param block: Block of complete lines
+    :type block: str
+    """
+
+    def __init__(self, block: str):
+        data = block.encode()
+        if not data.endswith(b"\n"):
+            data += b"\n"
+        self._bytes = BLOCK_PADDING + data + WORD_PADDING
+        self._buffer = np.frombuffer(self._bytes, dtype=np.uint8)
+        # words starting at each byte, i.e. overlapping, unaligned
+        self._words = np.ndarray(
+            shape=(len(self._buffer) - WORD_SIZE + 1,),
+            dtype="<u8",
+            buffer=self._buffer,
+            strides=(1,),
+        )
+        self._split(len(data), block.isascii())
+
+    def get_frame(self, first_line_number: int) -> tuple[pd.DataFrame, np.ndarray]:
+        """Return the fields of simple lines as data frame
+        with one column per :class:`EufRecord` field, and a "line"
+        column. Integer fields that are not made of 1 to MAX_INT_DIGITS
+        digits, and strands other than STRAND_CATEGORIES, are not parsed.
+
+        :param first_line_number: Number of the first line of the block
+        :type first_line_number: int
+        :returns: Data frame, and mask of the rows that were parsed
+        :rtype: tuple[pd.DataFrame, np.ndarray]
+        """
+        columns = {"line": self.get_line_indices(is_simple=True) + first_line_number}
+        is_parsed = np.ones(len(self._line_ends), dtype=bool)
+        for column, name in enumerate(EUF_COLUMNS):
+            if name in INT_COLUMNS:
+                columns[name], is_int = self._get_ints(column)
+                is_parsed &= is_int
+            elif name == "strand":
+                columns[name] = self._get_strands(column)
+                is_parsed &= columns[name].codes >= 0
+            else:
+                columns[name] = self._get_strings(column)
+        return pd.DataFrame(columns), is_parsed
+
+    def get_line_indices(self, is_simple: bool = True) -> np.ndarray:
+        """Return the indices of simple lines, or of other lines.
+
+        :param is_simple: Simple or other lines
+        :type is_simple: bool
+        :returns: Line indices, from 0
+        :rtype: np.ndarray
+        """
+        return np.flatnonzero(self._is_simple == is_simple)
+
+    def get_lines_to_check(self, is_valid: np.ndarray) -> list[tuple[int, str]]:
+        """Return lines that must be parsed one at a time, i.e.
+        other lines that are neither blank nor comments, and simple
+        lines that are not valid, in order.
+
+        :param is_valid: Mask of valid rows, see :meth:`get_frame`
+        :type is_valid: np.ndarray
+        :returns: Line indices, from 0, and stripped lines
+        :rtype: list[tuple[int, str]]
+        """
+        simple_indices = self.get_line_indices(is_simple=True)[~is_valid]
+        other_indices = self.get_line_indices(is_simple=False)
+        lines = []
+        for idx in np.sort(np.concatenate([simple_indices, other_indices])).tolist():
+            start, end = self._line_starts[idx], self._newlines[idx]
+            line = self._bytes[start:end].decode().strip()
+            if line == "" or line.startswith("#"):
+                continue
+            lines.append((idx, line))
+        return lines
+
+    def _split(self, size: int, is_ascii: bool) -> None:
+        buffer = self._buffer
+        offset = len(BLOCK_PADDING)
+        data = buffer[offset : offset + size]
+        # tabs, newlines, and all other characters that prevent a
+        # line from being simple, non-ASCII characters are counted
+        # as bytes, but field lengths are checked as characters
+        is_separator = data <= 32
+        if not is_ascii:
+            is_separator |= data >= 128
+        positions = np.flatnonzero(is_separator) + offset
+        kinds = buffer[positions]
+        for template in SIMPLE_LINE_SEPARATORS:
+            # all lines are simple, except comments
+            if len(kinds) % len(template) == 0 and np.array_equal(
+                kinds.reshape(-1, len(template)),
+                np.broadcast_to(template, (len(kinds) // len(template), len(template))),
+            ):
+                separators = positions.reshape(-1, len(template))
+                newlines = separators[:, -1]
+                line_starts = np.concatenate([[offset], newlines[:-1] + 1])
+                is_simple = buffer[line_starts] != HASH
+                if not is_simple.all():
+                    separators = separators[is_simple]
+                # tabs by column, i.e. contiguous for each field
+                self._tabs = np.ascontiguousarray(
+                    separators[:, : len(EUF_COLUMNS) - 1].T
+                )
+                self._line_ends = separators[:, len(EUF_COLUMNS) - 1]
+                break
+        else:
+            is_newline = kinds == NEWLINE
+            is_tab = kinds == TAB
+            is_line_end = is_newline.copy()
+            is_line_end[:-1] |= (
+                (kinds[:-1] == CARRIAGE_RETURN)
+                & is_newline[1:]
+                & (positions[1:] == positions[:-1] + 1)
+            )
+            newlines = positions[is_newline]
+            line_starts = np.concatenate([[offset], newlines[:-1] + 1])
+            line_indices = np.cumsum(is_newline) - is_newline
+            tab_counts = np.bincount(line_indices[is_tab], minlength=len(newlines))
+            other_counts = np.bincount(
+                line_indices[~is_tab & ~is_line_end], minlength=len(newlines)
+            )
+            is_simple = (
+                (tab_counts == len(EUF_COLUMNS) - 1)
+                & (other_counts == 0)
+                & (buffer[line_starts] != HASH)
+            )
+            first_tabs = (np.cumsum(tab_counts) - tab_counts)[is_simple]
+            self._tabs = positions[is_tab][
+                np.arange(len(EUF_COLUMNS) - 1)[:, np.newaxis] + first_tabs
+            ]
+            self._line_ends = newlines[is_simple] - (
+                buffer[newlines[is_simple] - 1] == CARRIAGE_RETURN
+            )
+        self._line_starts = line_starts
+        self._newlines = newlines
+        self._is_simple = is_simple
+
+    def _get_bounds(self, column: int) -> tuple[np.ndarray, np.ndarray]:
+        # start (inclusive) and end (exclusive) of a field of simple lines
+        if column == 0:
+            starts = self._line_starts[self._is_simple]
+        else:
+            starts = self._tabs[column - 1] + 1
+        if column == len(EUF_COLUMNS) - 1:
+            return starts, self._line_ends
+        return starts, self._tabs[column]
+
+    def _get_ints(self, column: int) -> tuple[np.ndarray, np.ndarray]:
+        # words ending at the end of the field, from the first, are
+        # masked to the field, and converted to 8 digits at a time
+        starts, ends = self._get_bounds(column)
+        lengths = ends - starts
+        min_length = int(lengths.min(initial=1))
+        max_length = int(lengths.max(initial=0))
+        is_parsed = np.ones(len(ends), dtype=bool)
+        if min_length < 1 or max_length > MAX_INT_DIGITS:
+            is_parsed = (lengths >= 1) & (lengths <= MAX_INT_DIGITS)
+            lengths = np.minimum(lengths, MAX_INT_DIGITS + 1)
+            max_length = min(max_length, MAX_INT_DIGITS)
+        values = np.zeros(len(ends), dtype=np.uint64)
+        errors = np.zeros(len(ends), dtype=np.uint64)
+        word_count = -(-max_length // WORD_SIZE)
+        words = self._get_words(ends, word_count)
+        for word, digits in zip(reversed(range(word_count)), words):
+            if min_length >= WORD_SIZE * (word + 1):
+                digits -= ZERO_DIGITS
+            else:
+                keep = _get_word_masks(HIGH_BYTE_MASKS, word, lengths)
+                digits &= keep
+                digits -= ZERO_DIGITS & keep
+            # bytes that are not digits are above 9, or wrap around
+            errors |= (digits + np.uint64(0x7676767676767676)) | digits
+            values *= np.uint64(10**WORD_SIZE)
+            values += _get_digit_values(digits)
+        is_parsed &= (errors & np.uint64(0x8080808080808080)) == 0
+        # at most MAX_INT_DIGITS digits
+        return values.view(np.int64), is_parsed
+
+    def _get_words(self, ends: np.ndarray, count: int) -> np.ndarray:
+        # the last count words before each end, gathered at once,
+        # by word, from the first
+        words = np.ndarray(
+            shape=(len(self._buffer) - WORD_SIZE * count + 1,),
+            dtype=f"V{WORD_SIZE * count}",
+            buffer=self._buffer,
+            strides=(1,),
+        )[ends - WORD_SIZE * count]
+        return words.view("<u8").reshape(len(ends), count).T.copy()
+
+    def _get_strings(self, column: int) -> pd.Categorical:
+        # strings are encoded word by word, codes are in order of first
+        # occurrence, and categories are kept as words, padded with null
+        # bytes, which are not part of simple lines
+        starts, ends = self._get_bounds(column)
+        lengths = ends - starts
+        codes = np.zeros(len(starts), dtype=np.int64)
+        words = np.zeros((min(len(starts), 1), 0), dtype=np.uint64)
+        for word in range(-(-int(lengths.max(initial=0)) // WORD_SIZE)):
+            keep = _get_word_masks(LOW_BYTE_MASKS, word, lengths)
+            indices = np.minimum(starts + WORD_SIZE * word, len(self._words) - 1)
+            word_codes, uniques = pd.factorize(self._words[indices] & keep)
+            if word == 0:
+                codes, pairs = word_codes, np.arange(len(uniques))
+            else:
+                codes, pairs = pd.factorize(codes * len(uniques) + word_codes)
+            words = np.column_stack(
+                [words[pairs // len(uniques)], uniques[pairs % len(uniques)]]
+            )
+        if words.shape[1] == 0:
+            return pd.Categorical.from_codes(codes, categories=[""] * len(words))
+        categories = words.view(f"S{words.itemsize * words.shape[1]}").ravel()
+        return pd.Categorical.from_codes(
+            codes, categories=[c.decode() for c in categories.tolist()]
+        )
+
+    def _get_strands(self, column: int) -> pd.Categorical:
+        starts, ends = self._get_bounds(column)
+        codes = STRAND_BYTE_CODES[self._buffer[starts]]
+        codes[ends - starts != 1] = -1
+        return pd.Categorical.from_codes(codes, categories=STRAND_CATEGORIES)
+
+
+def _get_word_masks(
+    byte_masks: np.ndarray, word: int, lengths: np.ndarray
+) -> np.ndarray:
+    # masks of the bytes of a word that are part of fields
+    # with the given lengths, see LOW_BYTE_MASKS
+    byte_counts = np.arange(int(lengths.max(initial=0)) + 1) - WORD_SIZE * word
+    return byte_masks[np.clip(byte_counts, 0, WORD_SIZE)][lengths]
+
+
+def _get_digit_values(words: np.ndarray) -> np.ndarray:
+    # combine digit values (0 - 9) pairwise: 2, 4, then 8
+    # digits, the first digit is the lowest byte
+    words = (words * np.uint64(10 * 2**8 + 1)) >> np.uint64(8)
+    words = (
+        (words & np.uint64(0x00FF00FF00FF00FF)) * np.uint64(100 * 2**16 + 1)
+    ) >> np.uint64(16)
+    words = (
+        (words & np.uint64(0x0000FFFF0000FFFF)) * np.uint64(10000 * 2**32 + 1)
+    ) >> np.uint64(32)
+    return words
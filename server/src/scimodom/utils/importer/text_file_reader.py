@@ -1,7 +1,13 @@
+import gzip
+from pathlib import Path
 from typing import TextIO, Generator
 
 from pydantic import ValidationError
 
+# gzip and bgzip files share the same magic bytes;
+# bgzip files are gzip files with several members.
+GZIP_MAGIC_BYTES = b"\x1f\x8b"
+
 
 class TextFileReaderError(Exception):
     """Exception for handling general text file reader errors."""
@@ -9,6 +15,33 @@ class TextFileReaderError(Exception):
     pass
 
 
+def is_gzip_file(path: str | Path) -> bool:
+    """Check if a file is gzip (or bgzip) compressed.
+
+    :param path: File path
+    :type path: str | Path
+    :return: True if the file starts with the gzip magic bytes.
+    :rtype: bool
+    """
+    with open(path, "rb") as fh:
+        return fh.read(len(GZIP_MAGIC_BYTES)) == GZIP_MAGIC_BYTES
+
+
+def open_text_file(path: str | Path) -> TextIO:
+    """Open a text file for reading, which may be gzip
+    (or bgzip) compressed. Compressed files are detected
+    by their magic bytes, and decompressed while reading.
+
+    :param path: File path
+    :type path: str | Path
+    :return: Opened file handle for reading
+    :rtype: TextIO
+    """
+    if is_gzip_file(path):
+        return gzip.open(path, "rt")
+    return open(path)
+
+
 class TextFileReader:
     """Provide a text file reader."""
 
@@ -21,6 +54,11 @@ class TextFileReader:
         self._source = source
         self._line_number = 0
 
+    @property
+    def line_number(self) -> int:
+        """Number of the last line read."""
+        return self._line_number
+
     def read_lines(self) -> Generator[str, None, None]:
         """Read lines.
 
@@ -32,24 +70,62 @@ class TextFileReader:
             stripped_line = line.strip()
             yield stripped_line
 
-    def report_error(self, message: str) -> None:
+    def read_blocks(self, size: int) -> Generator[tuple[int, str], None, None]:
+        """Read blocks of complete lines.
+
+        Lines are not stripped. This can be used after
+        :meth:`read_lines`, lines are then counted from
+        where the latter stopped.
+
+        :param size: Approximate number of characters per block.
+        :type size: int
+        :return: Number of the first line of each block, and block.
+        :rtype: Generator
+        """
+        remainder = ""
+        while True:
+            chunk = self._stream.read(size)
+            if not chunk:
+                break
+            chunk = remainder + chunk
+            end = chunk.rfind("\n") + 1
+            if end == 0:
+                remainder = chunk
+                continue
+            block, remainder = chunk[:end], chunk[end:]
+            first_line_number = self._line_number + 1
+            self._line_number += block.count("\n")
+            yield first_line_number, block
+        if remainder != "":
+            self._line_number += 1
+            yield self._line_number, remainder
+
+    def report_error(self, message: str, line_number: int | None = None) -> None:
         """Report reading error.
 
         :param message: Error message.
         :type message: str
+        :param line_number: Line number to report. If None,
+        the last line read is reported.
+        :type line_number: int | None
         :raises TextFileReaderError: If failed to read stream.
         """
-        raise TextFileReaderError(
-            f"{self._source}, line {self._line_number}: {message}"
-        )
+        if line_number is None:
+            line_number = self._line_number
+        raise TextFileReaderError(f"{self._source}, line {line_number}: {message}")
 
-    def report_error_pydantic_error(self, error: ValidationError) -> None:
+    def report_error_pydantic_error(
+        self, error: ValidationError, line_number: int | None = None
+    ) -> None:
         """Report validation error.
 
         :param error: Pydantic validation error
         :type error: ValidationError
+        :param line_number: Line number to report. If None,
+        the last line read is reported.
+        :type line_number: int | None
         """
         message = "; ".join(
             [f"{'/'.join(list(e['loc']))}: {e['msg']}" for e in error.errors()]  # type: ignore
         )
-        self.report_error(message)
+        self.report_error(message, line_number)
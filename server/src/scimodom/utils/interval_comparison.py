@@ -0,0 +1,385 @@
+from typing import Iterable, NamedTuple, Sequence
+
+import numpy as np
+
+from scimodom.utils.specs.enums import Strand
+
+STRAND_CODES = {Strand.UNDEFINED: 0, Strand.FORWARD: 1, Strand.REVERSE: 2}
+UNDEFINED_STRAND = STRAND_CODES[Strand.UNDEFINED]
+REVERSE_STRAND = STRAND_CODES[Strand.REVERSE]
+# partition keys and positions are packed into int64, see _pack
+POSITION_BITS = 32
+# B intervals are compared by length class, i.e. lengths in
+# [2**(k * LENGTH_CLASS_LOG2), 2**((k + 1) * LENGTH_CLASS_LOG2))
+LENGTH_CLASS_LOG2 = 2
+# maximum number of candidate overlaps expanded at once
+OVERLAP_BATCH_SIZE = 1 << 22
+
+
+class Intervals(NamedTuple):
+    """Coordinates of a set of BED intervals, in record order.
+
+    Chromosomes are given as codes, in the lexicographic order of
+    their names, see :func:`get_chrom_codes`, and strands as codes,
+    see STRAND_CODES. Chromosome codes must be shared by all
+    intervals that are compared.
+
+    :param chroms: Chromosome codes
+    :type chroms: np.ndarray
+    :param starts: Start positions
+    :type starts: np.ndarray
+    :param ends: End positions
+    :type ends: np.ndarray
+    :param strands: Strand codes
+    :type strands: np.ndarray
+    """
+
+    chroms: np.ndarray
+    starts: np.ndarray
+    ends: np.ndarray
+    strands: np.ndarray
+
+
+def get_chrom_codes(chroms: Iterable[str]) -> dict[str, int]:
+    """Return a code for each chromosome, in lexicographic
+    order, as for "bedtools sort".
+
+    :param chroms: Chromosomes
+    :type chroms: Iterable[str]
+    :returns: Code by chromosome
+    :rtype: dict[str, int]
+    """
+    return {chrom: code for code, chrom in enumerate(sorted(set(chroms)))}
+
+
+def get_sort_order(intervals: Intervals) -> np.ndarray:
+    """Return the order of intervals sorted by chrom,
+    then by start, as for "bedtools sort". The sort
+    is stable.
+
+    :param intervals: Intervals
+    :type intervals: Intervals
+    :returns: Positions in sort order
+    :rtype: np.ndarray
+    """
+    return np.argsort(
+        _pack(
+            np.asarray(intervals.chroms, dtype=np.int64),
+            np.asarray(intervals.starts, dtype=np.int64),
+        ),
+        kind="stable",
+    )
+
+
+def intersect(
+    a: Intervals, b_list: Sequence[Intervals], is_strand: bool
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Find all overlaps between intervals in A and
+    intervals in each B, as for "bedtools intersect -wa -wb
+    -sorted" with multiple B files. With is_strand, intervals
+    with undefined strand overlap nothing.
+
+    Overlaps are sorted by A (sort order, see :func:`get_sort_order`),
+    then by B file, then by B (sort order).
+
+    :param a: Intervals A
+    :type a: Intervals
+    :param b_list: Intervals B
+    :type b_list: Sequence[Intervals]
+    :param is_strand: Only report overlaps on the same strand
+    :type is_strand: bool
+    :returns: Positions in A, B file numbers, and positions in B
+    :rtype: tuple[np.ndarray, np.ndarray, np.ndarray]
+    """
+    a_order, a = _sort(a)
+    b = _PooledIntervals(b_list, is_strand)
+    a_hits, b_hits = b.overlap(a)
+    order = np.argsort(_pack(a_hits, b_hits), kind="stable")
+    return (
+        a_order[a_hits[order]],
+        b.files[b_hits[order]],
+        b.positions[b_hits[order]],
+    )
+
+
+def closest(
+    a: Intervals, b_list: Sequence[Intervals], is_strand: bool
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Find the closest non-overlapping intervals in all B
+    for each interval in A, with all ties, as for "bedtools
+    closest -io -t all -mdb all -D a -sorted".
+
+    Distances are reported with respect to A: intervals
+    upstream of A have negative distances, and book-ended
+    intervals are at distance 1. Intervals in A without any
+    interval in B on the same chromosome (and strand) are
+    not reported. Results are sorted as for :func:`intersect`.
+
+    :param a: Intervals A
+    :type a: Intervals
+    :param b_list: Intervals B
+    :type b_list: Sequence[Intervals]
+    :param is_strand: Only report intervals on the same strand
+    :type is_strand: bool
+    :returns: Positions in A, B file numbers, positions in B,
+    and distances
+    :rtype: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+    """
+    a_order, a = _sort(a)
+    b = _PooledIntervals(b_list, is_strand)
+    if len(b.starts) == 0:
+        return tuple(np.empty(0, dtype=np.int64) for _ in range(4))  # type: ignore
+    a_keys = _get_keys(a, is_strand)
+    is_valid = (
+        a.strands != UNDEFINED_STRAND if is_strand else np.ones(len(a_keys), bool)
+    )
+    # upstream (coordinates): last intervals ending at or before A
+    by_end = np.argsort(_pack(b.keys, b.ends), kind="stable")
+    packed_ends = _pack(b.keys[by_end], b.ends[by_end])
+    up_last = np.searchsorted(packed_ends, _pack(a_keys, a.starts), side="right") - 1
+    up_end = packed_ends[np.maximum(up_last, 0)]
+    has_up = is_valid & (up_last >= 0) & (up_end >> POSITION_BITS == a_keys)
+    up_first = np.searchsorted(packed_ends, up_end, side="left")
+    up_distance = a.starts - b.ends[by_end[np.maximum(up_last, 0)]] + 1
+    # downstream (coordinates): first intervals starting at or after A
+    by_start = np.argsort(_pack(b.keys, b.starts), kind="stable")
+    packed_starts = _pack(b.keys[by_start], b.starts[by_start])
+    down_first = np.searchsorted(packed_starts, _pack(a_keys, a.ends), side="left")
+    down_start = packed_starts[np.minimum(down_first, len(by_start) - 1)]
+    has_down = (
+        is_valid
+        & (down_first < len(by_start))
+        & (down_start >> POSITION_BITS == a_keys)
+    )
+    down_last = np.searchsorted(packed_starts, down_start, side="right")
+    down_distance = (
+        b.starts[by_start[np.minimum(down_first, len(by_start) - 1)]] - a.ends + 1
+    )
+    # closest on either side, or both for ties
+    use_up = has_up & (~has_down | (up_distance <= down_distance))
+    use_down = has_down & (~has_up | (down_distance <= up_distance))
+    is_reverse = a.strands == REVERSE_STRAND
+    a_hits = []
+    b_hits = []
+    distances = []
+    for use, first, last, sorted_b, distance, sign in [
+        (use_up, up_first, up_last + 1, by_end, up_distance, -1),
+        (use_down, down_first, down_last, by_start, down_distance, 1),
+    ]:
+        a_indices = np.flatnonzero(use)
+        queries, positions = _expand_ranges(first[use], last[use])
+        a_hits.append(a_indices[queries])
+        b_hits.append(sorted_b[positions])
+        signed_distance = np.where(is_reverse, -sign, sign) * distance
+        distances.append(signed_distance[a_indices][queries])
+    a_hit = np.concatenate(a_hits)
+    b_hit = np.concatenate(b_hits)
+    order = np.argsort(_pack(a_hit, b_hit), kind="stable")
+    return (
+        a_order[a_hit[order]],
+        b.files[b_hit[order]],
+        b.positions[b_hit[order]],
+        np.concatenate(distances)[order],
+    )
+
+
+def subtract(
+    a: Intervals, b_list: Sequence[Intervals], is_strand: bool
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Remove the parts of intervals in A that overlap any
+    interval in B, as for "bedtools subtract" with all B
+    files combined. Intervals in A may be split into several
+    fragments.
+
+    Fragments are sorted by A (sort order, see :func:`get_sort_order`),
+    then by position.
+
+    :param a: Intervals A
+    :type a: Intervals
+    :param b_list: Intervals B
+    :type b_list: Sequence[Intervals]
+    :param is_strand: Only subtract intervals on the same strand
+    :type is_strand: bool
+    :returns: Positions in A, with start and end positions
+    of each fragment
+    :rtype: tuple[np.ndarray, np.ndarray, np.ndarray]
+    """
+    a_order, a = _sort(a)
+    b = _PooledIntervals(b_list, is_strand)
+    a_hits, b_hits = b.overlap(a)
+    b_hit_starts = b.starts[b_hits]
+    b_hit_ends = b.ends[b_hits]
+    # intervals covered by a single interval are removed, and
+    # intervals that are not overlapped are kept as is
+    is_covered = (b_hit_starts <= a.starts[a_hits]) & (b_hit_ends >= a.ends[a_hits])
+    is_removed = np.zeros(len(a.starts), dtype=bool)
+    is_removed[a_hits[is_covered]] = True
+    is_overlapped = np.zeros(len(a.starts), dtype=bool)
+    is_overlapped[a_hits] = True
+    kept = np.flatnonzero(~is_overlapped)
+    # other intervals are split
+    is_split = ~is_removed[a_hits]
+    fragments: dict[int, list[tuple[int, int]]] = {}
+    for idx, b_start, b_end in zip(
+        a_hits[is_split].tolist(),
+        b_hit_starts[is_split].tolist(),
+        b_hit_ends[is_split].tolist(),
+    ):
+        fragments.setdefault(idx, []).append((b_start, b_end))
+    positions: list[int] = []
+    starts: list[int] = []
+    ends: list[int] = []
+    for idx, b_intervals in fragments.items():
+        start, end = int(a.starts[idx]), int(a.ends[idx])
+        for b_start, b_end in sorted(b_intervals):
+            if b_start > start:
+                positions.append(idx)
+                starts.append(start)
+                ends.append(b_start)
+            start = max(start, b_end)
+        if start < end:
+            positions.append(idx)
+            starts.append(start)
+            ends.append(end)
+    a_hit = np.concatenate([kept, np.asarray(positions, dtype=np.int64)])
+    a_starts = np.concatenate([a.starts[kept], np.asarray(starts, dtype=np.int64)])
+    a_ends = np.concatenate([a.ends[kept], np.asarray(ends, dtype=np.int64)])
+    order = np.argsort(_pack(a_hit, a_starts), kind="stable")
+    return a_order[a_hit[order]], a_starts[order], a_ends[order]
+
+
+class _PooledIntervals:
+    # intervals of all B, by file, then in sort order, i.e. in
+    # the order in which bedtools reports multiple files
+    def __init__(self, b_list: Sequence[Intervals], is_strand: bool):
+        orders = [get_sort_order(b) for b in b_list]
+        self.is_strand = is_strand
+        self.files = np.repeat(
+            np.arange(len(b_list), dtype=np.int64), [len(o) for o in orders]
+        )
+        self.positions = _concatenate(orders)
+        self.starts = _concatenate([b.starts[o] for b, o in zip(b_list, orders)])
+        self.ends = _concatenate([b.ends[o] for b, o in zip(b_list, orders)])
+        strands = _concatenate([b.strands[o] for b, o in zip(b_list, orders)])
+        self.keys = _get_keys(
+            Intervals(
+                _concatenate([b.chroms[o] for b, o in zip(b_list, orders)]),
+                self.starts,
+                self.ends,
+                strands,
+            ),
+            is_strand,
+        )
+        if is_strand:
+            # intervals with undefined strand are never compared
+            self.keys[strands == UNDEFINED_STRAND] = -1
+
+    def overlap(self, a: Intervals) -> tuple[np.ndarray, np.ndarray]:
+        # pairs of positions in A and in pooled B; B are compared by
+        # length class, so that the candidates of short intervals are
+        # not bounded by the length of long intervals, see _overlap_class
+        a_keys = _get_keys(a, self.is_strand)
+        is_valid = (
+            a.strands != UNDEFINED_STRAND
+            if self.is_strand
+            else np.ones(len(a_keys), dtype=bool)
+        )
+        length_classes = (
+            np.log2(np.maximum(self.ends - self.starts, 1)).astype(np.int64)
+            // LENGTH_CLASS_LOG2
+        )
+        a_hits = [np.empty(0, dtype=np.int64)]
+        b_hits = [np.empty(0, dtype=np.int64)]
+        for length_class in np.unique(length_classes).tolist():
+            a_hit, b_hit = self._overlap_class(
+                a, a_keys, is_valid, np.flatnonzero(length_classes == length_class)
+            )
+            a_hits.append(a_hit)
+            b_hits.append(b_hit)
+        return np.concatenate(a_hits), np.concatenate(b_hits)
+
+    def _overlap_class(
+        self, a: Intervals, a_keys: np.ndarray, is_valid: np.ndarray, b: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        # candidates start after (start - max_length) and before end
+        # of A, where max_length is the maximum length of B for each
+        # key; candidates are expanded in batches of queries, of at
+        # most OVERLAP_BATCH_SIZE (unless a single query has more)
+        by_start = b[np.argsort(_pack(self.keys[b], self.starts[b]), kind="stable")]
+        keys = self.keys[by_start]
+        packed_starts = _pack(keys, self.starts[by_start])
+        unique_keys, first = np.unique(keys, return_index=True)
+        max_lengths = np.maximum.reduceat(
+            self.ends[by_start] - self.starts[by_start], first
+        )
+        key_positions = np.minimum(
+            np.searchsorted(unique_keys, a_keys), len(unique_keys) - 1
+        )
+        has_key = is_valid & (unique_keys[key_positions] == a_keys)
+        lo = np.searchsorted(
+            packed_starts,
+            _pack(a_keys, np.maximum(a.starts - max_lengths[key_positions], -1)),
+            side="right",
+        )
+        hi = np.searchsorted(packed_starts, _pack(a_keys, a.ends), side="left")
+        hi = np.where(has_key, np.maximum(hi, lo), lo)
+        bounds = np.cumsum(hi - lo)
+        a_hits = [np.empty(0, dtype=np.int64)]
+        b_hits = [np.empty(0, dtype=np.int64)]
+        batch_start = 0
+        while batch_start < len(lo):
+            expanded = int(bounds[batch_start - 1]) if batch_start > 0 else 0
+            batch_end = max(
+                int(
+                    np.searchsorted(bounds, expanded + OVERLAP_BATCH_SIZE, side="right")
+                ),
+                batch_start + 1,
+            )
+            queries, candidates = _expand_ranges(
+                lo[batch_start:batch_end], hi[batch_start:batch_end]
+            )
+            queries += batch_start
+            b_hit = by_start[candidates]
+            is_overlap = self.ends[b_hit] > a.starts[queries]
+            a_hits.append(queries[is_overlap])
+            b_hits.append(b_hit[is_overlap])
+            batch_start = batch_end
+        return np.concatenate(a_hits), np.concatenate(b_hits)
+
+
+def _concatenate(arrays: Sequence[np.ndarray]) -> np.ndarray:
+    return np.concatenate(
+        [np.empty(0, dtype=np.int64), *[np.asarray(x, np.int64) for x in arrays]]
+    )
+
+
+def _get_keys(intervals: Intervals, is_strand: bool) -> np.ndarray:
+    # partition key, by chrom, and by strand
+    keys = np.asarray(intervals.chroms, dtype=np.int64) * len(STRAND_CODES)
+    if is_strand:
+        keys += np.asarray(intervals.strands, dtype=np.int64)
+    return keys
+
+
+def _pack(keys: np.ndarray, positions: np.ndarray) -> np.ndarray:
+    # sortable (key, position), for positions in [-1, 2**32 - 1)
+    return (keys << POSITION_BITS) + positions
+
+
+def _sort(intervals: Intervals) -> tuple[np.ndarray, Intervals]:
+    # intervals in sort order, queries are then found in (mostly)
+    # sorted order, and results are sorted by position in A
+    order = get_sort_order(intervals)
+    return order, Intervals(*[np.asarray(x, dtype=np.int64)[order] for x in intervals])
+
+
+def _expand_ranges(
+    first: np.ndarray, last: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    # all positions in [first, last) for each query
+    counts = np.maximum(last - first, 0)
+    queries = np.repeat(np.arange(len(first), dtype=np.int64), counts)
+    offsets = np.arange(counts.sum(), dtype=np.int64) - np.repeat(
+        np.cumsum(counts) - counts, counts
+    )
+    return queries, np.repeat(first, counts) + offsets
@@ -0,0 +1,369 @@
+import json
+from pathlib import Path
+from typing import Any, Sequence
+
+import numpy as np
+
+from scimodom.utils.specs.enums import Strand
+
+UNSTRANDED = ""
+INDEX_METADATA_FILE = "index.json"
+# maximum number of candidate overlaps expanded at once
+OVERLAP_BATCH_SIZE = 1 << 22
+INDEX_ARRAYS = [
+    "offsets",
+    "starts",
+    "ends",
+    "positions",
+    "max_lengths",
+    "name_codes",
+    "feature_codes",
+]
+
+
+class IntervalIndex:
+    """In-memory index of BED intervals for overlap queries.
+
+    Intervals are partitioned by chrom, strand, and feature, so
+    that e.g. exons are not bounded by the length of introns. For
+    each partition, starts and ends are kept in arrays sorted by
+    start, and overlaps are found with a binary search, using the
+    maximum interval length of the partition to bound the
+    candidates. Candidates are expanded in batches of at most
+    OVERLAP_BATCH_SIZE (unless a single query has more), to bound
+    memory. Intervals are half-open, as in BED.
+
+    Names and features are stored as codes into dictionaries. An
+    index can be saved as .npy arrays, and loaded memory-mapped,
+    see :meth:`save` and :meth:`load`.
+
+    :param chroms: Chromosomes
+    :type chroms: Sequence[str]
+    :param starts: Start positions
+    :type starts: Sequence[int]
+    :param ends: End positions
+    :type ends: Sequence[int]
+    :param strands: Strands, or None for an unstranded index
+    :type strands: Sequence[str] | None
+    :param names: Name (payload) of each interval, e.g. gene IDs
+    :type names: Sequence[str] | None
+    :param features: Feature of each interval, e.g. exon
+    :type features: Sequence[str] | None
+    """
+
+    def __init__(
+        self,
+        chroms: Sequence[str],
+        starts: Sequence[int],
+        ends: Sequence[int],
+        strands: Sequence[str] | None = None,
+        names: Sequence[str] | None = None,
+        features: Sequence[str] | None = None,
+    ):
+        partitions: dict[tuple[str, str, str], list[int]] = {}
+        for idx, chrom in enumerate(chroms):
+            strand = UNSTRANDED if strands is None else strands[idx]
+            feature = "" if features is None else features[idx]
+            partitions.setdefault((chrom, strand, feature), []).append(idx)
+        all_starts = np.asarray(starts, dtype=np.int64)
+        all_ends = np.asarray(ends, dtype=np.int64)
+        positions = [np.empty(0, dtype=np.int64)]
+        offsets = [0]
+        max_lengths = []
+        for indices in partitions.values():
+            partition = np.asarray(indices, dtype=np.int64)
+            partition = partition[np.argsort(all_starts[partition], kind="stable")]
+            positions.append(partition)
+            offsets.append(offsets[-1] + len(partition))
+            lengths = all_ends[partition] - all_starts[partition]
+            max_lengths.append(int(lengths.max(initial=0)))
+        sorted_positions = np.concatenate(positions)
+        coordinate_dtype = _get_coordinate_dtype(all_ends)
+        name_dictionary, name_codes = _encode(names, len(all_starts))
+        feature_dictionary, feature_codes = _encode(features, len(all_starts))
+        self._set_arrays(
+            metadata={
+                "is_stranded": strands is not None,
+                "partitions": [list(key) for key in partitions.keys()],
+                "names": name_dictionary,
+                "features": feature_dictionary,
+            },
+            arrays={
+                "offsets": np.asarray(offsets, dtype=np.int64),
+                "starts": all_starts[sorted_positions].astype(coordinate_dtype),
+                "ends": all_ends[sorted_positions].astype(coordinate_dtype),
+                "positions": sorted_positions,
+                "max_lengths": np.asarray(max_lengths, dtype=np.int64),
+                "name_codes": name_codes,
+                "feature_codes": feature_codes,
+            },
+        )
+
+    @classmethod
+    def from_bed(
+        cls, path: Path, stranded: bool = True, feature: str | None = None
+    ) -> "IntervalIndex":
+        """Read intervals from a BED file. If stranded,
+        the file must have at least 6 columns, and names
+        are read from the 7th column, if present, else
+        from the 4th column.
+
+        :param path: Path to BED file
+        :type path: Path
+        :param stranded: Index intervals by strand
+        :type stranded: bool
+        :param feature: Feature for all intervals
+        :type feature: str | None
+        :returns: Index
+        :rtype: IntervalIndex
+        """
+        return cls.from_beds([path], stranded, None if feature is None else [feature])
+
+    @classmethod
+    def from_beds(
+        cls,
+        paths: Sequence[Path],
+        stranded: bool = True,
+        features: Sequence[str] | None = None,
+    ) -> "IntervalIndex":
+        """Read intervals from BED files, see :meth:`from_bed`.
+        Intervals are indexed in file order.
+
+        :param paths: Path to BED files
+        :type paths: Sequence[Path]
+        :param stranded: Index intervals by strand
+        :type stranded: bool
+        :param features: Feature for intervals of each file
+        :type features: Sequence[str] | None
+        :returns: Index
+        :rtype: IntervalIndex
+        """
+        chroms: list[str] = []
+        starts: list[int] = []
+        ends: list[int] = []
+        strands: list[str] = []
+        names: list[str] = []
+        interval_features: list[str] = []
+        for idx, path in enumerate(paths):
+            with open(path, "r") as fh:
+                for line in fh:
+                    if not line.strip() or line.startswith(("#", "track", "browser")):
+                        continue
+                    fields = line.rstrip("\n").split("\t")
+                    chroms.append(fields[0])
+                    starts.append(int(fields[1]))
+                    ends.append(int(fields[2]))
+                    if stranded:
+                        strands.append(fields[5])
+                        names.append(fields[6] if len(fields) > 6 else fields[3])
+                    if features is not None:
+                        interval_features.append(features[idx])
+        return cls(
+            chroms,
+            starts,
+            ends,
+            strands=strands if stranded else None,
+            names=names if stranded else None,
+            features=interval_features if features is not None else None,
+        )
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> "IntervalIndex":
+        """Load an index saved with :meth:`save`. If mmap,
+        arrays are memory-mapped read-only, and thus shared
+        between processes through the page cache.
+
+        :param path: Index directory
+        :type path: Path
+        :param mmap: Memory-map arrays
+        :type mmap: bool
+        :returns: Index
+        :rtype: IntervalIndex
+        """
+        with open(Path(path, INDEX_METADATA_FILE), "r") as fh:
+            metadata = json.load(fh)
+        arrays = {
+            name: np.load(Path(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+            for name in INDEX_ARRAYS
+        }
+        index = cls.__new__(cls)
+        index._set_arrays(metadata, arrays)
+        return index
+
+    def save(self, path: Path) -> None:
+        """Save index as .npy arrays, and a JSON file
+        for partitions and dictionaries.
+
+        :param path: Index directory, created if it does not exist
+        :type path: Path
+        """
+        Path(path).mkdir(parents=True, exist_ok=True)
+        for name in INDEX_ARRAYS:
+            np.save(Path(path, f"{name}.npy"), self._arrays[name])
+        with open(Path(path, INDEX_METADATA_FILE), "w") as fh:
+            json.dump(self._metadata, fh)
+
+    @property
+    def is_stranded(self) -> bool:
+        return self._metadata["is_stranded"]
+
+    @property
+    def features(self) -> list[str]:
+        return self._metadata["features"]
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def get_name(self, position: int) -> str:
+        """Return the name of an interval.
+
+        :param position: Index position, i.e. order in which
+        the interval was given
+        :type position: int
+        :returns: Name
+        :rtype: str
+        """
+        return self._metadata["names"][self._name_codes[position]]
+
+    def get_feature_codes(self, positions: np.ndarray) -> np.ndarray:
+        """Return feature codes of intervals, i.e. positions
+        into :attr:`features`.
+
+        :param positions: Index positions
+        :type positions: np.ndarray
+        :returns: Feature codes
+        :rtype: np.ndarray
+        """
+        return np.asarray(self._feature_codes[positions])
+
+    def overlap(
+        self,
+        chroms: Sequence[str],
+        starts: Sequence[int],
+        ends: Sequence[int],
+        strands: Sequence[str] | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Find all overlaps between query intervals and
+        the index. For a stranded index, query intervals
+        only overlap intervals on the same strand, and
+        intervals with undefined strand overlap nothing,
+        as for "bedtools intersect -s".
+
+        Overlaps are returned as pairs of query and index
+        positions, sorted by query, then by index position,
+        i.e. in the order in which intervals were given.
+
+        :param chroms: Query chromosomes
+        :type chroms: Sequence[str]
+        :param starts: Query start positions
+        :type starts: Sequence[int]
+        :param ends: Query end positions
+        :type ends: Sequence[int]
+        :param strands: Query strands, required for a stranded index
+        :type strands: Sequence[str] | None
+        :returns: Query positions and index positions
+        :rtype: tuple[np.ndarray, np.ndarray]
+        """
+        if self.is_stranded and strands is None:
+            raise ValueError("Query strands are required for a stranded index.")
+        queries: dict[tuple[str, str], list[int]] = {}
+        for idx, chrom in enumerate(chroms):
+            strand = strands[idx] if self.is_stranded else UNSTRANDED  # type: ignore
+            if strand == Strand.UNDEFINED.value:
+                continue
+            queries.setdefault((chrom, strand), []).append(idx)
+        query_starts = np.asarray(starts, dtype=np.int64)
+        query_ends = np.asarray(ends, dtype=np.int64)
+        query_hits = [np.empty(0, dtype=np.int64)]
+        index_hits = [np.empty(0, dtype=np.int64)]
+        for key, indices in queries.items():
+            query_indices = np.asarray(indices, dtype=np.int64)
+            for partition in self._partitions.get(key, []):
+                hits, index_indices = self._overlap_partition(
+                    partition, query_starts[query_indices], query_ends[query_indices]
+                )
+                query_hits.append(query_indices[hits])
+                index_hits.append(index_indices)
+        query_hit = np.concatenate(query_hits)
+        index_hit = np.concatenate(index_hits)
+        order = np.lexsort((index_hit, query_hit))
+        return query_hit[order], index_hit[order]
+
+    def _set_arrays(self, metadata: dict[str, Any], arrays: dict[str, Any]) -> None:
+        self._metadata = metadata
+        self._arrays = arrays
+        # partitions by chrom and strand; indexes saved without
+        # feature partitions have one partition per chrom and strand
+        self._partitions: dict[tuple[str, ...], list[int]] = {}
+        for idx, key in enumerate(metadata["partitions"]):
+            self._partitions.setdefault(tuple(key[:2]), []).append(idx)
+        self._offsets = arrays["offsets"]
+        self._starts = arrays["starts"]
+        self._ends = arrays["ends"]
+        self._positions = arrays["positions"]
+        self._max_lengths = arrays["max_lengths"]
+        self._name_codes = arrays["name_codes"]
+        self._feature_codes = arrays["feature_codes"]
+
+    def _overlap_partition(
+        self, partition: int, starts: np.ndarray, ends: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        first = int(self._offsets[partition])
+        last = int(self._offsets[partition + 1])
+        partition_starts = self._starts[first:last]
+        max_length = int(self._max_lengths[partition])
+        # candidates start after (start - max_length) and before end
+        lo = np.searchsorted(partition_starts, starts - max_length, side="right")
+        hi = np.searchsorted(partition_starts, ends, side="left")
+        counts = np.maximum(hi - lo, 0)
+        bounds = np.cumsum(counts)
+        query_hits = [np.empty(0, dtype=np.int64)]
+        index_hits = [np.empty(0, dtype=np.int64)]
+        batch_start = 0
+        while batch_start < len(starts):
+            expanded = int(bounds[batch_start - 1]) if batch_start > 0 else 0
+            batch_end = max(
+                int(
+                    np.searchsorted(bounds, expanded + OVERLAP_BATCH_SIZE, side="right")
+                ),
+                batch_start + 1,
+            )
+            batch = slice(batch_start, batch_end)
+            hits, index_indices = self._overlap_candidates(
+                first + lo[batch], counts[batch], starts[batch]
+            )
+            query_hits.append(hits + batch_start)
+            index_hits.append(index_indices)
+            batch_start = batch_end
+        return np.concatenate(query_hits), np.concatenate(index_hits)
+
+    def _overlap_candidates(
+        self, lo: np.ndarray, counts: np.ndarray, starts: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        queries = np.repeat(np.arange(len(starts), dtype=np.int64), counts)
+        offsets = np.arange(counts.sum(), dtype=np.int64) - np.repeat(
+            np.cumsum(counts) - counts, counts
+        )
+        candidates = np.repeat(lo, counts) + offsets
+        is_overlap = self._ends[candidates] > starts[queries]
+        return queries[is_overlap], np.asarray(
+            self._positions[candidates[is_overlap]], dtype=np.int64
+        )
+
+
+def _get_coordinate_dtype(ends: np.ndarray) -> type:
+    if ends.max(initial=0) <= np.iinfo(np.int32).max:
+        return np.int32
+    return np.int64
+
+
+def _encode(values: Sequence[str] | None, size: int) -> tuple[list[str], np.ndarray]:
+    if values is None:
+        return [], np.zeros(size, dtype=np.int32)
+    dictionary: dict[str, int] = {}
+    codes = np.fromiter(
+        (dictionary.setdefault(value, len(dictionary)) for value in values),
+        dtype=np.int32,
+        count=size,
+    )
+    return list(dictionary.keys()), codes
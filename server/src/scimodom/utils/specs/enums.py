@@ -20,6 +20,79 @@ class Strand(Enum):
     UNDEFINED = "."
 
 
+class InsertMode(Enum):
+    """Define how records are written to model tables."""
+
+    ORM = "orm"
+    CORE = "core"
+    LOAD_DATA = "load_data"
+
+
+class AnnotationEngine(Enum):
+    """Define how data records are annotated."""
+
+    NUMPY = "numpy"
+    BEDTOOLS = "bedtools"
+    SQL = "sql"
+
+
+class ComparisonEngine(Enum):
+    """Define how dataset records are compared."""
+
+    NUMPY = "numpy"
+    BEDTOOLS = "bedtools"
+
+
+class ImportJobStatus(Enum):
+    """Define status of a dataset import job."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ImportStage(Enum):
+    """Define stages of a dataset import."""
+
+    VALIDATING = "validating"
+    INSERTING = "inserting"
+    ANNOTATING = "annotating"
+
+
+class ReannotationStage(Enum):
+    """Define stages of a re-annotation job, in order."""
+
+    RELEASE = "release"
+    ANNOTATION = "annotation"
+    SWAP = "swap"
+    DONE = "done"
+
+
+class ImportErrorClass(Enum):
+    """Define classes of errors found when
+    importing bedRMod records."""
+
+    FIELD_COUNT = "field count"
+    INVALID_VALUE = "invalid value"
+    OUT_OF_RANGE = "out of range"
+    UNKNOWN_CHROM = "unknown chrom"
+    UNKNOWN_NAME = "unknown name"
+    OTHER = "other"
+
+
+class ImportMetricsStage(Enum):
+    """Define stages of a dataset import for which
+    metrics are recorded, see :class:`ImportMetrics`."""
+
+    PARSING = "parsing"
+    VALIDATION = "validation"
+    LIFTOVER = "liftover"
+    INSERTION = "insertion"
+    ANNOTATION = "annotation"
+    GENE_CACHE = "gene_cache"
+
+
 # Specifications
 
 
@@ -0,0 +1,238 @@
+import json
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+from scimodom.utils.interval_index import IntervalIndex
+from scimodom.utils.specs.enums import Strand
+
+SPRINZL_METADATA_FILE = "sprinzl.json"
+SPRINZL_ARRAYS = ["offsets", "gene_starts", "feature_codes", "label_codes"]
+SPRINZL_GENE_INDEX = "genes"
+SPRINZL_FEATURES = ["exon", "intron"]
+NO_LABEL = -1
+
+
+class SprinzlIndex:
+    """Lookup of tRNA genes, features, and Sprinzl positions
+    by genomic position.
+
+    tRNA genes are kept in an :class:`IntervalIndex`. For
+    each gene, the feature (exon or intron) and the Sprinzl
+    label of every genomic position are stored in flat arrays,
+    in genomic order, so that a site is annotated with an
+    overlap query, and array indexing.
+
+    An index is built once per release from the BED12 gene
+    annotation and the sequence-to-Sprinzl mapping, see
+    :meth:`ExternalService.get_sprinzl_mapping`, and loaded
+    memory-mapped, see :meth:`save` and :meth:`load`.
+
+    :param chroms: Gene chromosomes
+    :type chroms: Sequence[str]
+    :param starts: Gene start positions
+    :type starts: Sequence[int]
+    :param ends: Gene end positions
+    :type ends: Sequence[int]
+    :param strands: Gene strands
+    :type strands: Sequence[str]
+    :param gene_ids: Gene IDs, i.e. tRNA sequence IDs
+    :type gene_ids: Sequence[str]
+    :param blocks: Exon blocks of each gene, as (start, end) pairs
+    :type blocks: Sequence[Sequence[tuple[int, int]]]
+    :param labels: Sprinzl label by sequence position (1-based)
+    for each gene ID. Sequences span the whole gene, incl. introns.
+    :type labels: dict[str, dict[int, str]]
+    """
+
+    def __init__(
+        self,
+        chroms: Sequence[str],
+        starts: Sequence[int],
+        ends: Sequence[int],
+        strands: Sequence[str],
+        gene_ids: Sequence[str],
+        blocks: Sequence[Sequence[tuple[int, int]]],
+        labels: dict[str, dict[int, str]],
+    ):
+        label_dictionary: dict[str, int] = {}
+        offsets = [0]
+        feature_codes = []
+        label_codes = []
+        for idx, gene_id in enumerate(gene_ids):
+            start, end = starts[idx], ends[idx]
+            gene_features = np.full(end - start, 1, dtype=np.int8)
+            for block_start, block_end in blocks[idx]:
+                gene_features[block_start - start : block_end - start] = 0
+            gene_labels = np.full(end - start, NO_LABEL, dtype=np.int32)
+            for position, label in labels.get(gene_id, {}).items():
+                if not 0 < position <= end - start:
+                    continue
+                if strands[idx] == Strand.REVERSE.value:
+                    offset = end - start - position
+                else:
+                    offset = position - 1
+                gene_labels[offset] = label_dictionary.setdefault(
+                    label, len(label_dictionary)
+                )
+            feature_codes.append(gene_features)
+            label_codes.append(gene_labels)
+            offsets.append(offsets[-1] + end - start)
+        self._genes = IntervalIndex(
+            chroms, starts, ends, strands=strands, names=gene_ids
+        )
+        self._set_arrays(
+            metadata={"labels": list(label_dictionary.keys())},
+            arrays={
+                "offsets": np.asarray(offsets, dtype=np.int64),
+                "gene_starts": np.asarray(starts, dtype=np.int64),
+                "feature_codes": np.concatenate(
+                    [np.empty(0, dtype=np.int8), *feature_codes]
+                ),
+                "label_codes": np.concatenate(
+                    [np.empty(0, dtype=np.int32), *label_codes]
+                ),
+            },
+        )
+
+    @classmethod
+    def from_files(
+        cls, annotation_file: Path, mapping_file: Path, organism: str
+    ) -> "SprinzlIndex":
+        """Read tRNA genes from a BED12 file, and Sprinzl labels
+        from a tab-separated mapping file, with sequence ID,
+        sequence position (1-based), and Sprinzl label as first
+        columns. A header line is skipped. Gene IDs are formed
+        as for GenomicAnnotation, i.e. "{organism}_{name}".
+
+        :param annotation_file: Path to BED12 annotation file
+        :type annotation_file: Path
+        :param mapping_file: Path to mapping file
+        :type mapping_file: Path
+        :param organism: Organism name
+        :type organism: str
+        :returns: Index
+        :rtype: SprinzlIndex
+        """
+        labels: dict[str, dict[int, str]] = {}
+        with open(mapping_file, "r") as fh:
+            for line in fh:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) < 3 or not fields[1].isdigit():
+                    continue
+                labels.setdefault(fields[0], {})[int(fields[1])] = fields[2]
+        chroms: list[str] = []
+        starts: list[int] = []
+        ends: list[int] = []
+        strands: list[str] = []
+        gene_ids: list[str] = []
+        blocks: list[list[tuple[int, int]]] = []
+        with open(annotation_file, "r") as fh:
+            for line in fh:
+                if not line.strip() or line.startswith(("#", "track", "browser")):
+                    continue
+                fields = line.rstrip("\n").split("\t")
+                start = int(fields[1])
+                chroms.append(fields[0])
+                starts.append(start)
+                ends.append(int(fields[2]))
+                strands.append(fields[5])
+                gene_ids.append(f"{organism}_{fields[3]}")
+                sizes = [int(x) for x in fields[10].rstrip(",").split(",")]
+                offsets = [int(x) for x in fields[11].rstrip(",").split(",")]
+                blocks.append(
+                    [
+                        (start + offset, start + offset + size)
+                        for offset, size in zip(offsets, sizes)
+                    ]
+                )
+        return cls(chroms, starts, ends, strands, gene_ids, blocks, labels)
+
+    @classmethod
+    def load(cls, path: Path, mmap: bool = True) -> "SprinzlIndex":
+        """Load an index saved with :meth:`save`,
+        see :meth:`IntervalIndex.load`.
+
+        :param path: Index directory
+        :type path: Path
+        :param mmap: Memory-map arrays
+        :type mmap: bool
+        :returns: Index
+        :rtype: SprinzlIndex
+        """
+        with open(Path(path, SPRINZL_METADATA_FILE), "r") as fh:
+            metadata = json.load(fh)
+        arrays = {
+            name: np.load(Path(path, f"{name}.npy"), mmap_mode="r" if mmap else None)
+            for name in SPRINZL_ARRAYS
+        }
+        index = cls.__new__(cls)
+        index._genes = IntervalIndex.load(Path(path, SPRINZL_GENE_INDEX), mmap)
+        index._set_arrays(metadata, arrays)
+        return index
+
+    def save(self, path: Path) -> None:
+        """Save index as .npy arrays, and a JSON file
+        for Sprinzl labels.
+
+        :param path: Index directory, created if it does not exist
+        :type path: Path
+        """
+        Path(path).mkdir(parents=True, exist_ok=True)
+        self._genes.save(Path(path, SPRINZL_GENE_INDEX))
+        for name in SPRINZL_ARRAYS:
+            np.save(Path(path, f"{name}.npy"), self._arrays[name])
+        with open(Path(path, SPRINZL_METADATA_FILE), "w") as fh:
+            json.dump(self._metadata, fh)
+
+    def lookup(
+        self,
+        chroms: Sequence[str],
+        starts: Sequence[int],
+        strands: Sequence[str],
+    ) -> tuple[np.ndarray, list[str], list[str], list[str | None]]:
+        """Find tRNA genes for sites given by their start
+        position, on the same strand, with the feature and
+        the Sprinzl label of each site.
+
+        :param chroms: Site chromosomes
+        :type chroms: Sequence[str]
+        :param starts: Site start positions
+        :type starts: Sequence[int]
+        :param strands: Site strands
+        :type strands: Sequence[str]
+        :returns: Site positions, with gene ID, feature (see
+        SPRINZL_FEATURES), and Sprinzl label, if any, for each hit
+        :rtype: tuple[np.ndarray, list[str], list[str], list[str | None]]
+        """
+        query_starts = np.asarray(starts, dtype=np.int64)
+        site_hits, gene_hits = self._genes.overlap(
+            chroms, query_starts, query_starts + 1, strands
+        )
+        positions = (
+            self._offsets[gene_hits]
+            + query_starts[site_hits]
+            - self._gene_starts[gene_hits]
+        )
+        labels = self._metadata["labels"]
+        return (
+            site_hits,
+            [self._genes.get_name(gene) for gene in gene_hits.tolist()],
+            [
+                SPRINZL_FEATURES[code]
+                for code in self._feature_codes[positions].tolist()
+            ],
+            [
+                None if code == NO_LABEL else labels[code]
+                for code in self._label_codes[positions].tolist()
+            ],
+        )
+
+    def _set_arrays(self, metadata: dict, arrays: dict) -> None:
+        self._metadata = metadata
+        self._arrays = arrays
+        self._offsets = arrays["offsets"]
+        self._gene_starts = arrays["gene_starts"]
+        self._feature_codes = arrays["feature_codes"]
+        self._label_codes = arrays["label_codes"]
@@ -1,4 +1,6 @@
 from datetime import datetime
+import json
+import logging
 from pathlib import Path
 import re
 
@@ -227,7 +229,6 @@ def _get_validator_service(Session, tmp_path):
         session=Session(),
         annotation_service=_get_annotation_service(Session, tmp_path),
         assembly_service=_get_assembly_service(Session, tmp_path),
-        bedtools_service=_get_bedtools_service(Session, tmp_path),
     )
 
 
@@ -258,6 +259,7 @@ def _get_dataset_service(Session, tmp_path):
         session=Session(),
         annotation_service=_get_annotation_service(Session, tmp_path),
         file_service=_get_file_service(Session, tmp_path),
+        data_service=DataService(Session(), _get_file_service(Session, tmp_path)),
         validator_service=_get_validator_service(Session, tmp_path),
     )
 
@@ -351,6 +353,10 @@ def mock_services(mocker, Session, tmp_path, test_runner):
         "scimodom.cli.dataset.get_file_service",
         return_value=_get_file_service(Session, tmp_path),
     )
+    mocker.patch(
+        "scimodom.cli.dataset.get_data_service",
+        return_value=DataService(Session(), _get_file_service(Session, tmp_path)),
+    )
 
 
 # tests
@@ -492,9 +498,11 @@ def test_add_dataset_dry_run(
     assert any(Path(d).iterdir()) is False
 
 
+@pytest.mark.parametrize("jobs", [1, 2])
 @pytest.mark.datafiles(Path(DATA_DIR, "file1.bedrmod"))
 @pytest.mark.datafiles(Path(DATA_DIR, "file2.bedrmod"))
 def test_add_dataset_in_batch(
+    jobs,
     Session,
     test_runner,
     datafiles,
@@ -509,6 +517,8 @@ def test_add_dataset_in_batch(
         "batch",
         "--annotation",
         "ensembl",
+        "--jobs",
+        jobs,
         datafiles.as_posix(),
         "test_request",
     ]
@@ -541,3 +551,67 @@ def test_add_dataset_in_batch(
     for chart_type in SunburstChartType:
         with open(Path(d, f"{chart_type.value}.json")) as fh:
             assert fh.read() == EXPECTED_CHARTS_IN_BATCH[chart_type.value]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+@pytest.mark.datafiles(Path(DATA_DIR, "file1.bedrmod"))
+@pytest.mark.datafiles(Path(DATA_DIR, "file2.bedrmod"))
+def test_validate_datasets(
+    jobs, Session, test_runner, datafiles, selection, test_data, mock_services, caplog
+):
+    # live logging would redirect the output of the command
+    caplog.set_level(logging.ERROR, logger="scimodom.utils.importer.bed_importer")
+    with open(Path(datafiles, "file1.bedrmod")) as fh:
+        header = "".join(line for line in fh if line.startswith("#"))
+    with open(Path(datafiles, "file3.bedrmod"), "w") as fh:
+        fh.write(header)
+        fh.write("1\t10\t11\tm6A\t1\t+\t10\t11\t0,0,0\t1\t1\n")
+        fh.write("1\t10\t11\tm6A\t2\t+\t10\t11\t0,0,0\t2\t2\n")
+        fh.write("2\t20\t21\tm6A\t1\t+\t20\t21\t0,0,0\t1\t1\n")
+        fh.write("1\t30\t31\tm1A\t1\t+\t30\t31\t0,0,0\t1\t1\n")
+        fh.write("1\t40\t41\tm6A\t1\t+\t40\t41\t0,0,0\t1\n")
+        fh.write("1\t50\t51\tm6A\t1\t*\t50\t51\t0,0,0\t1\t1\n")
+    args = ["dataset", "validate", "--jobs", jobs, "--json", datafiles.as_posix()]
+
+    result = test_runner.invoke(args=args)
+    assert result.exit_code == 1
+
+    reports = sorted(
+        (json.loads(line) for line in result.output.splitlines()),
+        key=lambda report: report["source"],
+    )
+    assert [Path(report["source"]).name for report in reports] == [
+        "file1.bedrmod",
+        "file2.bedrmod",
+        "file3.bedrmod",
+    ]
+    assert reports[0]["record_count"] == 5
+    assert reports[0]["error_count"] == 0
+    assert reports[0]["is_sorted"] is False
+    assert reports[0]["first_unsorted_line"] == 16
+    assert reports[0]["duplicate_site_count"] is None
+    assert reports[1]["error_count"] == 0
+    assert reports[1]["is_sorted"] is True
+    assert reports[2]["record_count"] == 2
+    assert reports[2]["error_counts"] == {
+        "unknown chrom": 1,
+        "unknown name": 1,
+        "field count": 1,
+        "invalid value": 1,
+    }
+    assert reports[2]["unknown_chroms"] == {"2": 1}
+    assert reports[2]["unknown_modification_names"] == {"m1A": 1}
+    assert reports[2]["is_sorted"] is True
+    assert reports[2]["duplicate_site_count"] == 1
+    with Session() as session:
+        assert session.scalar(select(func.count()).select_from(Data)) == 0
+
+
+def test_write_snapshots(Session, test_runner, dataset, mock_services, tmp_path):
+    result = test_runner.invoke(args=["dataset", "snapshot"])
+    assert result.exit_code == 0
+    assert "No snapshot written for dataset dataset_id04." in result.output
+    assert "done (4 datasets)" in result.output
+    file_service = _get_file_service(Session, tmp_path)
+    assert len(file_service.get_data_snapshot("dataset_id03")) == 4
+    assert file_service.get_data_snapshot("dataset_id04") is None
@@ -154,7 +154,6 @@ def _get_validator_service(Session, tmp_path):
         session=Session(),
         annotation_service=_get_annotation_service(Session, tmp_path),
         assembly_service=_get_assembly_service(Session, tmp_path),
-        bedtools_service=_get_bedtools_service(Session, tmp_path),
     )
 
 
@@ -163,6 +162,7 @@ def _get_dataset_service(Session, tmp_path):
         session=Session(),
         annotation_service=_get_annotation_service(Session, tmp_path),
         file_service=_get_file_service(Session, tmp_path),
+        data_service=DataService(Session(), _get_file_service(Session, tmp_path)),
         validator_service=_get_validator_service(Session, tmp_path),
     )
 
@@ -1,24 +1,43 @@
+import gzip
 from io import BytesIO
+from os import utime
 from pathlib import Path
+import time
 
 import pytest
 from sqlalchemy import select, func
 
 from scimodom.database.models import BamFile
-from scimodom.services.file import FileService
+from scimodom.services.file import FileService, FileTooLarge
 from scimodom.utils.specs.enums import AssemblyFileType
 
 
-def _get_file_service(Session, tmp_path):
+def _get_file_service(Session, tmp_path, comparison_cache_size=0):
     return FileService(
         session=Session(),
         data_path=Path(tmp_path, "t_data"),
         temp_path=Path(tmp_path, "t_temp"),
         upload_path=Path(tmp_path, "t_upload"),
         import_path=Path(tmp_path, "t_import"),
+        comparison_cache_size=comparison_cache_size,
     )
 
 
+def _write_comparison_cache(service, name, eufids, content, started=None):
+    if started is None:
+        started = time.time()
+    chunks = service.write_comparison_cache(name, eufids, started, [content])
+    assert "".join(chunks) == content
+
+
+def _read_comparison_cache(service, name):
+    fh = service.open_comparison_cache(name)
+    if fh is None:
+        return None
+    with fh:
+        return gzip.decompress(fh.read()).decode("utf-8")
+
+
 @pytest.fixture
 def assembly_dir(tmp_path):
     # add empty assembly directory
@@ -79,6 +98,17 @@ def test_gene_cache(Session, tmp_path):
         service.get_gene_cache(124)
 
 
+def test_merge_gene_cache(Session, tmp_path):
+    service = _get_file_service(Session, tmp_path)
+    service.update_gene_cache(122, ["Y", "1"])
+    assert service.merge_gene_cache(122, ["2", "1"]) == 3
+    assert service.get_gene_cache(122) == ["1", "2", "Y"]
+    assert service.merge_gene_cache(122, []) == 3
+    assert service.get_gene_cache(122) == ["1", "2", "Y"]
+    with pytest.raises(FileNotFoundError):
+        service.merge_gene_cache(123, ["1"])
+
+
 def test_sunburst_cache(Session, tmp_path):
     service = _get_file_service(Session, tmp_path)
 
@@ -93,6 +123,98 @@ def test_sunburst_cache(Session, tmp_path):
         assert fh.read() == "cache content"
 
 
+def test_get_comparison_cache_name():
+    assert (
+        FileService.get_comparison_cache_name(
+            "intersect", ["EUFID0000002", "EUFID0000001"], ["EUFID0000003"], None, True
+        )
+        == "intersect_EUFID0000001-EUFID0000002_EUFID0000003_strand"
+    )
+    assert (
+        FileService.get_comparison_cache_name(
+            "subtract", ["EUFID0000001"], [], "upload-abc-bed6", False
+        )
+        == "subtract_EUFID0000001_upload-abc-bed6_nostrand"
+    )
+    assert (
+        FileService.get_comparison_cache_name(
+            "closest", ["EUFID0000001"], ["EUFID0000002"], None, True, "summary"
+        )
+        == "closest_EUFID0000001_EUFID0000002_strand_summary"
+    )
+
+
+def test_comparison_cache(Session, tmp_path):
+    service = _get_file_service(Session, tmp_path, comparison_cache_size=1024)
+    name = "intersect_EUFID0000001_EUFID0000002_strand"
+    assert service.open_comparison_cache(name) is None
+    _write_comparison_cache(
+        service, name, ["EUFID0000001", "EUFID0000002"], '{"records":[]}'
+    )
+    assert _read_comparison_cache(service, name) == '{"records":[]}'
+
+    other_name = "closest_EUFID0000003_EUFID0000001_strand"
+    _write_comparison_cache(service, other_name, ["EUFID0000003"], "{}")
+    service.delete_comparison_cache("EUFID0000002")
+    assert service.open_comparison_cache(name) is None
+    assert _read_comparison_cache(service, other_name) == "{}"
+    service.delete_comparison_cache("EUFID0000001")
+    assert service.open_comparison_cache(other_name) is None
+
+
+def test_comparison_cache_invalidated(Session, tmp_path):
+    service = _get_file_service(Session, tmp_path, comparison_cache_size=1024)
+    name = "intersect_EUFID0000001_EUFID0000002_strand"
+    started = time.time()
+    service.delete_comparison_cache("EUFID0000002")
+    # the dataset was updated while the result was generated
+    _write_comparison_cache(service, name, ["EUFID0000002"], "{}", started)
+    assert service.open_comparison_cache(name) is None
+    _write_comparison_cache(service, name, ["EUFID0000002"], "{}")
+    assert _read_comparison_cache(service, name) == "{}"
+
+
+def test_comparison_cache_incomplete(Session, tmp_path):
+    service = _get_file_service(Session, tmp_path, comparison_cache_size=1024)
+    name = "intersect_EUFID0000001_EUFID0000002_strand"
+    chunks = service.write_comparison_cache(
+        name, ["EUFID0000001"], time.time(), ["{", "}"]
+    )
+    assert next(chunks) == "{"
+    chunks.close()
+    assert service.open_comparison_cache(name) is None
+    assert (
+        list(Path(tmp_path, "t_data", FileService.COMPARISON_CACHE_DEST).glob("*.gz"))
+        == []
+    )
+
+
+def test_comparison_cache_eviction(Session, tmp_path):
+    content = "x" * 10000
+    size = len(gzip.compress(content.encode("utf-8")))
+    service = _get_file_service(Session, tmp_path, comparison_cache_size=2 * size + 1)
+    names = [f"intersect_EUFID000000{i}_EUFID0000009_strand" for i in range(3)]
+    for idx, name in enumerate(names[:2]):
+        _write_comparison_cache(service, name, ["EUFID0000009"], content)
+        path = Path(
+            tmp_path, "t_data", FileService.COMPARISON_CACHE_DEST, f"{name}.json.gz"
+        )
+        utime(path, (idx, idx))
+    # names[0] is used last
+    service.open_comparison_cache(names[0]).close()
+    _write_comparison_cache(service, names[2], ["EUFID0000009"], content)
+    assert _read_comparison_cache(service, names[0]) == content
+    assert service.open_comparison_cache(names[1]) is None
+    assert _read_comparison_cache(service, names[2]) == content
+
+
+def test_comparison_cache_disabled(Session, tmp_path):
+    service = _get_file_service(Session, tmp_path)
+    name = "intersect_EUFID0000001_EUFID0000002_strand"
+    _write_comparison_cache(service, name, ["EUFID0000001"], "{}")
+    assert service.open_comparison_cache(name) is None
+
+
 # Project
 
 
@@ -108,6 +230,40 @@ def test_project_files(Session, tmp_path):
     service.delete_project_request_file("UUID")
 
 
+def test_import_job_files(Session, tmp_path):
+    service = _get_file_service(Session, tmp_path)
+    service.write_import_job("job-1", "queued")
+    service.write_import_job("job-1", "running")
+    assert service.read_import_job("job-1") == "running"
+    assert service.get_import_job_ids() == ["job-1"]
+
+    upload = Path(tmp_path, "upload.bedrmod")
+    upload.write_text("records")
+    path = service.add_import_job_input("job-1", upload)
+    assert not upload.exists()
+    assert Path(path).read_text() == "records"
+    service.delete_import_job_input("job-1")
+    assert not Path(path).exists()
+
+    with service.lock_import_job("job-1") as is_locked:
+        assert is_locked
+    with pytest.raises(ValueError):
+        service.read_import_job("../job-1")
+    with pytest.raises(FileNotFoundError):
+        service.read_import_job("job-2")
+
+
+def test_reannotation_job_files(Session, tmp_path):
+    service = _get_file_service(Session, tmp_path)
+    service.write_reannotation_job(9606, "release")
+    service.write_reannotation_job(9606, "annotation")
+    assert service.read_reannotation_job(9606) == "annotation"
+    with service.lock_reannotation_job(9606) as is_locked:
+        assert is_locked
+    with pytest.raises(FileNotFoundError):
+        service.read_reannotation_job(10090)
+
+
 # Assembly
 # cf. AssemblyFileType (specs.enums)
 
@@ -323,6 +479,34 @@ def test_upload(Session, tmp_path):
         assert fh.read() == "Some bedrmod data"
 
 
+def test_get_tmp_upload_file_digest(Session, tmp_path):
+    service = _get_file_service(Session, tmp_path)
+    file_id = service.upload_tmp_file(BytesIO(b"Some bedrmod data"), 1024)
+    other_file_id = service.upload_tmp_file(BytesIO(b"Some bedrmod data"), 1024)
+    digest = service.get_tmp_upload_file_digest(file_id)
+    assert len(digest) == 64
+    assert service.get_tmp_upload_file_digest(other_file_id) == digest
+
+
+def test_upload_gzip(Session, tmp_path):
+    # bgzip files consist of several gzip members
+    data = gzip.compress(b"Some bedrmod data\n") + gzip.compress(b"More data\n")
+    service = _get_file_service(Session, tmp_path)
+    file_id = service.upload_tmp_file(BytesIO(data), 1024)
+    assert Path(tmp_path, "t_upload", file_id).read_bytes() == data
+    with service.open_tmp_upload_file_by_id(file_id) as fh:
+        assert fh.read() == "Some bedrmod data\nMore data\n"
+
+
+def test_upload_gzip_too_large(Session, tmp_path):
+    data = gzip.compress(b"0" * 2048)
+    assert len(data) < 1024
+    service = _get_file_service(Session, tmp_path)
+    with pytest.raises(FileTooLarge):
+        service.upload_tmp_file(BytesIO(data), 1024)
+    assert list(Path(tmp_path, "t_upload").iterdir()) == []
+
+
 # BAM
 
 
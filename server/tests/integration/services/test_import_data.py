@@ -211,8 +211,8 @@ def _get_gene_service(session, file_service):
     return GeneService(session, file_service)
 
 
-def _get_data_service(session):
-    return DataService(session=session)
+def _get_data_service(session, file_service=None):
+    return DataService(session=session, file_service=file_service)
 
 
 def _get_external_service(file_service):
@@ -230,21 +230,18 @@ def _get_web_service():
     return WebService()
 
 
-def _get_validator_service(
-    session, annotation_service, assembly_service, bedtools_service
-):
+def _get_validator_service(session, annotation_service, assembly_service):
     return ValidatorService(
         session=session,
         annotation_service=annotation_service,
         assembly_service=assembly_service,
-        bedtools_service=bedtools_service,
     )
 
 
 def _get_dataset_service(session, tmp_path):
     bedtools_service = _get_bedtools_service(tmp_path)
     file_service = _get_file_service(session, tmp_path)
-    data_service = _get_data_service(session)
+    data_service = _get_data_service(session, file_service)
     external_service = _get_external_service(file_service)
     web_service = _get_web_service()
     gene_service = _get_gene_service(session, file_service)
@@ -261,12 +258,13 @@ def _get_dataset_service(session, tmp_path):
         file_service,
     )
     validator_service = _get_validator_service(
-        session, annotation_service, assembly_service, bedtools_service
+        session, annotation_service, assembly_service
     )
     return DatasetService(
         session=session,
         annotation_service=annotation_service,
         file_service=file_service,
+        data_service=data_service,
         validator_service=validator_service,
     )
 
@@ -274,8 +272,20 @@ def _get_dataset_service(session, tmp_path):
 # tests
 
 
-def test_import_data(Session, selection, project, test_data, tmp_path, freezer, mocker):
+@pytest.mark.parametrize("annotation_workers", [None, 2])
+def test_import_data(
+    annotation_workers,
+    Session,
+    selection,
+    project,
+    test_data,
+    tmp_path,
+    freezer,
+    mocker,
+):
     mocker.patch("scimodom.services.annotation.ensembl.Ensembl", MockEnsembl)
+    # chunks of one record, and thus shards of one record
+    mocker.patch.object(EnsemblAnnotationService, "ANNOTATION_SHARD_SIZE", 1)
     service = _get_dataset_service(Session(), tmp_path)
     file_handle = StringIO(EUF_FILE)
     freezer.move_to("2024-06-20 12:00:00")
@@ -289,6 +299,7 @@ def test_import_data(Session, selection, project, test_data, tmp_path, freezer,
         technology_id=1,
         organism_id=1,
         annotation_source=AnnotationSource.ENSEMBL,
+        annotation_workers=annotation_workers,
     )
     # manually trigger sunburst creation
     sunburst_service = _get_sunburst_service(Session(), tmp_path)
@@ -319,6 +330,10 @@ def test_import_data(Session, selection, project, test_data, tmp_path, freezer,
         # tmp_path / FileService.GENE_CACHE_DEST / "1"
         gene_set = set(service._file_service.get_gene_cache(1))
         assert gene_set == {"GENE1", "GENE2"}
+        # tmp_path / FileService.DATA_SNAPSHOT_DEST / eufid
+        snapshot = service._file_service.get_data_snapshot(eufid)
+        records = set(snapshot.get_rows(["chrom", "start", "score"]))
+        assert records == set(EXPECTED_RECORDS)
         for chart_type in SunburstChartType:
             # tmp_path / FileService.SUNBURST_CACHE_DEST / chart_type.value
             with service._file_service.open_sunburst_cache(chart_type.value) as fh:
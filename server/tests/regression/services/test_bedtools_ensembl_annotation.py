@@ -1,17 +1,21 @@
 from pathlib import Path
 import filecmp
+import shutil
 
 import pytest
+from sqlalchemy import delete, func, select
 
-from scimodom.database.models import Data
+from scimodom.database.models import Data, DataAnnotation, GenomicFeature
 from scimodom.services.bedtools import BedToolsService
 from scimodom.services.annotation.ensembl import EnsemblAnnotationService
+from scimodom.services.data import DataService
+from scimodom.services.file import FileService
 from scimodom.utils.dtos.bedtools import (
     GenomicAnnotationRecord,
-    DataAnnotationRecord,
+    TrustedDataAnnotationRecord,
     Bed6Record,
 )
-from scimodom.utils.specs.enums import Strand
+from scimodom.utils.specs.enums import AnnotationEngine, Strand
 
 # NOTE: subject to change cf. #119
 
@@ -138,17 +142,19 @@ EXPECTED_GENOMIC_ANNOTATION_RECORDS = [
 ]
 
 EXPECTED_DATA_RECORDS = [
-    DataAnnotationRecord(gene_id="ENSG00000000001", data_id=1, feature="Exonic"),
-    DataAnnotationRecord(gene_id="ENSG00000000007", data_id=2, feature="Exonic"),
-    DataAnnotationRecord(gene_id="ENSG00000000008", data_id=2, feature="Exonic"),
-    DataAnnotationRecord(gene_id="ENSG00000000004", data_id=3, feature="Exonic"),
-    DataAnnotationRecord(gene_id="ENSG00000000006", data_id=5, feature="Exonic"),
-    DataAnnotationRecord(gene_id="ENSG00000000004", data_id=3, feature="5'UTR"),
-    DataAnnotationRecord(gene_id="ENSG00000000007", data_id=2, feature="3'UTR"),
-    DataAnnotationRecord(gene_id="ENSG00000000001", data_id=1, feature="CDS"),
-    DataAnnotationRecord(gene_id="ENSG00000000004", data_id=3, feature="CDS"),
-    DataAnnotationRecord(gene_id="ENSG00000000006", data_id=5, feature="CDS"),
-    DataAnnotationRecord(gene_id="ENSIntergenic", data_id=4, feature="Intergenic"),
+    TrustedDataAnnotationRecord(gene_id="ENSG00000000001", data_id=1, feature="Exonic"),
+    TrustedDataAnnotationRecord(gene_id="ENSG00000000007", data_id=2, feature="Exonic"),
+    TrustedDataAnnotationRecord(gene_id="ENSG00000000008", data_id=2, feature="Exonic"),
+    TrustedDataAnnotationRecord(gene_id="ENSG00000000004", data_id=3, feature="Exonic"),
+    TrustedDataAnnotationRecord(gene_id="ENSG00000000006", data_id=5, feature="Exonic"),
+    TrustedDataAnnotationRecord(gene_id="ENSG00000000004", data_id=3, feature="5'UTR"),
+    TrustedDataAnnotationRecord(gene_id="ENSG00000000007", data_id=2, feature="3'UTR"),
+    TrustedDataAnnotationRecord(gene_id="ENSG00000000001", data_id=1, feature="CDS"),
+    TrustedDataAnnotationRecord(gene_id="ENSG00000000004", data_id=3, feature="CDS"),
+    TrustedDataAnnotationRecord(gene_id="ENSG00000000006", data_id=5, feature="CDS"),
+    TrustedDataAnnotationRecord(
+        gene_id="ENSIntergenic", data_id=4, feature="Intergenic"
+    ),
 ]
 
 
@@ -162,8 +168,111 @@ def chrom_file(tmp_path):
     return Path(file_path)
 
 
-def _get_bedtools_service(tmp_path):
-    return BedToolsService(tmp_path=tmp_path)
+def _get_bedtools_service(tmp_path, annotation_engine=AnnotationEngine.NUMPY):
+    return BedToolsService(tmp_path=tmp_path, annotation_engine=annotation_engine)
+
+
+def _get_ensembl_annotation_service(Session, tmp_path, annotation_engine):
+    return EnsemblAnnotationService(
+        session=Session(),
+        data_service=DataService(session=Session()),
+        bedtools_service=_get_bedtools_service(tmp_path, annotation_engine),
+        external_service=None,  # noqa
+        web_service=None,  # noqa
+        gene_service=None,  # noqa
+        file_service=FileService(
+            session=Session(),
+            data_path=Path(tmp_path, "t_data"),
+            temp_path=Path(tmp_path, "t_temp"),
+            upload_path=Path(tmp_path, "t_upload"),
+            import_path=Path(tmp_path, "t_import"),
+        ),
+        annotation_engine=annotation_engine,
+    )
+
+
+def _add_release_and_data(Session, tmp_path, records, id_offset):
+    # annotation 1 exists in the database (fixture), only files are added
+    release_path = Path(
+        tmp_path, "t_data", "annotation", "Homo_sapiens", "GRCh38", "110"
+    )
+    shutil.copytree(DATA_DIR, release_path, ignore=shutil.ignore_patterns("*.gz*"))
+    session = Session()
+    for record in records:
+        session.add(
+            Data(
+                id=record.id + id_offset,
+                dataset_id="dataset_id01",
+                modification_id=1,
+                chrom=record.chrom,
+                start=record.start,
+                end=record.end,
+                name="m6A",
+                score=0,
+                strand=record.strand,
+                thick_start=record.start,
+                thick_end=record.end,
+                item_rgb="0,0,0",
+                coverage=0,
+                frequency=1,
+            )
+        )
+    session.commit()
+
+
+def _annotate_data_in_database(Session, tmp_path, annotation_engine, id_offset):
+    service = _get_ensembl_annotation_service(Session, tmp_path, annotation_engine)
+    service.annotate_data(9606, "dataset_id01", [])
+    Session().commit()
+    query = select(
+        DataAnnotation.gene_id, DataAnnotation.data_id, DataAnnotation.feature
+    ).where(DataAnnotation.data_id > id_offset)
+    annotated_records = [
+        TrustedDataAnnotationRecord(
+            gene_id=row.gene_id, data_id=row.data_id - id_offset, feature=row.feature
+        )
+        for row in Session().execute(query)
+    ]
+    Session().execute(delete(DataAnnotation).where(DataAnnotation.data_id > id_offset))
+    Session().commit()
+    return sorted(annotated_records, key=_annotation_sort_key)
+
+
+def _annotation_sort_key(record):
+    return record.feature, record.data_id, record.gene_id
+
+
+def _get_parity_records():
+    # records on both strands around feature boundaries, spanning several features
+    records = []
+    data_id = 1
+    for path in sorted(DATA_DIR.glob("*.bed")):
+        with open(path, "r") as fh:
+            for line in fh:
+                chrom, start, end = line.split("\t")[:3]
+                for pos, length in [
+                    (int(start) - 1, 1),
+                    (int(start), 1),
+                    (int(end) - 1, 1),
+                    (int(end), 1),
+                    (int(start) - 5, 100),
+                ]:
+                    for strand in [Strand.FORWARD, Strand.REVERSE, Strand.UNDEFINED]:
+                        if pos < 0:
+                            continue
+                        records.append(
+                            Data(
+                                id=data_id,
+                                chrom=chrom,
+                                start=pos,
+                                end=pos + length,
+                                name="m6A",
+                                score=0,
+                                strand=strand,
+                            )
+                        )
+                        data_id += 1
+    return records
 
 
 # tests
@@ -179,10 +288,14 @@ def test_get_ensembl_annotation_records(datafiles, tmp_path):
 
 
 @pytest.mark.datafiles(Path(DATA_DIR, "test.gtf.gz"))
-def test_ensembl_to_bed_features(datafiles, tmp_path, chrom_file):
+@pytest.mark.parametrize("processes", [1, None])
+def test_ensembl_to_bed_features(datafiles, processes, tmp_path, chrom_file):
     bedtools_service = _get_bedtools_service(tmp_path)
     bedtools_service.ensembl_to_bed_features(
-        Path(datafiles, "test.gtf.gz"), chrom_file, FEATURES
+        Path(datafiles, "test.gtf.gz"),
+        chrom_file,
+        {k: list(v.keys()) for k, v in FEATURES.items()},
+        processes=processes,
     )
     filecmp.clear_cache()
     features = {k: list(v.keys()) for k, v in FEATURES.items()}
@@ -193,18 +306,112 @@ def test_ensembl_to_bed_features(datafiles, tmp_path, chrom_file):
         )
 
 
-def test_annotate_data_using_ensembl(tmp_path):
+@pytest.mark.parametrize(
+    "annotation_engine", [AnnotationEngine.NUMPY, AnnotationEngine.BEDTOOLS]
+)
+def test_annotate_data_using_ensembl(annotation_engine, tmp_path):
     features = {
         **EnsemblAnnotationService.FEATURES["conventional"],
         **EnsemblAnnotationService.FEATURES["extended"],
     }
-    bedtools_service = _get_bedtools_service(tmp_path)
+    bedtools_service = _get_bedtools_service(tmp_path, annotation_engine)
     annotated_records = bedtools_service.annotate_data_using_ensembl(
         DATA_DIR, features, RECORDS
     )
     assert list(annotated_records) == EXPECTED_DATA_RECORDS
 
 
+def test_annotate_data_using_ensembl_feature_index(tmp_path):
+    annotation_path = tmp_path / "annotation"
+    shutil.copytree(DATA_DIR, annotation_path)
+    features = {
+        **EnsemblAnnotationService.FEATURES["conventional"],
+        **EnsemblAnnotationService.FEATURES["extended"],
+    }
+    bedtools_service = _get_bedtools_service(tmp_path)
+    bedtools_service.ensembl_to_feature_index(
+        annotation_path, {k: list(v.keys()) for k, v in FEATURES.items()}
+    )
+    for feature in features.keys():
+        Path(annotation_path, f"{feature}.bed").unlink()
+    annotated_records = bedtools_service.annotate_data_using_ensembl(
+        annotation_path, dict(features), RECORDS
+    )
+    assert list(annotated_records) == EXPECTED_DATA_RECORDS
+    # a subset of features, in a different order
+    annotated_records = bedtools_service.annotate_data_using_ensembl(
+        annotation_path, {"CDS": "CDS", "intergenic": "Intergenic"}, RECORDS
+    )
+    assert list(annotated_records) == [
+        r for r in EXPECTED_DATA_RECORDS if r.feature in ["CDS", "Intergenic"]
+    ]
+
+
+def test_annotate_data_using_ensembl_parity(tmp_path):
+    features = {
+        **EnsemblAnnotationService.FEATURES["conventional"],
+        **EnsemblAnnotationService.FEATURES["extended"],
+    }
+    records = _get_parity_records()
+    annotated_records = {}
+    for annotation_engine in [AnnotationEngine.NUMPY, AnnotationEngine.BEDTOOLS]:
+        bedtools_service = _get_bedtools_service(tmp_path, annotation_engine)
+        annotated_records[annotation_engine] = list(
+            bedtools_service.annotate_data_using_ensembl(
+                DATA_DIR, dict(features), records
+            )
+        )
+    assert len(annotated_records[AnnotationEngine.NUMPY]) > len(records)
+    # records with the same start may be sorted in any order by bedtools
+    assert sorted(
+        annotated_records[AnnotationEngine.NUMPY], key=_annotation_sort_key
+    ) == sorted(annotated_records[AnnotationEngine.BEDTOOLS], key=_annotation_sort_key)
+
+
+def test_annotate_data_using_sql(Session, tmp_path, annotation):
+    _add_release_and_data(Session, tmp_path, RECORDS, 1000)
+    service = _get_ensembl_annotation_service(Session, tmp_path, AnnotationEngine.SQL)
+    # release exists, features are loaded (once)
+    service.create_annotation(9606)
+    service.create_annotation(9606)
+    features = Session().execute(
+        select(GenomicFeature.feature, func.count()).group_by(GenomicFeature.feature)
+    )
+    assert dict(features.all()) == {
+        "Exonic": 52,
+        "5'UTR": 10,
+        "3'UTR": 19,
+        "CDS": 37,
+        "Intronic": 44,
+        "Intergenic": 8,
+    }
+    assert _annotate_data_in_database(
+        Session, tmp_path, AnnotationEngine.SQL, 1000
+    ) == sorted(EXPECTED_DATA_RECORDS, key=_annotation_sort_key)
+
+
+def test_annotate_data_using_sql_parity(Session, tmp_path, annotation):
+    features = {
+        **EnsemblAnnotationService.FEATURES["conventional"],
+        **EnsemblAnnotationService.FEATURES["extended"],
+    }
+    records = _get_parity_records()
+    _add_release_and_data(Session, tmp_path, records, 1000)
+    _get_ensembl_annotation_service(
+        Session, tmp_path, AnnotationEngine.SQL
+    ).create_annotation(9606)
+    annotated_records = _annotate_data_in_database(
+        Session, tmp_path, AnnotationEngine.SQL, 1000
+    )
+    expected_records = _get_bedtools_service(tmp_path).annotate_data_using_ensembl(
+        DATA_DIR, features, records
+    )
+    assert len(annotated_records) > len(records) / 2
+    # records spanning several intervals of a gene are annotated once
+    assert len(set(annotated_records)) == len(annotated_records)
+    assert set(annotated_records) == set(expected_records)
+
+
 @pytest.mark.datafiles(
     Path(DATA_DIR, "test.fa.gz"),
     Path(DATA_DIR, "test.fa.gz.gzi"),
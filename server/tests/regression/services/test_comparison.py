@@ -9,7 +9,7 @@ from scimodom.utils.dtos.bedtools import (
     ComparisonRecord,
     Bed6Record,
 )
-from scimodom.utils.specs.enums import Strand
+from scimodom.utils.specs.enums import ComparisonEngine, Strand
 
 
 @pytest.fixture
@@ -17,6 +17,11 @@ def bedtools_service(tmp_path):
     yield BedToolsService(tmp_path=tmp_path)
 
 
+@pytest.fixture(params=[ComparisonEngine.NUMPY, ComparisonEngine.BEDTOOLS])
+def comparison_service(request, tmp_path):
+    yield BedToolsService(tmp_path=tmp_path, comparison_engine=request.param)
+
+
 DATASET_A = [
     ComparisonRecord(
         chrom="1",
@@ -633,61 +638,70 @@ EXPECTED_RESULT_INTERSECT_BED6_A_WITH_B = [
     ),
 ]
 
+
+def _as_json(records):
+    # trusted records from the service, or pydantic models as expected
+    return [
+        r.to_json_dict() if hasattr(r, "to_json_dict") else r.model_dump(mode="json")
+        for r in records
+    ]
+
+
 # tests
 
 
-def test_intersect_comparison_records_simple(bedtools_service):
+def test_intersect_comparison_records_simple(comparison_service):
     result = list(
-        bedtools_service.intersect_comparison_records(
+        comparison_service.intersect_comparison_records(
             DATASET_A, [DATASET_B], is_strand=True
         )
     )
-    assert result == EXPECTED_RESULT_INTERSECT_A_WITH_B
+    assert _as_json(result) == _as_json(EXPECTED_RESULT_INTERSECT_A_WITH_B)
 
 
-def test_closest_comparison_records_simple(bedtools_service):
+def test_closest_comparison_records_simple(comparison_service):
     result = list(
-        bedtools_service.closest_comparison_records(
+        comparison_service.closest_comparison_records(
             DATASET_A, [DATASET_B], is_strand=True
         )
     )
-    assert result == EXPECTED_RESULT_CLOSEST_A_WITH_B
+    assert _as_json(result) == _as_json(EXPECTED_RESULT_CLOSEST_A_WITH_B)
 
 
-def test_subtract_comparison_records_simple(bedtools_service):
+def test_subtract_comparison_records_simple(comparison_service):
     result = list(
-        bedtools_service.subtract_comparison_records(
+        comparison_service.subtract_comparison_records(
             DATASET_A, [DATASET_B], is_strand=True
         )
     )
-    assert result == EXPECTED_RESULT_SUBTRACT_A_WITH_B
+    assert _as_json(result) == _as_json(EXPECTED_RESULT_SUBTRACT_A_WITH_B)
 
 
-def test_intersect_comparison_records(bedtools_service):
+def test_intersect_comparison_records(comparison_service):
     result = list(
-        bedtools_service.intersect_comparison_records(
+        comparison_service.intersect_comparison_records(
             DATASET_A, [DATASET_B, DATASET_C], is_strand=True
         )
     )
-    assert result == EXPECTED_RESULT_INTERSECT_A_WITH_BC
+    assert _as_json(result) == _as_json(EXPECTED_RESULT_INTERSECT_A_WITH_BC)
 
 
-def test_closest_comparison_records(bedtools_service):
+def test_closest_comparison_records(comparison_service):
     result = list(
-        bedtools_service.closest_comparison_records(
+        comparison_service.closest_comparison_records(
             DATASET_A, [DATASET_B, DATASET_C], is_strand=True
         )
     )
-    assert result == EXPECTED_RESULT_CLOSEST_A_WITH_BC
+    assert _as_json(result) == _as_json(EXPECTED_RESULT_CLOSEST_A_WITH_BC)
 
 
-def test_subtract_comparison_records(bedtools_service):
+def test_subtract_comparison_records(comparison_service):
     result = list(
-        bedtools_service.subtract_comparison_records(
+        comparison_service.subtract_comparison_records(
             DATASET_A, [DATASET_B, DATASET_C], is_strand=True
         )
     )
-    assert result == EXPECTED_RESULT_SUBTRACT_A_WITH_BC
+    assert _as_json(result) == _as_json(EXPECTED_RESULT_SUBTRACT_A_WITH_BC)
 
 
 def test_intersect_bed6_records(bedtools_service):
@@ -696,4 +710,4 @@ def test_intersect_bed6_records(bedtools_service):
             RECORDS_A, StringIO(BED_FILE), is_strand=True
         )
     )
-    assert result == EXPECTED_RESULT_INTERSECT_BED6_A_WITH_B
+    assert _as_json(result) == _as_json(EXPECTED_RESULT_INTERSECT_BED6_A_WITH_B)
@@ -1,10 +1,12 @@
 from dataclasses import dataclass
+import gzip
 from io import StringIO
+from pathlib import Path
 from typing import Iterable
 import unittest
 
 import pytest
-from flask import Flask
+from flask import Flask, request
 from sqlalchemy.exc import NoResultFound
 
 from scimodom.api.dataset import (
@@ -12,6 +14,7 @@ from scimodom.api.dataset import (
     IntersectResponse,
     ClosestResponse,
     SubtractResponse,
+    ComparisonSummaryResponse,
 )
 from scimodom.services.validator import (
     SpecsError,
@@ -19,6 +22,7 @@ from scimodom.services.validator import (
     DatasetImportError,
 )
 from scimodom.database.models import Data
+from scimodom.services.file import FileService
 from scimodom.utils.dtos.bedtools import (
     ComparisonRecord,
     IntersectRecord,
@@ -26,6 +30,9 @@ from scimodom.utils.dtos.bedtools import (
     SubtractRecord,
     EufRecord,
     Bed6Record,
+    TrustedComparisonRecord,
+    TrustedIntersectRecord,
+    TrustedClosestRecord,
 )
 from scimodom.utils.specs.enums import Identifiers, Strand
 
@@ -107,6 +114,23 @@ class MockFileService:
         else:
             raise FileNotFoundError("That is no valid file ID")
 
+    @staticmethod
+    def get_tmp_upload_file_digest(file_id):
+        if file_id == MockFileService.VALID_TEMP_FILE_ID:
+            return "digest"
+        else:
+            raise FileNotFoundError("That is no valid file ID")
+
+    get_comparison_cache_name = staticmethod(FileService.get_comparison_cache_name)
+
+    @staticmethod
+    def open_comparison_cache(name):  # noqa
+        return None
+
+    @staticmethod
+    def write_comparison_cache(name, eufids, started, chunks):  # noqa
+        return chunks
+
 
 class MockDatasetService:
     @staticmethod
@@ -119,9 +143,9 @@ class MockDatasetService:
 
 class MockDataService:
     @staticmethod
-    def get_by_dataset(dataset_id):
-        for r in DATA_BY_DATASET_ID[dataset_id]:
-            yield r
+    def get_comparison_records(dataset_id):
+        for record in DATA_BY_DATASET_ID[dataset_id]:
+            yield _get_data_as_comparison_record(record)
 
 
 class MockBedtoolsService:
@@ -155,6 +179,20 @@ class MockBedtoolsService:
     ]
     SUBTRACT_RESULT = [SubtractRecord(**DEFAULT_COMPARISON_RECORD.model_dump())]
 
+    # the service returns trusted records, see INTERSECT_RESULT etc. for responses
+    TRUSTED_COMPARISON_RECORD = TrustedComparisonRecord(
+        **DEFAULT_COMPARISON_RECORD.model_dump()
+    )
+    TRUSTED_INTERSECT_RESULT = [
+        TrustedIntersectRecord(a=TRUSTED_COMPARISON_RECORD, b=TRUSTED_COMPARISON_RECORD)
+    ]
+    TRUSTED_CLOSEST_RESULT = [
+        TrustedClosestRecord(
+            a=TRUSTED_COMPARISON_RECORD, b=TRUSTED_COMPARISON_RECORD, distance=50
+        )
+    ]
+    TRUSTED_SUBTRACT_RESULT = [TRUSTED_COMPARISON_RECORD]
+
     @staticmethod
     def _log_operation(operation, a_records, b_records_list, is_strand):
         MockBedtoolsService.last_operation = operation
@@ -167,27 +205,27 @@ class MockBedtoolsService:
         a_records: Iterable[ComparisonRecord],
         b_records_list: list[Iterable[ComparisonRecord]],
         is_strand: bool,
-    ) -> Iterable[IntersectRecord]:
+    ) -> Iterable[TrustedIntersectRecord]:
         self._log_operation("intersect", a_records, b_records_list, is_strand)
-        return MockBedtoolsService.INTERSECT_RESULT
+        return MockBedtoolsService.TRUSTED_INTERSECT_RESULT
 
     def closest_comparison_records(
         self,
         a_records: Iterable[ComparisonRecord],
         b_records_list: list[Iterable[ComparisonRecord]],
         is_strand: bool,
-    ) -> Iterable[ClosestRecord]:
+    ) -> Iterable[TrustedClosestRecord]:
         self._log_operation("closest", a_records, b_records_list, is_strand)
-        return MockBedtoolsService.CLOSEST_RESULT
+        return MockBedtoolsService.TRUSTED_CLOSEST_RESULT
 
     def subtract_comparison_records(
         self,
         a_records: Iterable[ComparisonRecord],
         b_records_list: list[Iterable[ComparisonRecord]],
         is_strand: bool,
-    ) -> Iterable[SubtractRecord]:
+    ) -> Iterable[TrustedComparisonRecord]:
         self._log_operation("subtract", a_records, b_records_list, is_strand)
-        return MockBedtoolsService.SUBTRACT_RESULT
+        return MockBedtoolsService.TRUSTED_SUBTRACT_RESULT
 
 
 class MockBed6Importer:
@@ -390,6 +428,171 @@ def test_subtract(
     check_comparison_mocks("subtract", reference, comparison, upload, euf, strand)
 
 
+@pytest.mark.parametrize("operation", ["intersect", "closest", "subtract"])
+@pytest.mark.parametrize(
+    "comparison,upload",
+    [(["datasetidBxx"], None), (None, MockFileService.VALID_TEMP_FILE_ID)],
+)
+def test_comparison_stream(test_client, mock_services, operation, comparison, upload):
+    url = get_compare_url_parameters(operation, ["datasetidAxx"], comparison, upload)
+    expected_result = test_client.get(url)
+    result = test_client.get(url + "&stream=true")
+    assert result.status == "200 OK"
+    assert result.is_streamed
+    assert result.text == expected_result.text
+    check_comparison_mocks(operation, ["datasetidAxx"], comparison, upload, None, True)
+
+
+def test_comparison_order(test_client, mock_services, mocker):
+    # datasets are compared in the same order for any request order
+    mocker.patch(
+        "scimodom.api.helpers.get_unique_list_from_query_parameter",
+        side_effect=lambda name, list_type: request.args.getlist(name, type=list_type),
+    )
+    for reference, comparison in [
+        (["datasetidBxx", "datasetidAxx"], ["datasetidCxx"]),
+        (["datasetidCxx"], ["datasetidBxx", "datasetidAxx"]),
+    ]:
+        result = test_client.get(
+            get_compare_url_parameters("intersect", reference, comparison)
+        )
+        assert result.status == "200 OK"
+        assert MockBedtoolsService.last_a_dataset == (
+            get_a_datasets_as_comparison_records(*sorted(reference))
+        )
+        assert MockBedtoolsService.last_b_dataset_list == (
+            get_b_dataset_list_as_comparison_records(*sorted(comparison))
+        )
+
+
+@pytest.mark.parametrize("stream", [False, True])
+@pytest.mark.parametrize(
+    "parameters,records,total_records",
+    [
+        ("firstRecord=0&maxRecords=2", [0, 1], 5),
+        ("firstRecord=3&maxRecords=10", [3, 4], 5),
+        ("firstRecord=4", [4], 5),
+        ("maxRecords=1", [0], 5),
+        ("firstRecord=5&maxRecords=1", [], 5),
+    ],
+)
+def test_comparison_page(
+    test_client, mock_services, mocker, stream, parameters, records, total_records
+):
+    result = [
+        MockBedtoolsService.TRUSTED_COMPARISON_RECORD._replace(start=i, end=i + 1)
+        for i in range(5)
+    ]
+    mocker.patch.object(MockBedtoolsService, "TRUSTED_SUBTRACT_RESULT", result)
+    url = get_compare_url_parameters("subtract", ["datasetidAxx"], ["datasetidBxx"])
+    if stream:
+        url += "&stream=true"
+    response = test_client.get(f"{url}&{parameters}")
+    assert response.status == "200 OK"
+    page = SubtractResponse.model_validate_json(response.text)
+    assert [record.start for record in page.records] == records
+    assert page.totalRecords == total_records
+
+
+def test_comparison_page_cache(test_client, mock_services, mocker, tmp_path):
+    file_service = FileService(
+        session=None,  # noqa
+        data_path=Path(tmp_path, "t_data"),
+        temp_path=Path(tmp_path, "t_temp"),
+        upload_path=Path(tmp_path, "t_upload"),
+        import_path=Path(tmp_path, "t_import"),
+        comparison_cache_size=1024 * 1024,
+    )
+    mocker.patch("scimodom.api.dataset.get_file_service", return_value=file_service)
+    result = [
+        MockBedtoolsService.TRUSTED_COMPARISON_RECORD._replace(start=i, end=i + 1)
+        for i in range(5)
+    ]
+    mocker.patch.object(MockBedtoolsService, "TRUSTED_SUBTRACT_RESULT", result)
+    url = get_compare_url_parameters("subtract", ["datasetidAxx"], ["datasetidBxx"])
+
+    # a page request caches the full result, and other pages are read from it
+    response = test_client.get(url + "&firstRecord=0&maxRecords=2")
+    assert [
+        r.start for r in SubtractResponse.model_validate_json(response.text).records
+    ] == [0, 1]
+    MockBedtoolsService.last_operation = "none"
+    for parameters, starts in [
+        ("firstRecord=2&maxRecords=2", [2, 3]),
+        ("firstRecord=4&maxRecords=2", [4]),
+    ]:
+        response = test_client.get(f"{url}&{parameters}")
+        page = SubtractResponse.model_validate_json(response.text)
+        assert [record.start for record in page.records] == starts
+        assert page.totalRecords == 5
+    response = test_client.get(url)
+    assert [
+        record.start
+        for record in SubtractResponse.model_validate_json(response.text).records
+    ] == list(range(5))
+    assert MockBedtoolsService.last_operation == "none"
+
+
+def test_comparison_summary(test_client, mock_services, mocker):
+    a_records = get_a_datasets_as_comparison_records("datasetidAxx")
+    b_record = get_b_dataset_list_as_comparison_records("datasetidBxx")[0][0]
+    result = [
+        TrustedIntersectRecord(a=a_records[0], b=b_record),
+        TrustedIntersectRecord(a=a_records[1], b=b_record),
+    ]
+    mocker.patch.object(MockBedtoolsService, "TRUSTED_INTERSECT_RESULT", result)
+    response = test_client.get(
+        get_compare_url_parameters("intersect", ["datasetidAxx"], ["datasetidBxx"])
+        + "&summary=true"
+    )
+    assert response.status == "200 OK"
+    summary = ComparisonSummaryResponse.model_validate_json(response.text)
+    assert summary.totalRecords == 2
+    assert [(c.chrom, c.records) for c in summary.chroms] == [("17", 2)]
+    (pair,) = summary.pairs
+    assert (pair.reference, pair.comparison) == ("datasetidAxx", "datasetidBxx")
+    assert pair.records == 2
+    # dummy records are all the same, see _get_dummy_data_record
+    assert pair.referenceRecords == 1
+    assert pair.referenceTotal == 3
+    assert pair.fraction == 1 / 3
+    check_comparison_mocks(
+        "intersect", ["datasetidAxx"], ["datasetidBxx"], None, None, True
+    )
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_comparison_cache(test_client, mock_services, mocker, tmp_path, stream):
+    file_service = FileService(
+        session=None,  # noqa
+        data_path=Path(tmp_path, "t_data"),
+        temp_path=Path(tmp_path, "t_temp"),
+        upload_path=Path(tmp_path, "t_upload"),
+        import_path=Path(tmp_path, "t_import"),
+        comparison_cache_size=1024 * 1024,
+    )
+    mocker.patch("scimodom.api.dataset.get_file_service", return_value=file_service)
+    url = get_compare_url_parameters("intersect", ["datasetidAxx"], ["datasetidBxx"])
+    if stream:
+        url += "&stream=true"
+    # a result is cached once it is written
+    expected_text = test_client.get(url).text
+    MockBedtoolsService.last_operation = "none"
+
+    result = test_client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert result.status == "200 OK"
+    assert result.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(result.data).decode("utf-8") == expected_text
+    result = test_client.get(url)
+    assert "Content-Encoding" not in result.headers
+    assert result.text == expected_text
+    assert MockBedtoolsService.last_operation == "none"
+
+    # other strand flag
+    test_client.get(url.replace("strand=true", "strand=false"))
+    assert MockBedtoolsService.last_operation == "intersect"
+
+
 @pytest.mark.parametrize(
     "raise_error,http_status,message,user_message",
     [
@@ -499,6 +702,18 @@ def test_intersect_with_liftover(test_client, mock_services, mocker):
             "Request is missing 'upload' or 'comparison'",
             None,
         ),
+        (
+            "/intersect?reference=datasetidAxx&comparison=datasetidBxx&summary=true&maxRecords=10",
+            400,
+            "Request can only handle 'summary' or 'firstRecord' and 'maxRecords', but not both",
+            None,
+        ),
+        (
+            "/intersect?reference=datasetidAxx&comparison=datasetidBxx&maxRecords=0",
+            400,
+            "Invalid maxRecords",
+            None,
+        ),
         (
             "/intersect?reference=datasetidAxx&comparison=datasetidBxx&upload=im_the_only_valid_temp_file_id&strand=true",
             400,
@@ -610,9 +825,23 @@ def get_compare_url_parameters(
     return f"/{operation}?" + "&".join(parameters)
 
 
+def _get_data_as_comparison_record(data):
+    return TrustedComparisonRecord(
+        chrom=data.chrom,
+        start=data.start,
+        end=data.end,
+        name=data.name,
+        score=data.score,
+        strand=data.strand,
+        eufid=data.dataset_id,
+        coverage=data.coverage,
+        frequency=data.frequency,
+    )
+
+
 def get_a_datasets_as_comparison_records(*dataset_ids):
     return [
-        ComparisonRecord(**r.__dict__, eufid=r.dataset_id)
+        _get_data_as_comparison_record(r)
         for i in dataset_ids
         for r in DATA_BY_DATASET_ID[i]
     ]
@@ -620,9 +849,6 @@ def get_a_datasets_as_comparison_records(*dataset_ids):
 
 def get_b_dataset_list_as_comparison_records(*dataset_ids):
     return [
-        [
-            ComparisonRecord(**r.__dict__, eufid=r.dataset_id)
-            for r in DATA_BY_DATASET_ID[i]
-        ]
+        [_get_data_as_comparison_record(r) for r in DATA_BY_DATASET_ID[i]]
         for i in dataset_ids
     ]
@@ -1,3 +1,4 @@
+import json
 import pytest
 from flask import Flask
 from sqlalchemy.exc import NoResultFound
@@ -12,7 +13,14 @@ from scimodom.api.helpers import (
     get_optional_positive_int,
     get_valid_bam_file,
     validate_request_size,
+    generate_json_records,
+    generate_json_page,
+    get_response_from_json_chunks,
+    get_response_from_trusted_records,
+    get_started,
 )
+from scimodom.utils.dtos.bedtools import TrustedComparisonRecord
+from scimodom.utils.specs.enums import Strand
 
 
 @pytest.fixture
@@ -197,3 +205,79 @@ def test_validate_request_size(test_client):
         returned_message, returned_status = exc.value.response_tuple
         assert returned_message["message"] == "File too large (max. 10 bytes)"
         assert returned_status == 413
+
+
+@pytest.mark.parametrize("count", [0, 1, 1000, 2500])
+def test_get_response_from_json_chunks(count):
+    records = [
+        TrustedComparisonRecord(
+            "1", i, i + 1, "m6A", 1000, Strand.FORWARD, "EUFID0000001", 10, 50
+        )
+        for i in range(count)
+    ]
+    response = get_response_from_json_chunks(
+        generate_json_records(iter(records)), is_stream=True
+    )
+    assert response.is_streamed
+    assert response.mimetype == "application/json"
+    expected_response = get_response_from_trusted_records(records)
+    assert response.json == expected_response.json
+    # one record per line
+    assert len(response.get_data(as_text=True).splitlines()) == (
+        count + 2 if count else 1
+    )
+    response = get_response_from_json_chunks(
+        generate_json_records(iter(records)), is_stream=False
+    )
+    assert not response.is_streamed
+    assert response.json == expected_response.json
+
+
+@pytest.mark.parametrize(
+    "count,first_record,max_records,expected_starts",
+    [
+        (0, 0, None, []),
+        (5, 0, 2, [0, 1]),
+        (5, 3, 10, [3, 4]),
+        (5, 4, None, [4]),
+        (5, 5, 1, []),
+        (2500, 999, 3, [999, 1000, 1001]),
+    ],
+)
+def test_generate_json_page(count, first_record, max_records, expected_starts):
+    records = [
+        TrustedComparisonRecord(
+            "1", i, i + 1, "m6A", 1000, Strand.FORWARD, "EUFID0000001", 10, 50
+        )
+        for i in range(count)
+    ]
+    chunks = list(generate_json_records(records))
+    # as JSON chunks, or as lines of a (cached) file
+    for document in [chunks, "".join(chunks).splitlines(keepends=True)]:
+        page = json.loads(
+            "".join(generate_json_page(document, first_record, max_records))
+        )
+        assert page == {
+            "records": [records[i].to_json_dict() for i in expected_starts],
+            "totalRecords": count,
+        }
+
+
+def test_get_started():
+    def generate():
+        yield 1
+        yield 2
+        raise ValueError("late")
+
+    def generate_fail():
+        raise ValueError("early")
+        yield 1  # noqa
+
+    items = get_started(generate())
+    assert next(items) == 1
+    assert next(items) == 2
+    with pytest.raises(ValueError):
+        next(items)
+    with pytest.raises(ValueError):
+        get_started(generate_fail())
+    assert list(get_started([])) == []
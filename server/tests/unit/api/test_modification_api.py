@@ -8,7 +8,7 @@ from scimodom.api.modification import (
     modification_api,
     IntersectResponse,
 )
-from scimodom.utils.dtos.bedtools import Bed6Record
+from scimodom.utils.dtos.bedtools import Bed6Record, TrustedBed6Record
 from scimodom.utils.specs.enums import Strand, TargetsFileType
 
 
@@ -135,13 +135,16 @@ class MockBedtoolsService:
         b_stream: StringIO,
         is_strand: bool,
         is_sorted: bool = True,
-    ) -> Iterable[Bed6Record]:  # noqa
+    ) -> Iterable[TrustedBed6Record]:  # noqa
         line = b_stream.getvalue()
         if "TargetScan" in line:
             MockBedtoolsService.INTERSECTION_RECORDS = [MockBedtoolsService.RECORDS[0]]
         else:
             MockBedtoolsService.INTERSECTION_RECORDS = [MockBedtoolsService.RECORDS[1]]
-        return MockBedtoolsService.INTERSECTION_RECORDS
+        return [
+            TrustedBed6Record(**r.model_dump())
+            for r in MockBedtoolsService.INTERSECTION_RECORDS
+        ]
 
 
 @pytest.mark.parametrize(
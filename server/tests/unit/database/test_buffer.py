@@ -0,0 +1,138 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.dialects import mysql
+
+from scimodom.database.buffer import (
+    BulkInsertBuffer,
+    InsertBuffer,
+    get_insert_mode,
+    get_insert_modes,
+    _to_tsv_field,
+)
+from scimodom.database.models import Data, DataAnnotation
+from scimodom.utils.specs.enums import InsertMode, Strand
+
+DATA_COLUMNS = [
+    "dataset_id",
+    "modification_id",
+    "chrom",
+    "start",
+    "end",
+    "name",
+    "score",
+    "strand",
+    "thick_start",
+    "thick_end",
+    "item_rgb",
+    "coverage",
+    "frequency",
+]
+
+
+def _get_values(start):
+    return (
+        "dataset_id01",
+        1,
+        "1",
+        start,
+        start + 1,
+        "m6A",
+        0,
+        Strand.REVERSE,
+        start,
+        start + 1,
+        "0,0,0",
+        1,
+        1,
+    )
+
+
+@pytest.mark.parametrize("mode", list(InsertMode))
+def test_bulk_insert_buffer(mode, Session):
+    session = Session()
+    with BulkInsertBuffer[Data](
+        session, Data, DATA_COLUMNS, mode=mode, buffer_size=3
+    ) as buffer:
+        for start in range(10):
+            buffer.queue(_get_values(start))
+        assert buffer.row_count == 9
+    assert buffer.row_count == 10
+    data = session.execute(select(Data).order_by(Data.start)).scalars().all()
+    assert len(data) == 10
+    assert data[9].start == 9
+    assert data[9].strand == Strand.REVERSE
+    assert data[9].item_rgb == "0,0,0"
+
+
+def test_bulk_insert_buffer_no_auto_flush(Session):
+    session = Session()
+    buffer = BulkInsertBuffer[Data](
+        session, Data, DATA_COLUMNS, auto_flush=False, buffer_size=1
+    )
+    buffer.queue(_get_values(0))
+    buffer.queue(_get_values(1))
+    assert session.scalar(select(func.count()).select_from(Data)) == 0
+    buffer.flush()
+    assert session.scalar(select(func.count()).select_from(Data)) == 2
+
+
+def test_bulk_insert_buffer_rollback(Session):
+    session = Session()
+    checkpoint = session.begin_nested()
+    with BulkInsertBuffer[Data](session, Data, DATA_COLUMNS) as buffer:
+        buffer.queue(_get_values(0))
+    assert session.scalar(select(func.count()).select_from(Data)) == 1
+    checkpoint.rollback()
+    assert session.scalar(select(func.count()).select_from(Data)) == 0
+
+
+def test_insert_buffer(Session):
+    session = Session()
+    with InsertBuffer[DataAnnotation](session, buffer_size=1) as buffer:
+        buffer.queue(DataAnnotation(gene_id="ENSG", data_id=1, feature="Exonic"))
+    assert session.scalar(select(func.count()).select_from(DataAnnotation)) == 1
+
+
+def test_get_insert_modes():
+    insert_modes = get_insert_modes(" data=load_data, data_annotation = orm,")
+    assert insert_modes == {
+        "data": InsertMode.LOAD_DATA,
+        "data_annotation": InsertMode.ORM,
+    }
+    assert get_insert_mode(insert_modes, Data) == InsertMode.LOAD_DATA
+    assert get_insert_mode({}, Data) == InsertMode.CORE
+    with pytest.raises(ValueError):
+        get_insert_modes("data=bulk")
+
+
+def test_to_tsv_field():
+    assert _to_tsv_field(None) == "\\N"
+    assert _to_tsv_field(12) == "12"
+    assert _to_tsv_field("a\tb\\c\nd") == "a\\tb\\\\c\\nd"
+
+
+def test_bulk_insert_buffer_load_data(Session, mocker):
+    session = Session()
+    statements = []
+
+    def execute(statement, params):
+        with open(params["path"]) as fh:
+            statements.append((str(statement), fh.read()))
+
+    mocker.patch.object(session, "get_bind").return_value.dialect = mysql.dialect()
+    mocker.patch.object(session, "execute", side_effect=execute)
+    with BulkInsertBuffer[Data](
+        session, Data, DATA_COLUMNS, mode=InsertMode.LOAD_DATA
+    ) as buffer:
+        buffer.queue(_get_values(0))
+        buffer.queue((*_get_values(1)[:10], None, 1, 1))
+    assert statements == [
+        (
+            "LOAD DATA LOCAL INFILE :path INTO TABLE `data` CHARACTER SET utf8mb4 "
+            "(`dataset_id`, `modification_id`, `chrom`, `start`, `end`, `name`, "
+            "`score`, `strand`, `thick_start`, `thick_end`, `item_rgb`, "
+            "`coverage`, `frequency`)",
+            "dataset_id01\t1\t1\t0\t1\tm6A\t0\tREVERSE\t0\t1\t0,0,0\t1\t1\n"
+            "dataset_id01\t1\t1\t1\t2\tm6A\t0\tREVERSE\t1\t2\t\\N\t1\t1\n",
+        )
+    ]
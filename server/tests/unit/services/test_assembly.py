@@ -12,8 +12,11 @@ from scimodom.services.assembly import (
     AssemblyVersionError,
     AssemblyAbortedError,
     LiftOverError,
+    get_chain_index,
 )
-from scimodom.utils.specs.enums import AssemblyFileType
+from scimodom.utils.dtos.bedtools import EufRecord
+from scimodom.utils.importer.columnar_importer import EufColumnarImporter
+from scimodom.utils.specs.enums import AssemblyFileType, Strand
 from tests.mocks.enums import MockEnsembl
 from tests.mocks.io import MockStringIO, MockBytesIO
 from tests.mocks.web import MockWebService
@@ -296,6 +299,115 @@ def test_create_lifted_file_warning(Session, file_service, setup, caplog):  # no
     ]
 
 
+# 1:[0,100) -> 1:[0,100), 1:[100,300) -> 1:[150,350), 1:[400,700) -> 1:[350,650)
+# 2:[0,500) -> X:[0,500) on the reverse strand
+CHAIN_FILE = """chain 1000 1 1000 + 0 700 1 2000 + 0 650 1
+100\t0\t50
+200\t100\t0
+300
+
+chain 1000 2 500 + 0 500 X 500 - 0 500 2
+500
+"""
+
+
+def _get_euf_record(chrom, start, end, strand):
+    return EufRecord(
+        chrom=chrom,
+        start=start,
+        end=end,
+        name="m6A",
+        score=0,
+        strand=strand,
+        thick_start=start,
+        thick_end=end,
+        item_rgb="0,0,0",
+        coverage=10,
+        frequency=20,
+    )
+
+
+@pytest.fixture
+def chain_file(tmp_path):
+    path = Path(tmp_path, "GRCh37_to_GRCh38.chain")
+    path.write_text(CHAIN_FILE)
+    yield path.as_posix()
+
+
+def test_get_chain_index(chain_file):
+    assert get_chain_index(chain_file) is get_chain_index(chain_file)
+    chain_index = get_chain_index(chain_file)
+    assert chain_index.map_interval("1", 50, 51, Strand.FORWARD) == [
+        ("1", 50, 51, Strand.FORWARD)
+    ]
+    assert chain_index.map_interval("chr1", 150, 151, Strand.REVERSE) == [
+        ("1", 200, 201, Strand.REVERSE)
+    ]
+    assert chain_index.map_interval("1", 350, 351, Strand.FORWARD) == []
+    assert chain_index.map_interval("1", 450, 451, Strand.UNDEFINED) == [
+        ("1", 400, 401, Strand.UNDEFINED)
+    ]
+    assert chain_index.map_interval("1", 95, 105, Strand.FORWARD) == [
+        ("1", 95, 100, Strand.FORWARD),
+        ("1", 150, 155, Strand.FORWARD),
+    ]
+    assert chain_index.map_interval("2", 10, 11, Strand.FORWARD) == [
+        ("X", 489, 490, Strand.REVERSE)
+    ]
+    assert chain_index.map_interval("3", 10, 11, Strand.FORWARD) == []
+
+
+def test_lift_over_records(Session, file_service, setup, chain_file):  # noqa
+    service = _get_assembly_service(Session, file_service)
+    records = [
+        _get_euf_record("1", 150, 151, Strand.REVERSE),
+        _get_euf_record("2", 10, 11, Strand.FORWARD),
+    ]
+    lifted_records = list(service.lift_over_records(chain_file, records))
+    assert [(r.chrom, r.start, r.end, r.strand) for r in lifted_records] == [
+        ("1", 200, 201, Strand.REVERSE),
+        ("X", 489, 490, Strand.REVERSE),
+    ]
+    assert lifted_records[0].thick_start == 150
+    assert lifted_records[1].frequency == 20
+
+
+def test_lift_over_records_fail_count(Session, file_service, setup, chain_file):  # noqa
+    service = _get_assembly_service(Session, file_service)
+    records = [
+        _get_euf_record("1", 50, 51, Strand.FORWARD),
+        _get_euf_record("1", 350, 351, Strand.FORWARD),
+    ]
+    with pytest.raises(LiftOverError) as exc:
+        list(service.lift_over_records(chain_file, records))
+    assert (
+        str(exc.value)
+    ) == "Liftover failed: 1 records out of 2 could not be mapped."
+
+
+def test_lift_over_chunks(Session, file_service, setup, chain_file, caplog):  # noqa
+    euf_file = (
+        "1\t150\t151\tm6A\t0\t-\t150\t151\t0,0,0\t10\t20\n"
+        "1\t350\t351\tm6A\t0\t+\t350\t351\t0,0,0\t10\t20\n"
+        "1\t450\t451\tm6A\t0\t.\t450\t451\t0,0,0\t10\t20\n"
+        "2\t10\t11\tm6A\t0\t+\t10\t11\t0,0,0\t10\t20\n"
+    )
+    importer = EufColumnarImporter(stream=StringIO(euf_file), source="test")
+    service = _get_assembly_service(Session, file_service)
+    chunks = list(service.lift_over_chunks(chain_file, importer.parse_chunks()))
+    lifted = [
+        row for chunk in chunks for row in chunk.itertuples(index=False, name=None)
+    ]
+    assert [row[:4] + row[6:7] for row in lifted] == [
+        (1, "1", 200, 201, "-"),
+        (3, "1", 400, 401, "."),
+        (4, "X", 489, 490, "-"),
+    ]
+    assert caplog.messages[-1] == (
+        "1 records could not be mapped... Contact the system administrator if you have questions."
+    )
+
+
 def test_create_lifted_file_fail_version(Session, file_service, setup):  # noqa
     service = _get_assembly_service(Session, file_service)
     assembly = service.get_by_id(1)
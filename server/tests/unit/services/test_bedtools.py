@@ -8,6 +8,8 @@ from scimodom.utils.dtos.bedtools import (
     EufRecord,
     ComparisonRecord,
     Bed6Record,
+    TrustedBed6Record,
+    TrustedComparisonRecord,
 )
 from scimodom.utils.specs.enums import Strand
 
@@ -30,7 +32,7 @@ def test_get_bed6_record_from_bedtool():
             Strand.FORWARD,
         ]
     )
-    assert isinstance(record, Bed6Record)
+    assert isinstance(record, TrustedBed6Record)
     assert record.chrom == "1"
     assert record.start == 1043431
     assert record.end == 1043432
@@ -53,7 +55,7 @@ def test_get_comparison_record_from_bedtool():
             "19",
         ]
     )
-    assert isinstance(record, ComparisonRecord)
+    assert isinstance(record, TrustedComparisonRecord)
     assert record.chrom == "1"
     assert record.start == 1043431
     assert record.end == 1043432
@@ -1,6 +1,16 @@
+from pathlib import Path
+
 import pytest
+from sqlalchemy import delete
 
-from scimodom.services.data import DataService, NoDataRecords
+from scimodom.database.models import Data
+from scimodom.services.data import (
+    DATA_COMPARISON_COLUMNS,
+    DataService,
+    NoDataRecords,
+)
+from scimodom.services.file import FileService
+from scimodom.utils.dtos.bedtools import TrustedComparisonRecord
 from scimodom.utils.specs.enums import Strand
 
 
@@ -20,3 +30,116 @@ def test_get_by_dataset_no_records(Session):
         # get values from generator, otherwise this raises no error!
         list(service.get_by_dataset(["XXXXXXXXXXXX"]))
     assert str(exc.value) == "No records found for dataset id(s) XXXXXXXXXXXX!"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3])
+def test_get_chunks_by_dataset(chunk_size, dataset, Session):  # noqa
+    service = DataService(session=Session())
+    chunks = list(
+        service.get_chunks_by_dataset(
+            ["dataset_id01", "dataset_id03"], chunk_size=chunk_size
+        )
+    )
+    assert all(len(chunk) <= chunk_size for chunk in chunks)
+    records = [record for chunk in chunks for record in chunk]
+    assert [record.id for record in records] == [1, 2, 4, 5, 6, 7]
+    assert tuple(records[0]) == (1, "17", 100001, 100002, "m6A", 1000, Strand.FORWARD)
+
+
+def test_get_chunks_by_dataset_columns(dataset, Session):  # noqa
+    service = DataService(session=Session())
+    (chunk,) = service.get_chunks_by_dataset(
+        "dataset_id01", columns=DATA_COMPARISON_COLUMNS, min_data_id=1
+    )
+    assert len(chunk) == 1
+    assert chunk[0].dataset_id == "dataset_id01"
+    assert (chunk[0].coverage, chunk[0].frequency) == (44, 99)
+
+
+def test_get_chunks_by_dataset_no_records(dataset, Session):  # noqa
+    service = DataService(session=Session())
+    with pytest.raises(NoDataRecords):
+        list(service.get_chunks_by_dataset("dataset_id01", min_data_id=2))
+
+
+def _get_file_service(Session, tmp_path):
+    return FileService(
+        session=Session(),
+        data_path=Path(tmp_path, "t_data"),
+        temp_path=Path(tmp_path, "t_temp"),
+        upload_path=Path(tmp_path, "t_upload"),
+        import_path=Path(tmp_path, "t_import"),
+    )
+
+
+def test_write_snapshot(dataset, Session, tmp_path):  # noqa
+    file_service = _get_file_service(Session, tmp_path)
+    service = DataService(session=Session(), file_service=file_service)
+    expected_records = list(service.get_comparison_records("dataset_id03"))
+    service.write_snapshot("dataset_id03")
+    snapshot = service.get_snapshot("dataset_id03")
+    assert (len(snapshot), snapshot.max_data_id) == (4, 7)
+
+    # records are not read from the database anymore
+    session = Session()
+    session.execute(delete(Data).filter_by(dataset_id="dataset_id03"))
+    session.commit()
+    records = list(service.get_comparison_records("dataset_id03"))
+    assert records == expected_records
+    assert records[0] == TrustedComparisonRecord(
+        "1", 20652450, 20652451, "m6A", 0, Strand.REVERSE, "dataset_id03", 378, 9
+    )
+    assert len(list(service.get_bedrmod_rows("dataset_id03"))) == 4
+
+    service.delete_snapshot("dataset_id03")
+    assert service.get_snapshot("dataset_id03") is None
+    assert list(service.get_bedrmod_rows("dataset_id03")) == []
+    with pytest.raises(NoDataRecords):
+        list(service.get_comparison_records("dataset_id03"))
+
+
+def test_write_snapshot_by_chunks(dataset, Session, tmp_path):  # noqa
+    file_service = _get_file_service(Session, tmp_path)
+    service = DataService(session=Session(), file_service=file_service)
+    expected_rows = list(service.get_bedrmod_rows("dataset_id03"))
+    service.CHUNK_SIZE = 1
+    service.write_snapshot("dataset_id03")
+    snapshot = service.get_snapshot("dataset_id03")
+    assert snapshot.max_data_id == 7
+    assert list(snapshot.get_rows()) == expected_rows
+
+
+def test_write_snapshot_error(dataset, Session, tmp_path, mocker, caplog):  # noqa
+    file_service = _get_file_service(Session, tmp_path)
+    mocker.patch.object(
+        file_service, "update_data_snapshot", side_effect=OSError("No space left")
+    )
+    service = DataService(session=Session(), file_service=file_service)
+    service.write_snapshot("dataset_id03")
+    assert service.get_snapshot("dataset_id03") is None
+    assert "Failed to write snapshot for dataset dataset_id03" in caplog.text
+
+
+def test_write_snapshot_no_records(dataset, Session, tmp_path):  # noqa
+    file_service = _get_file_service(Session, tmp_path)
+    service = DataService(session=Session(), file_service=file_service)
+    service.write_snapshot("dataset_id04")
+    assert service.get_snapshot("dataset_id04") is None
+
+
+def test_get_bedrmod_rows(dataset, Session):  # noqa
+    service = DataService(session=Session())
+    assert service.get_snapshot("dataset_id01") is None
+    assert next(service.get_bedrmod_rows("dataset_id01")) == (
+        "17",
+        100001,
+        100002,
+        "m6A",
+        1000,
+        Strand.FORWARD,
+        100001,
+        100002,
+        "128,128,0",
+        43,
+        100,
+    )
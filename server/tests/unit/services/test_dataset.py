@@ -1,7 +1,11 @@
 from datetime import datetime
 from io import StringIO
+from os import close
+from pathlib import Path
+from tempfile import mkstemp
 from typing import Any, Generator
 
+import pandas as pd  # type: ignore # import-untyped
 import pytest
 from sqlalchemy import select, func
 from sqlalchemy.sql.operators import and_
@@ -11,14 +15,31 @@ from scimodom.database.models import (
     Dataset,
     DatasetModificationAssociation,
     Data,
+    DataAnnotation,
     User,
 )
+from scimodom.services.data import DataService
 from scimodom.services.dataset import DatasetService
-from scimodom.services.validator import _DatasetImportContext, DatasetUpdateError
-from scimodom.utils.importer.bed_importer import EufImporter
+from scimodom.services.file import FileService
+from scimodom.services.validator import (
+    _DatasetImportContext,
+    DatasetExistsError,
+    DatasetUpdateError,
+)
+from scimodom.utils.importer.bed_importer import (
+    BedImportTooManyErrors,
+    EufImporter,
+)
+from scimodom.utils.import_metrics import ImportMetrics
+from scimodom.utils.importer.columnar_importer import EufColumnarImporter
 from scimodom.utils.dtos.bedtools import EufRecord
 from scimodom.utils.specs.euf import EUF_HEADERS
-from scimodom.utils.specs.enums import Strand, AnnotationSource
+from scimodom.utils.specs.enums import (
+    AnnotationSource,
+    ImportMetricsStage,
+    ImportStage,
+    Strand,
+)
 
 
 class MockFileService:
@@ -26,10 +47,20 @@ class MockFileService:
         self._session = session
         self.deleted_bam_files: list[str] = []
         self.deleted_gene_cache: list[int] = []
+        self.deleted_comparison_cache: list[str] = []
 
     def delete_gene_cache(self, selection_id: int) -> None:
         self.deleted_gene_cache.append(selection_id)
 
+    def delete_comparison_cache(self, eufid: str) -> None:
+        self.deleted_comparison_cache.append(eufid)
+
+    @staticmethod
+    def create_temp_file(suffix="") -> str:
+        fp, path = mkstemp(suffix=suffix)
+        close(fp)
+        return path
+
     def remove_bam_file(self, bam_file):
         self.deleted_bam_files.append(bam_file.original_file_name)
         self._session.delete(bam_file)
@@ -60,6 +91,7 @@ class MockFileService:
 class MockAnnotationService:
     def __init__(self):
         self._annotated = False
+        self._min_data_id: int | None = None
 
     def annotate_data(
         self,
@@ -67,12 +99,16 @@ class MockAnnotationService:
         annotation_source: AnnotationSource,
         eufid: str,
         selection_ids: list[int],
+        min_data_id: int | None = None,
+        workers: int | None = None,
     ):
         self._annotated = True
+        self._min_data_id = min_data_id
 
 
 class MockValidatorService:
-    def __init__(self):
+    def __init__(self, session):
+        self._session = session
         self._context: _DatasetImportContext
         self._read_header: dict[str, str]
 
@@ -83,6 +119,13 @@ class MockValidatorService:
         for record in importer.parse():
             yield record
 
+    @staticmethod
+    def get_validated_chunks(
+        importer: EufColumnarImporter, context: _DatasetImportContext
+    ) -> Generator[pd.DataFrame, None, None]:  # noqa
+        for chunk in importer.parse_chunks():
+            yield chunk
+
     def create_import_context(self, importer: EufImporter, **kwargs) -> None:
         kwargs = {**kwargs, "taxa_id": 9606}
         self._context = _DatasetImportContext(**kwargs)
@@ -98,16 +141,26 @@ class MockValidatorService:
     def get_import_context(self) -> _DatasetImportContext:
         return self._context
 
+    def check_for_duplicate_dataset(self, context: _DatasetImportContext) -> None:
+        eufid = self._session.execute(
+            select(Dataset.id).filter_by(project_id=context.smid, title=context.title)
+        ).scalar_one_or_none()
+        if eufid is not None:
+            raise DatasetExistsError(f"Suspected duplicate dataset '{eufid}'.")
+
     def get_validated_header(self) -> dict[str, str]:
         return self._read_header
 
 
-def _get_dataset_service(session):
+def _get_dataset_service(session, data_service=None):
     return DatasetService(
         session=session,
         annotation_service=MockAnnotationService(),
         file_service=MockFileService(session),
-        validator_service=MockValidatorService(),
+        data_service=(
+            DataService(session=session) if data_service is None else data_service
+        ),
+        validator_service=MockValidatorService(session),
     )
 
 
@@ -225,6 +278,195 @@ def test_import_dataset(
     assert service._annotation_service._annotated is True
 
 
+def test_import_dataset_columnar(Session, selection, project):  # noqa
+    euf_file = (
+        GOOD_EUF_FILE
+        + "1\t20\t21\tm6A\t500\t-\t20\t21\t0,0,0\t30\t50\n"
+        + "1\t30\t31\tm6A\t100\t.\t30\t31\t0,0,0\t40\t60\n"
+    )
+    service = _get_dataset_service(Session())
+    service.PROGRESS_INTERVAL = 2
+    progress = []
+    eufid = service.import_dataset(
+        StringIO(euf_file),
+        source="test",
+        smid=project[0].id,
+        title="title",
+        assembly_id=1,
+        modification_ids=[1],
+        technology_id=1,
+        organism_id=1,
+        annotation_source=AnnotationSource.ENSEMBL,
+        columnar_flag=True,
+        progress=lambda *args: progress.append(args),
+    )
+    assert progress == [
+        (ImportStage.VALIDATING, 0, 0),
+        (ImportStage.INSERTING, 1, 0),
+        (ImportStage.INSERTING, 3, 0),
+        (ImportStage.ANNOTATING, 3, 3),
+    ]
+
+    with Session() as session:
+        data = (
+            session.execute(
+                select(Data).where(Data.dataset_id == eufid).order_by(Data.start)
+            )
+            .scalars()
+            .all()
+        )
+        assert [d.start for d in data] == [0, 20, 30]
+        assert [d.strand for d in data] == [
+            Strand.FORWARD,
+            Strand.REVERSE,
+            Strand.UNDEFINED,
+        ]
+        assert [d.modification_id for d in data] == [1, 1, 1]
+        assert data[2].score == 100
+        assert data[2].coverage == 40
+        assert data[2].frequency == 60
+
+
+def test_import_dataset_metrics(Session, selection, project):  # noqa
+    euf_file = GOOD_EUF_FILE + "1\t20\t21\tm6A\t500\t-\t20\t21\t0,0,0\t30\t50\n"
+    service = _get_dataset_service(Session())
+    metrics = ImportMetrics()
+    for title in ["title1", "title2"]:
+        service.import_dataset(
+            StringIO(euf_file),
+            source="test",
+            smid=project[0].id,
+            title=title,
+            assembly_id=1,
+            modification_ids=[1],
+            technology_id=1,
+            organism_id=1,
+            annotation_source=AnnotationSource.ENSEMBL,
+            metrics=metrics,
+        )
+    stages = metrics.get_stages()
+    assert [m.stage for m in stages] == [ImportMetricsStage.INSERTION]
+    assert stages[0].rows_in == 4
+    assert stages[0].rows_out == 4
+    assert stages[0].peak_rss > 0
+    assert metrics.wall_time >= stages[0].wall_time > 0
+
+
+def test_import_dataset_prescan(Session, selection, project, mocker):  # noqa
+    euf_file = GOOD_EUF_FILE + "1\t20\t21\tm6A\t500\t*\t20\t21\t0,0,0\t30\t50\n"
+    service = _get_dataset_service(Session())
+    generate_eufid = mocker.patch.object(service, "_generate_eufid")
+    with pytest.raises(BedImportTooManyErrors):
+        service.import_dataset(
+            StringIO(euf_file),
+            source="test",
+            smid=project[0].id,
+            title="title",
+            assembly_id=1,
+            modification_ids=[1],
+            technology_id=1,
+            organism_id=1,
+            annotation_source=AnnotationSource.ENSEMBL,
+        )
+    generate_eufid.assert_not_called()
+
+
+def _get_clustered_error_euf_file():
+    # 700 errors in the first 10700 records, but the error
+    # rate of the whole file is within the limit
+    error_line = "1\t20\t21\tm6A\t500\t*\t20\t21\t0,0,0\t30\t50\n"
+    valid_lines = [
+        f"1\t{start}\t{start + 1}\tm6A\t500\t+\t{start}\t{start + 1}\t0,0,0\t30\t50\n"
+        for start in range(20, 20020)
+    ]
+    return GOOD_EUF_FILE + error_line * 700 + "".join(valid_lines)
+
+
+@pytest.mark.parametrize("early_abort_flag", [False, True])
+def test_import_dataset_clustered_errors(
+    early_abort_flag, Session, selection, project
+):  # noqa
+    service = _get_dataset_service(Session())
+    kwargs = dict(
+        source="test",
+        smid=project[0].id,
+        title="title",
+        assembly_id=1,
+        modification_ids=[1],
+        technology_id=1,
+        organism_id=1,
+        annotation_source=AnnotationSource.ENSEMBL,
+        dry_run_flag=True,
+        early_abort_flag=early_abort_flag,
+    )
+    if early_abort_flag:
+        with pytest.raises(BedImportTooManyErrors):
+            service.import_dataset(StringIO(_get_clustered_error_euf_file()), **kwargs)
+    else:
+        eufid = service.import_dataset(
+            StringIO(_get_clustered_error_euf_file()), **kwargs
+        )
+        assert eufid == "DRYRUNDRYRUN"
+
+
+@pytest.mark.parametrize("columnar_flag", [False, True])
+def test_import_prepared_dataset(
+    columnar_flag, Session, selection, project, freezer
+):  # noqa
+    euf_file = GOOD_EUF_FILE + "1\t20\t21\tm6A\t500\t-\t20\t21\t\t30\t50\n"
+    service = _get_dataset_service(Session())
+    freezer.move_to("2017-05-20 11:00:23")
+    task = service.prepare_import(
+        StringIO(euf_file),
+        source="test",
+        smid=project[0].id,
+        title="title",
+        assembly_id=1,
+        modification_ids=[1],
+        technology_id=1,
+        organism_id=1,
+        annotation_source=AnnotationSource.ENSEMBL,
+        columnar_flag=columnar_flag,
+    )
+    assert task.context.eufid == ""
+    with Session() as session:
+        assert session.scalar(select(func.count()).select_from(Dataset)) == 0
+
+    prepared = service.prepare_records(task, StringIO(euf_file))
+    assert prepared.record_count == 2
+    eufid = service.import_prepared_dataset(prepared)
+    assert not Path(prepared.records_file).exists()
+
+    with Session() as session:
+        dataset = session.get_one(Dataset, eufid)
+        assert dataset.title == "title"
+        assert dataset.date_added == datetime(2017, 5, 20, 11, 0, 23)
+        assert dataset.experiment == "Description of experiment."
+        data = (
+            session.execute(
+                select(Data).where(Data.dataset_id == eufid).order_by(Data.start)
+            )
+            .scalars()
+            .all()
+        )
+        assert [(d.chrom, d.start, d.strand) for d in data] == [
+            ("1", 0, Strand.FORWARD),
+            ("1", 20, Strand.REVERSE),
+        ]
+        assert [d.modification_id for d in data] == [1, 1]
+        assert data[1].item_rgb == ""
+        assert data[1].frequency == 50
+    assert service._annotation_service._annotated is True
+
+    # a dataset with the same title was created in the meantime
+    prepared = service.prepare_records(task, StringIO(euf_file))
+    with pytest.raises(DatasetExistsError):
+        service.import_prepared_dataset(prepared)
+    assert not Path(prepared.records_file).exists()
+    with Session() as session:
+        assert session.scalar(select(func.count()).select_from(Data)) == 2
+
+
 def test_import_dataset_dry_run(Session, selection, project, freezer):  # noqa
     service = _get_dataset_service(Session())
     file = StringIO(GOOD_EUF_FILE)
@@ -344,6 +586,8 @@ def test_import_dataset_update_with_change(
     )
 
     assert new_eufid == eufid
+    # before and after the update
+    assert service._file_service.deleted_comparison_cache == [eufid, eufid]
     with Session() as session:
         dataset = session.get_one(Dataset, eufid)
         assert dataset.title == "title"
@@ -365,6 +609,135 @@ def test_import_dataset_update_with_change(
         assert data[0].score == 555
 
 
+def test_import_dataset_update_snapshot(Session, selection, project, tmp_path):  # noqa
+    file_service = FileService(
+        session=Session(),
+        data_path=Path(tmp_path, "t_data"),
+        temp_path=Path(tmp_path, "t_temp"),
+        upload_path=Path(tmp_path, "t_upload"),
+        import_path=Path(tmp_path, "t_import"),
+    )
+    data_service = DataService(session=Session(), file_service=file_service)
+    service = _get_dataset_service(Session(), data_service)
+    parameters: dict[str, Any] = {
+        "source": "test",
+        "smid": project[0].id,
+        "title": "title",
+        "assembly_id": 1,
+        "modification_ids": [1],
+        "technology_id": 1,
+        "organism_id": 1,
+        "annotation_source": AnnotationSource.ENSEMBL,
+    }
+    eufid = service.import_dataset(StringIO(GOOD_EUF_FILE), **parameters)
+    snapshot = data_service.get_snapshot(eufid)
+    assert list(snapshot.get_rows(["chrom", "start", "score"])) == [("1", 0, 1000)]
+
+    service.import_dataset(
+        StringIO(GOOD_EUF_FILE.replace("1000", "555")), eufid=eufid, **parameters
+    )
+    snapshot = data_service.get_snapshot(eufid)
+    assert list(snapshot.get_rows(["chrom", "start", "score"])) == [("1", 0, 555)]
+
+    with Session() as session:
+        service.delete_dataset(session.get_one(Dataset, eufid))
+    assert data_service.get_snapshot(eufid) is None
+
+
+def test_import_dataset_update_incremental(
+    Session, selection, project, freezer
+):  # noqa
+    service = _get_dataset_service(Session())
+    project_id = project[0].id
+    kwargs = {
+        "source": "test",
+        "smid": project_id,
+        "title": "title",
+        "assembly_id": 1,
+        "modification_ids": [1],
+        "technology_id": 1,
+        "organism_id": 1,
+        "annotation_source": AnnotationSource.ENSEMBL,
+    }
+    euf_file = (
+        GOOD_EUF_FILE
+        + "1\t20\t21\tm6A\t500\t-\t20\t21\t0,0,0\t30\t50\n"
+        + "1\t30\t31\tm6A\t100\t.\t30\t31\t0,0,0\t40\t60\n"
+    )
+    eufid = service.import_dataset(StringIO(euf_file), **kwargs)
+    with Session() as session:
+        ids_by_start = {
+            data.start: data.id
+            for data in session.execute(select(Data)).scalars().all()
+        }
+        session.add(
+            DataAnnotation(
+                data_id=ids_by_start[30], gene_id="ENSG00000000001", feature="Exonic"
+            )
+        )
+        session.commit()
+
+    # change one record, delete one, add one, keep one
+    euf_file = (
+        GOOD_EUF_FILE
+        + "1\t20\t21\tm6A\t500\t-\t20\t21\t0,0,0\t35\t55\n"
+        + "1\t40\t41\tm6A\t100\t+\t40\t41\t0,0,0\t40\t60\n"
+    )
+    service.import_dataset(StringIO(euf_file), eufid=eufid, **kwargs)
+
+    assert service._annotation_service._min_data_id == max(ids_by_start.values())
+    with Session() as session:
+        data = session.execute(select(Data).order_by(Data.start)).scalars().all()
+        assert [(d.start, d.coverage, d.frequency) for d in data] == [
+            (0, 10, 1),
+            (20, 35, 55),
+            (40, 40, 60),
+        ]
+        assert data[0].id == ids_by_start[0]
+        assert data[1].id == ids_by_start[20]
+        assert data[2].id > max(ids_by_start.values())
+        assert session.scalar(select(func.count()).select_from(DataAnnotation)) == 0
+
+
+def test_import_dataset_update_duplicates(Session, selection, project, freezer):  # noqa
+    service = _get_dataset_service(Session())
+    project_id = project[0].id
+    kwargs = {
+        "source": "test",
+        "smid": project_id,
+        "title": "title",
+        "assembly_id": 1,
+        "modification_ids": [1],
+        "technology_id": 1,
+        "organism_id": 1,
+        "annotation_source": AnnotationSource.ENSEMBL,
+    }
+    duplicate = "1\t20\t21\tm6A\t500\t-\t20\t21\t0,0,0\t30\t50\n"
+    euf_file = GOOD_EUF_FILE + duplicate * 3
+    eufid = service.import_dataset(StringIO(euf_file), **kwargs)
+    with Session() as session:
+        data_ids = session.execute(select(Data.id).order_by(Data.id)).scalars().all()
+    assert len(data_ids) == 4
+
+    # sites are matched one to one, and none is added again
+    for _ in range(2):
+        service.import_dataset(StringIO(euf_file), eufid=eufid, **kwargs)
+        with Session() as session:
+            assert (
+                session.execute(select(Data.id).order_by(Data.id)).scalars().all()
+                == data_ids
+            )
+
+    # one duplicate less is one deletion, the last ID
+    euf_file = GOOD_EUF_FILE + duplicate * 2
+    service.import_dataset(StringIO(euf_file), eufid=eufid, **kwargs)
+    with Session() as session:
+        assert (
+            session.execute(select(Data.id).order_by(Data.id)).scalars().all()
+            == data_ids[:-1]
+        )
+
+
 def test_import_dataset_update_fail(Session, selection, dataset, project):  # noqa
     service = _get_dataset_service(Session())
     with pytest.raises(DatasetUpdateError) as exc:
@@ -424,3 +797,8 @@ def test_delete_dataset(Session, dataset, bam_file):
             "dataset_id01_1.bam",
             "dataset_id01_2.bam",
         ]
+        assert service._file_service.deleted_comparison_cache == [
+            "dataset_id01",
+            "dataset_id03",
+            "dataset_id04",
+        ]
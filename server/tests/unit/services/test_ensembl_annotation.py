@@ -13,7 +13,7 @@ from scimodom.services.annotation import (
     AnnotationNotFoundError,
     AnnotationVersionError,
 )
-from scimodom.utils.specs.enums import AssemblyFileType
+from scimodom.utils.specs.enums import AssemblyFileType, Strand
 from tests.mocks.web import MockWebService
 from tests.mocks.enums import MockEnsembl
 
@@ -33,6 +33,9 @@ class MockBedToolsService:
     def ensembl_to_bed_features(self, annotation_path, chrom_file, features):  # noqa
         pass
 
+    def ensembl_to_feature_index(self, annotation_path, features):  # noqa
+        pass
+
     def annotate_data_using_ensembl(self, annotation_path, features, records):  # noqa
         pass
 
@@ -174,3 +177,25 @@ def test_ensembl_annotation_paths(Session, setup, mocker):
     )
     assert annotation_file == expected_annotation_path
     assert url == expected_url
+
+
+@pytest.mark.parametrize(
+    "max_size,expected_sizes",
+    [(10, [3, 1, 2]), (2, [2, 1, 1, 2]), (1, [1, 1, 1, 1, 1, 1])],
+)
+def test_get_shards(max_size, expected_sizes):
+    chunk = [
+        (1, "1", 10, 11, "m6A", 1000, Strand.FORWARD),
+        (2, "1", 20, 21, "m6A", 1000, Strand.FORWARD),
+        (3, "1", 30, 31, "m6A", 1000, Strand.REVERSE),
+        (4, "1", 40, 41, "m6A", 1000, Strand.FORWARD),
+        (5, "2", 10, 11, "m6A", 1000, Strand.FORWARD),
+        (6, "2", 20, 21, "m6A", 1000, Strand.FORWARD),
+    ]
+    shards = EnsemblAnnotationService._get_shards(chunk, max_size)
+    assert [len(shard) for shard in shards] == expected_sizes
+    for shard in shards:
+        assert len({(record.chrom, record.strand) for record in shard}) == 1
+    assert sorted(record.id for shard in shards for record in shard) == list(
+        range(1, 7)
+    )
@@ -1,8 +1,12 @@
+from pathlib import Path
+
+from scimodom.services.data import DataService
 from scimodom.services.exporter import Exporter
+from scimodom.services.file import FileService
 
 
 def test_exporter(Session, dataset):  # noqa
-    exporter = Exporter(Session())
+    exporter = Exporter(Session(), DataService(Session()))
     assert (
         exporter.get_dataset_file_name(dataset[0].id) == "dataset_title.bedrmod"
     )  # noqa
@@ -29,3 +33,23 @@ def test_exporter(Session, dataset):  # noqa
 Y\t200001\t200002\tm5C\t900\t-\t200001\t200002\t0,0,128\t44\t99
 """
     )
+
+
+def test_exporter_snapshot(Session, dataset, tmp_path):  # noqa
+    file_service = FileService(
+        session=Session(),
+        data_path=Path(tmp_path, "t_data"),
+        temp_path=Path(tmp_path, "t_temp"),
+        upload_path=Path(tmp_path, "t_upload"),
+        import_path=Path(tmp_path, "t_import"),
+    )
+    data_service = DataService(Session(), file_service=file_service)
+    expected_content = b"".join(
+        Exporter(Session(), data_service).generate_dataset(dataset[0].id)
+    )
+    data_service.write_snapshot(dataset[0].id)
+    assert data_service.get_snapshot(dataset[0].id) is not None
+    content = b"".join(
+        Exporter(Session(), data_service).generate_dataset(dataset[0].id)
+    )
+    assert content == expected_content
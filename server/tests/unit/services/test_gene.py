@@ -19,6 +19,12 @@ class MockFileService:
         for gene in genes:
             self._genes.append(gene)
 
+    def merge_gene_cache(self, selection_id: int, genes: Iterable[str]) -> int:
+        if not self._genes:
+            raise FileNotFoundError
+        self._genes = sorted(set(self._genes) | set(genes))
+        return len(self._genes)
+
     def get_gene_cache(self, selection_id: int) -> Iterable[str]:
         if not self._genes:
             raise FileNotFoundError
@@ -33,14 +39,7 @@ def _get_gene_service(session):
     )
 
 
-# tests
-
-
-def test_gene_cache(Session, project, annotation):
-    gene_service = _get_gene_service(Session())
-    assert gene_service.get_genes([4]) == ["ENSG2", "GENE1", "GENE3"]
-    assert gene_service.get_genes([1, 2, 3, 4]) == ["ENSG2", "GENE1", "GENE3"]
-
+def _add_dataset(Session, project):
     with Session() as session:
         stamp = datetime(2024, 10, 21, 8, 10, 27)
         dataset = Dataset(
@@ -77,5 +76,30 @@ def test_gene_cache(Session, project, annotation):
         session.add_all([dataset, data, association, data_annotation])
         session.commit()
 
+
+# tests
+
+
+def test_gene_cache(Session, project, annotation):
+    gene_service = _get_gene_service(Session())
+    assert gene_service.get_genes([4]) == ["ENSG2", "GENE1", "GENE3"]
+    assert gene_service.get_genes([1, 2, 3, 4]) == ["ENSG2", "GENE1", "GENE3"]
+
+    _add_dataset(Session, project)
+
     gene_service.update_gene_cache(4)
     assert gene_service.get_genes([4]) == ["ENSG2", "GENE1", "GENE3", "GENE4"]
+
+
+def test_merge_gene_cache(Session, project, annotation):
+    gene_service = _get_gene_service(Session())
+    assert gene_service.get_genes([4]) == ["ENSG2", "GENE1", "GENE3"]
+    assert gene_service.check_gene_cache(4)
+
+    _add_dataset(Session, project)
+
+    assert not gene_service.check_gene_cache(4)
+    assert gene_service.merge_gene_cache(4, "dataset_id01") == 3
+    assert gene_service.merge_gene_cache(4, "ABCDEFGHIJKL") == 4
+    assert gene_service.get_genes([4]) == ["ENSG2", "GENE1", "GENE3", "GENE4"]
+    assert gene_service.check_gene_cache(4)
@@ -0,0 +1,199 @@
+from pathlib import Path
+from posixpath import join as urljoin
+
+import pytest
+from sqlalchemy import select
+
+from scimodom.database.models import (
+    Annotation,
+    DataAnnotation,
+    GenomicAnnotation,
+    Sprinzl,
+)
+from scimodom.services.annotation import GtRNAdbAnnotationService
+from scimodom.services.annotation.gtrnadb import GTRNADB_URL, SPRINZL_INDEX
+from scimodom.services.data import DataService, NoDataRecords
+from scimodom.services.file import FileService
+from scimodom.utils.dtos.bedtools import GenomicAnnotationRecord
+from scimodom.utils.specs.enums import AssemblyFileType
+from tests.mocks.web import MockWebService
+
+# tRNA-Ala with an intron at 17:100001-100011 (site data1), and
+# tRNA-Gly on the reverse strand at Y:199951-200031 (site data2)
+BED12 = (
+    "chr17\t99991\t100071\ttRNA-Ala-AGC-1-1\t1000\t+\t99991\t100071\t0\t2\t10,60,\t0,20,\n"
+    "chrY\t199951\t200031\ttRNA-Gly-GCC-1-1\t1000\t-\t199951\t200031\t0\t1\t80,\t0,\n"
+    "chrUn_KI270442v1\t1\t73\ttRNA-Gly-GCC-2-1\t1000\t+\t1\t73\t0\t1\t72,\t0,\n"
+)
+
+MAPPING = (
+    "seq_id\tseq_pos\tsprinzl\n"
+    "Homo_sapiens_tRNA-Ala-AGC-1-1\t11\t37a\n"
+    "Homo_sapiens_tRNA-Gly-GCC-1-1\t30\t26\n"
+    "Homo_sapiens_tRNA-Gly-GCC-1-1\t31\t27\n"
+)
+
+GENES = ["Homo_sapiens_tRNA-Ala-AGC-1-1", "Homo_sapiens_tRNA-Gly-GCC-1-1"]
+
+
+class MockBedToolsService:
+    def __init__(self):
+        self.features = None
+
+    def gtrnadb_to_bed_features(self, annotation_file, features):  # noqa
+        self.features = features
+
+    @staticmethod
+    def get_gtrnadb_annotation_records(annotation_file, annotation_id, organism):
+        with open(annotation_file, "r") as fh:
+            for line in fh:
+                name = line.split("\t")[3]
+                yield GenomicAnnotationRecord(
+                    id=f"{organism}_{name}",
+                    annotation_id=annotation_id,
+                    name=name,
+                    biotype="tRNA",
+                )
+
+
+class MockExternalService:
+    @staticmethod
+    def get_sprinzl_mapping(model_file, fasta_file, sprinzl_file):  # noqa
+        assert Path(model_file).name == "eukaryota.cm"
+        assert Path(sprinzl_file).name == "eukaryota.txt"
+        mapping_file = Path(fasta_file).with_suffix(".tab")
+        with open(mapping_file, "w") as fh:
+            fh.write(MAPPING)
+        return mapping_file.as_posix()
+
+
+class MockGeneService:
+    pass
+
+
+@pytest.fixture
+def gtrnadb_annotation(Session, dataset):  # noqa
+    session = Session()
+    session.add(
+        Annotation(release=21, taxa_id=9606, source="gtrnadb", version="EyRBnPeVwbzW")
+    )
+    session.commit()
+    yield session.scalar(select(Annotation).filter_by(source="gtrnadb"))
+
+
+def _get_file_service(Session, tmp_path):
+    return FileService(
+        session=Session(),
+        data_path=Path(tmp_path, "t_data"),
+        temp_path=Path(tmp_path, "t_temp"),
+        upload_path=Path(tmp_path, "t_upload"),
+        import_path=Path(tmp_path, "t_import"),
+    )
+
+
+def _get_gtrnadb_annotation_service(Session, tmp_path, url_to_data=None):
+    return GtRNAdbAnnotationService(
+        session=Session(),
+        data_service=DataService(session=Session()),
+        bedtools_service=MockBedToolsService(),  # noqa
+        external_service=MockExternalService(),  # noqa
+        web_service=MockWebService(url_to_data=url_to_data),  # noqa
+        gene_service=MockGeneService(),  # noqa
+        file_service=_get_file_service(Session, tmp_path),
+    )
+
+
+def _get_urls():
+    return {
+        urljoin(GTRNADB_URL, "eukaryota", "Hsapi38", f"hg38-tRNAs.{fmt}"): data
+        for fmt, data in [("bed", BED12.encode()), ("fa", b">tRNA\nGCAU\n")]
+    }
+
+
+def _write_chrom_file(service):
+    chrom_file = service._file_service.get_assembly_file_path(
+        9606, AssemblyFileType.CHROM
+    )
+    chrom_file.parent.mkdir(parents=True, exist_ok=True)
+    chrom_file.write_text("17\t83257441\nY\t57227415\n")
+
+
+def _get_annotations(Session):
+    annotations = sorted(
+        (row.data_id, row.gene_id, row.feature)
+        for row in Session().execute(
+            select(
+                DataAnnotation.data_id, DataAnnotation.gene_id, DataAnnotation.feature
+            )
+        )
+    )
+    positions = sorted(
+        (row.data_id, row.position)
+        for row in Session().execute(select(Sprinzl.data_id, Sprinzl.position))
+    )
+    return annotations, positions
+
+
+# tests
+
+
+def test_create_annotation(Session, tmp_path, gtrnadb_annotation):
+    service = _get_gtrnadb_annotation_service(Session, tmp_path, _get_urls())
+    _write_chrom_file(service)
+    service.create_annotation(9606, domain="eukaryota", name="Hsapi38")
+
+    release_path = service.get_release_path(gtrnadb_annotation)
+    assert release_path == Path(
+        tmp_path, "t_data", "annotation", "Homo_sapiens", "GRCh38", "21"
+    )
+    with open(Path(release_path, "hg38-tRNAs.bed"), "r") as fh:
+        assert [line.split("\t")[0] for line in fh] == ["17", "Y"]
+    assert Path(release_path, SPRINZL_INDEX).is_dir()
+    assert service._bedtools_service.features == ["exon", "intron"]
+    genes = Session().scalars(
+        select(GenomicAnnotation.id).filter_by(annotation_id=gtrnadb_annotation.id)
+    )
+    assert sorted(genes) == GENES
+
+
+def test_create_annotation_index_only(Session, tmp_path, gtrnadb_annotation):
+    service = _get_gtrnadb_annotation_service(Session, tmp_path)
+    release_path = service.get_release_path(gtrnadb_annotation)
+    release_path.mkdir(parents=True)
+    Path(release_path, "hg38-tRNAs.bed").write_text(BED12)
+    Path(release_path, "hg38-tRNAs.fa").write_text(">tRNA\nGCAU\n")
+    session = Session()
+    for gene_id in GENES:
+        session.add(GenomicAnnotation(id=gene_id, annotation_id=gtrnadb_annotation.id))
+    session.commit()
+
+    # release exists, nothing is downloaded
+    service.create_annotation(9606, domain="eukaryota", name="Hsapi38")
+    assert Path(release_path, SPRINZL_INDEX).is_dir()
+    assert service._bedtools_service.features is None
+
+
+def test_annotate_data(Session, tmp_path, gtrnadb_annotation):
+    service = _get_gtrnadb_annotation_service(Session, tmp_path, _get_urls())
+    _write_chrom_file(service)
+    service.create_annotation(9606, domain="eukaryota", name="Hsapi38")
+    service.annotate_data(9606, "dataset_id01", [])
+    Session().commit()
+
+    annotations, positions = _get_annotations(Session)
+    assert annotations == [
+        (1, "Homo_sapiens_tRNA-Ala-AGC-1-1", "Intronic"),
+        (2, "Homo_sapiens_tRNA-Gly-GCC-1-1", "Exonic"),
+    ]
+    assert positions == [(1, "37a"), (2, "26")]
+
+
+def test_annotate_data_no_records(Session, tmp_path, gtrnadb_annotation):
+    service = _get_gtrnadb_annotation_service(Session, tmp_path, _get_urls())
+    _write_chrom_file(service)
+    service.create_annotation(9606, domain="eukaryota", name="Hsapi38")
+    # no records added by an update
+    service.annotate_data(9606, "dataset_id01", [], min_data_id=7)
+    assert _get_annotations(Session) == ([], [])
+    with pytest.raises(NoDataRecords):
+        service.annotate_data(9606, "dataset_idXX", [])
@@ -0,0 +1,139 @@
+import gzip
+from pathlib import Path
+
+import pytest
+
+from scimodom.services.file import FileService
+from scimodom.services.import_job import ImportJobNotFoundError, ImportJobService
+from scimodom.utils.dtos.import_job import DatasetImportRequestDto
+from scimodom.utils.importer.bed_importer import BedImportTooManyErrors
+from scimodom.utils.specs.enums import (
+    AnnotationSource,
+    ImportJobStatus,
+    ImportStage,
+)
+
+
+class MockDatasetService:
+    def __init__(self, exception: Exception | None = None):
+        self._exception = exception
+        self.imported: list[dict] = []
+
+    def import_dataset(self, stream, progress, **kwargs) -> str:
+        self.imported.append({"content": stream.read(), **kwargs})
+        progress(ImportStage.VALIDATING, 0, 0)
+        progress(ImportStage.INSERTING, 3, 2)
+        if self._exception is not None:
+            raise self._exception
+        progress(ImportStage.ANNOTATING, 3, 2)
+        return "EUFIDEUFID00"
+
+
+def _get_file_service(Session, tmp_path):
+    return FileService(
+        session=Session(),
+        data_path=Path(tmp_path, "t_data"),
+        temp_path=Path(tmp_path, "t_temp"),
+        upload_path=Path(tmp_path, "t_upload"),
+        import_path=Path(tmp_path, "t_import"),
+    )
+
+
+def _get_import_job_service(Session, tmp_path, dataset_service):
+    return ImportJobService(
+        session=Session(),
+        file_service=_get_file_service(Session, tmp_path),
+        dataset_service=dataset_service,
+    )
+
+
+def _submit(service, tmp_path, content: bytes = b"records") -> str:
+    upload = Path(tmp_path, "t_upload", "upload")
+    upload.write_bytes(content)
+    request = DatasetImportRequestDto(
+        file_path=upload.as_posix(),
+        smid="ABCDEFGH",
+        title="title",
+        assembly_id=1,
+        modification_ids=[1, 2],
+        organism_id=1,
+        technology_id=1,
+        annotation_source=AnnotationSource.ENSEMBL,
+        user_email="user@example.com",
+    )
+    return service.submit_dataset_import(request)
+
+
+# tests
+
+
+def test_submit_dataset_import(Session, tmp_path):
+    service = _get_import_job_service(Session, tmp_path, MockDatasetService())
+    job_id = _submit(service, tmp_path)
+    job = service.get_job(job_id)
+    assert job.status == ImportJobStatus.QUEUED
+    assert job.stage is None
+    assert job.request.user_email == "user@example.com"
+    assert Path(job.request.file_path).read_text() == "records"
+    assert not Path(tmp_path, "t_upload", "upload").exists()
+    with pytest.raises(ImportJobNotFoundError):
+        service.get_job("unknown")
+
+
+def test_run_next_job(Session, tmp_path):
+    dataset_service = MockDatasetService()
+    service = _get_import_job_service(Session, tmp_path, dataset_service)
+    assert service.run_next_job() is None
+    job_id = _submit(service, tmp_path)
+
+    job = service.run_next_job()
+    assert job.job_id == job_id
+    assert service.run_next_job() is None
+    job = service.get_job(job_id)
+    assert job.status == ImportJobStatus.DONE
+    assert job.stage == ImportStage.ANNOTATING
+    assert job.rows_parsed == 3
+    assert job.rows_inserted == 2
+    assert job.eufid == "EUFIDEUFID00"
+    assert dataset_service.imported[0]["content"] == "records"
+    assert dataset_service.imported[0]["modification_ids"] == [1, 2]
+    assert not Path(job.request.file_path).exists()
+    assert not Path(tmp_path, "t_data", "jobs", "import", f"{job_id}.lock").exists()
+
+
+def test_run_next_job_compressed(Session, tmp_path):
+    dataset_service = MockDatasetService()
+    service = _get_import_job_service(Session, tmp_path, dataset_service)
+    _submit(service, tmp_path, gzip.compress(b"records"))
+    assert service.run_next_job().status == ImportJobStatus.DONE
+    assert dataset_service.imported[0]["content"] == "records"
+
+
+def test_run_next_job_fail(Session, tmp_path):
+    exception = BedImportTooManyErrors("Found too many errors", "line 1: error")
+    service = _get_import_job_service(Session, tmp_path, MockDatasetService(exception))
+    job_id = _submit(service, tmp_path)
+    assert service.run_next_job().status == ImportJobStatus.FAILED
+    job = service.get_job(job_id)
+    assert job.status == ImportJobStatus.FAILED
+    assert job.stage == ImportStage.INSERTING
+    assert job.message == "Found too many errors"
+    assert job.error_summary == "line 1: error"
+    assert job.eufid is None
+    assert not Path(job.request.file_path).exists()
+    assert not Path(tmp_path, "t_data", "jobs", "import", f"{job_id}.lock").exists()
+
+
+def test_run_next_job_interrupted(Session, tmp_path):
+    dataset_service = MockDatasetService()
+    service = _get_import_job_service(Session, tmp_path, dataset_service)
+    job_id = _submit(service, tmp_path)
+    job = service.get_job(job_id)
+    service._update_job(job, status=ImportJobStatus.RUNNING)
+
+    assert service.run_next_job() is None
+    job = service.get_job(job_id)
+    assert job.status == ImportJobStatus.FAILED
+    assert job.message == "The import was interrupted."
+    assert dataset_service.imported == []
+    assert not Path(tmp_path, "t_data", "jobs", "import", f"{job_id}.lock").exists()
@@ -0,0 +1,191 @@
+from pathlib import Path
+from posixpath import join as urljoin
+
+import pytest
+from sqlalchemy import select
+
+from scimodom.database.models import (
+    Annotation,
+    DataAnnotation,
+    DataAnnotationShadow,
+    GenomicAnnotation,
+)
+from scimodom.services.annotation import (
+    EnsemblAnnotationService,
+    ReannotationError,
+    ReannotationService,
+)
+from scimodom.services.data import DataService
+from scimodom.services.file import FileService
+from scimodom.utils.dtos.bedtools import DataAnnotationRecord, GenomicAnnotationRecord
+from scimodom.utils.specs.enums import Ensembl, ReannotationStage
+from tests.mocks.web import MockWebService
+
+
+class MockBedToolsService:
+    def __init__(self, fail_annotation: bool = False):
+        self.fail_annotation = fail_annotation
+        self.release_count = 0
+
+    def ensembl_to_bed_features(self, annotation_path, chrom_file, features):  # noqa
+        self.release_count += 1
+
+    @staticmethod
+    def ensembl_to_feature_index(annotation_path, features):  # noqa
+        Path(annotation_path, "feature_index").mkdir()
+
+    @staticmethod
+    def get_ensembl_annotation_records(
+        annotation_path, annotation_id, intergenic_feature
+    ):  # noqa
+        yield GenomicAnnotationRecord(
+            id="ENSG1", annotation_id=annotation_id, name="NEW1", biotype="lncRNA"
+        )
+        yield GenomicAnnotationRecord(
+            id="ENSG5", annotation_id=annotation_id, name="GENE5", biotype="miRNA"
+        )
+        yield GenomicAnnotationRecord(
+            id=f"ENS{intergenic_feature}", annotation_id=annotation_id
+        )
+
+    def annotate_data_using_ensembl(self, annotation_path, features, records):
+        if self.fail_annotation:
+            raise RuntimeError("Annotation failed.")
+        assert Path(annotation_path).name == "111"
+        return [
+            DataAnnotationRecord(gene_id="ENSG5", data_id=record.id, feature="Exonic")
+            for record in records
+        ]
+
+
+class MockExternalService:
+    pass
+
+
+class MockGeneService:
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.selection_ids: list[int] = []
+
+    def update_gene_cache(self, selection_id: int) -> int:
+        if self.fail:
+            raise RuntimeError("Gene cache failed.")
+        self.selection_ids.append(selection_id)
+        return 0
+
+
+def _get_file_service(Session, tmp_path):
+    return FileService(
+        session=Session(),
+        data_path=Path(tmp_path, "t_data"),
+        temp_path=Path(tmp_path, "t_temp"),
+        upload_path=Path(tmp_path, "t_upload"),
+        import_path=Path(tmp_path, "t_import"),
+    )
+
+
+def _get_reannotation_service(Session, tmp_path, bedtools_service, gene_service):
+    file_service = _get_file_service(Session, tmp_path)
+    filen = EnsemblAnnotationService.ANNOTATION_FILE(
+        organism="Homo_sapiens", assembly="GRCh38", release=111, fmt="gtf"
+    )
+    url = urljoin(Ensembl.FTP.value, "release-111", "gtf", "homo_sapiens", filen)
+    ensembl_service = EnsemblAnnotationService(
+        session=Session(),
+        data_service=DataService(session=Session()),
+        bedtools_service=bedtools_service,  # noqa
+        external_service=MockExternalService(),  # noqa
+        web_service=MockWebService(url_to_data={url: b"GTF"}),  # noqa
+        gene_service=gene_service,  # noqa
+        file_service=file_service,
+    )
+    return ReannotationService(
+        session=Session(),
+        ensembl_service=ensembl_service,
+        file_service=file_service,
+        gene_service=gene_service,  # noqa
+    )
+
+
+def _get_data_annotations(Session, model=DataAnnotation):
+    return sorted(
+        (row.data_id, row.gene_id, row.feature)
+        for row in Session().execute(
+            select(model.data_id, model.gene_id, model.feature)
+        )
+    )
+
+
+# tests
+
+
+def test_reannotate(Session, tmp_path, annotation):
+    gene_service = MockGeneService()
+    service = _get_reannotation_service(
+        Session, tmp_path, MockBedToolsService(), gene_service
+    )
+    progress = []
+    job = service.reannotate(
+        9606, release=111, progress=lambda *args: progress.append(args)
+    )
+
+    assert job.stage == ReannotationStage.DONE
+    assert (job.from_release, job.to_release) == (110, 111)
+    assert job.eufids == job.done_eufids == ["dataset_id03"]
+    assert progress == [("dataset_id03", 1, 1)]
+    assert service.get_job(9606) == job
+    assert Session().get_one(Annotation, 1).release == 111
+    assert _get_data_annotations(Session) == [
+        (data_id, "ENSG5", "Exonic") for data_id in [4, 5, 6, 7]
+    ]
+    assert _get_data_annotations(Session, DataAnnotationShadow) == []
+    genes = {
+        gene.id: (gene.annotation_id, gene.name, gene.biotype)
+        for gene in Session().scalars(select(GenomicAnnotation))
+    }
+    assert genes == {
+        "ENSG1": (1, "NEW1", "lncRNA"),
+        "ENSG5": (1, "GENE5", "miRNA"),
+        "ENSIntergenic": (1, None, None),
+        "ENSMUSG1": (2, "Gene1", "protein_coding"),
+    }
+    assert sorted(gene_service.selection_ids) == [1, 2, 3, 4]
+    with pytest.raises(ReannotationError) as exc:
+        service.reannotate(9606, release=111)
+    assert (
+        str(exc.value) == "Annotation for taxonomy ID 9606 is already at release 111."
+    )
+
+
+def test_reannotate_resume(Session, tmp_path, annotation):
+    bedtools_service = MockBedToolsService(fail_annotation=True)
+    gene_service = MockGeneService(fail=True)
+    service = _get_reannotation_service(
+        Session, tmp_path, bedtools_service, gene_service
+    )
+    with pytest.raises(RuntimeError):
+        service.reannotate(9606, release=111)
+    assert service.get_job(9606).stage == ReannotationStage.ANNOTATION
+    assert Session().get_one(Annotation, 1).release == 110
+    assert _get_data_annotations(Session) == [
+        (4, "ENSG1", "CDS"),
+        (4, "ENSG1", "Exonic"),
+        (5, "ENSIntergenic", "Intergenic"),
+        (7, "ENSG2", "Intronic"),
+        (7, "ENSG3", "Exonic"),
+    ]
+
+    bedtools_service.fail_annotation = False
+    with pytest.raises(RuntimeError):
+        service.reannotate(9606, release=111)
+    # annotations are swapped, but gene caches are not up to date
+    assert service.get_job(9606).stage == ReannotationStage.SWAP
+    assert Session().get_one(Annotation, 1).release == 111
+
+    gene_service.fail = False
+    job = service.reannotate(9606, release=111)
+    assert job.stage == ReannotationStage.DONE
+    assert bedtools_service.release_count == 1
+    assert _get_data_annotations(Session) == [
+        (data_id, "ENSG5", "Exonic") for data_id in [4, 5, 6, 7]
+    ]
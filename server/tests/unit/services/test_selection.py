@@ -19,10 +19,18 @@ from scimodom.utils.dtos.project import (
 class MockGeneService:
     def __init__(self):
         self.deleted_cache_list: list[int] = []
+        self.updated_cache_list: list[int] = []
 
     def delete_gene_cache(self, selection_id: int) -> None:
         self.deleted_cache_list.append(selection_id)
 
+    def check_gene_cache(self, selection_id: int) -> bool:
+        return selection_id % 2 == 0
+
+    def update_gene_cache(self, selection_id: int) -> int:
+        self.updated_cache_list.append(selection_id)
+        return 0
+
 
 def _get_selection_service(Session):
     return SelectionService(Session(), gene_service=MockGeneService())
@@ -129,3 +137,12 @@ def test_delete_selections_by_dataset_cache_only(Session, project, dataset):
         assert set(session.execute(select(Selection.id)).scalars().all()) == set(
             [1, 3, 4]
         )
+
+
+def test_rebuild_gene_caches(Session, selection):
+    service = _get_selection_service(Session)
+    assert service.rebuild_gene_caches(is_check_only=True) == [1, 3]
+    assert service._gene_service.updated_cache_list == []
+    assert service.rebuild_gene_caches() == [1, 3]
+    assert service._gene_service.updated_cache_list == [1, 3]
+    assert service.rebuild_gene_caches([2, 3]) == [3]
@@ -1,5 +1,6 @@
 from collections import defaultdict, namedtuple
 from io import StringIO
+from pathlib import Path
 
 import pytest
 from sqlalchemy.exc import NoResultFound
@@ -17,24 +18,25 @@ from scimodom.services.validator import (
     DatasetExistsError,
     ValidatorService,
 )
+from scimodom.utils.import_metrics import ImportMetrics
 from scimodom.utils.importer.bed_importer import (
     EufImporter,
     BedImportEmptyFile,
     BedImportTooManyErrors,
 )
-from scimodom.utils.specs.enums import AnnotationSource, ImportLimits
-
+from scimodom.utils.importer.columnar_importer import EufColumnarImporter
+from scimodom.utils.specs.enums import (
+    AnnotationSource,
+    ImportErrorClass,
+    ImportLimits,
+    ImportMetricsStage,
+)
 
 InputSelection = namedtuple(
     "InputSelection", "smid modification organism technology assembly"
 )
 
 
-class MockBedToolsService:
-    def create_temp_euf_file(self, records):  # noqa
-        return "xxx"
-
-
 class MockAssemblyService:
     def __init__(
         self,
@@ -91,16 +93,28 @@ class MockAssemblyService:
     def get_name_for_version(self, taxa_id: int) -> str:  # noqa
         return "GRCh38"
 
-    def create_lifted_file(
+    def get_chain_file_path(self, assembly: Assembly) -> Path:  # noqa
+        return Path(f"{assembly.name}_to_GRCh38.chain.gz")
+
+    def lift_over_records(
         self,
-        assembly: Assembly,
-        raw_file: str,
-        unmapped_file: str | None = None,
+        chain_file: str,
+        records,
         threshold: float = ImportLimits.LIFTOVER.max,
-    ) -> StringIO:  # noqa
-        s = StringIO(GOOD_EUF_FILE)
-        s.name = "xxx"
-        return s
+    ):  # noqa
+        for record in records:
+            yield record.model_copy(
+                update={"start": record.start + 100, "end": record.end + 100}
+            )
+
+    def lift_over_chunks(
+        self,
+        chain_file: str,
+        chunks,
+        threshold: float = ImportLimits.LIFTOVER.max,
+    ):  # noqa
+        for chunk in chunks:
+            yield chunk.assign(start=chunk["start"] + 100, end=chunk["end"] + 100)
 
 
 class MockAnnotationService:
@@ -166,7 +180,6 @@ def _get_validator_service(
 
     return ValidatorService(
         session=session,
-        bedtools_service=MockBedToolsService(),
         assembly_service=MockAssemblyService(
             is_latest=is_latest_asembly,
             assemblies_by_id=assemblies_by_id,
@@ -412,8 +425,23 @@ def test_validate_records(liftover, Session, input_ctx):
     importer = EufImporter(stream=StringIO(GOOD_EUF_FILE), source="test")
     service = _get_validator_service(Session(), is_latest_asembly=liftover)
     service.create_import_context(importer=importer, **input_ctx)
-    for _ in service.get_validated_records(importer, service.get_import_context()):
-        pass
+    records = list(
+        service.get_validated_records(importer, service.get_import_context())
+    )
+    assert [record.start for record in records] == [0 if liftover else 100]
+
+
+def test_validate_records_with_chain_file(Session, input_ctx, caplog):
+    importer = EufImporter(stream=StringIO(GOOD_EUF_FILE), source="test")
+    service = _get_validator_service(Session(), is_latest_asembly=False)
+    service.create_import_context(importer=importer, **input_ctx)
+    context = service.get_import_context()
+    context.chain_file = service.get_chain_file(context)
+    assert context.chain_file == "GRCh38_to_GRCh38.chain.gz"
+    records = list(service.get_validated_records(importer, context))
+    assert len(records) == 1
+    assert records[0].start == 100
+    assert "Lifting over dataset using GRCh38_to_GRCh38.chain.gz..." in caplog.messages
 
 
 @pytest.mark.parametrize(
@@ -509,6 +537,142 @@ def test_validate_records_fail(
     assert caplog.record_tuples == record_tuples
 
 
+@pytest.mark.parametrize("liftover", (False, True))
+def test_validate_chunks(liftover, Session, input_ctx):
+    euf_file = GOOD_EUF_FILE + "1\t20\t21\tm6A\t1000\t-\t20\t21\t0,0,0\t10\t1\n"
+    importer = EufColumnarImporter(stream=StringIO(euf_file), source="test")
+    service = _get_validator_service(Session(), is_latest_asembly=liftover)
+    service.create_import_context(importer=importer, columnar_flag=True, **input_ctx)
+    chunks = list(service.get_validated_chunks(importer, service.get_import_context()))
+    starts = [start for chunk in chunks for start in chunk["start"].tolist()]
+    assert starts == ([0, 20] if liftover else [100, 120])
+
+
+def test_validate_chunks_fail(Session, input_ctx, caplog):
+    euf_file = (
+        GOOD_EUF_FILE
+        + "2\t20\t21\tm6A\t1000\t-\t20\t21\t0,0,0\t10\t1\n"
+        + "1\t30\t31\tm6\t1000\t-\t30\t31\t0,0,0\t10\t1\n"
+    )
+    importer = EufColumnarImporter(stream=StringIO(euf_file), source="test")
+    service = _get_validator_service(Session())
+    service.create_import_context(importer=importer, columnar_flag=True, **input_ctx)
+    with pytest.raises(BedImportTooManyErrors) as exc:
+        for _ in service.get_validated_chunks(importer, service.get_import_context()):
+            pass
+    assert str(exc.value) == "Found too many errors in test (valid: 1, errors: 2)"
+    assert caplog.record_tuples[:2] == [
+        (
+            "scimodom.utils.importer.bed_importer",
+            30,
+            "test, line 14: Unrecognized chrom: 2. Ignore this warning for scaffolds and contigs, otherwise this could be due to misformatting!",
+        ),
+        (
+            "scimodom.utils.importer.bed_importer",
+            30,
+            "test, line 15: Unrecognized name: m6.",
+        ),
+    ]
+
+
+@pytest.mark.parametrize("columnar_flag", (False, True))
+@pytest.mark.parametrize("liftover", (False, True))
+def test_validate_records_metrics(columnar_flag, liftover, Session, input_ctx):
+    euf_file = (
+        GOOD_EUF_FILE
+        + "".join(
+            f"1\t{start}\t{start + 1}\tm6A\t1000\t-\t{start}\t{start + 1}\t0,0,0\t10\t1\n"
+            for start in range(20, 40)
+        )
+        + "1\t50\t51\tm6\t1000\t-\t50\t51\t0,0,0\t10\t1\n"
+    )
+    importer_class = EufColumnarImporter if columnar_flag else EufImporter
+    importer = importer_class(stream=StringIO(euf_file), source="test")
+    service = _get_validator_service(Session(), is_latest_asembly=not liftover)
+    service.create_import_context(
+        importer=importer, columnar_flag=columnar_flag, **input_ctx
+    )
+    context = service.get_import_context()
+    metrics = ImportMetrics()
+    with metrics.activate():
+        if columnar_flag:
+            for _ in service.get_validated_chunks(importer, context):
+                pass
+        else:
+            for _ in service.get_validated_records(importer, context):
+                pass
+    stages = {m.stage: m for m in metrics.get_stages()}
+    expected_stages = [ImportMetricsStage.PARSING, ImportMetricsStage.VALIDATION]
+    if liftover:
+        expected_stages.append(ImportMetricsStage.LIFTOVER)
+    assert list(stages.keys()) == expected_stages
+    assert stages[ImportMetricsStage.PARSING].rows_in == 22
+    assert stages[ImportMetricsStage.PARSING].rows_out == 22
+    assert stages[ImportMetricsStage.VALIDATION].rows_in == 22
+    assert stages[ImportMetricsStage.VALIDATION].rows_out == 21
+    if liftover:
+        assert stages[ImportMetricsStage.LIFTOVER].rows_in == 21
+        assert stages[ImportMetricsStage.LIFTOVER].rows_out == 21
+
+
+@pytest.mark.parametrize("chunk_size", [30, 4096])
+def test_get_validation_report(chunk_size, Session, input_ctx):
+    euf_file = (
+        GOOD_EUF_FILE
+        + "1\t20\t21\tm6A\t1000\t-\t20\t21\t0,0,0\t10\t1\n"
+        + "1\t20\t21\tm6A\t1000\t+\t20\t21\t0,0,0\t10\t1\n"
+        + "2\t25\t26\tm6A\t1000\t-\t25\t26\t0,0,0\t10\t1\n"
+        + "1\t20\t21\tm6A\t900\t-\t20\t21\t0,0,0\t10\t1\n"
+        + "1\t30\t31\tm6\t1000\t-\t30\t31\t0,0,0\t10\t1\n"
+        + "1\t40\t41\tm6A\t1000\t-\t40\t41\t0,0,0\t10\n"
+    )
+    importer = EufColumnarImporter(
+        stream=StringIO(euf_file),
+        source="test",
+        max_error_rate=None,
+        chunk_size=chunk_size,
+    )
+    service = _get_validator_service(Session())
+    service.create_import_context(importer=importer, columnar_flag=True, **input_ctx)
+    report = service.get_validation_report(
+        importer, service.get_import_context(), "test"
+    )
+    assert report.source == "test"
+    assert report.record_count == 4
+    assert report.error_count == 3
+    assert report.error_counts == {
+        ImportErrorClass.UNKNOWN_CHROM: 1,
+        ImportErrorClass.UNKNOWN_NAME: 1,
+        ImportErrorClass.FIELD_COUNT: 1,
+    }
+    assert report.unknown_chroms == {"2": 1}
+    assert report.unknown_modification_names == {"m6": 1}
+    assert report.is_sorted is True
+    assert report.duplicate_site_count == 1
+    assert report.is_valid is False
+
+
+def test_get_validation_report_unsorted(Session, input_ctx):
+    euf_file = (
+        GOOD_EUF_FILE
+        + "1\t20\t21\tm6A\t1000\t-\t20\t21\t0,0,0\t10\t1\n"
+        + "1\t10\t11\tm6A\t1000\t-\t10\t11\t0,0,0\t10\t1\n"
+    )
+    importer = EufColumnarImporter(
+        stream=StringIO(euf_file), source="test", max_error_rate=None
+    )
+    service = _get_validator_service(Session())
+    service.create_import_context(importer=importer, columnar_flag=True, **input_ctx)
+    report = service.get_validation_report(
+        importer, service.get_import_context(), "test"
+    )
+    assert report.record_count == 3
+    assert report.is_sorted is False
+    assert report.first_unsorted_line == 15
+    assert report.duplicate_site_count is None
+    assert report.is_valid is True
+
+
 @pytest.mark.parametrize(
     "eufid,update,exception,message",
     [
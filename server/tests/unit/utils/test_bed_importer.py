@@ -8,8 +8,9 @@ from scimodom.utils.importer.bed_importer import (
     BedImportTooManyErrors,
     BedImportEmptyFile,
     EufImporter,
+    get_wilson_lower_bound,
 )
-from scimodom.utils.specs.enums import Strand
+from scimodom.utils.specs.enums import ImportErrorClass, Strand
 
 EUF_FILE = """#fileformat=bedRModv1.8
 #organism=10090
@@ -81,11 +82,14 @@ test, line 3: '*' is not a valid Strand
 
 def test_euf_error_without_error_rate(caplog):
     stream = StringIO(BAD_EUF_FILE)
-    result = list(
-        EufImporter(stream=stream, source="test", max_error_rate=None).parse()
-    )
+    importer = EufImporter(stream=stream, source="test", max_error_rate=None)
+    result = list(importer.parse())
 
     assert len(result) == 1
+    assert importer.get_error_counts() == {
+        ImportErrorClass.FIELD_COUNT: 1,
+        ImportErrorClass.INVALID_VALUE: 1,
+    }
     assert caplog.record_tuples == [
         (
             "scimodom.utils.importer.bed_importer",
@@ -139,3 +143,103 @@ def test_bed_6_file():
     assert len(result) == 3
     assert result[1].end == 3528097
     assert result[2].strand == Strand.FORWARD
+
+
+def _get_bed6_lines(valid_count, error_count):
+    valid_line = "1\t3528091\t3528092\tm6A\t1000\t+\n"
+    error_line = "1\t3528091\t3528092\tm6A\t1000\t*\n"
+    return valid_line * valid_count + error_line * error_count
+
+
+def test_early_abort():
+    stream = StringIO(_get_bed6_lines(10, 1000) + _get_bed6_lines(100000, 0))
+    importer = Bed6Importer(stream=stream, source="test", early_abort_min_records=100)
+    with pytest.raises(BedImportTooManyErrors) as exc:
+        _ = list(importer.parse())
+    assert str(exc.value) == (
+        "Found too many errors in test (valid: 10, errors: 90, aborted after 100 records)"
+    )
+
+
+def test_early_abort_within_limit():
+    stream = StringIO(_get_bed6_lines(980, 20) * 10)
+    importer = Bed6Importer(stream=stream, source="test", early_abort_min_records=100)
+    assert len(list(importer.parse())) == 9800
+
+
+def test_early_abort_disabled():
+    stream = StringIO(_get_bed6_lines(0, 1000) + _get_bed6_lines(100000, 0))
+    importer = Bed6Importer(stream=stream, source="test")
+    assert len(list(importer.parse())) == 100000
+
+
+@pytest.mark.parametrize(
+    "valid_count,error_count,is_rejected",
+    [(990, 10, False), (500, 500, False), (2, 1, True), (30, 20, True)],
+)
+def test_prescan(valid_count, error_count, is_rejected):
+    # errors at the end of large files are not seen
+    stream = StringIO(_get_bed6_lines(valid_count, error_count))
+    importer = Bed6Importer(stream=stream, source="test")
+    if is_rejected:
+        with pytest.raises(BedImportTooManyErrors):
+            importer.prescan(100)
+    else:
+        importer.prescan(100)
+
+
+def test_prescan_sample():
+    stream = StringIO(_get_bed6_lines(0, 50) + _get_bed6_lines(10000, 0))
+    importer = Bed6Importer(stream=stream, source="test")
+    with pytest.raises(BedImportTooManyErrors):
+        importer.prescan(100, early_abort_flag=True)
+
+
+def test_prescan_sample_disabled():
+    stream = StringIO(_get_bed6_lines(0, 50) + _get_bed6_lines(10000, 0))
+    importer = Bed6Importer(stream=stream, source="test")
+    importer.prescan(100)
+
+
+def _get_clustered_error_lines():
+    # 200 errors in the first 1000 lines, but the error
+    # rate of the whole file is within the limit
+    return _get_bed6_lines(0, 200) + _get_bed6_lines(99800, 0)
+
+
+def test_clustered_errors():
+    importer = Bed6Importer(
+        stream=StringIO(_get_clustered_error_lines()), source="test"
+    )
+    importer.prescan(800)
+    importer = Bed6Importer(
+        stream=StringIO(_get_clustered_error_lines()), source="test"
+    )
+    assert len(list(importer.parse())) == 99800
+
+
+def test_clustered_errors_early_abort():
+    importer = Bed6Importer(
+        stream=StringIO(_get_clustered_error_lines()), source="test"
+    )
+    with pytest.raises(BedImportTooManyErrors):
+        importer.prescan(800, early_abort_flag=True)
+    with pytest.raises(BedImportTooManyErrors):
+        # the first record is parsed on init
+        Bed6Importer(
+            stream=StringIO(_get_clustered_error_lines()),
+            source="test",
+            early_abort_min_records=100,
+        )
+
+
+def test_prescan_empty_file():
+    stream = StringIO(EMPTY_EUF_FILE)
+    with pytest.raises(BedImportEmptyFile):
+        EufImporter(stream=stream, source="test").prescan(100)
+
+
+def test_get_wilson_lower_bound():
+    assert get_wilson_lower_bound(0, 0, 4.0) == 0.0
+    assert get_wilson_lower_bound(0, 100, 4.0) == pytest.approx(0.0)
+    assert get_wilson_lower_bound(50, 100, 1.96) == pytest.approx(0.4038, abs=1e-4)
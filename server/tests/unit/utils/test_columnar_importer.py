@@ -0,0 +1,164 @@
+import logging
+from io import StringIO
+
+import pytest
+
+from scimodom.utils.importer.bed_importer import (
+    BedImportEmptyFile,
+    BedImportTooManyErrors,
+    EufImporter,
+)
+from scimodom.utils.importer.columnar_importer import EufColumnarImporter
+from scimodom.utils.specs.enums import Strand
+
+EUF_FILE = """#fileformat=bedRModv1.8
+#organism=10090
+#modification_type=RNA
+#assembly=GRCm39
+#annotation_source=Ensembl
+#annotation_version=110
+#sequencing_platform=HiSeq X Ten
+#basecalling=
+#bioinformatics_workflow=
+#experiment=
+#external_source=GEO;GSE123456
+#chrom\tchromStart\tchromEnd\tname\tscore\tstrand\tthickStart\tthickEnd\titemRgb\tcoverage\tfrequency
+1\t3528091\t3528092\tm6A\t1000\t+\t3457868\t3457869\t0,205,0\t31\t78
+1\t3528096\t3528097\tm6A\t1000\t+\t3457873\t3457874\t0,205,0\t6\t16
+1\t3528107\t3528108\tm6A\t1000\t-\t3457884\t3457885\t0,205,0\t5\t24
+"""
+
+
+@pytest.mark.parametrize("chunk_size", [1, 64, 1024])
+def test_euf_import(chunk_size):
+    stream = StringIO(EUF_FILE)
+    importer = EufColumnarImporter(stream=stream, source="test", chunk_size=chunk_size)
+    assert importer.get_header("annotation_source") == "Ensembl"
+
+    result = list(importer.parse())
+    assert len(result) == 3
+    assert result[1].end == 3528097
+    assert result[2].strand == Strand.REVERSE
+    assert result[0].frequency == 78
+    assert result == list(EufImporter(stream=StringIO(EUF_FILE)).parse())
+
+
+def test_euf_import_chunks():
+    stream = StringIO(EUF_FILE)
+    importer = EufColumnarImporter(stream=stream, source="test")
+    chunks = list(importer.parse_chunks())
+    assert [len(chunk) for chunk in chunks] == [1, 2]
+    assert chunks[1]["line"].tolist() == [14, 15]
+    assert chunks[1]["start"].tolist() == [3528096, 3528107]
+    assert chunks[1]["strand"].tolist() == ["+", "-"]
+
+
+BAD_EUF_FILE = """#chrom\tchromStart\tchromEnd\tname\tscore\tstrand\tthickStart\tthickEnd\titemRgb\tcoverage\tfrequency
+1\t3528091\t3528092\tm6A\t1000\t+\t3457868\t3457869\t0,205,0\t31\t78
+1\t3528096\t3528097\tm6A\t1000\t*\t3457873\t3457874\t0,205,0\t6\t16
+1\t3528107\t3528108\tm6A\t1001\t+\t3457884\t3457885\t0,205,0\t5\t24
+1\t3528107\t3528108\tm6A\t1000\t+\t3457884\t3457885\t0,205,0\t5
+# comment
+1\t3528108\t3528108\tm6A\t1000\t+\t3457884\t3457885\t0,205,0\t5\t24
+1\t+3528110\t3528111\tm6A\t1000\t+\t3457884\t3457885\t0,205,0\t5\t24
+
+1\t3528112\t3528113\tm6A\t1000\t+\t3457884\t3457885\t0,205,0\t5\t100
+1\t3528114\t3528115\tm6A\t1000\t+\t3457884\t3457885\t0,205,0\t5\t1e2
+"""
+
+
+@pytest.mark.parametrize("chunk_size", [1, 128, 1024])
+def test_euf_error(chunk_size, caplog):
+    stream = StringIO(BAD_EUF_FILE)
+    importer = EufColumnarImporter(
+        stream=stream, source="test", max_error_rate=None, chunk_size=chunk_size
+    )
+    result = list(importer.parse())
+    assert [record.start for record in result] == [3528091, 3528110, 3528112]
+    assert caplog.record_tuples == [
+        (
+            "scimodom.utils.importer.bed_importer",
+            logging.WARNING,
+            message,
+        )
+        for message in [
+            "test, line 3: '*' is not a valid Strand",
+            "test, line 4: score: Input should be less than or equal to 1000",
+            "test, line 5: Expected 11 fields, but got 10",
+            "test, line 7: : Value error, The value of 'end' (3528108) must be greater than the value of 'start' (3528108)",
+            "test, line 11: frequency: Input should be a valid integer, unable to parse string as an integer",
+        ]
+    ]
+    reference = EufImporter(stream=StringIO(BAD_EUF_FILE), source="test")
+    with pytest.raises(BedImportTooManyErrors):
+        _ = list(reference.parse())
+    assert importer.get_error_summary() == reference.get_error_summary()
+
+
+UNCLEAN_EUF_FILE = """#chrom\tchromStart\tchromEnd\tname\tscore\tstrand\tthickStart\tthickEnd\titemRgb\tcoverage\tfrequency
+1\t3528091\t3528092\tm6A\t1000\t+\t3457868\t3457869\t0,205,0\t31\t78\r
+1\t 3528096\t3528097 \tm6A\t1000\t+\t3457873\t3457874\t0,205,0\t6\t16
+KI270728.1\t1234567890\t1234567891\tm5C\t0\t-\t1234567890\t1234567891\t\t10\t1
+\t \t
+#comment
+KI270728.2\t1234567890123456789\t1234567890123456790\tm5C\t0\t-\t0\t1\t0,0,0\t10\t1
+chrUn_KI270302v1_random\t0\t1\t\u03a8\t1\t+\t0\t1\t0,0,0\t1\t100
+KI270728.1\t12345678\t123456789\tm5C\t0\t*\t0\t1\t0,0,0\t10\t1
+KI270728.1\t012345678\t123456789\tm5C\t0\t-\t0\t1\t0,0,0\t10\t1
+"""
+
+
+@pytest.mark.parametrize("chunk_size", [1, 64, 1024])
+def test_euf_import_unclean(chunk_size):
+    importer = EufColumnarImporter(
+        stream=StringIO(UNCLEAN_EUF_FILE),
+        source="test",
+        max_error_rate=None,
+        chunk_size=chunk_size,
+    )
+    reference = EufImporter(
+        stream=StringIO(UNCLEAN_EUF_FILE), source="test", max_error_rate=None
+    )
+    result = list(importer.parse())
+    assert [record.chrom for record in result] == [
+        "1",
+        "1",
+        "KI270728.1",
+        "KI270728.2",
+        "chrUn_KI270302v1_random",
+        "KI270728.1",
+    ]
+    assert result[2].item_rgb == ""
+    assert result[3].start == 1234567890123456789
+    assert result[4].name == "\u03a8"
+    assert result == list(reference.parse())
+    assert importer.get_error_summary() == reference.get_error_summary()
+
+
+def test_euf_error_rate():
+    stream = StringIO(BAD_EUF_FILE)
+    importer = EufColumnarImporter(stream=stream, source="test")
+    with pytest.raises(BedImportTooManyErrors) as exc:
+        _ = list(importer.parse_chunks())
+    assert str(exc.value) == "Found too many errors in test (valid: 3, errors: 5)"
+
+
+def test_euf_report_error(caplog):
+    stream = StringIO(EUF_FILE)
+    importer = EufColumnarImporter(stream=stream, source="test", max_error_rate=None)
+    for record in importer.parse():
+        if record.strand == Strand.REVERSE:
+            importer.report_error("Reverse strand.")
+    assert caplog.record_tuples == [
+        (
+            "scimodom.utils.importer.bed_importer",
+            logging.WARNING,
+            "test, line 15: Reverse strand.",
+        ),
+    ]
+
+
+def test_empty_euf_file():
+    stream = StringIO(EUF_FILE.split("1\t", 1)[0])
+    with pytest.raises(BedImportEmptyFile):
+        _ = list(EufColumnarImporter(stream=stream, source="test").parse_chunks())
@@ -0,0 +1,87 @@
+from scimodom.utils.comparison_summary import ComparisonSummary
+from scimodom.utils.dtos.bedtools import (
+    TrustedComparisonRecord,
+    TrustedIntersectRecord,
+)
+from scimodom.utils.specs.enums import Strand
+
+
+def _record(chrom, start, eufid):
+    return TrustedComparisonRecord(
+        chrom, start, start + 1, "m6A", 1000, Strand.FORWARD, eufid, 10, 50
+    )
+
+
+A_RECORDS = [
+    _record("1", 100, "EUFID000001A"),
+    _record("1", 200, "EUFID000001A"),
+    _record("2", 100, "EUFID000001A"),
+    _record("1", 100, "EUFID000002A"),
+]
+
+
+def test_comparison_summary_intersect():
+    summary = ComparisonSummary()
+    a_records = list(summary.count_references(A_RECORDS))
+    assert a_records == A_RECORDS
+    b1 = _record("1", 100, "EUFID000001B")
+    b2 = _record("1", 200, "EUFID000002B")
+    summary.add(
+        [
+            TrustedIntersectRecord(A_RECORDS[0], b1),
+            TrustedIntersectRecord(A_RECORDS[0], b2),
+            TrustedIntersectRecord(A_RECORDS[0], b1),
+            TrustedIntersectRecord(A_RECORDS[1], b1),
+            TrustedIntersectRecord(A_RECORDS[3], b1),
+        ]
+    )
+    assert summary.to_json_dict() == {
+        "totalRecords": 5,
+        "chroms": [{"chrom": "1", "records": 5}],
+        "pairs": [
+            {
+                "reference": "EUFID000001A",
+                "comparison": "EUFID000001B",
+                "records": 3,
+                "referenceRecords": 2,
+                "referenceTotal": 3,
+                "fraction": 2 / 3,
+            },
+            {
+                "reference": "EUFID000001A",
+                "comparison": "EUFID000002B",
+                "records": 1,
+                "referenceRecords": 1,
+                "referenceTotal": 3,
+                "fraction": 1 / 3,
+            },
+            {
+                "reference": "EUFID000002A",
+                "comparison": "EUFID000001B",
+                "records": 1,
+                "referenceRecords": 1,
+                "referenceTotal": 1,
+                "fraction": 1.0,
+            },
+        ],
+    }
+
+
+def test_comparison_summary_subtract():
+    summary = ComparisonSummary()
+    list(summary.count_references(A_RECORDS))
+    summary.add([A_RECORDS[1], A_RECORDS[2]])
+    assert summary.to_json_dict() == {
+        "totalRecords": 2,
+        "chroms": [{"chrom": "1", "records": 1}, {"chrom": "2", "records": 1}],
+        "pairs": [
+            {
+                "reference": "EUFID000001A",
+                "comparison": None,
+                "records": 2,
+                "referenceRecords": None,
+                "referenceTotal": 3,
+                "fraction": None,
+            }
+        ],
+    }
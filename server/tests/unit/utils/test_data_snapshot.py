@@ -0,0 +1,87 @@
+import json
+from pathlib import Path
+
+import numpy as np
+
+from scimodom.utils.data_snapshot import (
+    SNAPSHOT_METADATA_FILE,
+    DataSnapshot,
+    DataSnapshotBuilder,
+)
+from scimodom.utils.specs.enums import Strand
+
+COLUMNS = {
+    "chrom": ["2", "10", "1", "1"],
+    "start": [50, 5, 100, 10],
+    "end": [51, 6, 101, 11],
+    "name": ["m6A", "m5C", "m6A", "m6A"],
+    "score": [1000, 900, 800, 700],
+    "strand": [Strand.FORWARD, Strand.REVERSE, Strand.REVERSE, Strand.FORWARD],
+    "thick_start": [50, 5, 100, 10],
+    "thick_end": [51, 6, 101, 11],
+    "item_rgb": ["0,0,0", "128,128,0", "0,0,0", "0,0,0"],
+    "coverage": [10, 20, 30, 40],
+    "frequency": [1, 2, 3, 4],
+}
+
+
+def _get_rows(columns, order):
+    return [tuple(values[idx] for values in columns.values()) for idx in order]
+
+
+def test_data_snapshot():
+    snapshot = DataSnapshot("dataset_id01", 4, COLUMNS)
+    assert len(snapshot) == 4
+    assert (snapshot.dataset_id, snapshot.max_data_id) == ("dataset_id01", 4)
+    # sorted by chrom (as strings), then start
+    assert list(snapshot.get_rows()) == _get_rows(COLUMNS, [3, 2, 1, 0])
+    assert snapshot.get_dictionary("chrom") == ["1", "10", "2"]
+    assert snapshot.get_array("chrom").tolist() == [0, 0, 1, 2]
+    assert snapshot.get_array("start").dtype == np.int64
+    assert list(snapshot.get_rows(["start", "strand"])) == [
+        (10, Strand.FORWARD),
+        (100, Strand.REVERSE),
+        (5, Strand.REVERSE),
+        (50, Strand.FORWARD),
+    ]
+
+
+def test_data_snapshot_builder():
+    builder = DataSnapshotBuilder()
+    for chunk in [slice(0, 1), slice(1, 3), slice(3, 4)]:
+        builder.add({name: values[chunk] for name, values in COLUMNS.items()})
+    snapshot = builder.build("dataset_id01", 4)
+    expected = DataSnapshot("dataset_id01", 4, COLUMNS)
+    assert (snapshot.dataset_id, snapshot.max_data_id) == ("dataset_id01", 4)
+    assert list(snapshot.get_rows()) == list(expected.get_rows())
+    # codes are assigned in order of first occurrence, then sorted
+    assert snapshot.get_dictionary("chrom") == ["1", "10", "2"]
+    assert snapshot.get_array("chrom").tolist() == [0, 0, 1, 2]
+    assert snapshot.get_dictionary("name") == ["m5C", "m6A"]
+    assert snapshot.get_array("chrom").dtype == np.int32
+
+
+def test_data_snapshot_builder_empty():
+    snapshot = DataSnapshotBuilder().build("dataset_id01", 0)
+    assert len(snapshot) == 0
+    assert snapshot.get_array("start").dtype == np.int64
+    assert list(snapshot.get_rows()) == []
+
+
+def test_data_snapshot_save_load(tmp_path):
+    DataSnapshot("dataset_id01", 4, COLUMNS).save(Path(tmp_path, "snapshot"))
+    snapshot = DataSnapshot.load(Path(tmp_path, "snapshot"))
+    assert isinstance(snapshot.get_array("start"), np.memmap)
+    assert snapshot.max_data_id == 4
+    assert list(snapshot.get_rows()) == _get_rows(COLUMNS, [3, 2, 1, 0])
+
+
+def test_data_snapshot_load_other_version(tmp_path):
+    path = Path(tmp_path, "snapshot")
+    DataSnapshot("dataset_id01", 4, COLUMNS).save(path)
+    with open(Path(path, SNAPSHOT_METADATA_FILE)) as fh:
+        metadata = json.load(fh)
+    metadata["version"] = 0
+    with open(Path(path, SNAPSHOT_METADATA_FILE), "w") as fh:
+        json.dump(metadata, fh)
+    assert DataSnapshot.load(path) is None
@@ -1,6 +1,7 @@
 from scimodom.utils.specs.enums import (
     UserState,
     Strand,
+    InsertMode,
     Identifiers,
     Ensembl,
     AnnotationSource,
@@ -24,6 +25,13 @@ def test_strand():
     assert len(Strand) == 3
 
 
+def test_insert_mode():
+    assert InsertMode.ORM == InsertMode("orm")
+    assert InsertMode.CORE == InsertMode("core")
+    assert InsertMode.LOAD_DATA == InsertMode("load_data")
+    assert len(InsertMode) == 3
+
+
 def test_identifiers():
     assert Identifiers.SMID.length == 8
     assert Identifiers.EUFID.length == 12
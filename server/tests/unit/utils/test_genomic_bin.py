@@ -0,0 +1,45 @@
+import random
+
+import pytest
+
+from scimodom.utils.genomic_bin import BIN_MAX_END, get_bin, get_bin_ranges
+
+
+@pytest.mark.parametrize(
+    "start,end,expected_bin",
+    [
+        (0, 1, 585),
+        (131071, 131072, 585),
+        (131072, 131073, 586),
+        (131071, 131073, 73),
+        (0, 1 << 20, 73),
+        (0, (1 << 20) + 1, 9),
+        (100000000, 100000001, 585 + (100000000 >> 17)),
+        (0, BIN_MAX_END, 0),
+    ],
+)
+def test_get_bin(start, end, expected_bin):
+    assert get_bin(start, end) == expected_bin
+
+
+def test_get_bin_out_of_range():
+    with pytest.raises(ValueError) as exc:
+        get_bin(0, BIN_MAX_END + 1)
+    assert str(exc.value) == (
+        f"Interval 0-{BIN_MAX_END + 1} is out of range for binning (max. {BIN_MAX_END})."
+    )
+
+
+def test_get_bin_ranges():
+    rng = random.Random(42)
+    for _ in range(1000):
+        start = rng.randrange(0, 1 << 24)
+        end = start + rng.choice([1, 100, 1 << 17, 1 << 22])
+        # queries overlapping the interval
+        query_start = rng.randrange(start, end)
+        query_end = query_start + rng.choice([1, 100])
+        feature_bin = get_bin(start, end)
+        assert any(
+            first <= feature_bin <= last
+            for first, last in get_bin_ranges(query_start, query_end)
+        )
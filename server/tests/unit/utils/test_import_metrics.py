@@ -0,0 +1,117 @@
+import time
+
+import numpy as np
+import pytest
+
+from scimodom.utils import import_metrics
+from scimodom.utils.import_metrics import (
+    ImportMetrics,
+    get_current_rss,
+    get_import_metrics,
+)
+from scimodom.utils.specs.enums import ImportMetricsStage
+
+
+def _slow(items, seconds):
+    for item in items:
+        time.sleep(seconds)
+        yield item
+
+
+def test_timed():
+    metrics = ImportMetrics()
+    with metrics.activate():
+        parsed = get_import_metrics().timed(
+            ImportMetricsStage.PARSING, _slow(range(5), 0.02)
+        )
+        validated = get_import_metrics().timed(
+            ImportMetricsStage.VALIDATION,
+            (i for i in _slow(parsed, 0.002) if i % 2 == 0),
+            upstream=ImportMetricsStage.PARSING,
+        )
+        assert list(validated) == [0, 2, 4]
+    parsing, validation = metrics.get_stages()
+    assert parsing.stage == ImportMetricsStage.PARSING
+    assert (parsing.rows_in, parsing.rows_out) == (5, 5)
+    assert (validation.rows_in, validation.rows_out) == (5, 3)
+    # time spent parsing is not included in the validation time
+    assert parsing.wall_time >= 0.1
+    assert 0.01 <= validation.wall_time < parsing.wall_time / 2
+    assert parsing.peak_rss > 0
+    assert metrics.wall_time >= parsing.wall_time + validation.wall_time
+
+
+def test_stage():
+    metrics = ImportMetrics()
+    with metrics.activate():
+        with get_import_metrics().stage(ImportMetricsStage.ANNOTATION) as stage:
+            time.sleep(0.01)
+            with get_import_metrics().stage(ImportMetricsStage.GENE_CACHE):
+                time.sleep(0.05)
+            stage.rows_in += 3
+    annotation, gene_cache = metrics.get_stages()
+    assert 0.01 <= annotation.wall_time < gene_cache.wall_time
+    assert gene_cache.wall_time >= 0.05
+    assert annotation.rows_in == 3
+    assert annotation.rows_per_second == pytest.approx(3 / annotation.wall_time)
+
+
+def test_inactive():
+    items = [1, 2]
+    assert get_import_metrics().timed(ImportMetricsStage.PARSING, items) is not items
+    assert list(get_import_metrics().timed(ImportMetricsStage.PARSING, items)) == [
+        1,
+        2,
+    ]
+    with get_import_metrics().stage(ImportMetricsStage.INSERTION) as stage:
+        stage.rows_in += 1
+    assert get_import_metrics().get_stages() == []
+
+
+def test_merge_and_format_report():
+    metrics = ImportMetrics()
+    for _ in range(2):
+        dataset_metrics = ImportMetrics()
+        with dataset_metrics.activate():
+            with dataset_metrics.stage(ImportMetricsStage.INSERTION) as stage:
+                stage.rows_in += 10
+                stage.rows_out += 9
+        metrics.merge(dataset_metrics)
+    (insertion,) = metrics.get_stages()
+    assert (insertion.rows_in, insertion.rows_out) == (20, 18)
+    lines = metrics.format_report().split("\n")
+    assert lines[0].split() == [
+        "stage",
+        "time",
+        "(s)",
+        "rows",
+        "in",
+        "rows",
+        "out",
+        "rows/s",
+        "peak",
+        "RSS",
+        "(MiB)",
+    ]
+    assert lines[1].split()[0] == "insertion"
+    assert lines[1].split()[2:4] == ["20", "18"]
+    assert [line.split()[0] for line in lines[2:]] == ["other", "total"]
+
+
+def test_peak_rss_by_stage():
+    metrics = ImportMetrics()
+    with metrics.activate():
+        with get_import_metrics().stage(ImportMetricsStage.INSERTION):
+            array = np.ones(2**28, dtype=np.uint8)  # 256 MiB
+        del array
+        with get_import_metrics().stage(ImportMetricsStage.ANNOTATION):
+            pass
+    insertion, annotation = metrics.get_stages()
+    # memory released by a previous stage is not reported
+    assert insertion.peak_rss - annotation.peak_rss > 2**27
+
+
+def test_get_current_rss(mocker):
+    assert get_current_rss() > 0
+    mocker.patch.object(import_metrics, "PROC_STATUS_FILE", "/no/such/file")
+    assert get_current_rss() > 0
@@ -0,0 +1,256 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from scimodom.utils import interval_comparison
+from scimodom.utils.interval_comparison import (
+    STRAND_CODES,
+    Intervals,
+    closest,
+    get_chrom_codes,
+    get_sort_order,
+    intersect,
+    subtract,
+)
+from scimodom.utils.specs.enums import Strand
+
+CHROM_CODES = get_chrom_codes(["2", "1", "10"])
+
+
+def _intervals(chroms, starts, ends, strands):
+    return Intervals(
+        np.asarray([CHROM_CODES[chrom] for chrom in chroms], dtype=np.int64),
+        np.asarray(starts, dtype=np.int64),
+        np.asarray(ends, dtype=np.int64),
+        np.asarray([STRAND_CODES[Strand(strand)] for strand in strands]),
+    )
+
+
+def _as_list(*arrays):
+    return list(zip(*[array.tolist() for array in arrays]))
+
+
+A = _intervals(
+    ["2", "1", "1", "10"],
+    [50, 100, 10, 5],
+    [60, 200, 20, 6],
+    ["+", "-", "+", "+"],
+)
+
+
+def test_get_chrom_codes():
+    assert CHROM_CODES == {"1": 0, "10": 1, "2": 2}
+
+
+def test_get_sort_order():
+    # chroms are sorted as strings, as for bedtools sort
+    assert get_sort_order(A).tolist() == [2, 1, 3, 0]
+
+
+def test_intersect():
+    b1 = _intervals(["1", "1", "2"], [150, 15, 55], [160, 16, 56], ["-", "-", "+"])
+    b2 = _intervals(["1"], [0], [1000], ["+"])
+    assert _as_list(*intersect(A, [b1, b2], is_strand=True)) == [
+        (2, 1, 0),
+        (1, 0, 0),
+        (0, 0, 2),
+    ]
+    assert _as_list(*intersect(A, [b1, b2], is_strand=False)) == [
+        (2, 0, 1),
+        (2, 1, 0),
+        (1, 0, 0),
+        (1, 1, 0),
+        (0, 0, 2),
+    ]
+
+
+def test_closest():
+    a = _intervals(
+        ["1", "1", "1", "2"],
+        [100, 100, 300, 0],
+        [110, 110, 310, 1],
+        ["+", "-", "+", "+"],
+    )
+    b1 = _intervals(["1", "1"], [80, 105], [90, 106], ["+", "+"])
+    b2 = _intervals(["1", "1"], [120, 400], [121, 401], ["+", "-"])
+    # b1[1] overlaps a[0] and is ignored, b1[0] and b2[0] are tied
+    assert _as_list(*closest(a, [b1, b2], is_strand=True)) == [
+        (0, 0, 0, -11),
+        (0, 1, 0, 11),
+        (1, 1, 1, -291),
+        (2, 1, 0, -180),
+    ]
+    # distances are with respect to the strand of A
+    assert _as_list(*closest(a, [b1, b2], is_strand=False)) == [
+        (0, 0, 0, -11),
+        (0, 1, 0, 11),
+        (1, 0, 0, 11),
+        (1, 1, 0, -11),
+        (2, 1, 1, 91),
+    ]
+
+
+def test_closest_book_ended():
+    a = _intervals(["1"], [100], [101], ["+"])
+    b = _intervals(["1", "1"], [99, 101], [100, 102], ["+", "+"])
+    assert _as_list(*closest(a, [b], is_strand=True)) == [(0, 0, 0, -1), (0, 0, 1, 1)]
+
+
+def test_subtract():
+    a = _intervals(
+        ["1", "1", "1", "1"],
+        [100, 0, 50, 500],
+        [200, 10, 51, 501],
+        ["+", "+", "+", "."],
+    )
+    b1 = _intervals(["1", "1"], [90, 120], [110, 130], ["+", "+"])
+    b2 = _intervals(["1", "1", "1"], [125, 50, 500], [140, 51, 501], ["+", "-", "."])
+    assert _as_list(*subtract(a, [b1, b2], is_strand=True)) == [
+        (1, 0, 10),
+        (2, 50, 51),
+        (0, 110, 120),
+        (0, 140, 200),
+        (3, 500, 501),
+    ]
+    assert _as_list(*subtract(a, [b1, b2], is_strand=False)) == [
+        (1, 0, 10),
+        (0, 110, 120),
+        (0, 140, 200),
+    ]
+
+
+def test_comparison_random():
+    rng = np.random.default_rng(1)
+    a = _intervals(
+        ["1"] * 200,
+        starts := rng.integers(0, 10000, 200),
+        starts + rng.integers(1, 50, 200),
+        rng.choice(["+", "-"], 200),
+    )
+    b = _intervals(
+        ["1"] * 300,
+        starts := rng.integers(0, 10000, 300),
+        starts + rng.integers(1, 300, 300),
+        rng.choice(["+", "-"], 300),
+    )
+    a_order = get_sort_order(a).tolist()
+    b_order = get_sort_order(b).tolist()
+
+    def is_overlap(i, j):
+        return b.starts[j] < a.ends[i] and b.ends[j] > a.starts[i]
+
+    def get_distance(i, j):
+        if b.ends[j] <= a.starts[i]:
+            distance = -(a.starts[i] - b.ends[j] + 1)
+        else:
+            distance = b.starts[j] - a.ends[i] + 1
+        return -distance if a.strands[i] == STRAND_CODES[Strand.REVERSE] else distance
+
+    expected_intersect = [
+        (i, 0, j)
+        for i in a_order
+        for j in b_order
+        if a.strands[i] == b.strands[j] and is_overlap(i, j)
+    ]
+    assert _as_list(*intersect(a, [b], is_strand=True)) == expected_intersect
+
+    expected_closest = []
+    for i in a_order:
+        candidates = [
+            (j, get_distance(i, j))
+            for j in b_order
+            if a.strands[i] == b.strands[j] and not is_overlap(i, j)
+        ]
+        if candidates:
+            minimum = min(abs(distance) for _, distance in candidates)
+            expected_closest.extend(
+                (i, 0, j, distance)
+                for j, distance in candidates
+                if abs(distance) == minimum
+            )
+    assert _as_list(*closest(a, [b], is_strand=True)) == expected_closest
+
+    result = _as_list(*subtract(a, [b], is_strand=True))
+    for i, start, end in result:
+        assert a.starts[i] <= start < end <= a.ends[i]
+        assert not any(
+            a.strands[i] == b.strands[j] and b.starts[j] < end and b.ends[j] > start
+            for j in range(300)
+        )
+    covered = sum(end - start for _, start, end in result)
+    expected_covered = sum(
+        sum(
+            not any(
+                a.strands[i] == b.strands[j] and b.starts[j] <= x < b.ends[j]
+                for j in range(300)
+            )
+            for x in range(a.starts[i], a.ends[i])
+        )
+        for i in a_order
+    )
+    assert covered == expected_covered
+
+
+def test_comparison_empty():
+    empty = _intervals([], [], [], [])
+    assert _as_list(*intersect(A, [empty], is_strand=True)) == []
+    assert _as_list(*closest(A, [empty], is_strand=True)) == []
+    assert _as_list(*subtract(A, [], is_strand=True)) == [
+        (2, 10, 20),
+        (1, 100, 200),
+        (3, 5, 6),
+        (0, 50, 60),
+    ]
+
+
+@pytest.mark.parametrize("batch_size", [1, 5, 1 << 22])
+def test_comparison_batches(monkeypatch, batch_size):
+    monkeypatch.setattr(interval_comparison, "OVERLAP_BATCH_SIZE", batch_size)
+    b = _intervals(
+        ["1", "1", "1", "2"],
+        [150, 15, 0, 55],
+        [160, 16, 1000, 56],
+        ["-", "-", "+", "+"],
+    )
+    # B in sort order: 2, 1, 0, 3
+    assert _as_list(*intersect(A, [b], is_strand=False)) == [
+        (2, 0, 2),
+        (2, 0, 1),
+        (1, 0, 2),
+        (1, 0, 0),
+        (0, 0, 3),
+    ]
+    assert _as_list(*subtract(A, [b], is_strand=True)) == [
+        (1, 100, 150),
+        (1, 160, 200),
+        (3, 5, 6),
+        (0, 50, 55),
+        (0, 56, 60),
+    ]
+
+
+def test_comparison_long_interval():
+    # a chromosome-length interval does not widen the candidates
+    # of other intervals
+    sites = np.arange(0, 248000000, 1000)
+    a = _intervals(["1"] * len(sites), sites, sites + 1, ["+"] * len(sites))
+    b_starts = np.concatenate([[0], sites[::2]])
+    b = _intervals(
+        ["1"] * len(b_starts),
+        b_starts,
+        np.concatenate([[248956422], sites[::2] + 1]),
+        ["+"] * len(b_starts),
+    )
+    tracemalloc.start()
+    try:
+        a_hits, _, b_hits = intersect(a, [b], is_strand=True)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # all sites overlap the long interval, and every other site a short one
+    assert len(a_hits) == len(sites) + len(sites[::2])
+    assert np.count_nonzero(b_hits == 0) == len(sites)
+    # a shared window would expand to about 3 * 10^10 candidates
+    assert peak < 200 * 1024 * 1024
+    assert _as_list(*subtract(a, [b], is_strand=True)) == []
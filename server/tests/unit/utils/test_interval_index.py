@@ -0,0 +1,151 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from scimodom.utils import interval_index
+from scimodom.utils.interval_index import IntervalIndex
+
+
+def _overlap(index, *args, **kwargs):
+    query_hits, index_hits = index.overlap(*args, **kwargs)
+    return list(zip(query_hits.tolist(), index_hits.tolist()))
+
+
+def test_overlap():
+    index = IntervalIndex(
+        ["1", "1", "1", "2", "1"],
+        [100, 10, 0, 10, 5],
+        [200, 20, 1000, 20, 15],
+        strands=["+", "+", "-", "+", "+"],
+        names=["A", "B", "C", "D", "E"],
+    )
+    assert len(index) == 5
+    assert _overlap(
+        index,
+        ["1", "1", "1", "1", "2", "3", "1"],
+        [15, 20, 99, 150, 19, 15, 15],
+        [16, 21, 100, 151, 20, 16, 16],
+        strands=["+", "+", "+", "-", "+", "+", "."],
+    ) == [(0, 1), (3, 2), (4, 3)]
+
+
+def test_overlap_unstranded():
+    index = IntervalIndex(["1", "1"], [0, 100], [50, 200])
+    assert _overlap(index, ["1", "1", "1"], [49, 50, 40], [50, 100, 120]) == [
+        (0, 0),
+        (2, 0),
+        (2, 1),
+    ]
+
+
+def test_overlap_missing_strands():
+    index = IntervalIndex(["1"], [0], [50], strands=["+"])
+    with pytest.raises(ValueError) as exc:
+        index.overlap(["1"], [0], [1])
+    assert str(exc.value) == "Query strands are required for a stranded index."
+
+
+def test_overlap_random():
+    rng = np.random.default_rng(1)
+    starts = rng.integers(0, 10000, 500)
+    ends = starts + rng.integers(1, 300, 500)
+    index = IntervalIndex(["1"] * 500, starts, ends)
+    query_starts = rng.integers(0, 10000, 200)
+    query_ends = query_starts + rng.integers(1, 50, 200)
+    expected = [
+        (i, j)
+        for i in range(200)
+        for j in range(500)
+        if starts[j] < query_ends[i] and ends[j] > query_starts[i]
+    ]
+    assert _overlap(index, ["1"] * 200, query_starts, query_ends) == expected
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, 1 << 22])
+def test_overlap_batches(monkeypatch, batch_size):
+    monkeypatch.setattr(interval_index, "OVERLAP_BATCH_SIZE", batch_size)
+    rng = np.random.default_rng(2)
+    starts = rng.integers(0, 10000, 500)
+    ends = starts + rng.integers(1, 300, 500)
+    features = rng.choice(["exon", "intron"], 500).tolist()
+    index = IntervalIndex(["1"] * 500, starts, ends, features=features)
+    query_starts = rng.integers(0, 10000, 200)
+    query_ends = query_starts + rng.integers(1, 50, 200)
+    expected = [
+        (i, j)
+        for i in range(200)
+        for j in range(500)
+        if starts[j] < query_ends[i] and ends[j] > query_starts[i]
+    ]
+    assert _overlap(index, ["1"] * 200, query_starts, query_ends) == expected
+
+
+def test_overlap_long_intervals(monkeypatch):
+    # a single long intron must not widen the candidate window of exons,
+    # and candidates of the intron are expanded in batches
+    monkeypatch.setattr(interval_index, "OVERLAP_BATCH_SIZE", 100000)
+    exon_starts = np.arange(0, 10000000, 1000)
+    starts = [0, *exon_starts.tolist()]
+    ends = [10000000, *(exon_starts + 10).tolist()]
+    features = ["intron"] + ["exon"] * len(exon_starts)
+    index = IntervalIndex(
+        ["1"] * len(starts),
+        starts,
+        ends,
+        strands=["+"] * len(starts),
+        features=features,
+    )
+    query_starts = np.arange(0, 10000000, 20)
+    tracemalloc.start()
+    try:
+        query_hits, index_hits = index.overlap(
+            ["1"] * len(query_starts),
+            query_starts,
+            query_starts + 1,
+            strands=["+"] * len(query_starts),
+        )
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    # all queries overlap the intron, one in 50 overlaps an exon
+    assert len(query_hits) == len(query_starts) + len(exon_starts)
+    assert np.count_nonzero(index_hits == 0) == len(query_starts)
+    # a shared window would expand to about 5 * 10^9 candidates
+    assert peak < 200 * 1024 * 1024
+
+
+def test_from_bed(tmp_path):
+    path = tmp_path / "exon.bed"
+    path.write_text(
+        "1\t10\t20\tGENE1\t.\t+\tENSG1,ENSG2\tprotein_coding\n"
+        "1\t30\t40\tGENE3\t.\t-\tENSG3\tlncRNA\n"
+    )
+    index = IntervalIndex.from_bed(path)
+    assert [index.get_name(i) for i in range(len(index))] == ["ENSG1,ENSG2", "ENSG3"]
+    assert _overlap(index, ["1", "1"], [35, 15], [36, 16], strands=["-", "+"]) == [
+        (0, 1),
+        (1, 0),
+    ]
+
+
+def test_save_and_load(tmp_path):
+    index = IntervalIndex(
+        ["1", "2", "1"],
+        [10, 10, 0],
+        [20, 20, 2**31],
+        strands=["+", "+", "+"],
+        names=["A", "B", "A"],
+        features=["exon", "intron", "intron"],
+    )
+    index.save(tmp_path / "index")
+    loaded = IntervalIndex.load(tmp_path / "index")
+    assert isinstance(loaded._starts, np.memmap)
+    assert loaded._starts.dtype == np.int64
+    assert loaded.features == ["exon", "intron"]
+    query = (["1", "2"], [15, 15], [16, 16], ["+", "+"])
+    assert (
+        _overlap(loaded, *query) == _overlap(index, *query) == [(0, 0), (0, 2), (1, 1)]
+    )
+    assert [loaded.get_name(i) for i in range(3)] == ["A", "B", "A"]
+    assert loaded.get_feature_codes(np.array([2, 0])).tolist() == [1, 0]
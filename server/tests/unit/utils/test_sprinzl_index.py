@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import pytest
+
+from scimodom.utils.sprinzl_index import SprinzlIndex
+
+ANNOTATION = (
+    "track name=tRNAs\n"
+    "17\t100000\t100010\ttRNA-Ala-AGC-1-1\t1000\t+\t100000\t100010\t0\t2\t4,3,\t0,7,\n"
+    "Y\t199995\t200005\ttRNA-Gly-GCC-1-1\t1000\t-\t199995\t200005\t0\t1\t10,\t0,\n"
+)
+MAPPING = (
+    "seq_id\tseq_pos\tsprinzl\n"
+    "Homo_sapiens_tRNA-Ala-AGC-1-1\t1\t1\n"
+    "Homo_sapiens_tRNA-Ala-AGC-1-1\t2\t2\n"
+    "Homo_sapiens_tRNA-Ala-AGC-1-1\t8\t20a\n"
+    "Homo_sapiens_tRNA-Gly-GCC-1-1\t4\t4\n"
+    "Homo_sapiens_tRNA-Gly-GCC-1-1\t11\t73\n"
+)
+
+
+def _lookup(index, *args):
+    sites, gene_ids, features, labels = index.lookup(*args)
+    return list(zip(sites.tolist(), gene_ids, features, labels))
+
+
+@pytest.fixture
+def sprinzl_index(tmp_path):
+    annotation_file = Path(tmp_path, "hg38-tRNAs.bed")
+    annotation_file.write_text(ANNOTATION)
+    mapping_file = Path(tmp_path, "seq_to_sprinzl.tab")
+    mapping_file.write_text(MAPPING)
+    return SprinzlIndex.from_files(annotation_file, mapping_file, "Homo_sapiens")
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_lookup(sprinzl_index, tmp_path, mmap):
+    sprinzl_index.save(Path(tmp_path, "index"))
+    for index in [sprinzl_index, SprinzlIndex.load(Path(tmp_path, "index"), mmap)]:
+        assert _lookup(
+            index,
+            ["17", "17", "17", "17", "Y", "Y", "1"],
+            [100001, 100005, 100001, 100007, 200001, 200004, 100001],
+            ["+", "+", "-", "+", "-", "-", "+"],
+        ) == [
+            (0, "Homo_sapiens_tRNA-Ala-AGC-1-1", "exon", "2"),
+            (1, "Homo_sapiens_tRNA-Ala-AGC-1-1", "intron", None),
+            (3, "Homo_sapiens_tRNA-Ala-AGC-1-1", "exon", "20a"),
+            (4, "Homo_sapiens_tRNA-Gly-GCC-1-1", "exon", "4"),
+            (5, "Homo_sapiens_tRNA-Gly-GCC-1-1", "exon", None),
+        ]
+
+
+def test_lookup_empty(sprinzl_index):
+    assert _lookup(sprinzl_index, [], [], []) == []